@@ -0,0 +1,347 @@
+"""
+Aggregates behind the admin dashboard (`/api/admin/stats`, `/api/admin/analytics`).
+
+Every number comes from a few aggregate statements (one multi-aggregate SELECT
+for the table counts and orphan checks, one GROUP BY per analytics chart) and
+the results are cached per process:
+- for ADMIN_STATS_CACHE_SECONDS at most, which bounds staleness from writes
+  made by other workers, and
+- until the next commit in this process that wrote one of the counted tables
+  (ORM flushes and bulk query updates/deletes are tracked via session events).
+
+Usage:
+    from app.admin_stats import admin_stats
+
+    stats = admin_stats.get(db, "stats")
+    analytics = admin_stats.get(db, "analytics")
+"""
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Tuple
+
+from sqlalchemy import event, extract, func, select
+from sqlalchemy.orm import Session
+
+from app.models import (
+    Cargo, CargoAuditLog, CargoPortOperation, CargoStatus, Contract, ContractAuditLog, Customer,
+    Inspector, LoadPort, MonthlyPlan, MonthlyPlanAuditLog, Product, QuarterlyPlan, QuarterlyPlanAuditLog,
+)
+
+logger = logging.getLogger(__name__)
+
+# Upper bound (seconds) on how long a cached dashboard snapshot is served
+ADMIN_STATS_CACHE_SECONDS = float(os.getenv("ADMIN_STATS_CACHE_SECONDS", "30"))
+
+# Writes to these tables invalidate the cached snapshots
+_COUNTED_TABLES = frozenset(
+    model.__tablename__ for model in (
+        Cargo, CargoAuditLog, CargoPortOperation, Contract, ContractAuditLog, Customer, Inspector,
+        LoadPort, MonthlyPlan, MonthlyPlanAuditLog, Product, QuarterlyPlan, QuarterlyPlanAuditLog,
+    )
+)
+
+# Session.info key set when a flush in the current transaction touched a counted table
+_DIRTY_KEY = "admin_stats_dirty"
+
+
+def _count(column, *criteria):
+    return select(func.count(column)).where(*criteria).scalar_subquery()
+
+
+def collect_stats(db: Session) -> Dict[str, Any]:
+    """Table counts, audit log counts and orphan checks in one statement."""
+    orphaned_qp = (
+        select(func.count(QuarterlyPlan.id))
+        .outerjoin(Contract, Contract.id == QuarterlyPlan.contract_id)
+        .where(QuarterlyPlan.contract_id.isnot(None), Contract.id.is_(None))
+        .scalar_subquery()
+    )
+    orphaned_mp = (
+        select(func.count(MonthlyPlan.id))
+        .outerjoin(QuarterlyPlan, QuarterlyPlan.id == MonthlyPlan.quarterly_plan_id)
+        .where(MonthlyPlan.quarterly_plan_id.isnot(None), QuarterlyPlan.id.is_(None))
+        .scalar_subquery()
+    )
+    orphaned_cargos = (
+        select(func.count(Cargo.id))
+        .outerjoin(MonthlyPlan, MonthlyPlan.id == Cargo.monthly_plan_id)
+        .where(Cargo.monthly_plan_id.isnot(None), MonthlyPlan.id.is_(None))
+        .scalar_subquery()
+    )
+    row = db.execute(select(
+        _count(Customer.id).label("customers"),
+        _count(Contract.id).label("contracts"),
+        _count(QuarterlyPlan.id).label("quarterly_plans"),
+        _count(MonthlyPlan.id).label("monthly_plans"),
+        _count(Cargo.id).label("cargos"),
+        _count(CargoAuditLog.id).label("cargo_logs"),
+        _count(MonthlyPlanAuditLog.id).label("monthly_plan_logs"),
+        _count(QuarterlyPlanAuditLog.id).label("quarterly_plan_logs"),
+        _count(ContractAuditLog.id).label("contract_logs"),
+        orphaned_qp.label("orphaned_qp"),
+        orphaned_mp.label("orphaned_mp"),
+        orphaned_cargos.label("orphaned_cargos"),
+        _count(MonthlyPlan.id, MonthlyPlan.month_quantity == 0).label("zero_qty_mp"),
+        _count(MonthlyPlan.id, MonthlyPlan.authority_topup_quantity > 0).label("monthly_plans_with_topups"),
+        # Distinct contracts that have at least one monthly plan with authority topup
+        _count(func.distinct(MonthlyPlan.contract_id), MonthlyPlan.authority_topup_quantity > 0).label("contracts_with_topups"),
+    )).one()
+
+    issues = []
+    if row.orphaned_qp > 0:
+        issues.append({"type": "orphaned_quarterly_plans", "count": row.orphaned_qp, "severity": "warning"})
+    if row.orphaned_mp > 0:
+        issues.append({"type": "orphaned_monthly_plans", "count": row.orphaned_mp, "severity": "warning"})
+    if row.orphaned_cargos > 0:
+        issues.append({"type": "orphaned_cargos", "count": row.orphaned_cargos, "severity": "error"})
+    if row.zero_qty_mp > 0:
+        issues.append({"type": "zero_quantity_monthly_plans", "count": row.zero_qty_mp, "severity": "info"})
+
+    return {
+        "counts": {
+            "customers": row.customers,
+            "contracts": row.contracts,
+            "quarterly_plans": row.quarterly_plans,
+            "monthly_plans": row.monthly_plans,
+            "cargos": row.cargos,
+            "audit_logs": {
+                "cargo": row.cargo_logs,
+                "monthly_plan": row.monthly_plan_logs,
+                "quarterly_plan": row.quarterly_plan_logs,
+                "contract": row.contract_logs,
+                "total": row.cargo_logs + row.monthly_plan_logs + row.quarterly_plan_logs + row.contract_logs
+            }
+        },
+        "monthly_plans_with_topups": row.monthly_plans_with_topups,
+        "contracts_with_topups": row.contracts_with_topups or 0,
+        "issues": issues,
+        "last_updated": datetime.utcnow().isoformat()
+    }
+
+
+def _last_twelve_months(today: date):
+    """(year, month) of the last 12 calendar months, oldest first, ending with today's month."""
+    index = today.year * 12 + today.month - 1
+    return [divmod(i, 12) for i in range(index - 11, index + 1)]
+
+
+def collect_analytics(db: Session) -> Dict[str, Any]:
+    """Inspector, port, monthly trend, customer, status and product volume aggregates."""
+    # Inspector usage statistics (from normalized inspector_id FK)
+    inspector_stats = []
+    try:
+        inspector_query = db.query(
+            Inspector.name,
+            func.count(Cargo.id).label('cargo_count')
+        ).join(
+            Cargo, Cargo.inspector_id == Inspector.id
+        ).group_by(Inspector.id, Inspector.name).order_by(
+            func.count(Cargo.id).desc()
+        ).all()
+
+        for row in inspector_query:
+            inspector_stats.append({
+                "name": row.name,
+                "cargo_count": row.cargo_count
+            })
+    except Exception as e:
+        logger.error(f"Error getting inspector stats: {e}")
+
+    # Port usage statistics (from normalized cargo_port_operations table)
+    port_stats = []
+    try:
+        port_query = db.query(
+            LoadPort.code,
+            LoadPort.name,
+            func.count(CargoPortOperation.id).label('cargo_count')
+        ).join(
+            CargoPortOperation, CargoPortOperation.load_port_id == LoadPort.id
+        ).group_by(LoadPort.id, LoadPort.code, LoadPort.name).order_by(
+            func.count(CargoPortOperation.id).desc()
+        ).all()
+
+        for row in port_query:
+            port_stats.append({
+                "port": row.code,
+                "port_name": row.name,
+                "cargo_count": row.cargo_count
+            })
+    except Exception as e:
+        logger.error(f"Error getting port stats: {e}")
+
+    # Monthly cargo trends (last 12 months) - one GROUP BY over the window
+    monthly_trends = []
+    try:
+        months = _last_twelve_months(date.today())
+        first_year, first_month0 = months[0]
+        cargo_year = extract('year', Cargo.created_at)
+        cargo_month = extract('month', Cargo.created_at)
+        counts = {
+            (int(y), int(m)): n
+            for y, m, n in db.query(cargo_year, cargo_month, func.count(Cargo.id))
+            .filter(Cargo.created_at >= datetime(first_year, first_month0 + 1, 1))
+            .group_by(cargo_year, cargo_month)
+            .all()
+        }
+        for year, month0 in months:
+            month_date = date(year, month0 + 1, 1)
+            monthly_trends.append({
+                "month": month_date.month,
+                "year": year,
+                "label": month_date.strftime("%b %Y"),
+                "cargo_count": counts.get((year, month_date.month), 0)
+            })
+    except Exception as e:
+        logger.error(f"Error getting monthly trends: {e}")
+
+    # Customer cargo distribution
+    customer_stats = []
+    try:
+        # Join cargos -> monthly_plans -> quarterly_plans -> contracts -> customers using ORM
+        customer_query = db.query(
+            Customer.name.label('customer_name'),
+            func.count(func.distinct(Cargo.id)).label('cargo_count')
+        ).join(
+            Contract, Contract.customer_id == Customer.id
+        ).join(
+            QuarterlyPlan, QuarterlyPlan.contract_id == Contract.id
+        ).join(
+            MonthlyPlan, MonthlyPlan.quarterly_plan_id == QuarterlyPlan.id
+        ).join(
+            Cargo, Cargo.monthly_plan_id == MonthlyPlan.id
+        ).group_by(Customer.id, Customer.name).order_by(
+            func.count(func.distinct(Cargo.id)).desc()
+        ).all()
+
+        for row in customer_query:
+            customer_stats.append({
+                "customer": row.customer_name,
+                "cargo_count": row.cargo_count
+            })
+    except Exception as e:
+        logger.error(f"Error getting customer stats: {e}")
+
+    # Cargo status distribution
+    status_stats = []
+    try:
+        status_query = db.query(
+            Cargo.status,
+            func.count(Cargo.id).label('count')
+        ).group_by(Cargo.status).all()
+
+        for row in status_query:
+            status_stats.append({
+                "status": row.status.value if row.status else "Unknown",
+                "count": row.count
+            })
+    except Exception as e:
+        logger.error(f"Error getting status stats: {e}")
+
+    # Product volume analytics - COMPLETED cargos only
+    # Status enum names: COMPLETED_LOADING, DISCHARGE_COMPLETE are considered completed
+    product_stats = []
+    try:
+        completed_statuses = [CargoStatus.COMPLETED_LOADING, CargoStatus.DISCHARGE_COMPLETE]
+        completed_query = db.query(
+            Product.name.label('product_name'),
+            func.sum(Cargo.cargo_quantity).label('completed_quantity'),
+            func.count(Cargo.id).label('cargo_count')
+        ).join(
+            Cargo, Cargo.product_id == Product.id
+        ).filter(
+            Cargo.status.in_(completed_statuses)
+        ).group_by(Product.name).order_by(
+            func.sum(Cargo.cargo_quantity).desc()
+        ).all()
+
+        for row in completed_query:
+            product_stats.append({
+                "product": row.product_name,
+                "completed_quantity": float(row.completed_quantity or 0),
+                "cargo_count": row.cargo_count
+            })
+    except Exception as e:
+        logger.error(f"Error getting product stats: {e}")
+
+    return {
+        "inspector_stats": inspector_stats,
+        "port_stats": port_stats,
+        "monthly_trends": monthly_trends,
+        "customer_stats": customer_stats,
+        "status_stats": status_stats,
+        "product_stats": product_stats,
+        "last_updated": datetime.utcnow().isoformat()
+    }
+
+
+class AdminStatsCache:
+    """Process-wide cache of the admin dashboard aggregates."""
+
+    builders: Dict[str, Callable[[Session], Dict[str, Any]]] = {
+        "stats": collect_stats,
+        "analytics": collect_analytics,
+    }
+
+    def __init__(self, ttl: float = ADMIN_STATS_CACHE_SECONDS) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[int, float, Dict[str, Any]]] = {}
+        # Bumped by every committed write to a counted table; entries built
+        # under an older generation are discarded
+        self._generation = 0
+
+    def get(self, db: Session, key: str) -> Dict[str, Any]:
+        """Cached result for `key` ("stats" or "analytics"), rebuilt when expired or invalidated."""
+        with self._lock:
+            generation = self._generation
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] == generation and time.monotonic() - entry[1] < self.ttl:
+            return entry[2]
+
+        result = self.builders[key](db)
+        with self._lock:
+            # A write committed while building keeps the result out of the cache
+            if self._generation == generation:
+                self._entries[key] = (generation, time.monotonic(), result)
+        return result
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+# Global instance
+admin_stats = AdminStatsCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _track_counted_writes(session: Session, flush_context) -> None:
+    if session.info.get(_DIRTY_KEY):
+        return
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if getattr(obj, "__tablename__", None) in _COUNTED_TABLES:
+            session.info[_DIRTY_KEY] = True
+            return
+
+
+@event.listens_for(Session, "after_bulk_update")
+@event.listens_for(Session, "after_bulk_delete")
+def _track_counted_bulk_writes(update_context) -> None:
+    table = getattr(update_context.mapper, "local_table", None)
+    if table is not None and table.name in _COUNTED_TABLES:
+        update_context.session.info[_DIRTY_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_counted_commit(session: Session) -> None:
+    if session.info.pop(_DIRTY_KEY, False):
+        admin_stats.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_counted_writes(session: Session) -> None:
+    session.info.pop(_DIRTY_KEY, None)
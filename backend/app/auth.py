@@ -8,16 +8,19 @@ Provides secure token-based authentication with:
 """
 import os
 import secrets
+import threading
+import time
 import bcrypt
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional
-from fastapi import HTTPException, Depends, status
+from typing import Dict, Optional, Tuple
+from fastapi import HTTPException, Depends, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 import logging
 
-from app.database import get_db
+from app.database import DbSession, SessionLocal, get_async_db, get_db, run_in_db_thread
 from app import models
 
 logger = logging.getLogger(__name__)
@@ -55,6 +58,9 @@ REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
 # Bearer token security
 security = HTTPBearer(auto_error=False)
 
+# How long an authenticated (active) user is served from the in-process cache
+AUTH_USER_CACHE_SECONDS = float(os.getenv("AUTH_USER_CACHE_SECONDS", "30"))
+
 
 # =============================================================================
 # PASSWORD UTILITIES
@@ -126,6 +132,51 @@ def decode_token(token: str) -> Optional[dict]:
         return None
 
 
+@dataclass(frozen=True)
+class AuthContext:
+    """Bearer token of the current request and its decoded claims (None if missing/invalid)."""
+    token: Optional[str]
+    claims: Optional[dict]
+
+    @property
+    def user_id(self) -> Optional[int]:
+        try:
+            return int(self.claims["sub"]) if self.claims and self.claims.get("sub") else None
+        except (TypeError, ValueError):
+            return None
+
+    @property
+    def initials(self) -> Optional[str]:
+        return self.claims.get("initials") if self.claims else None
+
+
+def get_auth_context(request: Request) -> AuthContext:
+    """
+    Decode the request's bearer token once and keep the result on request.state.
+    
+    The middleware calls this first; require_auth/get_current_user reuse the same
+    claims instead of verifying the signature again.
+    """
+    ctx = getattr(request.state, "auth", None)
+    if ctx is not None:
+        return ctx
+    
+    token = None
+    auth_header = request.headers.get("Authorization")
+    if auth_header and auth_header.startswith("Bearer "):
+        token = auth_header[7:]  # Remove "Bearer " prefix
+    ctx = AuthContext(token=token, claims=decode_token(token) if token else None)
+    request.state.auth = ctx
+    return ctx
+
+
+def _token_claims(request: Request, token: str) -> Optional[dict]:
+    ctx = get_auth_context(request)
+    if ctx.token == token:
+        return ctx.claims
+    return decode_token(token)
+
+
 def generate_invite_token() -> str:
     """Generate a secure random token for invites/password resets."""
     return secrets.token_urlsafe(32)
@@ -159,6 +210,73 @@ def get_user_by_id(db: Session, user_id: int) -> Optional[models.User]:
     return db.query(models.User).filter(models.User.id == user_id).first()
 
 
+class _UserCache:
+    """
+    Small TTL cache of active users keyed by ID, so authenticated requests skip the user SELECT.
+    
+    Entries are detached User instances; callers merge them into their own session.
+    Writes that change a user's status, role or identity must call invalidate_cached_user.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[int, Tuple[float, models.User]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[models.User]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self.invalidate(user_id)
+            return None
+        return entry[1]
+
+    def put(self, user: models.User) -> None:
+        with self._lock:
+            # Evict expired entries on write so the cache stays bounded by recently active users
+            now = time.monotonic()
+            for expired in [k for k, (exp, _) in self._entries.items() if exp <= now]:
+                del self._entries[expired]
+            self._entries[user.id] = (now + self.ttl, user)
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+
+_user_cache = _UserCache(AUTH_USER_CACHE_SECONDS)
+
+
+def invalidate_cached_user(user_id: Optional[int] = None) -> None:
+    """Drop a user (or everyone, if user_id is None) from the auth cache. Call after commit."""
+    _user_cache.invalidate(user_id)
+
+
+def get_active_user(db: Session, user_id: int) -> Optional[models.User]:
+    """
+    Get an ACTIVE user by ID, served from the auth cache when possible.
+    
+    The returned instance belongs to `db` (merged without a SELECT), so endpoints
+    can modify and commit it as usual.
+    """
+    cached = _user_cache.get(user_id)
+    if cached is not None:
+        return db.merge(cached, load=False)
+    
+    user = get_user_by_id(db, user_id)
+    if not user or user.status != models.UserStatus.ACTIVE:
+        return None
+    if AUTH_USER_CACHE_SECONDS > 0:
+        db.expunge(user)
+        _user_cache.put(user)
+        user = db.merge(user, load=False)
+    return user
+
+
 def get_user_by_invite_token(db: Session, token: str) -> Optional[models.User]:
     """Get a user by invite token (if not expired)."""
     user = db.query(models.User).filter(models.User.invite_token == token).first()
@@ -181,7 +299,8 @@ def get_user_by_reset_token(db: Session, token: str) -> Optional[models.User]:
 # DEPENDENCY INJECTION
 # =============================================================================
 
-async def get_current_user(
+def get_current_user(
+    request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: Session = Depends(get_db)
 ) -> Optional[models.User]:
@@ -192,8 +311,7 @@ async def get_current_user(
     if not credentials:
         return None
     
-    token = credentials.credentials
-    payload = decode_token(token)
+    payload = _token_claims(request, credentials.credentials)
     
     if not payload:
         return None
@@ -207,21 +325,11 @@ async def get_current_user(
     except (TypeError, ValueError):
         return None
     
-    user = get_user_by_id(db, user_id)
-    if not user or user.status != models.UserStatus.ACTIVE:
-        return None
-    
-    return user
+    return get_active_user(db, user_id)
 
 
-async def require_auth(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db)
-) -> models.User:
-    """
-    Require authentication - raises 401 if not authenticated.
-    Use this dependency for protected routes.
-    """
+def _authenticated_user_id(request: Request, credentials: Optional[HTTPAuthorizationCredentials]) -> int:
+    """User ID from a valid bearer token - raises 401 otherwise (no DB access)."""
     if not credentials:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -229,8 +337,7 @@ async def require_auth(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    token = credentials.credentials
-    payload = decode_token(token)
+    payload = _token_claims(request, credentials.credentials)
     
     if not payload:
         raise HTTPException(
@@ -248,30 +355,70 @@ async def require_auth(
         )
     
     try:
-        user_id = int(user_id)
+        return int(user_id)
     except (TypeError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid user ID in token",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    user = get_user_by_id(db, user_id)
+
+
+def _require_active_user(db: Session, user_id: int) -> models.User:
+    """The active user with this ID - raises 401 if missing or not active."""
+    user = get_active_user(db, user_id)
     if not user:
+        # Only a cache miss reaches here, so this extra lookup is just for the error message
+        exists = get_user_by_id(db, user_id) is not None
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
+            detail="User account is not active" if exists else "User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    return user
+
+
+def _require_active_user_detached(user_id: int) -> models.User:
+    """_require_active_user in a short-lived session of its own, returned detached."""
+    with SessionLocal() as db:
+        user = _require_active_user(db, user_id)
+        db.expunge(user)
+        return user
+
+
+def require_auth(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    db: Session = Depends(get_db)
+) -> models.User:
+    """
+    Require authentication - raises 401 if not authenticated.
+    Use this dependency for protected routes.
+    """
+    user_id = _authenticated_user_id(request, credentials)
+    return _require_active_user(db, user_id)
+
+
+async def require_auth_async(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    db: DbSession = Depends(get_async_db)
+) -> models.User:
+    """
+    require_auth for async endpoints that use get_async_db.
     
-    if user.status != models.UserStatus.ACTIVE:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User account is not active",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    Shares the endpoint's session: with the async engine the user is loaded
+    without a worker thread or a sync pool connection. Without it the lookup
+    runs in a DB worker thread on a session of its own, closed before the
+    endpoint runs, so the request never holds a connection while it waits for
+    a thread; the user is then attached to the endpoint's session (no query).
+    """
+    user_id = _authenticated_user_id(request, credentials)
+    if not isinstance(db, Session):
+        return await db.run_sync(_require_active_user, user_id)
     
-    return user
+    user = await run_in_db_thread(_require_active_user_detached, user_id)
+    return db.merge(user, load=False)
 
 
 async def require_admin(
@@ -289,11 +436,19 @@ async def require_admin(
     return current_user
 
 
+async def require_admin_async(
+    current_user: models.User = Depends(require_auth_async)
+) -> models.User:
+    """require_admin for async endpoints that use get_async_db."""
+    return await require_admin(current_user)
+
+
 # =============================================================================
 # OPTIONAL AUTH (for backward compatibility during migration)
 # =============================================================================
 
-async def get_optional_user(
+def get_optional_user(
+    request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: Session = Depends(get_db)
 ) -> Optional[models.User]:
@@ -301,4 +456,4 @@ async def get_optional_user(
     Get user if authenticated, otherwise return None.
     Use this for routes that work with or without auth.
     """
-    return await get_current_user(credentials, db)
+    return get_current_user(request, credentials, db)
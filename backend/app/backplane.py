@@ -0,0 +1,380 @@
+"""
+Pub/sub backplane that connects the presence managers of several uvicorn workers.
+
+Each worker fans messages out to its own WebSocket connections and publishes
+them on the backplane; the other workers deliver them to theirs. Presence
+membership is exchanged the same way so every worker can show the users
+connected anywhere.
+
+Implementations (REALTIME_BACKPLANE):
+- "memory" (default): single worker, publish is a no-op
+- "postgres": PostgreSQL LISTEN/NOTIFY on REALTIME_BACKPLANE_CHANNEL, using the
+  app's DATABASE_URL. Payloads above the NOTIFY limit are sent in chunks.
+- "unix": newline-delimited JSON through a local broker on
+  REALTIME_BACKPLANE_SOCKET. For tests and local multi-worker runs:
+
+      python -m app.backplane --socket /tmp/oil_lifting_backplane.sock
+
+Usage:
+    from app.backplane import create_backplane
+
+    backplane = create_backplane()
+    await backplane.start(handle_message)   # async def handle_message(message: dict)
+    await backplane.publish({"kind": "deliver", ...})
+    await backplane.stop()
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+REALTIME_BACKPLANE = os.getenv("REALTIME_BACKPLANE", "memory").lower()
+REALTIME_BACKPLANE_CHANNEL = os.getenv("REALTIME_BACKPLANE_CHANNEL", "oil_lifting_realtime")
+REALTIME_BACKPLANE_SOCKET = os.getenv("REALTIME_BACKPLANE_SOCKET", "/tmp/oil_lifting_backplane.sock")
+
+# Seconds to wait before reconnecting a lost backplane connection
+_RECONNECT_DELAY_SECONDS = 2.0
+
+MessageHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class Backplane:
+    """
+    Interface: publish JSON-serializable dicts to every other worker.
+
+    Messages published by this worker are not delivered back to it; subscribers
+    receive each message with "origin" set to the publishing worker's id.
+    """
+
+    name = "base"
+
+    def __init__(self) -> None:
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._handler: Optional[MessageHandler] = None
+
+    @property
+    def distributed(self) -> bool:
+        """True if other workers can receive what this one publishes."""
+        return True
+
+    async def start(self, handler: MessageHandler) -> None:
+        self._handler = handler
+
+    async def publish(self, message: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    async def stop(self) -> None:
+        self._handler = None
+
+    def _encode(self, message: Dict[str, Any]) -> str:
+        return json.dumps({**message, "origin": self.worker_id}, separators=(",", ":"))
+
+    async def _dispatch(self, payload: str) -> None:
+        """Decode a received payload and hand it to the handler (skipping our own messages)."""
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed backplane message")
+            return
+        if message.get("origin") == self.worker_id or self._handler is None:
+            return
+        try:
+            await self._handler(message)
+        except Exception as e:
+            logger.error(f"Backplane message handler failed: {e}", exc_info=True)
+
+
+class InProcessBackplane(Backplane):
+    """Single-worker backplane: there is nobody else to deliver to."""
+
+    name = "memory"
+
+    @property
+    def distributed(self) -> bool:
+        return False
+
+    async def publish(self, message: Dict[str, Any]) -> None:
+        return None
+
+
+class PostgresBackplane(Backplane):
+    """
+    PostgreSQL LISTEN/NOTIFY backplane.
+
+    One dedicated connection LISTENs; publishes go through a second connection
+    (serialized by a lock so chunks of one message stay contiguous and ordered).
+    NOTIFY payloads are limited to just under 8000 bytes, so larger messages are
+    split into chunks sent in one transaction and reassembled by the receivers.
+    """
+
+    name = "postgres"
+
+    # Bytes of message text per NOTIFY (leaves room for the chunk envelope)
+    CHUNK_SIZE = 7000
+    # Incomplete chunked messages are dropped after this many seconds, or oldest
+    # first beyond this many (a chunk lost with a LISTEN connection never arrives)
+    PARTIAL_MESSAGE_TTL_SECONDS = 30.0
+    MAX_PARTIAL_MESSAGES = 64
+
+    def __init__(self, dsn: str, channel: str = REALTIME_BACKPLANE_CHANNEL) -> None:
+        super().__init__()
+        # SQLAlchemy URL -> libpq URL
+        self.dsn = dsn.replace("postgresql+psycopg://", "postgresql://", 1)
+        self.channel = channel
+        self._publish_conn = None
+        self._publish_lock = asyncio.Lock()
+        self._listen_task: Optional[asyncio.Task] = None
+        # (origin, message id) -> (first chunk received at, received chunks), oldest first
+        self._partial: Dict[Tuple[str, str], Tuple[float, List[Optional[str]]]] = {}
+
+    async def start(self, handler: MessageHandler) -> None:
+        await super().start(handler)
+        self._listen_task = asyncio.create_task(self._listen(), name="backplane-listen")
+
+    async def _connect(self):
+        import psycopg
+        return await psycopg.AsyncConnection.connect(self.dsn, autocommit=True)
+
+    async def _listen(self) -> None:
+        from psycopg import sql
+        while True:
+            try:
+                conn = await self._connect()
+                try:
+                    await conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.channel)))
+                    # Chunks missed while reconnecting never complete their messages
+                    self._partial.clear()
+                    logger.info(f"Backplane listening on PostgreSQL channel {self.channel} (worker {self.worker_id})")
+                    async for notify in conn.notifies():
+                        await self._receive(notify.payload)
+                finally:
+                    await conn.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Backplane LISTEN connection lost: {e} - reconnecting in {_RECONNECT_DELAY_SECONDS}s")
+                await asyncio.sleep(_RECONNECT_DELAY_SECONDS)
+
+    async def _receive(self, payload: str) -> None:
+        if not payload.startswith("#"):
+            await self._dispatch(payload)
+            return
+        # Chunk: "#<origin> <message id> <index> <count> <text>"
+        try:
+            header, text = payload[1:].split("\n", 1)
+            origin, message_id, index, count = header.split(" ")
+            index, count = int(index), int(count)
+            if not 0 <= index < count:
+                raise ValueError(f"chunk {index} of {count}")
+        except ValueError:
+            logger.warning("Ignoring malformed backplane chunk")
+            return
+        if origin == self.worker_id:
+            return
+        key = (origin, message_id)
+        entry = self._partial.get(key)
+        if entry is None:
+            self._evict_partial(time.monotonic())
+            entry = self._partial[key] = (time.monotonic(), [None] * count)
+        chunks = entry[1]
+        if len(chunks) != count:
+            logger.warning("Ignoring malformed backplane chunk")
+            return
+        chunks[index] = text
+        if all(chunk is not None for chunk in chunks):
+            del self._partial[key]
+            await self._dispatch("".join(chunks))
+
+    def _evict_partial(self, now: float) -> None:
+        """Drop expired incomplete messages, and the oldest ones beyond MAX_PARTIAL_MESSAGES - 1."""
+        for key in list(self._partial):
+            started, _ = self._partial[key]
+            if now - started < self.PARTIAL_MESSAGE_TTL_SECONDS and len(self._partial) < self.MAX_PARTIAL_MESSAGES:
+                break
+            del self._partial[key]
+            logger.warning(f"Dropped incomplete backplane message {key[1]} from worker {key[0]}")
+
+    async def publish(self, message: Dict[str, Any]) -> None:
+        payload = self._encode(message)
+        if len(payload.encode("utf-8")) <= self.CHUNK_SIZE:
+            parts = [payload]
+        else:
+            message_id = uuid.uuid4().hex[:12]
+            pieces = [payload[i:i + self.CHUNK_SIZE // 4] for i in range(0, len(payload), self.CHUNK_SIZE // 4)]
+            parts = [
+                f"#{self.worker_id} {message_id} {index} {len(pieces)}\n{piece}"
+                for index, piece in enumerate(pieces)
+            ]
+
+        async with self._publish_lock:
+            try:
+                if self._publish_conn is None or self._publish_conn.closed:
+                    self._publish_conn = await self._connect()
+                async with self._publish_conn.transaction():
+                    for part in parts:
+                        await self._publish_conn.execute("SELECT pg_notify(%s, %s)", (self.channel, part))
+            except Exception as e:
+                logger.warning(f"Backplane publish failed: {e}")
+                if self._publish_conn is not None:
+                    await self._publish_conn.close()
+                self._publish_conn = None
+
+    async def stop(self) -> None:
+        if self._listen_task is not None:
+            self._listen_task.cancel()
+            try:
+                await self._listen_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listen_task = None
+        if self._publish_conn is not None:
+            await self._publish_conn.close()
+            self._publish_conn = None
+        await super().stop()
+
+
+class UnixSocketBackplane(Backplane):
+    """Client of `UnixSocketBroker`: newline-delimited JSON over a Unix socket."""
+
+    name = "unix"
+
+    def __init__(self, path: str = REALTIME_BACKPLANE_SOCKET) -> None:
+        super().__init__()
+        self.path = path
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connected = asyncio.Event()
+        self._read_task: Optional[asyncio.Task] = None
+
+    async def start(self, handler: MessageHandler) -> None:
+        await super().start(handler)
+        self._read_task = asyncio.create_task(self._read(), name="backplane-unix")
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            logger.warning(f"Backplane broker at {self.path} not reachable yet - retrying in the background")
+
+    async def _read(self) -> None:
+        while True:
+            try:
+                reader, self._writer = await asyncio.open_unix_connection(self.path, limit=2 ** 24)
+                self._connected.set()
+                logger.info(f"Backplane connected to broker {self.path} (worker {self.worker_id})")
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        raise ConnectionError("broker closed the connection")
+                    await self._dispatch(line.decode("utf-8"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._connected.clear()
+                self._writer = None
+                logger.warning(f"Backplane broker connection lost: {e} - reconnecting in {_RECONNECT_DELAY_SECONDS}s")
+                await asyncio.sleep(_RECONNECT_DELAY_SECONDS)
+
+    async def publish(self, message: Dict[str, Any]) -> None:
+        writer = self._writer
+        if writer is None:
+            logger.warning("Backplane publish skipped: broker not connected")
+            return
+        try:
+            writer.write(self._encode(message).encode("utf-8") + b"\n")
+            await writer.drain()
+        except Exception as e:
+            logger.warning(f"Backplane publish failed: {e}")
+
+    async def stop(self) -> None:
+        if self._read_task is not None:
+            self._read_task.cancel()
+            try:
+                await self._read_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._read_task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        await super().stop()
+
+
+class UnixSocketBroker:
+    """Minimal broker: relays every line it receives to all connected clients (sender included)."""
+
+    def __init__(self, path: str = REALTIME_BACKPLANE_SOCKET) -> None:
+        self.path = path
+        self._clients: Set[asyncio.StreamWriter] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path, limit=2 ** 24)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._clients.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                for client in list(self._clients):
+                    try:
+                        client.write(line)
+                    except Exception:
+                        self._clients.discard(client)
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+        # Closing the client transports ends their handlers (readline returns EOF)
+        for client in list(self._clients):
+            client.close()
+        self._clients.clear()
+        await asyncio.sleep(0)
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+def create_backplane(kind: str = REALTIME_BACKPLANE) -> Backplane:
+    """Backplane selected by REALTIME_BACKPLANE."""
+    if kind == "postgres":
+        from app.database import DATABASE_URL
+        if not DATABASE_URL or not DATABASE_URL.startswith("postgresql"):
+            raise ValueError("REALTIME_BACKPLANE=postgres requires a PostgreSQL DATABASE_URL")
+        return PostgresBackplane(DATABASE_URL)
+    if kind == "unix":
+        return UnixSocketBackplane()
+    if kind != "memory":
+        raise ValueError(f"Unknown REALTIME_BACKPLANE '{kind}' (expected memory, postgres or unix)")
+    return InProcessBackplane()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the Unix-socket backplane broker")
+    parser.add_argument("--socket", default=REALTIME_BACKPLANE_SOCKET, help="Socket path")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    async def serve() -> None:
+        broker = UnixSocketBroker(args.socket)
+        await broker.start()
+        logger.info(f"Backplane broker listening on {args.socket}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await broker.stop()
+
+    asyncio.run(serve())
@@ -124,12 +124,9 @@ def get_port_name(port_code: str) -> str:
 # =============================================================================
 
 def get_load_port_by_code(db, port_code: str):
-    """Get LoadPort model by code from database."""
-    from app import models
-    return db.query(models.LoadPort).filter(
-        models.LoadPort.code == port_code.upper(),
-        models.LoadPort.is_active == True
-    ).first()
+    """Get active load port (id, code, name, ...) by code from the reference data cache."""
+    from app.reference_data import reference_data
+    return reference_data.load_port_by_code(db, port_code)
 
 
 def get_load_port_by_id(db, port_id: int):
@@ -139,10 +136,9 @@ def get_load_port_by_id(db, port_id: int):
 
 
 def get_active_load_port_codes(db) -> Set[str]:
-    """Get set of active load port codes from database."""
-    from app import models
-    ports = db.query(models.LoadPort.code).filter(models.LoadPort.is_active == True).all()
-    return {p.code for p in ports}
+    """Get set of active load port codes from the reference data cache."""
+    from app.reference_data import reference_data
+    return set(reference_data.active_load_port_codes(db))
 
 
 def validate_load_port_db(db, port_code: str) -> bool:
@@ -1,6 +1,9 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, text, inspect, select
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from typing import Any, Callable, Optional, TypeVar, Union
+import hashlib
 import os
 import logging
 from dotenv import load_dotenv
@@ -14,6 +17,8 @@ logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 USE_SQLITE = os.getenv("USE_SQLITE", "false").lower() == "true"
+# Always run the full create_all table check at startup, even if the models fingerprint is unchanged
+FORCE_SCHEMA_CHECK = os.getenv("FORCE_SCHEMA_CHECK", "false").lower() == "true"
 
 # Convert postgresql:// to postgresql+psycopg:// for psycopg v3 compatibility
 # psycopg v3 requires the explicit +psycopg driver specification
@@ -86,17 +91,143 @@ else:
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# =============================================================================
+# OPTIONAL ASYNC ENGINE
+# =============================================================================
+# USE_ASYNC_DB=true adds an AsyncSession path next to the sync engine:
+# PostgreSQL via psycopg v3 async (same postgresql+psycopg:// URL), SQLite via aiosqlite.
+# Read-heavy endpoints depend on get_async_db and run their query code through run_db,
+# so their I/O is awaited on the event loop instead of occupying worker threads.
+USE_ASYNC_DB = os.getenv("USE_ASYNC_DB", "false").lower() == "true"
+
+async_engine = None
+AsyncSessionLocal = None
+
+if USE_ASYNC_DB:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    if DATABASE_URL.startswith("sqlite:///"):
+        ASYNC_DATABASE_URL = DATABASE_URL.replace("sqlite:///", "sqlite+aiosqlite:///", 1)
+        async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=False)
+    else:
+        # psycopg v3 serves both modes; create_async_engine selects its async driver
+        ASYNC_DATABASE_URL = DATABASE_URL
+        async_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            pool_pre_ping=True,
+            pool_size=int(os.getenv("ASYNC_DB_POOL_SIZE", "10")),
+            max_overflow=int(os.getenv("ASYNC_DB_MAX_OVERFLOW", "20")),
+            pool_timeout=30,
+            pool_recycle=3600,
+            connect_args={"connect_timeout": 10},
+            echo=False
+        )
+
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    logger.info(f"✓ Async database engine enabled ({async_engine.dialect.name}, driver {async_engine.dialect.driver})")
+
+# Worker threads for the DB work async endpoints offload with run_db / run_in_db_thread.
+# They get their own limiter: sync endpoints and dependencies (get_db, require_auth)
+# keep AnyIO's default thread pool, so they never compete with the offloaded queries
+# for a thread while holding a connection.
+# Default matches the PostgreSQL connection pool (pool_size + max_overflow):
+# extra threads would only queue for a connection while holding a worker.
+DB_THREAD_POOL_SIZE = int(os.getenv("DB_THREAD_POOL_SIZE", "15"))
+
 Base = declarative_base()
 
 
-def ensure_schema():
+def schema_fingerprint() -> str:
+    """Stable hash of the tables, columns and indexes defined in models."""
+    from app import models  # Import models to register them with Base
+    digest = hashlib.sha256()
+    for table in sorted(Base.metadata.tables.values(), key=lambda t: t.name):
+        digest.update(f"table:{table.name}".encode("utf-8"))
+        for column in table.columns:
+            digest.update(f"|{column.name}:{column.type!r}:{column.nullable}:{column.primary_key}".encode("utf-8"))
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            digest.update(f"|index:{index.name}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def get_startup_fingerprint(key: str) -> Optional[str]:
+    """Stored fingerprint for a startup step, or None (also if the table does not exist yet)."""
+    from app import models
+    try:
+        with engine.connect() as conn:
+            return conn.execute(
+                select(models.StartupFingerprint.fingerprint).where(models.StartupFingerprint.key == key)
+            ).scalar()
+    except SQLAlchemyError:
+        return None
+
+
+def set_startup_fingerprint(db, key: str, fingerprint: str) -> None:
+    """Record a startup step's fingerprint in the caller's transaction."""
+    from app import models
+    db.merge(models.StartupFingerprint(key=key, fingerprint=fingerprint))
+
+
+def ensure_schema(force: bool = FORCE_SCHEMA_CHECK) -> bool:
     """
     Create all tables defined in models.
     All constraints and indexes are now defined in models.py via __table_args__.
+    
+    Skipped (one primary-key SELECT instead of introspecting every table) when the
+    models fingerprint matches the one recorded by the last successful run.
+    Set FORCE_SCHEMA_CHECK=true to always run the full check.
+    
+    Returns:
+        True if create_all ran
     """
     from app import models  # Import models to register them with Base
+    fingerprint = schema_fingerprint()
+    if not force and get_startup_fingerprint("schema") == fingerprint:
+        logger.info(f"Database schema unchanged (fingerprint {fingerprint[:12]}) - skipping table check")
+        return False
+
+    existing_tables = set(inspect(engine).get_table_names())
+    defined_tables = set(Base.metadata.tables.keys())
+    missing_tables = defined_tables - existing_tables
+    logger.info(f"Database dialect: {engine.dialect.name}")
+    logger.info(f"Tables defined in models: {len(defined_tables)}, already in database: {len(existing_tables)}")
+    if missing_tables:
+        logger.info(f"Creating {len(missing_tables)} missing tables: {sorted(missing_tables)}")
+
     Base.metadata.create_all(bind=engine)
+
+    # create_all skips existing tables entirely, so columns and indexes added to a
+    # model later have to be created one by one. Only nullable columns without a
+    # server default can be added this way - anything else needs a migration script.
+    inspector = inspect(engine)
+    for table_name in sorted(existing_tables & defined_tables):
+        table = Base.metadata.tables[table_name]
+        existing_columns = {col["name"] for col in inspector.get_columns(table_name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            if not column.nullable or column.server_default is not None:
+                logger.warning(f"Column {table_name}.{column.name} is missing and can't be added automatically")
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            logger.info(f"Adding missing column {table_name}.{column.name} ({column_type})")
+            with engine.begin() as conn:
+                conn.execute(text(f'ALTER TABLE {table_name} ADD COLUMN "{column.name}" {column_type}'))
+
+        existing_indexes = {ix["name"] for ix in inspector.get_indexes(table_name)}
+        for index in table.indexes:
+            if index.name and index.name not in existing_indexes:
+                logger.info(f"Creating missing index {index.name} on {table_name}")
+                index.create(bind=engine)
+
+    db = SessionLocal()
+    try:
+        set_startup_fingerprint(db, "schema", fingerprint)
+        db.commit()
+    finally:
+        db.close()
     logger.info("Database schema ensured")
+    return True
 
 
 def get_db():
@@ -106,3 +237,68 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Dependency for read endpoints that can run without a worker thread.
+    
+    Yields an AsyncSession when USE_ASYNC_DB is enabled, otherwise a regular Session.
+    Either way, pass it to run_db() together with the (sync) query function.
+    """
+    if AsyncSessionLocal is None:
+        from starlette.concurrency import run_in_threadpool
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+        return
+
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+T = TypeVar("T")
+
+# Session or AsyncSession, as yielded by get_async_db
+DbSession = Union[Session, Any]
+
+
+async def run_db(db: DbSession, fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run fn(session, *args, **kwargs) against a session from get_async_db.
+    
+    With an AsyncSession the sync ORM code runs via run_sync (greenlet, no thread);
+    with a regular Session it runs in the worker thread pool. Query code, lazy loads
+    and serializers are therefore shared with the sync endpoints unchanged.
+    """
+    if not isinstance(db, Session):
+        return await db.run_sync(fn, *args, **kwargs)
+
+    return await run_in_db_thread(fn, db, *args, **kwargs)
+
+
+# Limiter of the DB worker threads, created by configure_db_thread_pool
+_db_thread_limiter = None
+
+
+async def run_in_db_thread(fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run blocking DB work in a worker thread bounded by DB_THREAD_POOL_SIZE.
+    
+    Only for work that checks out its connection inside the call (a fresh session
+    from get_async_db or SessionLocal): a caller already holding a connection must
+    use run_in_threadpool, or it could wait for a thread that waits for its connection.
+    """
+    from functools import partial
+    from anyio import to_thread
+    return await to_thread.run_sync(partial(fn, *args, **kwargs), limiter=_db_thread_limiter)
+
+
+def configure_db_thread_pool():
+    """Create the DB worker thread limiter. Must run inside the event loop."""
+    global _db_thread_limiter
+    from anyio import CapacityLimiter
+    _db_thread_limiter = CapacityLimiter(DB_THREAD_POOL_SIZE)
+    logger.info(f"DB worker threads limited to {DB_THREAD_POOL_SIZE}")
@@ -0,0 +1,459 @@
+"""
+Document rendering (nomination Excel, TNG memo) off the request worker.
+
+openpyxl and python-docx are CPU-bound, so rendering runs in a process pool.
+The split is:
+- Routers gather everything a document needs from the DB into a small,
+  picklable job (NominationJob / TngJob).
+- render_nomination / render_tng turn a job into (filename, bytes). They never
+  touch the database, so they can run in a worker process; each worker keeps
+  its own cached copy of the nomination template.
+
+DOCUMENT_WORKERS sets the pool size (default: CPU count, at most 4).
+DOCUMENT_WORKERS=0 renders in the worker thread pool instead of processes.
+
+Usage:
+    from app.document_render import NominationJob, render_nomination, run_render
+
+    filename, content = await run_render(render_nomination, job)
+"""
+import io
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import AsyncIterator, Callable, Optional, Tuple
+
+from app.nomination_template import nomination_template
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_WORKERS = int(os.getenv("DOCUMENT_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+TNG_TEMPLATE_PATH = Path(__file__).parent.parent / "templates" / "tng_template.docx"
+
+NOMINATION_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+TNG_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+DEFAULT_TNG_NOTES = """Cargo to be commingled.
+Vessel to adopt early departure procedure (EDP). 
+Master to send his daily ETA to the following email:  GXSTRMDCARGOJET@shell.com
+BL WILL NOT BE AVAILABLE AT DISPORT."""
+
+
+@dataclass(frozen=True)
+class NominationJob:
+    """Everything needed to render one cargo nomination."""
+    cargo_id: int
+    product_name: str
+    customer_name: str
+    contract_number: str
+    contract_type: str
+    laycan: str
+    vessel_name: Optional[str]
+    eta: Optional[str]
+    cargo_quantity: float
+    load_port_codes: Tuple[str, ...]
+    inspector_name: Optional[str]
+
+
+@dataclass(frozen=True)
+class TngJob:
+    """Everything needed to render one TNG memo (one monthly plan or combi group)."""
+    monthly_plan_id: int
+    customer_name: str
+    contract_number: str
+    date_text: str
+    loading_window: str
+    delivery_window: str
+    discharge_port: str
+    products: Tuple[Tuple[str, float], ...]
+    disport_restrictions: str
+    tng_notes: str
+    discharge_ranges: str
+    month: int
+    year: int
+
+
+def _clean_filename_part(value: Optional[str]) -> str:
+    return (value or 'TBA').replace(' ', '_').replace('/', '_').replace('\\', '_').replace(':', '_')
+
+
+def _format_quantity(quantity: float) -> str:
+    return f"{int(quantity) if quantity == int(quantity) else quantity}"
+
+
+def get_sheet_name_for_product(product_name: str, customer_name: str) -> str:
+    """Determine which sheet to use based on product and customer"""
+    product_lower = product_name.lower()
+    customer_lower = customer_name.lower()
+
+    # Check for KPCT customer
+    if 'kpct' in customer_lower or 'kpc trading' in customer_lower:
+        if 'jet' in product_lower or 'gas' in product_lower:
+            return 'KPCT Gas-Jet'
+        else:
+            return 'KPCT Gas-Jet'  # Default for KPCT
+
+    # Check product type
+    if 'jet' in product_lower or 'gas' in product_lower:
+        return 'Gas-Jet'
+    elif 'fuel' in product_lower or 'hfo' in product_lower or 'heavy fuel' in product_lower:
+        return 'Fuel'
+    else:
+        # Default to Gas-Jet
+        return 'Gas-Jet'
+
+
+def render_nomination(job: NominationJob) -> Tuple[str, bytes]:
+    """
+    Fill the nomination template for one cargo.
+
+    Raises:
+        ValueError: If the template has no usable sheet or the output is not a valid .xlsx
+    """
+    from openpyxl.styles import Font
+
+    wb = nomination_template.workbook()
+    product_name = job.product_name
+    customer_name = job.customer_name
+
+    # Determine which sheet to use
+    sheet_name = get_sheet_name_for_product(product_name, customer_name)
+    if sheet_name not in wb.sheetnames:
+        # Fallback to first available template sheet
+        available_sheets = [s for s in wb.sheetnames if s not in ['Reference', 'LIST ']]
+        if not available_sheets:
+            wb.close()
+            raise ValueError("No template sheet found")
+        sheet_name = available_sheets[0]
+
+    ws = wb[sheet_name]
+
+    # Get inspector info from the LIST sheet
+    inspector_code, spec_code = nomination_template.inspector_info(customer_name, job.inspector_name or '')
+
+    # Fill in the template
+    # Note: A4 (Date/Header) is kept as is in template - don't change it
+
+    # ITEM (Row 22, Column C) - put red text "Enter Item Number"
+    cell_c22 = ws['C22']
+    cell_c22.value = 'Enter Item Number'
+    if cell_c22.font is None:
+        cell_c22.font = Font(color='FF0000')
+    else:
+        cell_c22.font = Font(color='FF0000', size=cell_c22.font.size, name=cell_c22.font.name)
+
+    # LAYDAYS (Row 22, Columns G-H)
+    laycan = job.laycan
+    if laycan and laycan != 'TBA' and laycan != '-':
+        # Try to parse laycan (e.g., "21-22/11" or "20-21/11/2025")
+        match = re.search(r'(\d{1,2})-(\d{1,2})/(\d{1,2})', laycan)
+        if match:
+            day1, day2, month = match.groups()
+            ws['G22'] = f'({day1}-{day2}/{month})'
+        else:
+            ws['G22'] = laycan
+    else:
+        ws['G22'] = 'TBA'
+
+    # H22 - keep empty (no text)
+    ws['H22'] = ''
+
+    # VESSEL (Row 23, Column C)
+    ws['C23'] = job.vessel_name
+
+    # ETA KUWAIT (Row 23, Column G)
+    ws['G23'] = job.eta or 'TBA'
+
+    # PRODUCT (Row 24, Column C)
+    ws['C24'] = product_name
+
+    # Delivery (Row 24, Column G) - FOB or CIF
+    ws['G24'] = job.contract_type
+
+    # QUANTITY (Row 25, Column C) - remove .0 if whole number
+    ws['C25'] = f"{_format_quantity(job.cargo_quantity)} KT +/- 10%"
+
+    # Load ports, already sorted by load port sort order
+    ports_list = list(job.load_port_codes)
+    load_ports = ",".join(ports_list)
+
+    # Load ports in G7 to G14 (header section) - fill these with load ports
+    # Note: G8 is kept as "KWT" - skip it
+    # G9, G11, G13 should be the same as G7 (first port)
+    if ports_list:
+        first_port = ports_list[0]
+        ws['G7'] = first_port
+        ws['G9'] = first_port
+        ws['G11'] = first_port
+        ws['G13'] = first_port
+
+        # G10, G12, G14 get subsequent ports if available
+        if len(ports_list) > 1:
+            ws['G10'] = ports_list[1]
+        if len(ports_list) > 2:
+            ws['G12'] = ports_list[2]
+        if len(ports_list) > 3:
+            ws['G14'] = ports_list[3]
+
+    # Load ports info (Row 25, Column D and Row 26, Column C)
+    if ports_list:
+        if len(ports_list) == 1:
+            ws['D25'] = f'(AS PER MASTER REQUEST) to be fully loaded Ex. {ports_list[0]}'
+        elif len(ports_list) == 2:
+            ws['D25'] = f'(AS PER MASTER REQUEST) to be Loaded as follows: '
+            ws['C26'] = f' 1ST PORT: {ports_list[0]}\n 2ND PORT: Balance Quantity Ex. {ports_list[1]}'
+        else:
+            ws['D25'] = f'(AS PER MASTER REQUEST) to be loaded from: {load_ports}'
+
+    # INSPECTOR (Row 28, Column C)
+    ws['C28'] = job.inspector_name or 'TBA'
+
+    # CHARGES (Row 28, Column G-H) - Split customer name
+    customer_name_parts = customer_name.split()
+    ws['G28'] = '50/50 KPC/ '
+    ws['H28'] = customer_name_parts[0] if customer_name_parts else customer_name
+
+    # SAMPLING KPC PROCEDURE (Row 29, Column C) - based on product type
+    product_lower = product_name.lower().strip()
+    # Check for gasoil (including "gasoil 10ppm" or "gasoil 10 ppm" variations)
+    if 'gasoil' in product_lower:
+        ws['C29'] = 'G-001'
+    else:
+        # JET-A1 and default fallback
+        ws['C29'] = 'K-001'
+
+    # SPEC (Row 29, Column G) - from reference or inspector info
+    if spec_code:
+        ws['G29'] = spec_code
+    else:
+        # Default based on product
+        if 'jet' in product_lower or 'gas' in product_lower:
+            ws['G29'] = '3001-A'
+        elif 'fuel' in product_lower or 'hfo' in product_lower:
+            ws['G29'] = '5325 M'
+        else:
+            ws['G29'] = '3001-A'
+
+    # CUSTOMER (Row 30, Column C)
+    ws['C30'] = customer_name
+
+    # CONTRACT NO. (Row 30, Column G)
+    ws['G30'] = f'({job.contract_number})'
+
+    content = nomination_template.render(wb)
+
+    # Filename: vessel_name_customer_name_contract_number_load_port
+    first_port = ports_list[0] if ports_list else 'TBA'
+    filename = (
+        f"{_clean_filename_part(job.vessel_name)}_{_clean_filename_part(customer_name)}_"
+        f"{_clean_filename_part(job.contract_number)}_{_clean_filename_part(first_port)}.xlsx"
+    )
+    return filename, content
+
+
+def _replace_in_paragraph(paragraph, old_text, new_text):
+    if old_text in paragraph.text:
+        # Preserve formatting by replacing in runs
+        for run in paragraph.runs:
+            if old_text in run.text:
+                run.text = run.text.replace(old_text, new_text)
+        # If not found in runs, replace in full text (loses some formatting)
+        if old_text in paragraph.text:
+            paragraph.text = paragraph.text.replace(old_text, new_text)
+
+
+def render_tng(job: TngJob) -> Tuple[str, bytes]:
+    """Fill the TNG memo template for one monthly plan (or combi group)."""
+    from docx import Document
+
+    doc = Document(TNG_TEMPLATE_PATH)
+    products = job.products
+    discharge_port = job.discharge_port
+    total_quantity = sum(quantity for _, quantity in products)
+
+    # Build products table text
+    # Format: DISCHARGE_PORT    Product1    50KT ± 10%    DELIVERY_WINDOW
+    #                          Product2    50KT ± 10%
+    products_text_lines = []
+    for i, (name, quantity) in enumerate(products):
+        qty_str = f"{_format_quantity(quantity)}KT ± 10%"
+        if i == 0:
+            # First product includes discharge port and delivery window
+            products_text_lines.append(f"                {discharge_port.upper()}                   {name}                {qty_str}                  {job.delivery_window}")
+        else:
+            # Subsequent products only show product and quantity
+            products_text_lines.append(f"                                                      {name}                {qty_str}")
+
+    products_table_text = "\n".join(products_text_lines)
+
+    # Replace placeholders in document
+    replacements = {
+        "{{DATE}}": job.date_text,
+        "{{CUSTOMER_NAME}}": job.customer_name,
+        "{{CONTRACT_NUMBER}}": job.contract_number,
+        "{{LOADING_WINDOW}}": job.loading_window,
+        "{{DELIVERY_WINDOW}}": job.delivery_window,
+        "{{DISCHARGE_PORT}}": discharge_port.upper(),
+        "{{PRODUCT_NAME}}": ", ".join(name for name, _ in products),
+        "{{CARGO_QUANTITY}}": f"{_format_quantity(total_quantity)}KT ± 10%",
+        "{{DISPORT_RESTRICTIONS}}": job.disport_restrictions,
+        "{{DISCHARGE_RANGES}}": job.discharge_ranges,
+        "{{TNG_NOTES}}": job.tng_notes,
+    }
+
+    # Process paragraphs
+    for para in doc.paragraphs:
+        for old_text, new_text in replacements.items():
+            _replace_in_paragraph(para, old_text, new_text)
+
+        # Handle the products table line specially for combi cargos
+        if "{{PRODUCT_NAME}}" in para.text or any(name in para.text for name, _ in products):
+            # If combi cargo with multiple products, format as multi-line
+            if len(products) > 1:
+                para.text = products_table_text
+
+    # Process tables (for the SUB line with customer name and contract number)
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                for para in cell.paragraphs:
+                    for old_text, new_text in replacements.items():
+                        _replace_in_paragraph(para, old_text, new_text)
+
+    buffer = BytesIO()
+    doc.save(buffer)
+
+    customer_clean = job.customer_name.replace(' ', '_').replace('/', '_')[:20]
+    contract_clean = job.contract_number.replace(' ', '_').replace('/', '_')
+    filename = f"TNG_{customer_clean}_{contract_clean}_{job.month}_{job.year}.docx"
+    return filename, buffer.getvalue()
+
+
+# =============================================================================
+# Worker pool
+# =============================================================================
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_document_pool() -> Optional[ProcessPoolExecutor]:
+    """The shared render process pool, created on first use (None when DOCUMENT_WORKERS=0)."""
+    global _pool
+    if DOCUMENT_WORKERS <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn: forking a threaded server process can copy held locks into the child
+                _pool = ProcessPoolExecutor(
+                    max_workers=DOCUMENT_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                logger.info(f"Document render pool started with {DOCUMENT_WORKERS} processes")
+    return _pool
+
+
+def shutdown_document_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+async def run_render(render: Callable, job) -> Tuple[str, bytes]:
+    """Run a render function in the process pool without blocking the event loop."""
+    import asyncio
+    from fastapi.concurrency import run_in_threadpool
+
+    pool = get_document_pool()
+    if pool is None:
+        return await run_in_threadpool(render, job)
+    return await asyncio.get_running_loop().run_in_executor(pool, render, job)
+
+
+# =============================================================================
+# ZIP streaming
+# =============================================================================
+
+class _ZipChunkSink(io.RawIOBase):
+    """Write-only, unseekable target for ZipFile; bytes are drained after each file."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _unique_name(filename: str, used: set) -> str:
+    """Suffix repeated filenames (e.g. two cargos on the same vessel and contract) with _2, _3..."""
+    if filename not in used:
+        used.add(filename)
+        return filename
+    stem, dot, ext = filename.rpartition(".")
+    n = 2
+    while f"{stem}_{n}{dot}{ext}" in used:
+        n += 1
+    unique = f"{stem}_{n}{dot}{ext}"
+    used.add(unique)
+    return unique
+
+
+async def stream_document_zip(render: Callable, jobs: list, errors: Optional[list] = None) -> AsyncIterator[bytes]:
+    """
+    Render jobs concurrently and yield a ZIP archive, one member per finished document.
+
+    Members are written in completion order. Failed jobs (and any `errors` passed in)
+    are listed in errors.txt at the end instead of aborting the download.
+    """
+    import asyncio
+
+    errors = list(errors or [])
+
+    async def render_one(job):
+        try:
+            return job, await run_render(render, job), None
+        except Exception as e:
+            return job, None, e
+
+    tasks = [asyncio.ensure_future(render_one(job)) for job in jobs]
+    sink = _ZipChunkSink()
+    used_names = set()
+    try:
+        # .xlsx/.docx are already ZIP-compressed; storing them avoids a pointless deflate pass
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+            for next_done in asyncio.as_completed(tasks):
+                job, result, error = await next_done
+                if error is not None:
+                    job_id = getattr(job, "cargo_id", None) or getattr(job, "monthly_plan_id", None)
+                    logger.warning(f"Batch document render failed for {type(job).__name__} {job_id}: {error}")
+                    errors.append(f"{type(job).__name__} {job_id}: {error}")
+                    continue
+                filename, content = result
+                archive.writestr(_unique_name(filename, used_names), content)
+                yield sink.drain()
+            if errors:
+                archive.writestr("errors.txt", "\n".join(errors) + "\n")
+        yield sink.drain()
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -32,6 +32,7 @@ class ErrorCode(str, Enum):
     INVALID_YEAR = "INVALID_YEAR"
     PRODUCT_NOT_IN_CONTRACT = "PRODUCT_NOT_IN_CONTRACT"
     MISSING_REQUIRED_FIELD = "MISSING_REQUIRED_FIELD"
+    INVALID_CURSOR = "INVALID_CURSOR"
     
     # Business logic errors (400/409)
     CARGO_ALREADY_EXISTS = "CARGO_ALREADY_EXISTS"
@@ -296,6 +297,14 @@ def invalid_load_port(port_code: str, valid_ports: list) -> ValidationError:
     )
 
 
+def invalid_cursor() -> ValidationError:
+    return ValidationError(
+        message="Invalid or expired pagination cursor. Restart from the first page.",
+        code=ErrorCode.INVALID_CURSOR,
+        field="cursor"
+    )
+
+
 def invalid_status(status: str, valid_statuses: list) -> ValidationError:
     return ValidationError(
         message=f"Invalid status: {status}. Valid values: {', '.join(valid_statuses)}",
@@ -0,0 +1,272 @@
+"""
+Data integrity check for the admin page.
+
+The checks are a handful of set-based queries (GROUP BY aggregates and
+anti-joins) whose results are compared in memory, so the cost no longer grows
+with one query per contract / quarterly plan / duplicated monthly plan.
+
+Reports are cached per process with the time they were generated:
+- `GET /api/admin/integrity-check` serves the cached report while it is younger
+  than INTEGRITY_CHECK_CACHE_SECONDS (or recomputes it inline).
+- `?background=true` starts the check as a background job and returns at once;
+  the job's state and finished report are polled via
+  `GET /api/admin/integrity-check/job`.
+
+Usage:
+    from app.integrity_check import integrity_reports
+
+    report = integrity_reports.get(db, max_age=60)
+    job = integrity_reports.start_job()
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import Cargo, Contract, ContractProduct, MonthlyPlan, Product, QuarterlyPlan
+
+logger = logging.getLogger(__name__)
+
+# Age (seconds) up to which a cached report is served instead of re-running the checks
+INTEGRITY_CHECK_CACHE_SECONDS = float(os.getenv("INTEGRITY_CHECK_CACHE_SECONDS", "300"))
+
+# Allow small floating point differences
+_TOLERANCE = 0.01
+
+
+def _quantity_issues_contract_vs_quarterly(db: Session) -> List[Dict[str, Any]]:
+    """Contract product totals vs the (first) quarterly plan of the same contract and product."""
+    issues = []
+
+    qp_totals: Dict[tuple, float] = {}
+    for contract_id, product_id, q1, q2, q3, q4 in db.query(
+        QuarterlyPlan.contract_id, QuarterlyPlan.product_id,
+        QuarterlyPlan.q1_quantity, QuarterlyPlan.q2_quantity, QuarterlyPlan.q3_quantity, QuarterlyPlan.q4_quantity,
+    ).order_by(QuarterlyPlan.id).all():
+        # Note: topup quantities are tracked in contract year_quantities, not quarterly plans
+        qp_totals.setdefault((contract_id, product_id), (q1 or 0) + (q2 or 0) + (q3 or 0) + (q4 or 0))
+
+    rows = db.query(
+        Contract.id, Contract.contract_number, Product.name, ContractProduct.product_id,
+        ContractProduct.total_quantity, ContractProduct.optional_quantity,
+    ).join(ContractProduct, ContractProduct.contract_id == Contract.id
+    ).join(Product, Product.id == ContractProduct.product_id
+    ).order_by(Contract.id, ContractProduct.id).all()
+
+    for contract_id, contract_number, product_name, product_id, total_quantity, optional_quantity in rows:
+        contract_total = (total_quantity or 0) + (optional_quantity if optional_quantity and optional_quantity > 0 else 0)
+        qp_total = qp_totals.get((contract_id, product_id))
+        if qp_total is not None:
+            if abs(contract_total - qp_total) > _TOLERANCE:
+                issues.append({
+                    "type": "quantity_mismatch",
+                    "severity": "warning",
+                    "entity": "contract_vs_quarterly",
+                    "contract_id": contract_id,
+                    "contract_number": contract_number,
+                    "product": product_name,
+                    "contract_total": contract_total,
+                    "quarterly_total": qp_total,
+                    "difference": contract_total - qp_total
+                })
+        elif contract_total > 0:
+            issues.append({
+                "type": "missing_quarterly_plan",
+                "severity": "error",
+                "entity": "quarterly_plan",
+                "contract_id": contract_id,
+                "contract_number": contract_number,
+                "product": product_name,
+                "message": f"No quarterly plan for {product_name} with contract quantity {contract_total}"
+            })
+    return issues
+
+
+def _quantity_issues_quarterly_vs_monthly(db: Session) -> List[Dict[str, Any]]:
+    """Quarterly plan quantities vs the sum of their monthly plans per quarter."""
+    issues = []
+
+    quarter = case(
+        (MonthlyPlan.month <= 3, 1),
+        (MonthlyPlan.month <= 6, 2),
+        (MonthlyPlan.month <= 9, 3),
+        else_=4,
+    )
+    monthly_totals: Dict[tuple, float] = {
+        (qp_id, int(q)): float(total or 0)
+        for qp_id, q, total in db.query(
+            MonthlyPlan.quarterly_plan_id, quarter, func.sum(MonthlyPlan.month_quantity)
+        ).filter(MonthlyPlan.quarterly_plan_id.isnot(None)
+        ).group_by(MonthlyPlan.quarterly_plan_id, quarter).all()
+    }
+
+    rows = db.query(
+        QuarterlyPlan.id, QuarterlyPlan.q1_quantity, QuarterlyPlan.q2_quantity,
+        QuarterlyPlan.q3_quantity, QuarterlyPlan.q4_quantity,
+        Contract.contract_number, Product.name,
+    ).outerjoin(Contract, Contract.id == QuarterlyPlan.contract_id
+    ).outerjoin(Product, Product.id == QuarterlyPlan.product_id
+    ).order_by(QuarterlyPlan.id).all()
+
+    for qp_id, q1, q2, q3, q4, contract_number, product_name in rows:
+        for q, qp_quantity in enumerate((q1 or 0, q2 or 0, q3 or 0, q4 or 0), start=1):
+            monthly_total = monthly_totals.get((qp_id, q), 0)
+            if abs(qp_quantity - monthly_total) > _TOLERANCE:
+                issues.append({
+                    "type": "quantity_mismatch",
+                    "severity": "info",
+                    "entity": "quarterly_vs_monthly",
+                    "quarterly_plan_id": qp_id,
+                    "contract_number": contract_number or "Unknown",
+                    "product": product_name or "Unknown",
+                    "quarter": q,
+                    "quarterly_quantity": qp_quantity,
+                    "monthly_total": monthly_total,
+                    "difference": qp_quantity - monthly_total
+                })
+    return issues
+
+
+def _cargo_issues(db: Session) -> List[Dict[str, Any]]:
+    """Cargos pointing at missing monthly plans, and monthly plans with several cargos."""
+    issues = []
+
+    orphaned = db.query(Cargo.id, Cargo.cargo_id, Cargo.vessel_name, Cargo.monthly_plan_id
+    ).outerjoin(MonthlyPlan, MonthlyPlan.id == Cargo.monthly_plan_id
+    ).filter(Cargo.monthly_plan_id.isnot(None), MonthlyPlan.id.is_(None)
+    ).order_by(Cargo.id).all()
+    for cargo_id, cargo_ref, vessel_name, monthly_plan_id in orphaned:
+        issues.append({
+            "type": "orphaned_cargo",
+            "severity": "error",
+            "entity": "cargo",
+            "cargo_id": cargo_id,
+            "cargo_ref": cargo_ref,
+            "vessel_name": vessel_name,
+            "monthly_plan_id": monthly_plan_id,
+            "message": "Cargo references non-existent monthly plan"
+        })
+
+    duplicated = db.query(Cargo.monthly_plan_id).group_by(Cargo.monthly_plan_id).having(func.count(Cargo.id) > 1).subquery()
+    cargo_ids_by_plan: Dict[int, List[int]] = {}
+    for monthly_plan_id, cargo_id in db.query(Cargo.monthly_plan_id, Cargo.id).join(
+        duplicated, duplicated.c.monthly_plan_id == Cargo.monthly_plan_id
+    ).order_by(Cargo.monthly_plan_id, Cargo.id).all():
+        cargo_ids_by_plan.setdefault(monthly_plan_id, []).append(cargo_id)
+    for monthly_plan_id, cargo_ids in cargo_ids_by_plan.items():
+        issues.append({
+            "type": "duplicate_cargo_assignment",
+            "severity": "warning",
+            "entity": "cargo",
+            "monthly_plan_id": monthly_plan_id,
+            "cargo_count": len(cargo_ids),
+            "cargo_ids": cargo_ids,
+            "message": f"Multiple cargos ({len(cargo_ids)}) assigned to same monthly plan"
+        })
+    return issues
+
+
+def run_integrity_check(db: Session) -> Dict[str, Any]:
+    """Run all checks and build the report returned by the admin endpoint."""
+    started = time.perf_counter()
+    issues = (
+        _quantity_issues_contract_vs_quarterly(db)
+        + _quantity_issues_quarterly_vs_monthly(db)
+        + _cargo_issues(db)
+    )
+    return {
+        "total_issues": len(issues),
+        "issues_by_severity": {
+            "error": len([i for i in issues if i["severity"] == "error"]),
+            "warning": len([i for i in issues if i["severity"] == "warning"]),
+            "info": len([i for i in issues if i["severity"] == "info"])
+        },
+        "issues": issues,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+class IntegrityReportCache:
+    """Last integrity report of this process plus the state of the background job."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._report: Optional[Dict[str, Any]] = None
+        self._report_time = 0.0  # monotonic
+        self._job: Optional[Dict[str, Any]] = None
+
+    def get(self, db: Session, max_age: float = INTEGRITY_CHECK_CACHE_SECONDS) -> Dict[str, Any]:
+        """Cached report if younger than max_age seconds, otherwise run the checks now."""
+        with self._lock:
+            report, report_time = self._report, self._report_time
+        if report is not None and time.monotonic() - report_time <= max_age:
+            return {**report, "cached": True}
+        report = run_integrity_check(db)
+        self._store(report)
+        return {**report, "cached": False}
+
+    def _store(self, report: Dict[str, Any]) -> None:
+        with self._lock:
+            self._report = report
+            self._report_time = time.monotonic()
+
+    def job_status(self) -> Optional[Dict[str, Any]]:
+        """State of the latest background job (with its report once finished), or None."""
+        with self._lock:
+            return dict(self._job) if self._job else None
+
+    def start_job(self) -> Dict[str, Any]:
+        """
+        Register a background job, unless one is already running.
+
+        Returns the job state; run it with `run_job(job["job_id"])` (e.g. from
+        FastAPI BackgroundTasks) when its status is "pending".
+        """
+        with self._lock:
+            if self._job and self._job["status"] in ("pending", "running"):
+                return dict(self._job)
+            self._job = {
+                "job_id": uuid.uuid4().hex,
+                "status": "pending",
+                "started_at": None,
+                "finished_at": None,
+                "error": None,
+                "report": None,
+            }
+            return dict(self._job)
+
+    def run_job(self, job_id: str) -> None:
+        """Run the registered job with its own session. Meant for a worker thread."""
+        with self._lock:
+            if not self._job or self._job["job_id"] != job_id or self._job["status"] != "pending":
+                return
+            self._job["status"] = "running"
+            self._job["started_at"] = datetime.now(timezone.utc).isoformat()
+
+        db = SessionLocal()
+        try:
+            report = run_integrity_check(db)
+        except Exception as e:
+            logger.error(f"Integrity check job {job_id} failed: {e}", exc_info=True)
+            with self._lock:
+                self._job.update(status="failed", error=str(e), finished_at=datetime.now(timezone.utc).isoformat())
+            return
+        finally:
+            db.close()
+
+        self._store(report)
+        with self._lock:
+            self._job.update(status="done", report=report, finished_at=datetime.now(timezone.utc).isoformat())
+        logger.info(f"Integrity check job {job_id} done: {report['total_issues']} issues in {report['duration_ms']}ms")
+
+
+# Global instance
+integrity_reports = IntegrityReportCache()
@@ -0,0 +1,254 @@
+"""
+Parsed laycan dates for monthly plans and cargos.
+
+Laycans are entered as free text ("15-20 Nov 2024", "02-03/11", "02-03", "15")
+and stay that way in laycan_5_days / laycan_2_days / laycan_window. Alerts need
+them as dates, so every write also stores the parsed range in the indexed
+laycan_start / laycan_end columns:
+
+- MonthlyPlan: laycan_2_days, else laycan_5_days, read against the plan's month/year
+- Cargo (FOB): the monthly plan's range
+- Cargo (CIF): laycan_window, read against the monthly plan's month/year
+
+A before_flush listener keeps the columns in step with the text fields (all
+writes go through the ORM), and `backfill_laycan_dates` fills rows written
+before the columns existed or parsed by an older LAYCAN_PARSER_VERSION.
+
+The parser matches frontend/src/utils/laycanParser.ts, including JavaScript
+Date's rollover of out-of-range days ("31" in a 30-day month is the 1st of the
+next month). Stored ranges always read partial laycans against the plan's own
+month/year, never the current date, so they don't depend on when a row was
+written or backfilled.
+"""
+import logging
+import re
+from datetime import date, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app import models
+
+logger = logging.getLogger(__name__)
+
+# Bump when parse_laycan changes so the startup backfill re-parses every row
+LAYCAN_PARSER_VERSION = "1"
+
+# Rows re-parsed per batch by backfill_laycan_dates
+BACKFILL_BATCH_SIZE = 1000
+
+MONTH_NAMES = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+
+_FULL_DATE = re.compile(r"(\d{1,2})(?:[\s-]+(\d{1,2}))?[\s-]*([a-z]{3})[\s-]+(\d{4})", re.IGNORECASE)
+_DAY_MONTH = re.compile(r"(\d{1,2})[\s-]+(\d{1,2})[\s/]+(\d{1,2})")
+_DAY_RANGE = re.compile(r"(\d{1,2})[\s-]+(\d{1,2})")
+_SINGLE_DAY = re.compile(r"^(\d{1,2})$")
+
+# Fields a stored range is derived from
+PLAN_LAYCAN_FIELDS = ("laycan_2_days", "laycan_5_days", "month", "year")
+CARGO_LAYCAN_FIELDS = ("laycan_window", "contract_type", "monthly_plan_id")
+
+LaycanRange = Tuple[date, date]
+
+
+def _calendar_date(year: int, month_index: int, day: int) -> Optional[date]:
+    """date for (year, 0-based month, day) with out-of-range months/days rolled over like new Date(y, m, d)."""
+    year += month_index // 12
+    try:
+        return date(year, month_index % 12 + 1, 1) + timedelta(days=day - 1)
+    except (ValueError, OverflowError):
+        return None
+
+
+def _range(year: int, month_index: int, start_day: int, end_day: int) -> Optional[LaycanRange]:
+    start = _calendar_date(year, month_index, start_day)
+    end = _calendar_date(year, month_index, end_day)
+    if start is None or end is None:
+        return None
+    return start, end
+
+
+def parse_laycan(laycan: Optional[str], month: Optional[int] = None, year: Optional[int] = None) -> Optional[LaycanRange]:
+    """
+    Parse a laycan string into its (start, end) dates.
+
+    Args:
+        laycan: Free-text laycan, e.g. "15-20 Nov 2024", "02-03/11", "02-03" or "15"
+        month: Reference month for formats without one
+        year: Reference year for formats without one
+
+    Only when neither month nor year is given does the current month/year
+    stand in as the reference (ad-hoc parsing, like the frontend parser). With
+    just one of them, a laycan that needs the missing one doesn't parse.
+
+    Returns:
+        (start, end), or None for empty/TBA/unparseable laycans
+    """
+    if not laycan or not laycan.strip() or laycan in ("TBA", "-"):
+        return None
+
+    if month is None and year is None:
+        today = date.today()
+        month, year = today.month, today.year
+
+    match = _FULL_DATE.search(laycan)
+    if match:
+        month_name = match.group(3).lower()
+        if month_name in MONTH_NAMES:
+            start_day = int(match.group(1))
+            end_day = int(match.group(2)) if match.group(2) else start_day
+            return _range(int(match.group(4)), MONTH_NAMES.index(month_name), start_day, end_day)
+
+    match = _DAY_MONTH.search(laycan)
+    if match:
+        if year is None:
+            return None
+        return _range(year, int(match.group(3)) - 1, int(match.group(1)), int(match.group(2)))
+
+    match = _DAY_RANGE.search(laycan)
+    if match:
+        if month is None or year is None:
+            return None
+        return _range(year, month - 1, int(match.group(1)), int(match.group(2)))
+
+    match = _SINGLE_DAY.match(laycan)
+    if match:
+        if month is None or year is None:
+            return None
+        day = int(match.group(1))
+        return _range(year, month - 1, day, day)
+
+    return None
+
+
+def stored_laycan(laycan: Optional[str], month: Optional[int], year: Optional[int]) -> Optional[LaycanRange]:
+    """
+    parse_laycan for the stored columns: without a complete plan month/year
+    there is no range, rather than one read against the current date.
+    """
+    if month is None or year is None:
+        return None
+    return parse_laycan(laycan, month, year)
+
+
+def plan_laycan(plan: models.MonthlyPlan) -> Optional[LaycanRange]:
+    """Laycan range of a monthly plan (2-day laycan takes priority over the 5-day one)."""
+    return stored_laycan(plan.laycan_2_days or plan.laycan_5_days, plan.month, plan.year)
+
+
+def cargo_laycan(cargo: models.Cargo, plan: Optional[models.MonthlyPlan]) -> Optional[LaycanRange]:
+    """Laycan range of a cargo: its plan's for FOB, its own laycan_window for CIF."""
+    if plan is None:
+        return None
+    if cargo.contract_type == models.ContractType.FOB:
+        return plan_laycan(plan)
+    return stored_laycan(cargo.laycan_window, plan.month, plan.year)
+
+
+def _store(entity, laycan: Optional[LaycanRange]) -> None:
+    start, end = laycan or (None, None)
+    # Only assign real changes, so unrelated rows aren't marked dirty
+    if entity.laycan_start != start:
+        entity.laycan_start = start
+    if entity.laycan_end != end:
+        entity.laycan_end = end
+
+
+def _changed(entity, fields) -> bool:
+    attrs = inspect(entity).attrs
+    return any(attrs[name].history.has_changes() for name in fields)
+
+
+def _plan_of(session: Session, cargo: models.Cargo) -> Optional[models.MonthlyPlan]:
+    if cargo.monthly_plan_id is not None:
+        return session.get(models.MonthlyPlan, cargo.monthly_plan_id)
+    # New plan and cargo flushed together: only the relationship is set
+    return cargo.monthly_plan
+
+
+@event.listens_for(Session, "before_flush")
+def _maintain_laycan_dates(session: Session, flush_context, instances) -> None:
+    plans = []
+    cargos = []
+    for obj in session.new:
+        if isinstance(obj, models.MonthlyPlan):
+            plans.append(obj)
+        elif isinstance(obj, models.Cargo):
+            cargos.append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, models.MonthlyPlan) and _changed(obj, PLAN_LAYCAN_FIELDS):
+            plans.append(obj)
+        elif isinstance(obj, models.Cargo) and _changed(obj, CARGO_LAYCAN_FIELDS):
+            cargos.append(obj)
+    if not plans and not cargos:
+        return
+
+    with session.no_autoflush:
+        for plan in plans:
+            _store(plan, plan_laycan(plan))
+
+        # Existing cargos of a changed plan follow its laycan (FOB) or month/year (CIF)
+        changed_plan_ids = {plan.id: plan for plan in plans if plan.id is not None}
+        if changed_plan_ids:
+            plan_cargos = session.execute(
+                select(models.Cargo).where(models.Cargo.monthly_plan_id.in_(changed_plan_ids))
+            ).scalars().all()
+            for cargo in plan_cargos:
+                if cargo not in cargos:
+                    _store(cargo, cargo_laycan(cargo, changed_plan_ids[cargo.monthly_plan_id]))
+
+        for cargo in cargos:
+            _store(cargo, cargo_laycan(cargo, _plan_of(session, cargo)))
+
+
+def backfill_laycan_dates(db: Session) -> int:
+    """
+    Parse the stored laycan range of every monthly plan and cargo.
+
+    Runs at startup when LAYCAN_PARSER_VERSION changed (or the columns were just
+    added); only rows whose range differs are updated. Caller commits.
+
+    Returns:
+        Number of rows updated
+    """
+    updated = 0
+    plans_by_id = {}
+    last_id = 0
+    while True:
+        plans = db.query(models.MonthlyPlan).filter(
+            models.MonthlyPlan.id > last_id
+        ).order_by(models.MonthlyPlan.id).limit(BACKFILL_BATCH_SIZE).all()
+        if not plans:
+            break
+        for plan in plans:
+            start, end = plan_laycan(plan) or (None, None)
+            if (plan.laycan_start, plan.laycan_end) != (start, end):
+                plan.laycan_start, plan.laycan_end = start, end
+                updated += 1
+            plans_by_id[plan.id] = (plan.month, plan.year, plan.laycan_2_days or plan.laycan_5_days)
+        last_id = plans[-1].id
+        db.flush()
+
+    last_id = 0
+    while True:
+        cargos = db.query(models.Cargo).filter(
+            models.Cargo.id > last_id
+        ).order_by(models.Cargo.id).limit(BACKFILL_BATCH_SIZE).all()
+        if not cargos:
+            break
+        for cargo in cargos:
+            laycan = None
+            plan = plans_by_id.get(cargo.monthly_plan_id)
+            if plan is not None:
+                month, year, plan_text = plan
+                text = plan_text if cargo.contract_type == models.ContractType.FOB else cargo.laycan_window
+                laycan = stored_laycan(text, month, year)
+            start, end = laycan or (None, None)
+            if (cargo.laycan_start, cargo.laycan_end) != (start, end):
+                cargo.laycan_start, cargo.laycan_end = start, end
+                updated += 1
+        last_id = cargos[-1].id
+        db.flush()
+
+    return updated
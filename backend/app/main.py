@@ -4,21 +4,31 @@ from fastapi.responses import JSONResponse
 from slowapi.errors import RateLimitExceeded
 import logging
 import os
-import time
-from collections import defaultdict
-from threading import Lock
 
-from app.database import engine, Base, ensure_schema
+from app.database import configure_db_thread_pool
+from app.document_render import shutdown_document_pool
+from app.backplane import create_backplane
+from app.presence import presence_manager
 # CRITICAL: Import models BEFORE create_all() to ensure all tables are registered with Base.metadata
 # Without this explicit import, models may not be fully loaded when create_all() runs
 import app.models  # noqa: F401 - This registers all model classes with Base.metadata
+import app.laycan  # noqa: F401 - Registers the flush listener that keeps parsed laycan dates current
 
 from app.routers import customers, contracts, quarterly_plans, monthly_plans, cargos, audit_logs, documents
 from app.routers import config_router, admin, products, load_ports, inspectors, discharge_ports
-from app.routers import auth_router, users, presence_router, version_history_router, highlights
+from app.routers import auth_router, users, presence_router, version_history_router, highlights, views, alerts
 from app.errors import AppError, handle_app_error, handle_unexpected_error, handle_database_error
+from app.utils.pagination import NEXT_CURSOR_HEADER
 from sqlalchemy.exc import SQLAlchemyError
-from app.rate_limiter import limiter, rate_limit_exceeded_handler
+from app.rate_limiter import (
+    limiter,
+    rate_limit_exceeded_handler,
+    rate_limiter,
+    get_client_ip,
+    too_many_requests,
+    RATE_LIMIT_WINDOW,
+)
+from starlette.concurrency import run_in_threadpool
 
 # Configure logging
 logging.basicConfig(
@@ -28,41 +38,10 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # =============================================================================
-# DATABASE TABLE CREATION
+# STARTUP (schema check, seed users/reference data, reference data cache)
 # =============================================================================
-# Log which tables will be created and in which database
-from sqlalchemy import inspect
-inspector = inspect(engine)
-existing_tables = set(inspector.get_table_names())
-defined_tables = set(Base.metadata.tables.keys())
-missing_tables = defined_tables - existing_tables
-
-dialect_name = engine.dialect.name
-logger.info(f"Database dialect: {dialect_name}")
-logger.info(f"Tables defined in models: {len(defined_tables)}")
-logger.info(f"Tables already in database: {len(existing_tables)}")
-
-if missing_tables:
-    logger.info(f"Creating {len(missing_tables)} missing tables: {sorted(missing_tables)}")
-else:
-    logger.info("All tables already exist - no creation needed")
-
-# Create all tables that don't exist yet
-Base.metadata.create_all(bind=engine)
-
-# Run schema migrations (add columns, indexes, etc.)
-ensure_schema()
-
-logger.info("Database initialization complete")
-
-# Ensure admin/test users and reference data exist on startup
-from app.startup import ensure_admin_user, ensure_test_users, ensure_discharge_ports, ensure_products, ensure_load_ports, ensure_inspectors
-ensure_admin_user()
-ensure_test_users()
-ensure_discharge_ports()
-ensure_products()
-ensure_load_ports()
-ensure_inspectors()
+from app.startup import run_startup
+run_startup()
 
 app = FastAPI(
     title="Oil Lifting Program API", 
@@ -70,6 +49,27 @@ app = FastAPI(
     description="API for managing oil lifting contracts, cargos, and port operations"
 )
 
+
+@app.on_event("startup")
+async def limit_db_worker_threads():
+    configure_db_thread_pool()
+
+
+@app.on_event("shutdown")
+def stop_document_render_pool():
+    shutdown_document_pool()
+
+
+@app.on_event("startup")
+async def start_presence_backplane():
+    await presence_manager.start_backplane(create_backplane())
+
+
+@app.on_event("shutdown")
+async def stop_presence_backplane():
+    await presence_manager.stop_backplane()
+
+
 # Add slowapi rate limiter state
 app.state.limiter = limiter
 
@@ -109,53 +109,15 @@ app.add_middleware(
         "Origin",
         "X-Requested-With",
     ],
-    expose_headers=["Content-Disposition"],  # For file downloads
+    expose_headers=[
+        "Content-Disposition",  # For file downloads
+        NEXT_CURSOR_HEADER,  # Cursor paging of list endpoints
+    ],
 )
 
 # =============================================================================
-# Rate Limiting (simple in-memory implementation)
+# Rate Limiting (global per-IP limit; see app/rate_limiter.py for backends)
 # =============================================================================
-# In production, use Redis-based rate limiting for distributed systems
-# High limit to handle React Strict Mode double renders, parallel API calls,
-# and heavy pages like HomePage/Port Movement with many cargos
-RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", "2000"))  # requests per window
-RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW", "60"))  # window in seconds
-
-class RateLimiter:
-    """Simple in-memory rate limiter using sliding window."""
-    def __init__(self, max_requests: int, window_seconds: int):
-        self.max_requests = max_requests
-        self.window_seconds = window_seconds
-        self.requests = defaultdict(list)
-        self.lock = Lock()
-    
-    def is_allowed(self, client_id: str) -> bool:
-        """Check if request is allowed for this client."""
-        now = time.time()
-        with self.lock:
-            # Remove old requests outside the window
-            self.requests[client_id] = [
-                req_time for req_time in self.requests[client_id]
-                if now - req_time < self.window_seconds
-            ]
-            
-            # Check if under limit
-            if len(self.requests[client_id]) < self.max_requests:
-                self.requests[client_id].append(now)
-                return True
-            return False
-    
-    def get_remaining(self, client_id: str) -> int:
-        """Get remaining requests for this client."""
-        now = time.time()
-        with self.lock:
-            valid_requests = [
-                req_time for req_time in self.requests[client_id]
-                if now - req_time < self.window_seconds
-            ]
-            return max(0, self.max_requests - len(valid_requests))
-
-rate_limiter = RateLimiter(RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW)
 
 @app.middleware("http")
 async def rate_limit_middleware(request: Request, call_next):
@@ -164,25 +126,22 @@ async def rate_limit_middleware(request: Request, call_next):
     if request.url.path in ["/", "/api/health"]:
         return await call_next(request)
     
-    # Get client identifier (IP address)
-    client_ip = request.client.host if request.client else "unknown"
+    # Get client identifier (IP address, proxy-aware - same key as the per-route limits)
+    client_ip = get_client_ip(request)
+    
+    if rate_limiter.backend.blocking:
+        result = await run_in_threadpool(rate_limiter.hit, client_ip)
+    else:
+        result = rate_limiter.hit(client_ip)
     
-    if not rate_limiter.is_allowed(client_ip):
-        return JSONResponse(
-            status_code=429,
-            content={
-                "detail": "Too many requests. Please slow down.",
-                "retry_after": RATE_LIMIT_WINDOW
-            },
-            headers={"Retry-After": str(RATE_LIMIT_WINDOW)}
-        )
+    if not result.allowed:
+        return too_many_requests("Too many requests. Please slow down.", result.retry_after)
     
     response = await call_next(request)
     
     # Add rate limit headers
-    remaining = rate_limiter.get_remaining(client_ip)
-    response.headers["X-RateLimit-Limit"] = str(RATE_LIMIT_REQUESTS)
-    response.headers["X-RateLimit-Remaining"] = str(remaining)
+    response.headers["X-RateLimit-Limit"] = str(result.limit)
+    response.headers["X-RateLimit-Remaining"] = str(result.remaining)
     response.headers["X-RateLimit-Window"] = str(RATE_LIMIT_WINDOW)
     
     return response
@@ -191,7 +150,7 @@ async def rate_limit_middleware(request: Request, call_next):
 # Middleware to extract user initials from JWT token (not client header!)
 # =============================================================================
 from app.audit_utils import set_current_user_initials
-from app.auth import decode_token
+from app.auth import get_auth_context
 
 @app.middleware("http")
 async def extract_user_initials(request: Request, call_next):
@@ -200,24 +159,13 @@ async def extract_user_initials(request: Request, call_next):
     
     SECURITY: We extract info from the validated JWT token, NOT from
     a client-provided header. This prevents clients from spoofing identity.
-    """
-    user_initials = None
-    user_id = None
     
-    # Get Authorization header
-    auth_header = request.headers.get("Authorization")
-    if auth_header and auth_header.startswith("Bearer "):
-        token = auth_header[7:]  # Remove "Bearer " prefix
-        payload = decode_token(token)
-        if payload:
-            # Extract info from the validated JWT payload
-            user_initials = payload.get("initials")
-            user_id = payload.get("sub")  # User ID is stored in 'sub' claim
-            if user_id:
-                try:
-                    user_id = int(user_id)
-                except (ValueError, TypeError):
-                    user_id = None
+    The decoded claims are kept on request.state, so require_auth does not
+    verify the token a second time.
+    """
+    auth = get_auth_context(request)
+    user_initials = auth.initials
+    user_id = auth.user_id
     
     # Set for audit logging
     set_current_user_initials(user_initials)
@@ -310,6 +258,8 @@ app.include_router(inspectors.router, prefix="/api/inspectors", tags=["inspector
 app.include_router(discharge_ports.router, prefix="/api/discharge-ports", tags=["discharge-ports"])
 app.include_router(version_history_router.router, prefix="/api", tags=["version-history"])
 app.include_router(highlights.router, prefix="/api/highlights", tags=["highlights"])
+app.include_router(views.router, prefix="/api/views", tags=["views"])
+app.include_router(alerts.router, prefix="/api/alerts", tags=["alerts"])
 app.include_router(admin.router)
 
 
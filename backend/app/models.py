@@ -2,7 +2,7 @@
 SQLAlchemy models for the Oil Lifting Program.
 """
 from typing import Optional
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Enum, Text, Boolean, UniqueConstraint, CheckConstraint, Index, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Date, DateTime, ForeignKey, Enum, Text, Boolean, UniqueConstraint, CheckConstraint, Index, JSON
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 
@@ -145,6 +145,45 @@ class DischargePort(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
 
+class ReferenceDataVersion(Base):
+    """
+    Generation counter for the reference tables above (products, load ports,
+    inspectors, discharge ports). Bumped on every admin write so each worker's
+    in-memory reference data cache can detect that it is stale.
+    Holds a single row (id=1).
+    """
+    __tablename__ = "reference_data_versions"
+    
+    id = Column(Integer, primary_key=True)
+    generation = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class StartupFingerprint(Base):
+    """
+    Fingerprints of startup work already applied (e.g. "schema", "seed_users"),
+    so worker boots can skip create_all and seeding when nothing changed.
+    """
+    __tablename__ = "startup_fingerprints"
+    
+    key = Column(String(50), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class RateLimitCounter(Base):
+    """
+    Shared request counters for the database rate limit backend (RATE_LIMIT_BACKEND=database).
+    One row per (limit key, fixed window); rows expire two windows after their start.
+    """
+    __tablename__ = "rate_limit_counters"
+    
+    key = Column(String(255), primary_key=True)
+    window_index = Column(BigInteger, primary_key=True)  # floor(epoch seconds / window length)
+    count = Column(Integer, nullable=False, default=0)
+    expires_at = Column(Float, nullable=False, index=True)  # epoch seconds
+
+
 # =============================================================================
 # USER/AUTH MODELS
 # =============================================================================
@@ -461,6 +500,7 @@ class MonthlyPlan(Base):
         Index('idx_monthly_plans_year_month', 'year', 'month'),
         Index('idx_monthly_plans_contract_year_month', 'contract_id', 'year', 'month'),
         Index('idx_monthly_plans_product', 'product_id'),
+        Index('idx_monthly_plans_laycan_start', 'laycan_start'),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -475,6 +515,10 @@ class MonthlyPlan(Base):
     laycan_2_days = Column(String, nullable=True)
     laycan_2_days_remark = Column(Text, nullable=True)
     
+    # Parsed laycan (laycan_2_days, else laycan_5_days) - maintained by app.laycan on every flush
+    laycan_start = Column(Date, nullable=True)
+    laycan_end = Column(Date, nullable=True)
+    
     # CIF contract fields
     loading_month = Column(String, nullable=True)
     loading_window = Column(String, nullable=True)
@@ -547,6 +591,7 @@ class Cargo(Base):
         Index('idx_cargos_contract_id', 'contract_id'),
         Index('idx_cargos_customer_id', 'customer_id'),
         Index('idx_cargos_product_id', 'product_id'),
+        Index('idx_cargos_laycan_start', 'laycan_start'),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -572,6 +617,11 @@ class Cargo(Base):
     cargo_quantity = Column(Float, nullable=False)
     laycan_window = Column(String)
     
+    # Parsed laycan the alerts use: the monthly plan's for FOB, laycan_window for CIF.
+    # Maintained by app.laycan on every flush.
+    laycan_start = Column(Date, nullable=True)
+    laycan_end = Column(Date, nullable=True)
+    
     # Manual vessel operation fields
     eta = Column(String)
     berthed = Column(String)
@@ -689,6 +739,10 @@ class CargoPortOperation(Base):
 class CargoAuditLog(Base):
     """Audit log for cargo changes."""
     __tablename__ = "cargo_audit_logs"
+    __table_args__ = (
+        # Newest-first feeds and date-range filters (admin unified audit feed)
+        Index('idx_cargo_audit_logs_created', 'created_at', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     cargo_id = Column(Integer, ForeignKey("cargos.id"), nullable=True)  # Nullable for deleted cargos
@@ -719,6 +773,12 @@ class CargoAuditLog(Base):
 class MonthlyPlanAuditLog(Base):
     """Audit log for monthly plan changes."""
     __tablename__ = "monthly_plan_audit_logs"
+    __table_args__ = (
+        Index('idx_monthly_plan_audit_logs_created', 'created_at', 'id'),
+        # Reconciliation page: month/year and action filters, newest first
+        Index('idx_monthly_plan_audit_logs_period_created', 'year', 'month', 'created_at'),
+        Index('idx_monthly_plan_audit_logs_action_created', 'action', 'created_at'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     monthly_plan_id = Column(Integer, ForeignKey("monthly_plans.id"), nullable=True)
@@ -748,6 +808,10 @@ class MonthlyPlanAuditLog(Base):
 class QuarterlyPlanAuditLog(Base):
     """Audit log for quarterly plan changes."""
     __tablename__ = "quarterly_plan_audit_logs"
+    __table_args__ = (
+        Index('idx_quarterly_plan_audit_logs_created', 'created_at', 'id'),
+        Index('idx_quarterly_plan_audit_logs_action_created', 'action', 'created_at'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     quarterly_plan_id = Column(Integer, ForeignKey("quarterly_plans.id"), nullable=True)
@@ -817,6 +881,9 @@ class ContractAuditLog(Base):
     Tracks when additional quantities are authorized beyond the original contract.
     """
     __tablename__ = "contract_audit_logs"
+    __table_args__ = (
+        Index('idx_contract_audit_logs_created', 'created_at', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     contract_id = Column(Integer, ForeignKey("contracts.id"), nullable=True)
@@ -849,6 +916,9 @@ class GeneralAuditLog(Base):
     Covers: customers, products, load_ports, inspectors, users
     """
     __tablename__ = "general_audit_logs"
+    __table_args__ = (
+        Index('idx_general_audit_logs_created', 'created_at', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     entity_type = Column(String, nullable=False, index=True)  # CUSTOMER, PRODUCT, LOAD_PORT, INSPECTOR, USER
@@ -867,6 +937,40 @@ class GeneralAuditLog(Base):
     user_initials = Column(String(4), nullable=True, index=True)
 
 
+class WeeklyQuantitySnapshot(Base):
+    """
+    Monthly plan quantity per contract/product/month as it stood at a weekly
+    (Thursday end) boundary. "Previous week" figures of the weekly quantity
+    comparison are read from here instead of replaying audit logs per request.
+    """
+    __tablename__ = "weekly_quantity_snapshots"
+    __table_args__ = (
+        UniqueConstraint('snapshot_at', 'year', 'contract_id', 'product_name', 'month',
+                         name='uq_weekly_quantity_snapshots_key'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    snapshot_at = Column(DateTime(timezone=True), nullable=False)  # Week boundary (Thursday 23:59:59.999999 UTC)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+    contract_id = Column(Integer, nullable=False)  # No FK - snapshots outlive deleted contracts
+    contract_number = Column(String, nullable=True)
+    contract_name = Column(String, nullable=True)
+    product_name = Column(String, nullable=False)
+    quantity = Column(Float, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class WeeklyQuantitySnapshotRun(Base):
+    """Marks a (week boundary, year) snapshot as materialized, even when it has no rows."""
+    __tablename__ = "weekly_quantity_snapshot_runs"
+
+    snapshot_at = Column(DateTime(timezone=True), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    row_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 # =============================================================================
 # VERSION HISTORY & SOFT DELETE MODELS
 # =============================================================================
@@ -0,0 +1,261 @@
+"""
+Cached nomination Excel template.
+
+Parsing `templates/nomination_template.xlsx` with openpyxl costs far more than
+filling in a handful of cells, and the nomination endpoint used to parse it
+three times per request (once to render, twice with data_only=True to scan the
+`Reference` and `LIST ` sheets).
+
+This module parses the file once per modification time:
+- The render workbook is pickled right after loading; each render unpickles a
+  private clone, which is an order of magnitude cheaper than load_workbook and
+  never shares mutable cells between concurrent requests.
+- The `Reference` and `LIST ` sheets are read once into lowercased row indexes,
+  and lookups are memoized per (contract, customer) / (customer, inspector).
+
+Editing the template on disk is picked up on the next request (mtime check).
+
+Usage:
+    from app.nomination_template import nomination_template
+
+    wb = nomination_template.workbook()
+    md_reference, indicator, full_name = nomination_template.reference_data(contract_number, customer_name)
+    content = nomination_template.render(wb)
+"""
+import logging
+import os
+import pickle
+import threading
+from dataclasses import dataclass, field
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_PATH = Path(__file__).parent.parent / "templates" / "nomination_template.xlsx"
+
+REFERENCE_SHEET = "Reference"
+LIST_SHEET = "LIST "
+
+# Excel files are ZIP archives
+_ZIP_SIGNATURE = b"PK\x03\x04"
+
+
+@dataclass(frozen=True)
+class ReferenceRow:
+    """One row of the Reference sheet, with lowercased match keys."""
+    name_key: str
+    full_name_key: str
+    md_reference: str
+    indicator: str
+    full_name: str
+
+
+@dataclass(frozen=True)
+class InspectorRow:
+    """One row of the LIST sheet, with lowercased match keys."""
+    customer_key: str
+    inspector_key: str
+    code: str
+    spec: str
+
+
+@dataclass
+class ParsedTemplate:
+    """Everything derived from one version (mtime) of the template file."""
+    mtime_ns: int
+    workbook_bytes: bytes
+    sheetnames: Tuple[str, ...]
+    has_reference_sheet: bool
+    has_list_sheet: bool
+    reference_rows: Tuple[ReferenceRow, ...] = ()
+    inspector_rows: Tuple[InspectorRow, ...] = ()
+    _reference_memo: Dict[Tuple[str, str], tuple] = field(default_factory=dict)
+    _inspector_memo: Dict[Tuple[str, str], tuple] = field(default_factory=dict)
+
+
+def _strip_external_links(wb) -> None:
+    """Remove external links so Excel does not show security warnings."""
+    if hasattr(wb, 'external_references'):
+        wb.external_references = []
+    if hasattr(wb, '_external_links'):
+        wb._external_links = []
+
+
+def _cell_text(ws, row: int, column: int):
+    return ws.cell(row, column).value or ''
+
+
+class NominationTemplate:
+    """
+    Process-wide cache of the parsed nomination template.
+
+    The parsed template is swapped atomically, so readers never take a lock.
+    Only reparsing is serialized.
+    """
+
+    def __init__(self, path: Path = TEMPLATE_PATH):
+        self.path = path
+        self._parsed: Optional[ParsedTemplate] = None
+        self._reload_lock = threading.Lock()
+
+    # -------------------------------------------------------------------------
+    # Loading
+    # -------------------------------------------------------------------------
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def _parse(self, mtime_ns: int) -> ParsedTemplate:
+        from openpyxl import load_workbook
+
+        wb = load_workbook(self.path, read_only=False, keep_vba=False, data_only=False)
+        _strip_external_links(wb)
+        workbook_bytes = pickle.dumps(wb, protocol=pickle.HIGHEST_PROTOCOL)
+        sheetnames = tuple(wb.sheetnames)
+        wb.close()
+
+        has_reference_sheet = REFERENCE_SHEET in sheetnames
+        has_list_sheet = LIST_SHEET in sheetnames
+        reference_rows = ()
+        inspector_rows = ()
+        if has_reference_sheet or has_list_sheet:
+            # Lookup sheets are read for their cached formula values
+            values_wb = load_workbook(self.path, data_only=True)
+            if has_reference_sheet:
+                ws_ref = values_wb[REFERENCE_SHEET]
+                reference_rows = tuple(
+                    ReferenceRow(
+                        name_key=str(_cell_text(ws_ref, row, 2)).lower(),  # Column B: Reference
+                        full_name_key=str(_cell_text(ws_ref, row, 3)).lower(),  # Column C: Full name
+                        md_reference=_cell_text(ws_ref, row, 4),  # Column D: MD reference
+                        indicator=_cell_text(ws_ref, row, 10),  # Column J: Indicator
+                        full_name=_cell_text(ws_ref, row, 3),
+                    )
+                    for row in range(2, ws_ref.max_row + 1)
+                )
+            if has_list_sheet:
+                ws_list = values_wb[LIST_SHEET]
+                inspector_rows = tuple(
+                    InspectorRow(
+                        customer_key=str(_cell_text(ws_list, row, 3)).lower(),  # Column C: Customer List
+                        inspector_key=str(_cell_text(ws_list, row, 8)).lower(),  # Column H: Inspector
+                        code=_cell_text(ws_list, row, 9),  # Column I: Code
+                        spec=_cell_text(ws_list, row, 10),  # Column J: Spec
+                    )
+                    for row in range(2, ws_list.max_row + 1)
+                )
+            values_wb.close()
+
+        logger.info(
+            f"Nomination template parsed: {len(sheetnames)} sheets, {len(reference_rows)} reference rows, "
+            f"{len(inspector_rows)} inspector rows"
+        )
+        return ParsedTemplate(
+            mtime_ns=mtime_ns,
+            workbook_bytes=workbook_bytes,
+            sheetnames=sheetnames,
+            has_reference_sheet=has_reference_sheet,
+            has_list_sheet=has_list_sheet,
+            reference_rows=reference_rows,
+            inspector_rows=inspector_rows,
+        )
+
+    def parsed(self) -> ParsedTemplate:
+        """Return the parsed template, reparsing if the file changed on disk."""
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        parsed = self._parsed
+        if parsed is not None and parsed.mtime_ns == mtime_ns:
+            return parsed
+
+        with self._reload_lock:
+            if self._parsed is not None and self._parsed.mtime_ns == mtime_ns:
+                return self._parsed
+            self._parsed = self._parse(mtime_ns)
+            return self._parsed
+
+    # -------------------------------------------------------------------------
+    # Rendering
+    # -------------------------------------------------------------------------
+
+    def workbook(self):
+        """A private, writable copy of the template workbook."""
+        return pickle.loads(self.parsed().workbook_bytes)
+
+    @staticmethod
+    def render(wb) -> bytes:
+        """
+        Save a filled-in workbook to memory and return the .xlsx bytes.
+
+        Raises:
+            ValueError: If the output is empty or not a valid Excel (ZIP) file
+        """
+        _strip_external_links(wb)
+        buffer = BytesIO()
+        try:
+            wb.save(buffer)
+        finally:
+            wb.close()
+        content = buffer.getvalue()
+        if not content:
+            raise ValueError("Failed to generate Excel file - file is empty")
+        if content[:4] != _ZIP_SIGNATURE:
+            raise ValueError("Generated file is not a valid Excel file")
+        return content
+
+    # -------------------------------------------------------------------------
+    # Lookups
+    # -------------------------------------------------------------------------
+
+    def reference_data(self, contract_number: str, customer_name: str):
+        """(md_reference, indicator, full_name) from the Reference sheet, or (None, None, None)."""
+        parsed = self.parsed()
+        if not parsed.has_reference_sheet:
+            return None, None, None
+
+        key = (contract_number or '', customer_name or '')
+        cached = parsed._reference_memo.get(key)
+        if cached is not None:
+            return cached
+
+        contract_lower = key[0].lower()
+        customer_lower = key[1].lower()
+        result = (None, None, None)
+        for row in parsed.reference_rows:
+            # Match by contract number or customer name
+            if (contract_lower and contract_lower in row.name_key) or \
+               (customer_lower and customer_lower in row.full_name_key):
+                result = (row.md_reference, row.indicator, row.full_name)
+                break
+        parsed._reference_memo[key] = result
+        return result
+
+    def inspector_info(self, customer_name: str, inspector_name: str):
+        """(inspector_code, spec_code) from the LIST sheet, or (None, None)."""
+        parsed = self.parsed()
+        if not parsed.has_list_sheet:
+            return None, None
+
+        key = (customer_name or '', inspector_name or '')
+        cached = parsed._inspector_memo.get(key)
+        if cached is not None:
+            return cached
+
+        customer_lower = key[0].lower()
+        inspector_lower = key[1].lower()
+        result = (None, None)
+        if customer_lower:
+            for row in parsed.inspector_rows:
+                if customer_lower not in row.customer_key:
+                    continue
+                # If inspector matches, return code and spec; without an inspector, the first match
+                if not inspector_lower or inspector_lower in row.inspector_key:
+                    result = (row.code, row.spec)
+                    break
+        parsed._inspector_memo[key] = result
+        return result
+
+
+# Global nomination template instance
+nomination_template = NominationTemplate()
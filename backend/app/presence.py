@@ -3,21 +3,69 @@ WebSocket-based presence management for real-time collaboration awareness.
 
 Tracks which users are viewing which resources (pages, records) and broadcasts
 presence updates to all users viewing the same resource.
+
+Broadcasts never write to a socket themselves: every connection has a bounded
+outbound queue drained by its own writer task, so a slow or half-dead client
+only delays its own messages. Overflow policy per message:
+- coalesced: a newer message with the same coalesce key replaces the queued one
+  (presence lists, a user's editing state)
+- droppable: discarded when the queue is full ("user is editing" notifications;
+  the matching stop is not droppable, so an editing state never sticks)
+- otherwise the connection is evicted as a slow consumer (closed with 1013,
+  clients reconnect and reload)
+A send that does not complete within WS_SEND_TIMEOUT_SECONDS also evicts.
+Messages are built once per broadcast as `Frame`s and encoded once per wire
+format negotiated by the connections (app.wire).
+
+Data changes carry a per-resource sequence number ("seq") within this
+worker's stream ("epoch"). The last SYNC_REPLAY_BUFFER_SIZE changes per
+resource are kept, so a client reconnecting with ?since=<seq>&epoch=<epoch>
+receives only what it missed, or "resync_required" when that is no longer
+possible (buffer exceeded, or a different worker/process).
+
+With several uvicorn workers, broadcasts and presence membership travel over
+a pub/sub backplane (app.backplane): each worker delivers to its own sockets
+and the presence lists combine the users connected to every worker.
 """
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict, Set, Optional, List, Tuple
+from typing import Callable, Deque, Dict, Set, Optional, List, Tuple, Union
+from collections import deque
 from dataclasses import dataclass, asdict
 from datetime import datetime, timezone
 import asyncio
-import json
 import logging
 import os
+import time
+import uuid
+
+from app.backplane import Backplane, InProcessBackplane
+from app.wire import JSON, Frame, WireFormat, negotiate
 
 logger = logging.getLogger(__name__)
 
 # Maximum WebSocket connections per user (prevents resource exhaustion)
 MAX_CONNECTIONS_PER_USER = int(os.getenv("MAX_WS_CONNECTIONS_PER_USER", "50"))
 
+# Outbound messages queued per connection before the overflow policy applies
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+# Seconds a single send may take before the connection is evicted
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "5"))
+# Close code for evicted slow consumers ("Try Again Later")
+WS_CLOSE_SLOW_CONSUMER = 1013
+
+# Number of recent deliveries the latency percentiles are computed over
+_LATENCY_WINDOW = 2048
+
+# Window (ms) in which data changes on a resource are merged into one frame (0 sends each at once)
+DATA_SYNC_BATCH_MS = float(os.getenv("DATA_SYNC_BATCH_MS", "50"))
+
+# Data changes kept per resource for clients resuming with ?since=<seq>
+SYNC_REPLAY_BUFFER_SIZE = int(os.getenv("SYNC_REPLAY_BUFFER_SIZE", "1000"))
+
+# Seconds between full presence membership announcements on the backplane.
+# A worker that stays silent for 3 intervals is considered gone.
+PRESENCE_SYNC_SECONDS = float(os.getenv("PRESENCE_SYNC_SECONDS", "15"))
+
 
 @dataclass
 class PresenceUser:
@@ -31,6 +79,170 @@ class PresenceUser:
         return asdict(self)
 
 
+class FanoutMetrics:
+    """Counters and queue-to-wire latency of WebSocket fan-out (process-wide)."""
+    
+    def __init__(self) -> None:
+        self.enqueued = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.evicted = 0
+        self.send_timeouts = 0
+        self.send_errors = 0
+        self.replayed = 0
+        self.max_queue_depth = 0
+        self._latencies: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+    
+    def record_delivery(self, seconds: float) -> None:
+        self.sent += 1
+        self._latencies.append(seconds)
+    
+    def snapshot(self) -> dict:
+        latencies = sorted(self._latencies)
+        
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2)
+        
+        return {
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "evicted": self.evicted,
+            "send_timeouts": self.send_timeouts,
+            "send_errors": self.send_errors,
+            "replayed": self.replayed,
+            "max_queue_depth": self.max_queue_depth,
+            "latency_ms": {
+                "samples": len(latencies),
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": round(latencies[-1] * 1000, 2) if latencies else None,
+            },
+        }
+
+
+@dataclass
+class _Outbound:
+    payload: str
+    coalesce_key: Optional[str]
+    enqueued_at: float
+
+
+class ConnectionSender:
+    """
+    Bounded outbound queue for one WebSocket, drained by its own writer task.
+    
+    `enqueue` never waits. When the connection has to be evicted (queue full or
+    send timeout/failure) the sender closes itself and calls `on_evict(sender, reason)`.
+    Frames are encoded in the connection's wire format.
+    """
+    
+    def __init__(
+        self,
+        websocket: WebSocket,
+        label: str,
+        metrics: FanoutMetrics,
+        on_evict: Callable[["ConnectionSender", str], None],
+        max_queue: int = WS_SEND_QUEUE_SIZE,
+        send_timeout: float = WS_SEND_TIMEOUT_SECONDS,
+        wire: WireFormat = JSON,
+    ):
+        self.websocket = websocket
+        self.label = label
+        self.wire = wire
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.closed = False
+        self._metrics = metrics
+        self._on_evict = on_evict
+        self._queue: Deque[_Outbound] = deque()
+        self._pending_by_key: Dict[str, _Outbound] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+    
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name=f"ws-writer:{self.label}")
+    
+    def enqueue(self, frame: Frame, coalesce_key: Optional[str] = None, droppable: bool = False) -> bool:
+        """Queue a message. Returns False if it was dropped or the connection is closed/evicted."""
+        if self.closed:
+            return False
+        payload = frame.encode(self.wire)
+        
+        if coalesce_key is not None:
+            pending = self._pending_by_key.get(coalesce_key)
+            if pending is not None:
+                pending.payload = payload
+                self._metrics.coalesced += 1
+                return True
+        
+        if len(self._queue) >= self.max_queue:
+            if droppable:
+                self._metrics.dropped += 1
+                return False
+            self._evict(f"send queue full ({self.max_queue} messages)")
+            return False
+        
+        item = _Outbound(payload=payload, coalesce_key=coalesce_key, enqueued_at=time.perf_counter())
+        self._queue.append(item)
+        if coalesce_key is not None:
+            self._pending_by_key[coalesce_key] = item
+        self._metrics.enqueued += 1
+        if len(self._queue) > self._metrics.max_queue_depth:
+            self._metrics.max_queue_depth = len(self._queue)
+        self._wakeup.set()
+        return True
+    
+    async def _run(self) -> None:
+        while True:
+            while not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            
+            item = self._queue.popleft()
+            if item.coalesce_key is not None and self._pending_by_key.get(item.coalesce_key) is item:
+                del self._pending_by_key[item.coalesce_key]
+            
+            try:
+                await asyncio.wait_for(self.websocket.send_text(item.payload), timeout=self.send_timeout)
+            except asyncio.TimeoutError:
+                self._metrics.send_timeouts += 1
+                self._evict(f"send timed out after {self.send_timeout}s")
+                return
+            except Exception as e:
+                self._metrics.send_errors += 1
+                self._evict(f"send failed: {e}")
+                return
+            self._metrics.record_delivery(time.perf_counter() - item.enqueued_at)
+    
+    def _evict(self, reason: str) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self._metrics.evicted += 1
+        self._queue.clear()
+        self._pending_by_key.clear()
+        logger.warning(f"Evicting WebSocket {self.label}: {reason}")
+        self._on_evict(self, reason)
+    
+    def close(self) -> None:
+        """Stop the writer task and discard queued messages (the socket itself is left alone)."""
+        self.closed = True
+        self._queue.clear()
+        self._pending_by_key.clear()
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+
+
 class PresenceManager:
     """
     Manages WebSocket connections and tracks which users are viewing which resources.
@@ -46,11 +258,16 @@ class PresenceManager:
     Security features:
     - Maximum connections per user to prevent resource exhaustion
     - Per-resource locks to reduce contention
+    - Per-connection send queues with timeouts, so slow clients are evicted
+      instead of stalling broadcasts
+    
+    The connection limit applies per worker; presence lists are aggregated
+    across workers through the backplane.
     """
     
     def __init__(self, max_connections_per_user: int = MAX_CONNECTIONS_PER_USER):
-        # resource_key -> {user_id -> WebSocket}
-        self.connections: Dict[str, Dict[int, WebSocket]] = {}
+        # resource_key -> {user_id -> ConnectionSender (wraps the WebSocket)}
+        self.connections: Dict[str, Dict[int, ConnectionSender]] = {}
         # resource_key -> {user_id -> PresenceUser}
         self.user_info: Dict[str, Dict[int, PresenceUser]] = {}
         # user_id -> set of resource_keys (for cleanup on disconnect)
@@ -61,6 +278,23 @@ class PresenceManager:
         self._global_lock = asyncio.Lock()
         # Max connections per user
         self.max_connections_per_user = max_connections_per_user
+        # Fan-out counters and latency
+        self.metrics = FanoutMetrics()
+        # Cross-worker delivery (single worker until start_backplane is called)
+        self.backplane: Backplane = InProcessBackplane()
+        # resource_key -> {worker_id -> {user_id -> PresenceUser}} reported by other workers
+        self.remote_users: Dict[str, Dict[str, Dict[int, PresenceUser]]] = {}
+        # worker_id -> monotonic time its last message arrived
+        self._remote_seen: Dict[str, float] = {}
+        self._sync_task: Optional[asyncio.Task] = None
+        # resource_key -> {merge_key -> data_sync event} waiting for the batch flush
+        self._pending_sync: Dict[str, Dict[str, dict]] = {}
+        self._sync_flush_handles: Dict[str, asyncio.TimerHandle] = {}
+        # Identifies this manager's sequence numbers; a resume from another epoch needs a resync
+        self.stream_epoch = uuid.uuid4().hex[:12]
+        # resource_key -> last assigned seq / recent data_sync events (with seq)
+        self._sync_seq: Dict[str, int] = {}
+        self._sync_log: Dict[str, Deque[dict]] = {}
     
     async def _get_resource_lock(self, key: str) -> asyncio.Lock:
         """Get or create a lock for a specific resource."""
@@ -83,6 +317,206 @@ class PresenceManager:
         """Create a unique key for a resource."""
         return f"{resource_type}:{resource_id}"
     
+    def _evict_later(self, resource_type: str, resource_id: str, user_id: int) -> Callable[[ConnectionSender, str], None]:
+        """on_evict callback for a sender: unregister and close it outside the caller's stack."""
+        def on_evict(sender: ConnectionSender, reason: str) -> None:
+            asyncio.get_running_loop().create_task(self._evict(resource_type, resource_id, user_id, sender))
+        return on_evict
+    
+    async def _evict(self, resource_type: str, resource_id: str, user_id: int, sender: ConnectionSender) -> None:
+        """Drop a slow consumer: unregister it (unless it was already replaced) and close its socket."""
+        key = self._make_key(resource_type, resource_id)
+        if self.connections.get(key, {}).get(user_id) is sender:
+            await self.disconnect(resource_type, resource_id, user_id)
+        try:
+            await asyncio.wait_for(
+                sender.websocket.close(code=WS_CLOSE_SLOW_CONSUMER, reason="Slow consumer"),
+                timeout=WS_SEND_TIMEOUT_SECONDS
+            )
+        except Exception:
+            pass  # Connection may already be closed
+    
+    def _fan_out(
+        self,
+        connections: Dict[int, ConnectionSender],
+        frame: Frame,
+        exclude_user_id: Optional[int] = None,
+        coalesce_key: Optional[str] = None,
+        droppable: bool = False
+    ) -> Tuple[int, int]:
+        """Enqueue a frame on every connection (never waits). Returns (queued, rejected)."""
+        queued = rejected = 0
+        for uid, sender in connections.items():
+            if exclude_user_id and uid == exclude_user_id:
+                continue
+            if sender.enqueue(frame, coalesce_key=coalesce_key, droppable=droppable):
+                queued += 1
+            else:
+                rejected += 1
+        return (queued, rejected)
+    
+    async def send_to_user(self, resource_type: str, resource_id: str, user_id: int, message: Union[dict, Frame]) -> bool:
+        """Queue a message for one user's connection to a resource (e.g. heartbeat acks)."""
+        sender = self.connections.get(self._make_key(resource_type, resource_id), {}).get(user_id)
+        if sender is None:
+            return False
+        frame = message if isinstance(message, Frame) else Frame(message)
+        return sender.enqueue(frame, coalesce_key=frame.message.get("type"))
+    
+    def get_metrics(self) -> dict:
+        """Fan-out counters, delivery latency percentiles and current queue depths."""
+        senders = [sender for conns in self.connections.values() for sender in conns.values()]
+        return {
+            **self.metrics.snapshot(),
+            "connections": len(senders),
+            "resources": len(self.connections),
+            "queued_now": sum(sender.queue_depth for sender in senders),
+            "backplane": self.backplane.name,
+            "worker_id": self.backplane.worker_id,
+            "remote_workers": len(self._remote_seen),
+        }
+    
+    # -------------------------------------------------------------------------
+    # Backplane (multi-worker)
+    # -------------------------------------------------------------------------
+    
+    async def start_backplane(self, backplane: Backplane) -> None:
+        """Attach a backplane and announce this worker's presence membership. Call at app startup."""
+        self.backplane = backplane
+        await backplane.start(self._on_backplane_message)
+        if backplane.distributed:
+            self._sync_task = asyncio.create_task(self._sync_membership(), name="presence-sync")
+            await backplane.publish({"kind": "sync_request"})
+        logger.info(f"Presence backplane: {backplane.name} (worker {backplane.worker_id})")
+    
+    async def stop_backplane(self) -> None:
+        """Tell the other workers this one is gone and detach the backplane. Call at app shutdown."""
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            self._sync_task = None
+        if self.backplane.distributed:
+            await self.backplane.publish({"kind": "bye"})
+        await self.backplane.stop()
+        self.backplane = InProcessBackplane()
+    
+    def _local_membership(self, key: str) -> List[dict]:
+        return [u.to_dict() for u in self.user_info.get(key, {}).values()]
+    
+    async def _publish_membership(self, key: str) -> None:
+        if self.backplane.distributed:
+            await self.backplane.publish({"kind": "membership", "resource": key, "users": self._local_membership(key)})
+    
+    async def _publish_hello(self) -> None:
+        await self.backplane.publish({
+            "kind": "hello",
+            "resources": {key: self._local_membership(key) for key in list(self.user_info)},
+        })
+    
+    async def _sync_membership(self) -> None:
+        """Periodically announce full membership and forget workers that went silent."""
+        while True:
+            await asyncio.sleep(PRESENCE_SYNC_SECONDS)
+            try:
+                await self._publish_hello()
+                cutoff = time.monotonic() - 3 * PRESENCE_SYNC_SECONDS
+                for worker_id in [w for w, seen in self._remote_seen.items() if seen < cutoff]:
+                    logger.warning(f"Presence: worker {worker_id} went silent - dropping its users")
+                    await self._forget_worker(worker_id)
+            except Exception as e:
+                logger.error(f"Presence membership sync failed: {e}", exc_info=True)
+    
+    def _set_remote_users(self, worker_id: str, key: str, users: List[dict]) -> bool:
+        """Store another worker's users on a resource. Returns True if anything changed."""
+        new_users = {u["user_id"]: PresenceUser(**u) for u in users}
+        by_worker = self.remote_users.setdefault(key, {})
+        if by_worker.get(worker_id, {}) == new_users:
+            if not by_worker:
+                del self.remote_users[key]
+            return False
+        if new_users:
+            by_worker[worker_id] = new_users
+        else:
+            by_worker.pop(worker_id, None)
+        if not by_worker:
+            del self.remote_users[key]
+        return True
+    
+    async def _forget_worker(self, worker_id: str) -> None:
+        self._remote_seen.pop(worker_id, None)
+        changed = [key for key in list(self.remote_users) if self._set_remote_users(worker_id, key, [])]
+        for key in changed:
+            await self._broadcast_presence_key(key)
+    
+    async def _broadcast_presence_key(self, key: str) -> None:
+        resource_type, _, resource_id = key.partition(":")
+        await self.broadcast_presence(resource_type, resource_id)
+    
+    async def _on_backplane_message(self, message: dict) -> None:
+        """Handle a message published by another worker."""
+        origin = message.get("origin")
+        kind = message.get("kind")
+        if not origin:
+            return
+        if kind == "bye":
+            await self._forget_worker(origin)
+            return
+        self._remote_seen[origin] = time.monotonic()
+        
+        if kind == "deliver":
+            connections = dict(self.connections.get(message["resource"], {}))
+            if connections:
+                self._fan_out(
+                    connections,
+                    Frame(message["message"]),
+                    exclude_user_id=message.get("exclude_user_id"),
+                    coalesce_key=message.get("coalesce_key"),
+                    droppable=message.get("droppable", False)
+                )
+        elif kind == "sync_events":
+            self._deliver_sync_events(message["resource"], message.get("events", []))
+        elif kind == "membership":
+            if self._set_remote_users(origin, message["resource"], message.get("users", [])):
+                await self._broadcast_presence_key(message["resource"])
+        elif kind == "hello":
+            resources = message.get("resources", {})
+            keys = set(resources) | {key for key, by_worker in self.remote_users.items() if origin in by_worker}
+            for key in keys:
+                if self._set_remote_users(origin, key, resources.get(key, [])):
+                    await self._broadcast_presence_key(key)
+        elif kind == "sync_request":
+            await self._publish_hello()
+    
+    async def _publish_delivery(
+        self,
+        key: str,
+        frame: Frame,
+        exclude_user_id: Optional[int] = None,
+        coalesce_key: Optional[str] = None,
+        droppable: bool = False
+    ) -> None:
+        """Hand a message to the other workers for their connections on `key`."""
+        if not self.backplane.distributed:
+            return
+        try:
+            await self.backplane.publish({
+                "kind": "deliver",
+                "resource": key,
+                "message": frame.message,
+                "exclude_user_id": exclude_user_id,
+                "coalesce_key": coalesce_key,
+                "droppable": droppable,
+            })
+        except Exception as e:
+            logger.warning(f"Failed to publish {key} message to other workers: {e}")
+    
+    def _all_users(self, key: str) -> List[PresenceUser]:
+        """Users on a resource across all workers (local entry wins for a user on several)."""
+        users = dict(self.user_info.get(key, {}))
+        for by_user in self.remote_users.get(key, {}).values():
+            for uid, user in by_user.items():
+                users.setdefault(uid, user)
+        return list(users.values())
+    
     async def connect(
         self, 
         websocket: WebSocket, 
@@ -90,11 +524,22 @@ class PresenceManager:
         resource_id: str,
         user_id: int,
         initials: str,
-        full_name: str
+        full_name: str,
+        since: Optional[int] = None,
+        epoch: Optional[str] = None,
+        wire: Optional[WireFormat] = None
     ) -> Tuple[bool, Optional[str]]:
         """
         Register a user's connection to a resource.
         
+        The first message queued is the data changes missed since `since`
+        (or "resync_required"), then "sync_state" with the current epoch/seq.
+        
+        Args:
+            since: Last seq the client received before reconnecting
+            epoch: Epoch that seq belongs to
+            wire: Wire format (default: negotiated from the offered subprotocols)
+        
         Returns:
             Tuple of (success, error_message)
             - (True, None) if connection was successful
@@ -111,8 +556,10 @@ class PresenceManager:
             )
             return (False, f"Maximum connections ({self.max_connections_per_user}) exceeded. Please close some tabs.")
         
-        # Accept the connection
-        await websocket.accept()
+        # Accept the connection in the negotiated wire format
+        if wire is None:
+            wire = negotiate(websocket.scope.get("subprotocols") or [])
+        await websocket.accept(subprotocol=wire.subprotocol)
         
         # Get per-resource lock for finer-grained concurrency
         resource_lock = await self._get_resource_lock(key)
@@ -128,8 +575,23 @@ class PresenceManager:
                     self.user_resources[user_id] = set()
                 self.user_resources[user_id].add(key)
             
-            # Store connection and user info
-            self.connections[key][user_id] = websocket
+            # Store connection and user info (a reconnect replaces the previous sender)
+            previous = self.connections[key].get(user_id)
+            if previous is not None:
+                previous.close()
+            sender = ConnectionSender(
+                websocket,
+                label=f"{key}/user:{user_id}",
+                metrics=self.metrics,
+                on_evict=self._evict_later(resource_type, resource_id, user_id),
+                wire=wire,
+            )
+            sender.start()
+            self.connections[key][user_id] = sender
+            # No await between registering and replaying: every later change is
+            # delivered live, every earlier one is in the replay
+            for frame in self._resume_frames(key, user_id, since, epoch):
+                sender.enqueue(frame)
             self.user_info[key][user_id] = PresenceUser(
                 user_id=user_id,
                 initials=initials,
@@ -137,7 +599,8 @@ class PresenceManager:
                 connected_at=datetime.now(timezone.utc).isoformat()
             )
         
-        # Broadcast updated presence to all users on this resource
+        # Broadcast updated presence to all users on this resource (on every worker)
+        await self._publish_membership(key)
         await self.broadcast_presence(resource_type, resource_id)
         
         logger.info(f"User {initials} (ID:{user_id}) connected to {key} ({current_count + 1} total connections)")
@@ -158,7 +621,9 @@ class PresenceManager:
         
         async with resource_lock:
             if key in self.connections:
-                self.connections[key].pop(user_id, None)
+                sender = self.connections[key].pop(user_id, None)
+                if sender is not None:
+                    sender.close()
                 user = self.user_info[key].pop(user_id, None)
                 if user:
                     initials = user.initials
@@ -177,7 +642,8 @@ class PresenceManager:
         # Clean up the resource lock if no longer needed
         await self._cleanup_resource_lock(key)
         
-        # Broadcast updated presence to remaining users
+        # Broadcast updated presence to remaining users (on every worker)
+        await self._publish_membership(key)
         await self.broadcast_presence(resource_type, resource_id)
         
         logger.info(f"User {initials} (ID:{user_id}) disconnected from {key}")
@@ -198,7 +664,7 @@ class PresenceManager:
         resource_id: str,
         exclude_user_id: Optional[int] = None
     ) -> None:
-        """Broadcast current presence list to all users on a resource."""
+        """Broadcast the current presence list (users on all workers) to this worker's connections on a resource."""
         key = self._make_key(resource_type, resource_id)
         
         # Get per-resource lock
@@ -210,12 +676,12 @@ class PresenceManager:
                 return
             
             connections = dict(self.connections.get(key, {}))
-            users = list(self.user_info.get(key, {}).values())
+            users = self._all_users(key)
         
         user_initials = [u.initials for u in users]
         logger.info(f"Broadcasting presence for {key}: {len(users)} users ({', '.join(user_initials)}) to {len(connections)} connections")
         
-        message = json.dumps({
+        frame = Frame({
             "type": "presence",
             "resource_type": resource_type,
             "resource_id": resource_id,
@@ -223,31 +689,17 @@ class PresenceManager:
             "count": len(users)
         })
         
-        # Send to all connected users
-        disconnected = []
-        for uid, ws in connections.items():
-            if exclude_user_id and uid == exclude_user_id:
-                continue
-            try:
-                await ws.send_text(message)
-                logger.debug(f"Sent presence update to user {uid}")
-            except Exception as e:
-                logger.warning(f"Failed to send presence to user {uid}: {e}")
-                disconnected.append(uid)
-        
-        # Clean up any disconnected users
-        for uid in disconnected:
-            await self.disconnect(resource_type, resource_id, uid)
+        # Queue for all connected users; only the latest presence list matters
+        self._fan_out(connections, frame, exclude_user_id=exclude_user_id, coalesce_key="presence")
     
     def get_users_on_resource(
         self, 
         resource_type: str, 
         resource_id: str
     ) -> List[dict]:
-        """Get list of users currently viewing a resource (synchronous)."""
+        """Get list of users currently viewing a resource on any worker (synchronous)."""
         key = self._make_key(resource_type, resource_id)
-        users = self.user_info.get(key, {})
-        return [u.to_dict() for u in users.values()]
+        return [u.to_dict() for u in self._all_users(key)]
     
     def get_other_users(
         self, 
@@ -257,8 +709,7 @@ class PresenceManager:
     ) -> List[dict]:
         """Get list of OTHER users viewing a resource (excludes the requesting user)."""
         key = self._make_key(resource_type, resource_id)
-        users = self.user_info.get(key, {})
-        return [u.to_dict() for u in users.values() if u.user_id != exclude_user_id]
+        return [u.to_dict() for u in self._all_users(key) if u.user_id != exclude_user_id]
     
     async def send_notification(
         self,
@@ -266,7 +717,9 @@ class PresenceManager:
         resource_id: str,
         notification_type: str,
         data: dict,
-        exclude_user_id: Optional[int] = None
+        exclude_user_id: Optional[int] = None,
+        coalesce_key: Optional[str] = None,
+        droppable: bool = False
     ) -> None:
         """
         Send a custom notification to all users on a resource.
@@ -275,6 +728,10 @@ class PresenceManager:
         - "data_changed" - Someone saved changes
         - "editing_started" - Someone started editing a field
         - "editing_stopped" - Someone stopped editing
+        
+        Args:
+            coalesce_key: A queued message with the same key is replaced by this one
+            droppable: Drop (instead of evicting the client) when its queue is full
         """
         key = self._make_key(resource_type, resource_id)
         
@@ -284,20 +741,15 @@ class PresenceManager:
         async with resource_lock:
             connections = dict(self.connections.get(key, {}))
         
-        message = json.dumps({
+        frame = Frame({
             "type": notification_type,
             "resource_type": resource_type,
             "resource_id": resource_id,
             **data
         })
         
-        for uid, ws in connections.items():
-            if exclude_user_id and uid == exclude_user_id:
-                continue
-            try:
-                await ws.send_text(message)
-            except Exception as e:
-                logger.warning(f"Failed to send notification to user {uid}: {e}")
+        self._fan_out(connections, frame, exclude_user_id=exclude_user_id, coalesce_key=coalesce_key, droppable=droppable)
+        await self._publish_delivery(key, frame, exclude_user_id, coalesce_key, droppable)
 
 
     async def broadcast_data_change(
@@ -309,7 +761,9 @@ class PresenceManager:
         entity_id: int,
         entity_data: Optional[dict] = None,
         changed_by_user_id: Optional[int] = None,
-        changed_by_initials: Optional[str] = None
+        changed_by_initials: Optional[str] = None,
+        merge_key: Optional[str] = None,
+        base_version: Optional[int] = None
     ) -> Tuple[int, int]:
         """
         Broadcast a data change to all users viewing a resource.
@@ -317,6 +771,13 @@ class PresenceManager:
         This is used for real-time sync - when data changes, all connected
         users receive the update and can refresh their UI.
         
+        Changes are held for DATA_SYNC_BATCH_MS and merged per resource: within
+        the window the latest change per entity wins (a "created" followed by
+        "updated" stays "created" with the newer data, and deltas are folded
+        into the pending change of the same entity), and the batch goes out
+        as a single frame - "data_sync" for one change, "data_sync_batch" for
+        several.
+        
         Args:
             resource_type: Type of resource (e.g., "page")
             resource_id: ID of resource (e.g., "port-movement")
@@ -326,9 +787,16 @@ class PresenceManager:
             entity_data: Optional full entity data for "created" or "updated"
             changed_by_user_id: ID of user who made the change
             changed_by_initials: Initials of user who made the change
+            merge_key: Identity used for merging within a batch
+                (default "<entity_type>:<entity_id>")
+            base_version: Marks entity_data as a delta (changed fields only) on
+                top of this entity version; receivers on another version
+                fetch the entity instead
             
         Returns:
-            Tuple of (success_count, failure_count) for monitoring/feedback
+            Tuple of (pending_count, 0): this worker's connections the change will
+            be delivered to when the batch is flushed (other workers receive it
+            through the backplane).
         """
         key = self._make_key(resource_type, resource_id)
         
@@ -338,11 +806,9 @@ class PresenceManager:
         async with resource_lock:
             connections = dict(self.connections.get(key, {}))
         
-        if not connections:
-            return (0, 0)
-        
-        message = json.dumps({
-            "type": "data_sync",
+        # Numbered and buffered even with nobody connected: a viewer who
+        # dropped off resumes from its last seq and must find this change
+        event = {
             "change_type": change_type,
             "entity_type": entity_type,
             "entity_id": entity_id,
@@ -352,28 +818,142 @@ class PresenceManager:
                 "initials": changed_by_initials
             } if changed_by_user_id else None,
             "timestamp": datetime.now(timezone.utc).isoformat()
-        })
+        }
+        if base_version is not None:
+            event["base_version"] = base_version
         
         logger.info(f"Broadcasting {change_type} {entity_type}:{entity_id} to {len(connections)} users on {key}")
         
-        disconnected = []
-        success_count = 0
-        for uid, ws in connections.items():
-            # Don't send to the user who made the change - they already have the data
-            if changed_by_user_id and uid == changed_by_user_id:
-                continue
-            try:
-                await ws.send_text(message)
-                success_count += 1
-            except Exception as e:
-                logger.warning(f"Failed to send data_sync to user {uid}: {e}")
-                disconnected.append(uid)
-        
-        # Clean up disconnected users
-        for uid in disconnected:
-            await self.disconnect(resource_type, resource_id, uid)
+        self._queue_sync_event(key, merge_key or f"{entity_type}:{entity_id}", event)
+        # Don't send to the user who made the change - they already have the data
+        pending = sum(1 for uid in connections if not (changed_by_user_id and uid == changed_by_user_id))
+        return (pending, 0)
+    
+    def _queue_sync_event(self, key: str, merge_key: str, event: dict) -> None:
+        """Merge a change into the resource's pending batch and schedule the flush."""
+        pending = self._pending_sync.setdefault(key, {})
+        previous = pending.pop(merge_key, None)  # Re-insert so batch order follows the latest writes
+        if previous is not None and previous["change_type"] != "deleted" and "base_version" in event:
+            # A delta only carries its changed fields: fold it into the pending change,
+            # which keeps its base (or stays a full snapshot)
+            event = {**event, "entity_data": {**(previous["entity_data"] or {}), **(event["entity_data"] or {})}}
+            if "base_version" in previous:
+                event["base_version"] = previous["base_version"]
+            else:
+                del event["base_version"]
+        if previous is not None and previous["change_type"] == "created" and event["change_type"] == "updated":
+            event = {**event, "change_type": "created"}
+        pending[merge_key] = event
+        
+        if DATA_SYNC_BATCH_MS <= 0:
+            self._flush_sync(key)
+        elif key not in self._sync_flush_handles:
+            self._sync_flush_handles[key] = asyncio.get_running_loop().call_later(
+                DATA_SYNC_BATCH_MS / 1000, self._flush_sync, key
+            )
+    
+    def _flush_sync(self, key: str) -> None:
+        """Send a resource's pending changes to local connections and the other workers."""
+        self._sync_flush_handles.pop(key, None)
+        events = list(self._pending_sync.pop(key, {}).values())
+        if not events:
+            return
+        self._deliver_sync_events(key, events)
+        if self.backplane.distributed:
+            asyncio.get_running_loop().create_task(self._publish_sync_events(key, events))
+    
+    async def _publish_sync_events(self, key: str, events: List[dict]) -> None:
+        try:
+            await self.backplane.publish({"kind": "sync_events", "resource": key, "events": events})
+        except Exception as e:
+            logger.warning(f"Failed to publish {key} data changes to other workers: {e}")
+    
+    def _deliver_sync_events(self, key: str, events: List[dict]) -> Tuple[int, int]:
+        """
+        Queue data changes for this worker's connections on a resource.
         
-        return (success_count, len(disconnected))
+        Each user gets the changes made by others; a frame is built once per
+        distinct recipient set (everyone, or everyone minus one of the changers)
+        and encoded once per wire format.
+        """
+        events = self._record_sync_events(key, events)
+        connections = dict(self.connections.get(key, {}))
+        changers = {e["changed_by"]["user_id"] for e in events if e.get("changed_by")}
+        frames: Dict[Optional[int], Optional[Frame]] = {}
+        
+        queued = rejected = 0
+        for uid, sender in connections.items():
+            frame_key = uid if uid in changers else None
+            if frame_key not in frames:
+                frames[frame_key] = self._sync_frame(key, self._visible_events(events, frame_key))
+            frame = frames[frame_key]
+            if frame is None:
+                continue
+            if sender.enqueue(frame):
+                queued += 1
+            else:
+                rejected += 1
+        return (queued, rejected)
+    
+    @staticmethod
+    def _visible_events(events: List[dict], user_id: Optional[int]) -> List[dict]:
+        """Events not made by `user_id` (they already have their own changes)."""
+        return [e for e in events if not (e.get("changed_by") and e["changed_by"]["user_id"] == user_id)]
+    
+    def _sync_frame(self, key: str, events: List[dict], replay: bool = False) -> Optional[Frame]:
+        """data_sync for one event, data_sync_batch for several, None for none."""
+        if not events:
+            return None
+        if len(events) == 1 and not replay:
+            return Frame({"type": "data_sync", **events[0]})
+        resource_type, _, resource_id = key.partition(":")
+        return Frame({
+            "type": "data_sync_batch",
+            "resource_type": resource_type,
+            "resource_id": resource_id,
+            "count": len(events),
+            "seq": events[-1]["seq"],
+            "replay": replay,
+            "events": events,
+        })
+    
+    def _record_sync_events(self, key: str, events: List[dict]) -> List[dict]:
+        """Number events with the resource's next seq values and keep them for replay."""
+        seq = self._sync_seq.get(key, 0)
+        log = self._sync_log.get(key)
+        if log is None:
+            log = self._sync_log[key] = deque(maxlen=SYNC_REPLAY_BUFFER_SIZE)
+        numbered = []
+        for event in events:
+            seq += 1
+            numbered.append({**event, "seq": seq})
+        log.extend(numbered)
+        self._sync_seq[key] = seq
+        return numbered
+    
+    def _resume_frames(self, key: str, user_id: int, since: Optional[int], epoch: Optional[str]) -> List[Frame]:
+        """Frames that bring a (re)connecting client up to date, ending with sync_state."""
+        current = self._sync_seq.get(key, 0)
+        frames = []
+        if since is not None:
+            log = self._sync_log.get(key) or ()
+            # Oldest seq still buffered; everything after `since` must be in the buffer
+            oldest = log[0]["seq"] if log else current + 1
+            if epoch != self.stream_epoch or since > current or since + 1 < oldest:
+                frames.append(Frame({
+                    "type": "resync_required",
+                    "epoch": self.stream_epoch,
+                    "seq": current,
+                    "reason": "epoch" if epoch != self.stream_epoch else "buffer_exceeded",
+                }))
+            else:
+                missed = self._visible_events([e for e in log if e["seq"] > since], user_id)
+                frame = self._sync_frame(key, missed, replay=True)
+                if frame is not None:
+                    frames.append(frame)
+                    self.metrics.replayed += len(missed)
+        frames.append(Frame({"type": "sync_state", "epoch": self.stream_epoch, "seq": current}))
+        return frames
 
 
 # Global presence manager instance
@@ -0,0 +1,251 @@
+"""
+Column-projected read queries for the list views.
+
+List endpoints used to load whole ORM entities (Cargo has 50+ columns,
+MonthlyPlan 40+), joined with their relationships, only to copy a subset of
+fields into dicts. A `Projection` declares a view's columns once; the same
+declaration builds the `select()` and turns its rows into response dicts. Rows
+come back as plain `Row` tuples - no identity map, no instance state, no
+relationship loading.
+
+What the rows reference is resolved per batch instead of per row:
+- product, inspector and load port names from the in-process reference data
+  registry (app.reference_data)
+- port operations of a batch of cargos, and the quarterly plans, contracts and
+  customers behind a batch of monthly plans, with one narrow query each
+
+Views:
+- CARGO_LIST: port movement, completed cargos, active loadings, in-road CIF
+  lists and the lifting plan's cargo list (schemas.Cargo)
+- MONTHLY_PLAN: the lifting plan's monthly plan list (schemas.MonthlyPlan)
+- MONTHLY_PLAN plus the embedded quarterly plan/contract info: the CIF/TNG tab
+  and the port movement plan list (schemas.MonthlyPlanEnriched)
+
+The filter functions in the routers apply to a projection's select() as well
+as to an ORM query, so both paths share their WHERE clauses:
+
+    stmt = port_movement_query(db, [month], year, CARGO_LIST.select())
+    rows = db.execute(stmt).all()
+    return cargo_list_records(db, rows)
+"""
+from collections import defaultdict
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+
+from app import models
+from app.reference_data import reference_data
+
+# Maximum ids per IN (...) list when loading what a batch of rows references
+ID_CHUNK_SIZE = 1000
+
+
+class Projection:
+    """
+    An explicit column list of one model, shared by a view's query and its serializer.
+
+    Args:
+        model: Mapped class the columns belong to
+        fields: Column attribute names; they are also the keys of the records
+    """
+
+    def __init__(self, model, fields: Sequence[str]):
+        self.model = model
+        self.fields = tuple(fields)
+        self.columns = tuple(getattr(model, name) for name in self.fields)
+
+    def select(self):
+        """SELECT of just this projection's columns (filters and joins are added by the caller)."""
+        return select(*self.columns)
+
+    def record(self, row: Sequence[Any]) -> Dict[str, Any]:
+        """A row of select() as a dict keyed by field name, with enum members as their values."""
+        return {
+            name: value.value if isinstance(value, Enum) else value
+            for name, value in zip(self.fields, row)
+        }
+
+    def by_id(self, db: Session, ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Records for the given ids (the projection must include "id")."""
+        id_column = self.model.id
+        records = {}
+        for chunk in _chunks(ids):
+            for row in db.execute(self.select().where(id_column.in_(chunk))):
+                record = self.record(row)
+                records[record["id"]] = record
+        return records
+
+
+def _chunks(ids: Iterable[int]) -> Iterator[List[int]]:
+    unique = sorted({i for i in ids if i is not None})
+    for start in range(0, len(unique), ID_CHUNK_SIZE):
+        yield unique[start:start + ID_CHUNK_SIZE]
+
+
+# =============================================================================
+# CARGOS
+# =============================================================================
+
+CARGO_LIST = Projection(models.Cargo, [
+    "id", "cargo_id", "vessel_name", "customer_id", "product_id", "contract_id",
+    "contract_type", "combi_group_id", "lc_status", "inspector_id",
+    "cargo_quantity", "laycan_window", "eta", "berthed", "commenced", "etc",
+    "eta_load_port", "loading_start_time", "loading_completion_time", "etd_load_port",
+    "eta_discharge_port", "discharge_port_location", "discharge_completion_time",
+    "five_nd_date", "nd_completed", "nd_days", "nd_delivery_window", "notes",
+    "sailing_fax_entry_completed", "sailing_fax_entry_initials", "sailing_fax_entry_date",
+    "documents_mailing_completed", "documents_mailing_initials", "documents_mailing_date",
+    "inspector_invoice_completed", "inspector_invoice_initials", "inspector_invoice_date",
+    "status", "monthly_plan_id", "version", "created_at", "updated_at",
+])
+
+PORT_OPERATION = Projection(models.CargoPortOperation, [
+    "id", "cargo_id", "load_port_id", "status", "eta", "berthed", "commenced", "etc",
+    "notes", "created_at", "updated_at",
+])
+
+
+def _port_operations_by_cargo(db: Session, cargo_ids: Iterable[int], snapshot) -> Dict[int, List[dict]]:
+    """Port operations of the given cargos in load port display order, with port_code resolved."""
+    grouped = defaultdict(list)
+    for chunk in _chunks(cargo_ids):
+        stmt = PORT_OPERATION.select().where(models.CargoPortOperation.cargo_id.in_(chunk))
+        for row in db.execute(stmt):
+            op = PORT_OPERATION.record(row)
+            port = snapshot.load_ports_by_id.get(op["load_port_id"])
+            grouped[op["cargo_id"]].append((port, op))
+
+    result = {}
+    for cargo_id, ops in grouped.items():
+        ops.sort(key=lambda item: (item[0].sort_order if item[0] else 0, item[1]["load_port_id"]))
+        result[cargo_id] = ops
+    return result
+
+
+def cargo_list_records(db: Session, rows: Sequence[Any]) -> List[dict]:
+    """
+    Turn CARGO_LIST rows into schemas.Cargo-shaped dicts (same values as _cargo_to_schema).
+    """
+    snapshot = reference_data.snapshot(db)
+    ops_by_cargo = _port_operations_by_cargo(db, (row.id for row in rows), snapshot)
+
+    records = []
+    for row in rows:
+        record = CARGO_LIST.record(row)
+        record["product_name"] = snapshot.product_name_by_id.get(record.pop("product_id"))
+        record["inspector_name"] = snapshot.inspector_name_by_id.get(record.pop("inspector_id"))
+
+        ops = ops_by_cargo.get(record["id"])
+        port_operations = None
+        load_ports = ""
+        if ops:
+            load_ports = ",".join(port.code for port, _ in ops if port)
+            port_operations = []
+            for port, op in ops:
+                op = dict(op)
+                del op["load_port_id"]
+                op["port_code"] = port.code if port else ""
+                port_operations.append(op)
+        record["load_ports"] = load_ports
+        record["port_operations"] = port_operations
+        records.append(record)
+    return records
+
+
+# =============================================================================
+# MONTHLY PLANS
+# =============================================================================
+
+MONTHLY_PLAN = Projection(models.MonthlyPlan, [
+    "id", "month", "year", "month_quantity", "number_of_liftings", "planned_lifting_sizes",
+    "laycan_5_days", "laycan_2_days", "laycan_2_days_remark",
+    "loading_month", "loading_window", "cif_route",
+    "delivery_month", "delivery_window", "delivery_window_remark",
+    "combi_group_id", "product_id",
+    "authority_topup_quantity", "authority_topup_reference", "authority_topup_reason", "authority_topup_date",
+    "tng_issued", "tng_issued_date", "tng_issued_initials",
+    "tng_revised", "tng_revised_date", "tng_revised_initials", "tng_remarks",
+    "quarterly_plan_id", "contract_id", "version", "created_at", "updated_at",
+])
+
+# Embedded in MonthlyPlanEnriched rows
+QUARTERLY_PLAN_INFO = Projection(models.QuarterlyPlan, [
+    "id", "product_id", "contract_year", "q1_quantity", "q2_quantity", "q3_quantity",
+    "q4_quantity", "contract_id",
+])
+
+CONTRACT_INFO = Projection(models.Contract, [
+    "id", "contract_id", "contract_number", "contract_type", "contract_category",
+    "payment_method", "start_period", "end_period", "fiscal_start_month",
+    "tng_lead_days", "tng_notes", "cif_destination", "customer_id",
+])
+
+CUSTOMER_INFO = Projection(models.Customer, ["id", "customer_id", "name"])
+
+
+def monthly_plan_records(db: Session, rows: Sequence[Any]) -> List[dict]:
+    """Turn MONTHLY_PLAN rows into schemas.MonthlyPlan-shaped dicts (same values as _monthly_plan_to_schema)."""
+    snapshot = reference_data.snapshot(db)
+    records = []
+    for row in rows:
+        record = MONTHLY_PLAN.record(row)
+        record["product_name"] = snapshot.product_name_by_id.get(record.pop("product_id"))
+        records.append(record)
+    return records
+
+
+def _contract_products(db: Session, contract_ids: Iterable[int]) -> Dict[int, List[dict]]:
+    """Product lists of the given contracts, in ContractProduct.to_dict format."""
+    products = defaultdict(list)
+    for chunk in _chunks(contract_ids):
+        contract_products = db.query(models.ContractProduct).options(
+            joinedload(models.ContractProduct.product)
+        ).filter(
+            models.ContractProduct.contract_id.in_(chunk)
+        ).order_by(models.ContractProduct.id).all()
+        for cp in contract_products:
+            products[cp.contract_id].append(cp.to_dict())
+    return products
+
+
+def monthly_plan_enriched_records(db: Session, rows: Sequence[Any]) -> List[dict]:
+    """
+    Turn MONTHLY_PLAN rows into schemas.MonthlyPlanEnriched-shaped dicts
+    (monthly plan fields plus the embedded quarterly plan and contract info).
+
+    The quarterly plans, contracts and customers are loaded once per batch and
+    shared by every plan that references them.
+    """
+    snapshot = reference_data.snapshot(db)
+    records = monthly_plan_records(db, rows)
+
+    quarterly_plans = QUARTERLY_PLAN_INFO.by_id(db, (r["quarterly_plan_id"] for r in records))
+    # A plan's contract: its own contract_id, else the quarterly plan's
+    contract_ids = {}
+    for record in records:
+        qp = quarterly_plans.get(record["quarterly_plan_id"])
+        contract_ids[record["id"]] = record["contract_id"] or (qp["contract_id"] if qp else None)
+    contracts = CONTRACT_INFO.by_id(db, contract_ids.values())
+    customers = CUSTOMER_INFO.by_id(db, (c["customer_id"] for c in contracts.values()))
+    products = _contract_products(db, contracts.keys())
+
+    for record in records:
+        quarterly_plan_data = None
+        qp = quarterly_plans.get(record["quarterly_plan_id"])
+        if qp:
+            quarterly_plan_data = dict(qp)
+            quarterly_plan_data["product_name"] = snapshot.product_name_by_id.get(quarterly_plan_data.pop("product_id"))
+
+        contract_data = None
+        contract = contracts.get(contract_ids[record["id"]])
+        if contract:
+            contract_data = dict(contract)
+            contract_data["products"] = products.get(contract["id"], [])
+            contract_data["customer"] = customers.get(contract["customer_id"])
+
+        record["quarterly_plan"] = quarterly_plan_data
+        record["contract"] = contract_data
+    return records
+
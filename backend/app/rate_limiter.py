@@ -1,55 +1,472 @@
 """
-Rate limiting configuration for the Oil Lifting Program API.
+Rate limiting for the Oil Lifting Program API.
 
-Uses slowapi to prevent brute force attacks and API abuse.
+Two layers share one client key (get_client_ip), one 429 format and one counter backend:
+- The global per-IP limit applied by the HTTP middleware in main.py (`rate_limiter`).
+- Per-route limits on sensitive endpoints via slowapi (`limiter`, e.g. 5 logins/minute).
+
+Algorithm: sliding window counter. Each key keeps only the counts of the current and
+previous fixed window; the request rate is estimated as
+    previous * (1 - elapsed_fraction_of_current_window) + current
+which is O(1) time and memory per client, unlike a list of timestamps.
+
+Backends (RATE_LIMIT_BACKEND):
+- "memory" (default): per-process dict with lock striping and idle-key eviction.
+- "database": counters in the `rate_limit_counters` table, so limits hold across
+  multiple uvicorn workers (SQLite or PostgreSQL, via the app's engine).
 """
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from fastapi import Request
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from limits.storage import Storage
+import asyncio
+import functools
+import ipaddress
 import logging
+import math
+import os
+import threading
+import time
+import zlib
 
 logger = logging.getLogger(__name__)
 
+# Global per-IP limit. High to handle React Strict Mode double renders, parallel API calls,
+# and heavy pages like HomePage/Port Movement with many cargos
+RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", "2000"))  # requests per window
+RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW", "60"))  # window in seconds
+
+# Counter backend shared by the global limit and slowapi: "memory" or "database"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+
+# Lock stripes for the in-memory backend (keys are spread by CRC32)
+RATE_LIMIT_STRIPES = 64
+
+
+def _parse_trusted_proxies(value: str) -> List[ipaddress._BaseNetwork]:
+    networks = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(item, strict=False))
+        except ValueError:
+            logger.warning(f"Ignoring invalid TRUSTED_PROXIES entry: {item!r}")
+    return networks
+
+
+# Reverse proxies whose X-Forwarded-For is believed (comma-separated IPs or CIDRs,
+# e.g. "127.0.0.1,10.0.0.0/8"). Empty: the header is ignored, since any client can set it.
+TRUSTED_PROXIES = _parse_trusted_proxies(os.getenv("TRUSTED_PROXIES", ""))
+
+
+# Set once the "X-Forwarded-For from an untrusted peer" warning has been logged
+_untrusted_forwarded_warned = False
+
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
 
 def get_client_ip(request: Request) -> str:
     """
     Get client IP address, handling proxies.
-    
-    Checks X-Forwarded-For header first (for reverse proxy setups),
-    then falls back to direct client IP.
+
+    The direct peer address, unless the peer is one of TRUSTED_PROXIES: then the
+    X-Forwarded-For chain is walked from the right (the entries our proxies
+    appended) and the first address that isn't a trusted proxy is the client.
     """
-    # Check for forwarded header (common in production with reverse proxy)
+    global _untrusted_forwarded_warned
+    peer = request.client.host if request.client else None
+    if peer is None:
+        return "unknown"
     forwarded = request.headers.get("X-Forwarded-For")
-    if forwarded:
-        # X-Forwarded-For can contain multiple IPs; first is the client
-        return forwarded.split(",")[0].strip()
-    
-    # Fall back to direct client IP
-    if request.client:
-        return request.client.host
-    
-    return "unknown"
+    if not _is_trusted_proxy(peer):
+        if forwarded and not _untrusted_forwarded_warned:
+            # Behind a reverse proxy every client would share the proxy's limits
+            _untrusted_forwarded_warned = True
+            logger.warning(
+                f"X-Forwarded-For received from {peer}, which is not in TRUSTED_PROXIES: "
+                f"rate limits are keyed on {peer}. If it is your reverse proxy, add it to TRUSTED_PROXIES."
+            )
+        return peer
+
+    if not forwarded:
+        return peer
+    for host in reversed([h.strip() for h in forwarded.split(",") if h.strip()]):
+        if not _is_trusted_proxy(host):
+            return host
+    return peer
+
+
+# =============================================================================
+# COUNTER BACKENDS
+# =============================================================================
+
+class RateLimitBackend:
+    """
+    Fixed-window counters keyed by (key, floor(now / window)).
+
+    hit() increments the current window and returns (current, previous) counts,
+    which is all the sliding window counter needs.
+    """
+
+    # True if calls do I/O and must not run on the event loop
+    blocking = False
+
+    def hit(self, key: str, window: int, now: float, amount: int = 1) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    def peek(self, key: str, window: int, now: float) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    def clear(self, key: str) -> None:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        raise NotImplementedError
+
+
+class _Stripe:
+    __slots__ = ("lock", "entries", "next_sweep")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # key -> [window_index, current_count, previous_count, expires_at]
+        self.entries: Dict[str, List] = {}
+        self.next_sweep = 0.0
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    In-process counters. Keys are spread over lock stripes so concurrent clients rarely
+    contend; each stripe drops keys idle for two windows when it is next touched after
+    its sweep deadline, so departed clients do not accumulate.
+    """
+
+    def __init__(self, stripes: int = RATE_LIMIT_STRIPES, sweep_interval: float = 30.0):
+        self._stripes = [_Stripe() for _ in range(stripes)]
+        self.sweep_interval = sweep_interval
+
+    def _stripe(self, key: str) -> _Stripe:
+        return self._stripes[zlib.crc32(key.encode("utf-8")) % len(self._stripes)]
+
+    @staticmethod
+    def _roll(entry: List, index: int) -> None:
+        """Advance an entry to window `index`, shifting the current count into previous."""
+        if entry[0] == index:
+            return
+        entry[2] = entry[1] if entry[0] == index - 1 else 0
+        entry[1] = 0
+        entry[0] = index
+
+    def _sweep(self, stripe: _Stripe, now: float) -> None:
+        expired = [k for k, e in stripe.entries.items() if e[3] <= now]
+        for k in expired:
+            del stripe.entries[k]
+        stripe.next_sweep = now + self.sweep_interval
+
+    def hit(self, key: str, window: int, now: float, amount: int = 1) -> Tuple[int, int]:
+        index = int(now // window)
+        stripe = self._stripe(key)
+        with stripe.lock:
+            if now >= stripe.next_sweep:
+                self._sweep(stripe, now)
+            entry = stripe.entries.get(key)
+            if entry is None:
+                entry = stripe.entries[key] = [index, 0, 0, 0.0]
+            else:
+                self._roll(entry, index)
+            entry[1] += amount
+            entry[3] = (index + 2) * window
+            return entry[1], entry[2]
+
+    def peek(self, key: str, window: int, now: float) -> Tuple[int, int]:
+        index = int(now // window)
+        stripe = self._stripe(key)
+        with stripe.lock:
+            entry = stripe.entries.get(key)
+            if entry is None:
+                return 0, 0
+            if entry[0] == index:
+                return entry[1], entry[2]
+            return 0, entry[1] if entry[0] == index - 1 else 0
+
+    def clear(self, key: str) -> None:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            stripe.entries.pop(key, None)
+
+    def reset(self) -> None:
+        for stripe in self._stripes:
+            with stripe.lock:
+                stripe.entries.clear()
+
+
+class DatabaseRateLimitBackend(RateLimitBackend):
+    """
+    Counters in the rate_limit_counters table, shared by every worker using the same database.
+
+    Each hit is one upsert (INSERT ... ON CONFLICT DO UPDATE ... RETURNING, supported by
+    PostgreSQL and SQLite 3.35+) plus a primary-key read of the previous window.
+    Expired rows are deleted at most every `sweep_interval` seconds per worker.
+    """
+
+    blocking = True
+
+    def __init__(self, sweep_interval: float = 60.0):
+        self.sweep_interval = sweep_interval
+        self._next_sweep = 0.0
+
+    def _insert(self, dialect_name: str):
+        from app.models import RateLimitCounter
+        if dialect_name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        return insert(RateLimitCounter.__table__), RateLimitCounter.__table__
+
+    def hit(self, key: str, window: int, now: float, amount: int = 1) -> Tuple[int, int]:
+        from sqlalchemy import select, delete
+        from app.database import engine
+
+        index = int(now // window)
+        insert, table = self._insert(engine.dialect.name)
+        stmt = insert.values(key=key, window_index=index, count=amount, expires_at=(index + 2) * window)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.key, table.c.window_index],
+            set_={"count": table.c.count + amount},
+        ).returning(table.c.count)
+
+        with engine.begin() as conn:
+            current = conn.execute(stmt).scalar_one()
+            previous = conn.execute(
+                select(table.c.count).where(table.c.key == key, table.c.window_index == index - 1)
+            ).scalar() or 0
+            if now >= self._next_sweep:
+                self._next_sweep = now + self.sweep_interval
+                conn.execute(delete(table).where(table.c.expires_at <= now))
+        return current, previous
+
+    def peek(self, key: str, window: int, now: float) -> Tuple[int, int]:
+        from sqlalchemy import select
+        from app.database import engine
+        from app.models import RateLimitCounter
+
+        index = int(now // window)
+        table = RateLimitCounter.__table__
+        with engine.connect() as conn:
+            rows = dict(conn.execute(
+                select(table.c.window_index, table.c.count).where(
+                    table.c.key == key, table.c.window_index.in_([index, index - 1])
+                )
+            ).all())
+        return rows.get(index, 0), rows.get(index - 1, 0)
+
+    def clear(self, key: str) -> None:
+        from sqlalchemy import delete
+        from app.database import engine
+        from app.models import RateLimitCounter
+
+        with engine.begin() as conn:
+            conn.execute(delete(RateLimitCounter.__table__).where(RateLimitCounter.__table__.c.key == key))
+
+    def reset(self) -> None:
+        from sqlalchemy import delete
+        from app.database import engine
+        from app.models import RateLimitCounter
+
+        with engine.begin() as conn:
+            conn.execute(delete(RateLimitCounter.__table__))
+
+
+def create_backend(name: str = RATE_LIMIT_BACKEND) -> RateLimitBackend:
+    if name == "database":
+        logger.info("Rate limiting: shared counters in the database (rate_limit_counters)")
+        return DatabaseRateLimitBackend()
+    if name != "memory":
+        logger.warning(f"Unknown RATE_LIMIT_BACKEND '{name}', using in-memory counters")
+    return MemoryRateLimitBackend()
+
+
+rate_limit_backend = create_backend()
+
+
+# =============================================================================
+# GLOBAL LIMIT (HTTP middleware)
+# =============================================================================
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: int  # seconds until the estimate drops below the limit (0 if allowed)
+
+
+class RateLimiter:
+    """Sliding window counter limiter: constant work and memory per client."""
+
+    def __init__(self, max_requests: int, window_seconds: int, backend: RateLimitBackend, prefix: str = "global"):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.backend = backend
+        self.prefix = prefix
+
+    def _estimate(self, current: int, previous: int, now: float) -> float:
+        elapsed = (now % self.window_seconds) / self.window_seconds
+        return previous * (1 - elapsed) + current
+
+    def hit(self, client_id: str) -> RateLimitResult:
+        """Count a request for this client and report whether it is allowed."""
+        now = time.time()
+        current, previous = self.backend.hit(f"{self.prefix}:{client_id}", self.window_seconds, now)
+        # The rejected request itself is counted too, so hammering clients stay limited
+        used = self._estimate(current, previous, now)
+        if used <= self.max_requests:
+            return RateLimitResult(True, self.max_requests, max(0, int(self.max_requests - used)), 0)
+        return RateLimitResult(False, self.max_requests, 0, self._retry_after(current, previous, now))
+
+    def _retry_after(self, current: int, previous: int, now: float) -> int:
+        """Seconds until the estimate (without new requests) drops back to the limit."""
+        offset = now % self.window_seconds
+        if current < self.max_requests and previous > 0:
+            # Still in this window, once enough of the previous window has decayed
+            needed = 1 - (self.max_requests - current) / previous
+            wait = needed * self.window_seconds - offset
+        else:
+            # In the next window, once enough of this window has decayed
+            needed = max(0.0, 1 - self.max_requests / current) if current else 0.0
+            wait = (self.window_seconds - offset) + needed * self.window_seconds
+        return max(1, math.ceil(wait))
+
+    def get_remaining(self, client_id: str) -> int:
+        """Get remaining requests for this client without counting one."""
+        now = time.time()
+        current, previous = self.backend.peek(f"{self.prefix}:{client_id}", self.window_seconds, now)
+        return max(0, int(self.max_requests - self._estimate(current, previous, now)))
+
+
+rate_limiter = RateLimiter(RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW, rate_limit_backend)
+
+
+def too_many_requests(detail: str, retry_after: int) -> JSONResponse:
+    """429 response shared by the global limit and the per-route limits."""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": detail, "retry_after": retry_after},
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+# =============================================================================
+# PER-ROUTE LIMITS (slowapi)
+# =============================================================================
+
+class BackendStorage(Storage):
+    """
+    `limits` storage adapter so slowapi's per-route limits use the same counter backend
+    (and therefore hold across workers with RATE_LIMIT_BACKEND=database).
+    Selected with storage_uri="backend://"; supports slowapi's default fixed-window strategy.
+    """
+    STORAGE_SCHEME = ["backend"]
+
+    # limits keys end with ".../<amount>/<multiples>/<granularity>", e.g. ".../5/1/minute"
+    GRANULARITY_SECONDS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400, "month": 2592000, "year": 31104000}
+
+    def __init__(self, uri: Optional[str] = None, wrap_exceptions: bool = False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.backend = rate_limit_backend
+
+    @property
+    def base_exceptions(self):
+        return Exception
+
+    def _window(self, key: str) -> int:
+        parts = key.rsplit("/", 2)
+        try:
+            return int(parts[1]) * self.GRANULARITY_SECONDS[parts[2]]
+        except (IndexError, KeyError, ValueError):
+            return RATE_LIMIT_WINDOW
+
+    def incr(self, key: str, expiry: int, *args, amount: int = 1, **kwargs) -> int:
+        current, _ = self.backend.hit(f"route:{key}", int(expiry), time.time(), amount)
+        return current
+
+    def get(self, key: str) -> int:
+        current, _ = self.backend.peek(f"route:{key}", self._window(key), time.time())
+        return current
+
+    def get_expiry(self, key: str) -> float:
+        window = self._window(key)
+        return (int(time.time() // window) + 1) * window
+
+    def check(self) -> bool:
+        return True
+
+    def reset(self) -> Optional[int]:
+        self.backend.reset()
+        return None
+
+    def clear(self, key: str) -> None:
+        self.backend.clear(f"route:{key}")
+
+
+class BackendLimiter(Limiter):
+    """
+    slowapi Limiter that checks async routes in the thread pool when the counter
+    backend blocks (RATE_LIMIT_BACKEND=database), like the global middleware does.
+    slowapi itself calls the storage directly on the event loop for async routes.
+    """
+
+    def limit(self, *args, **kwargs):
+        decorator = super().limit(*args, **kwargs)
+
+        def wrap(func):
+            wrapped = decorator(func)
+            if not (rate_limit_backend.blocking and asyncio.iscoroutinefunction(func)):
+                return wrapped
+
+            @functools.wraps(wrapped)
+            async def offloaded(*call_args, **call_kwargs):
+                request = call_kwargs.get("request")
+                if (
+                    self.enabled and self._auto_check and isinstance(request, Request)
+                    and not getattr(request.state, "_rate_limiting_complete", False)
+                ):
+                    await run_in_threadpool(self._check_request_limit, request, func, False)
+                    # slowapi's own wrapper sees the check as done and skips it
+                    request.state._rate_limiting_complete = True
+                return await wrapped(*call_args, **call_kwargs)
+
+            return offloaded
+
+        return wrap
 
 
 # Create limiter instance with IP-based key function
-limiter = Limiter(key_func=get_client_ip)
+limiter = BackendLimiter(key_func=get_client_ip, storage_uri="backend://")
 
 
 async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded) -> JSONResponse:
     """
     Custom handler for rate limit exceeded errors.
-    
+
     Returns a user-friendly error message with retry information.
     """
     logger.warning(f"Rate limit exceeded for IP: {get_client_ip(request)} on {request.url.path}")
-    
-    return JSONResponse(
-        status_code=429,
-        content={
-            "detail": "Too many requests. Please wait before trying again.",
-            "retry_after": exc.detail  # Contains the retry-after time
-        }
-    )
 
+    retry_after = 60
+    if getattr(exc, "limit", None) is not None:
+        retry_after = int(exc.limit.limit.get_expiry())
+    return too_many_requests("Too many requests. Please wait before trying again.", retry_after)
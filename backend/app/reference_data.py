@@ -0,0 +1,233 @@
+"""
+In-memory reference data registry for the Oil Lifting Program.
+
+Products, load ports, inspectors and discharge ports change rarely but are looked
+up on every row by the serializers (product name, inspector name, voyage days...).
+This module keeps a process-wide snapshot of those tables so hot paths do
+dictionary lookups instead of SQL.
+
+Invalidation:
+- Admin write endpoints call `reference_data.invalidate(db)` before committing.
+  That bumps a generation counter in `reference_data_versions` inside the same
+  transaction and marks the local snapshot stale.
+- Other uvicorn workers compare their snapshot generation against the DB
+  counter at most every REFERENCE_DATA_CHECK_SECONDS and reload when it moved.
+
+Usage:
+    from app.reference_data import reference_data
+
+    name = reference_data.product_name(db, cargo.product_id)
+    port = reference_data.load_port_by_code(db, "MAA")
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import models
+
+logger = logging.getLogger(__name__)
+
+# How often (seconds) a worker verifies its snapshot against the DB generation counter
+REFERENCE_DATA_CHECK_SECONDS = float(os.getenv("REFERENCE_DATA_CHECK_SECONDS", "5"))
+
+# Single row holding the generation counter
+_VERSION_ROW_ID = 1
+
+
+@dataclass(frozen=True)
+class LoadPortRef:
+    """Lightweight, session-independent view of a LoadPort row."""
+    id: int
+    code: str
+    name: str
+    is_active: bool
+    sort_order: int
+
+
+@dataclass(frozen=True)
+class DischargePortRef:
+    """Lightweight, session-independent view of a DischargePort row."""
+    id: int
+    name: str
+    voyage_days_suez: Optional[int]
+    voyage_days_cape: Optional[int]
+    is_active: bool
+
+
+@dataclass(frozen=True)
+class ReferenceSnapshot:
+    """Immutable set of lookup tables built from one load of the reference tables."""
+    generation: int
+    product_name_by_id: Dict[int, str] = field(default_factory=dict)
+    product_id_by_name: Dict[str, int] = field(default_factory=dict)
+    inspector_name_by_id: Dict[int, str] = field(default_factory=dict)
+    inspector_id_by_name: Dict[str, int] = field(default_factory=dict)
+    load_ports_by_code: Dict[str, LoadPortRef] = field(default_factory=dict)
+    load_ports_by_id: Dict[int, LoadPortRef] = field(default_factory=dict)
+    active_load_port_codes: FrozenSet[str] = frozenset()
+    discharge_ports_by_name: Dict[str, DischargePortRef] = field(default_factory=dict)
+
+
+class ReferenceDataRegistry:
+    """
+    Process-wide cache of reference tables with generation-based invalidation.
+
+    Snapshots are immutable and swapped atomically, so readers never take a lock.
+    Only reloads are serialized.
+    """
+
+    def __init__(self, check_interval: float = REFERENCE_DATA_CHECK_SECONDS):
+        self.check_interval = check_interval
+        self._snapshot: Optional[ReferenceSnapshot] = None
+        self._stale = True
+        self._last_check = 0.0
+        self._reload_lock = threading.Lock()
+
+    # -------------------------------------------------------------------------
+    # Loading / invalidation
+    # -------------------------------------------------------------------------
+
+    def _read_generation(self, db: Session) -> int:
+        generation = db.query(models.ReferenceDataVersion.generation).filter(
+            models.ReferenceDataVersion.id == _VERSION_ROW_ID
+        ).scalar()
+        return generation or 0
+
+    def load(self, db: Session) -> ReferenceSnapshot:
+        """Load all reference tables into a fresh snapshot."""
+        generation = self._read_generation(db)
+
+        products = db.query(models.Product.id, models.Product.name).all()
+        inspectors = db.query(models.Inspector.id, models.Inspector.name).all()
+        load_ports = [
+            LoadPortRef(p.id, p.code, p.name, bool(p.is_active), p.sort_order or 0)
+            for p in db.query(
+                models.LoadPort.id, models.LoadPort.code, models.LoadPort.name,
+                models.LoadPort.is_active, models.LoadPort.sort_order
+            ).all()
+        ]
+        discharge_ports = [
+            DischargePortRef(p.id, p.name, p.voyage_days_suez, p.voyage_days_cape, bool(p.is_active))
+            for p in db.query(
+                models.DischargePort.id, models.DischargePort.name,
+                models.DischargePort.voyage_days_suez, models.DischargePort.voyage_days_cape,
+                models.DischargePort.is_active
+            ).all()
+        ]
+
+        snapshot = ReferenceSnapshot(
+            generation=generation,
+            product_name_by_id={p.id: p.name for p in products},
+            product_id_by_name={p.name: p.id for p in products},
+            inspector_name_by_id={i.id: i.name for i in inspectors},
+            inspector_id_by_name={i.name: i.id for i in inspectors},
+            load_ports_by_code={p.code: p for p in load_ports},
+            load_ports_by_id={p.id: p for p in load_ports},
+            active_load_port_codes=frozenset(p.code for p in load_ports if p.is_active),
+            discharge_ports_by_name={p.name: p for p in discharge_ports},
+        )
+
+        self._snapshot = snapshot
+        self._stale = False
+        self._last_check = time.monotonic()
+        logger.info(
+            f"Reference data loaded (generation {generation}): {len(products)} products, "
+            f"{len(load_ports)} load ports, {len(inspectors)} inspectors, {len(discharge_ports)} discharge ports"
+        )
+        return snapshot
+
+    def warm(self) -> None:
+        """Load the snapshot at startup using a dedicated session."""
+        from app.database import SessionLocal
+        db = SessionLocal()
+        try:
+            with self._reload_lock:
+                self.load(db)
+        finally:
+            db.close()
+
+    def _mark_stale(self, *args) -> None:
+        self._stale = True
+
+    def invalidate(self, db: Session) -> None:
+        """
+        Bump the shared generation counter and drop the local snapshot.
+
+        Call before `db.commit()` in any endpoint that writes a reference table.
+        The counter update is part of the caller's transaction, so other workers
+        only observe the new generation once the write is committed.
+        """
+        updated = db.query(models.ReferenceDataVersion).filter(
+            models.ReferenceDataVersion.id == _VERSION_ROW_ID
+        ).update(
+            {models.ReferenceDataVersion.generation: models.ReferenceDataVersion.generation + 1},
+            synchronize_session=False
+        )
+        if not updated:
+            db.add(models.ReferenceDataVersion(id=_VERSION_ROW_ID, generation=1))
+
+        self._mark_stale()
+        # A concurrent reload could still pick up pre-commit rows; mark stale again once committed
+        event.listen(db, "after_commit", self._mark_stale, once=True)
+
+    def snapshot(self, db: Session) -> ReferenceSnapshot:
+        """Return a current snapshot, reloading if it was invalidated or another worker bumped the generation."""
+        snapshot = self._snapshot
+        if snapshot is not None and not self._stale:
+            if time.monotonic() - self._last_check < self.check_interval:
+                return snapshot
+            self._last_check = time.monotonic()
+            if self._read_generation(db) == snapshot.generation:
+                return snapshot
+            self._stale = True
+
+        with self._reload_lock:
+            if self._snapshot is not None and not self._stale:
+                return self._snapshot
+            return self.load(db)
+
+    # -------------------------------------------------------------------------
+    # Lookups
+    # -------------------------------------------------------------------------
+
+    def product_name(self, db: Session, product_id: Optional[int]) -> Optional[str]:
+        if not product_id:
+            return None
+        return self.snapshot(db).product_name_by_id.get(product_id)
+
+    def product_id(self, db: Session, product_name: Optional[str]) -> Optional[int]:
+        if not product_name:
+            return None
+        return self.snapshot(db).product_id_by_name.get(product_name)
+
+    def inspector_name(self, db: Session, inspector_id: Optional[int]) -> Optional[str]:
+        if not inspector_id:
+            return None
+        return self.snapshot(db).inspector_name_by_id.get(inspector_id)
+
+    def inspector_id(self, db: Session, inspector_name: Optional[str]) -> Optional[int]:
+        if not inspector_name:
+            return None
+        return self.snapshot(db).inspector_id_by_name.get(inspector_name)
+
+    def load_port_by_code(self, db: Session, port_code: str, active_only: bool = True) -> Optional[LoadPortRef]:
+        port = self.snapshot(db).load_ports_by_code.get((port_code or "").upper())
+        if port is None or (active_only and not port.is_active):
+            return None
+        return port
+
+    def active_load_port_codes(self, db: Session) -> FrozenSet[str]:
+        return self.snapshot(db).active_load_port_codes
+
+    def discharge_port(self, db: Session, name: str) -> Optional[DischargePortRef]:
+        return self.snapshot(db).discharge_ports_by_name.get(name)
+
+
+# Global reference data registry instance
+reference_data = ReferenceDataRegistry()
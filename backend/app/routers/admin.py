@@ -2,9 +2,9 @@
 Admin API endpoints for database management and monitoring.
 Provides bird's eye view of all data with editing capabilities.
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select, union_all, literal, null, case, cast, String, Float, text
 from typing import List, Optional, Any
 from datetime import datetime
 import json
@@ -12,9 +12,13 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-from app.database import get_db
-from app.auth import require_auth, require_admin
+from app.database import get_db, get_async_db, run_db, DbSession
+from app.auth import require_admin, require_admin_async
+from app.errors import invalid_cursor, to_http_exception
+from app.utils.pagination import decode_feed_cursor, encode_feed_cursor, feed_order, union_branch_keyset_filter
 from app import models, schemas
+from app.admin_stats import admin_stats
+from app.integrity_check import INTEGRITY_CHECK_CACHE_SECONDS, integrity_reports
 from app.models import (
     Customer, Contract, QuarterlyPlan, MonthlyPlan, Cargo, Product, CargoStatus,
     CargoAuditLog, MonthlyPlanAuditLog, QuarterlyPlanAuditLog, ContractAuditLog,
@@ -29,239 +33,15 @@ router = APIRouter(prefix="/api/admin", tags=["admin"])
 # =============================================================================
 
 @router.get("/stats")
-def get_database_stats(db: Session = Depends(get_db), current_user: models.User = Depends(require_admin)):
-    """Get overview statistics for all tables."""
-    
-    # Count records in each table
-    customers_count = db.query(func.count(Customer.id)).scalar()
-    contracts_count = db.query(func.count(Contract.id)).scalar()
-    quarterly_plans_count = db.query(func.count(QuarterlyPlan.id)).scalar()
-    monthly_plans_count = db.query(func.count(MonthlyPlan.id)).scalar()
-    cargos_count = db.query(func.count(Cargo.id)).scalar()
-    
-    # Audit log counts
-    cargo_logs_count = db.query(func.count(CargoAuditLog.id)).scalar()
-    monthly_plan_logs_count = db.query(func.count(MonthlyPlanAuditLog.id)).scalar()
-    quarterly_plan_logs_count = db.query(func.count(QuarterlyPlanAuditLog.id)).scalar()
-    contract_logs_count = db.query(func.count(ContractAuditLog.id)).scalar()
-    
-    # Data integrity checks
-    issues = []
-    
-    # Check for orphaned quarterly plans (no contract)
-    orphaned_qp = db.query(QuarterlyPlan).filter(
-        ~QuarterlyPlan.contract_id.in_(db.query(Contract.id))
-    ).count()
-    if orphaned_qp > 0:
-        issues.append({"type": "orphaned_quarterly_plans", "count": orphaned_qp, "severity": "warning"})
-    
-    # Check for orphaned monthly plans (no quarterly plan)
-    orphaned_mp = db.query(MonthlyPlan).filter(
-        ~MonthlyPlan.quarterly_plan_id.in_(db.query(QuarterlyPlan.id))
-    ).count()
-    if orphaned_mp > 0:
-        issues.append({"type": "orphaned_monthly_plans", "count": orphaned_mp, "severity": "warning"})
-    
-    # Check for orphaned cargos (no monthly plan)
-    orphaned_cargos = db.query(Cargo).filter(
-        ~Cargo.monthly_plan_id.in_(db.query(MonthlyPlan.id))
-    ).count()
-    if orphaned_cargos > 0:
-        issues.append({"type": "orphaned_cargos", "count": orphaned_cargos, "severity": "error"})
-    
-    # Check for monthly plans with zero quantity
-    zero_qty_mp = db.query(MonthlyPlan).filter(MonthlyPlan.month_quantity == 0).count()
-    if zero_qty_mp > 0:
-        issues.append({"type": "zero_quantity_monthly_plans", "count": zero_qty_mp, "severity": "info"})
-    
-    # Check for monthly plans with authority topups
-    monthly_plans_with_topups = db.query(MonthlyPlan).filter(
-        MonthlyPlan.authority_topup_quantity > 0
-    ).count()
-
-    # Count distinct contracts that have at least one monthly plan with authority topup
-    contracts_with_topups = db.query(func.count(func.distinct(MonthlyPlan.contract_id))).filter(
-        MonthlyPlan.authority_topup_quantity > 0
-    ).scalar() or 0
-    
-    return {
-        "counts": {
-            "customers": customers_count,
-            "contracts": contracts_count,
-            "quarterly_plans": quarterly_plans_count,
-            "monthly_plans": monthly_plans_count,
-            "cargos": cargos_count,
-            "audit_logs": {
-                "cargo": cargo_logs_count,
-                "monthly_plan": monthly_plan_logs_count,
-                "quarterly_plan": quarterly_plan_logs_count,
-                "contract": contract_logs_count,
-                "total": cargo_logs_count + monthly_plan_logs_count + quarterly_plan_logs_count + contract_logs_count
-            }
-        },
-        "monthly_plans_with_topups": monthly_plans_with_topups,
-        "contracts_with_topups": contracts_with_topups,
-        "issues": issues,
-        "last_updated": datetime.utcnow().isoformat()
-    }
+async def get_database_stats(db: DbSession = Depends(get_async_db), current_user: models.User = Depends(require_admin_async)):
+    """Get overview statistics for all tables (cached, see app.admin_stats)."""
+    return await run_db(db, admin_stats.get, "stats")
 
 
 @router.get("/analytics")
 def get_analytics(db: Session = Depends(get_db), current_user: models.User = Depends(require_admin)):
-    """Get analytics data for inspector usage and port statistics."""
-    
-    # Inspector usage statistics (from normalized inspector_id FK)
-    inspector_stats = []
-    try:
-        from app.models import Inspector
-        inspector_query = db.query(
-            Inspector.name,
-            func.count(Cargo.id).label('cargo_count')
-        ).join(
-            Cargo, Cargo.inspector_id == Inspector.id
-        ).group_by(Inspector.id, Inspector.name).order_by(
-            func.count(Cargo.id).desc()
-        ).all()
-        
-        for row in inspector_query:
-            inspector_stats.append({
-                "name": row.name,
-                "cargo_count": row.cargo_count
-            })
-    except Exception as e:
-        logger.error(f"Error getting inspector stats: {e}")
-    
-    # Port usage statistics (from normalized cargo_port_operations table)
-    port_stats = []
-    try:
-        from app.models import CargoPortOperation, LoadPort
-        # Join cargo_port_operations with load_ports to get counts
-        port_query = db.query(
-            LoadPort.code,
-            LoadPort.name,
-            func.count(CargoPortOperation.id).label('cargo_count')
-        ).join(
-            CargoPortOperation, CargoPortOperation.load_port_id == LoadPort.id
-        ).group_by(LoadPort.id, LoadPort.code, LoadPort.name).order_by(
-            func.count(CargoPortOperation.id).desc()
-        ).all()
-        
-        for row in port_query:
-            port_stats.append({
-                "port": row.code,
-                "port_name": row.name,
-                "cargo_count": row.cargo_count
-            })
-    except Exception as e:
-        logger.error(f"Error getting port stats: {e}")
-    
-    # Monthly cargo trends (last 12 months)
-    monthly_trends = []
-    try:
-        from datetime import date
-        from dateutil.relativedelta import relativedelta
-        
-        today = date.today()
-        for i in range(11, -1, -1):
-            month_date = today - relativedelta(months=i)
-            month = month_date.month
-            year = month_date.year
-            
-            # Count cargos created in this month
-            cargo_count = db.query(func.count(Cargo.id)).filter(
-                func.extract('month', Cargo.created_at) == month,
-                func.extract('year', Cargo.created_at) == year
-            ).scalar() or 0
-            
-            monthly_trends.append({
-                "month": month,
-                "year": year,
-                "label": month_date.strftime("%b %Y"),
-                "cargo_count": cargo_count
-            })
-    except Exception as e:
-        logger.error(f"Error getting monthly trends: {e}")
-    
-    # Customer cargo distribution
-    customer_stats = []
-    try:
-        # Join cargos -> monthly_plans -> quarterly_plans -> contracts -> customers using ORM
-        customer_query = db.query(
-            Customer.name.label('customer_name'),
-            func.count(func.distinct(Cargo.id)).label('cargo_count')
-        ).join(
-            Contract, Contract.customer_id == Customer.id
-        ).join(
-            QuarterlyPlan, QuarterlyPlan.contract_id == Contract.id
-        ).join(
-            MonthlyPlan, MonthlyPlan.quarterly_plan_id == QuarterlyPlan.id
-        ).join(
-            Cargo, Cargo.monthly_plan_id == MonthlyPlan.id
-        ).group_by(Customer.id, Customer.name).order_by(
-            func.count(func.distinct(Cargo.id)).desc()
-        ).all()
-        
-        for row in customer_query:
-            customer_stats.append({
-                "customer": row.customer_name,
-                "cargo_count": row.cargo_count
-            })
-    except Exception as e:
-        logger.error(f"Error getting customer stats: {e}")
-    
-    # Cargo status distribution
-    status_stats = []
-    try:
-        status_query = db.query(
-            Cargo.status,
-            func.count(Cargo.id).label('count')
-        ).group_by(Cargo.status).all()
-        
-        for row in status_query:
-            status_stats.append({
-                "status": row.status.value if row.status else "Unknown",
-                "count": row.count
-            })
-    except Exception as e:
-        logger.error(f"Error getting status stats: {e}")
-    
-    # Product volume analytics - COMPLETED cargos only
-    # Status enum names: COMPLETED_LOADING, DISCHARGE_COMPLETE are considered completed
-    product_stats = []
-    try:
-        # Get completed cargo quantities per product using ORM
-        completed_statuses = [CargoStatus.COMPLETED_LOADING, CargoStatus.DISCHARGE_COMPLETE]
-        completed_query = db.query(
-            Product.name.label('product_name'),
-            func.sum(Cargo.cargo_quantity).label('completed_quantity'),
-            func.count(Cargo.id).label('cargo_count')
-        ).join(
-            Cargo, Cargo.product_id == Product.id
-        ).filter(
-            Cargo.status.in_(completed_statuses)
-        ).group_by(Product.name).order_by(
-            func.sum(Cargo.cargo_quantity).desc()
-        ).all()
-        
-        for row in completed_query:
-            product_stats.append({
-                "product": row.product_name,
-                "completed_quantity": float(row.completed_quantity or 0),
-                "cargo_count": row.cargo_count
-            })
-        
-    except Exception as e:
-        logger.error(f"Error getting product stats: {e}")
-    
-    return {
-        "inspector_stats": inspector_stats,
-        "port_stats": port_stats,
-        "monthly_trends": monthly_trends,
-        "customer_stats": customer_stats,
-        "status_stats": status_stats,
-        "product_stats": product_stats,
-        "last_updated": datetime.utcnow().isoformat()
-    }
+    """Get analytics data for inspector usage and port statistics (cached, see app.admin_stats)."""
+    return admin_stats.get(db, "analytics")
 
 
 # =============================================================================
@@ -770,114 +550,182 @@ def delete_cargo_admin(cargo_id: int, db: Session = Depends(get_db), current_use
 # AUDIT LOGS
 # =============================================================================
 
+# Unified feed sources: (source key, model, type value, entity id, entity ref)
+# The source key is part of the sort key, so it must stay stable across releases.
+def _audit_feed_branches():
+    monthly_plan_ref = case(
+        (
+            MonthlyPlanAuditLog.contract_number.isnot(None),
+            MonthlyPlanAuditLog.contract_number + " - "
+            + cast(MonthlyPlanAuditLog.month, String) + "/" + cast(MonthlyPlanAuditLog.year, String)
+        ),
+        else_=None,
+    )
+    general_type = func.coalesce(func.lower(GeneralAuditLog.entity_type), "general")
+    return [
+        ("cargo", CargoAuditLog, literal("cargo"),
+         func.coalesce(CargoAuditLog.cargo_db_id, CargoAuditLog.cargo_id), CargoAuditLog.cargo_cargo_id),
+        ("mp", MonthlyPlanAuditLog, literal("monthly_plan"),
+         func.coalesce(MonthlyPlanAuditLog.monthly_plan_db_id, MonthlyPlanAuditLog.monthly_plan_id), monthly_plan_ref),
+        ("qp", QuarterlyPlanAuditLog, literal("quarterly_plan"),
+         func.coalesce(QuarterlyPlanAuditLog.quarterly_plan_db_id, QuarterlyPlanAuditLog.quarterly_plan_id),
+         QuarterlyPlanAuditLog.contract_number),
+        ("contract", ContractAuditLog, literal("contract"),
+         func.coalesce(ContractAuditLog.contract_db_id, ContractAuditLog.contract_id), ContractAuditLog.contract_number),
+        ("general", GeneralAuditLog, general_type, GeneralAuditLog.entity_id, GeneralAuditLog.entity_name),
+    ]
+
+
+AUDIT_FEED_GENERAL_TYPES = ["customer", "product", "load_port", "inspector", "user"]
+AUDIT_FEED_SOURCE_TYPES = {"cargo": "cargo", "monthly_plan": "mp", "quarterly_plan": "qp", "contract": "contract"}
+
+
+def _estimated_row_count(db: Session, table_name: str) -> Optional[int]:
+    """Planner row estimate (PostgreSQL only) - avoids a full count on large unfiltered tables."""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    estimate = db.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": table_name}
+    ).scalar()
+    return estimate if estimate is not None and estimate >= 0 else None
+
+
 @router.get("/audit-logs")
-def get_all_audit_logs(
+async def get_all_audit_logs(
     log_type: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(require_admin)
+    skip: int = Query(0, ge=0, description="Offset - ignored when a cursor is given"),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    user_initials: Optional[str] = Query(None, description="Only changes made by this user"),
+    user_id: Optional[int] = Query(None, description="Only changes made by this user ID"),
+    date_from: Optional[datetime] = Query(None, description="Only changes at or after this time"),
+    date_to: Optional[datetime] = Query(None, description="Only changes before this time"),
+    total_mode: str = Query("exact", pattern="^(exact|estimate|none)$",
+                            description="exact: COUNT per source; estimate: planner estimate for unfiltered sources (PostgreSQL); none: skip"),
+    db: DbSession = Depends(get_async_db),
+    current_user: models.User = Depends(require_admin_async)
 ):
-    """Get unified audit logs from all sources."""
-    logs = []
-    
-    if not log_type or log_type == "cargo":
-        cargo_logs = db.query(CargoAuditLog).order_by(CargoAuditLog.created_at.desc()).offset(skip).limit(limit).all()
-        for log in cargo_logs:
-            logs.append({
-                "id": f"cargo-{log.id}",
-                "type": "cargo",
-                "entity_id": log.cargo_db_id or log.cargo_id,
-                "entity_ref": log.cargo_cargo_id,
-                "action": log.action,
-                "field_name": log.field_name,
-                "old_value": log.old_value,
-                "new_value": log.new_value,
-                "description": log.description,
-                "created_at": log.created_at.isoformat() if log.created_at else None,
-                "user_initials": log.user_initials,
-            })
-    
-    if not log_type or log_type == "monthly_plan":
-        mp_logs = db.query(MonthlyPlanAuditLog).order_by(MonthlyPlanAuditLog.created_at.desc()).offset(skip).limit(limit).all()
-        for log in mp_logs:
-            logs.append({
-                "id": f"mp-{log.id}",
-                "type": "monthly_plan",
-                "entity_id": log.monthly_plan_db_id or log.monthly_plan_id,
-                "entity_ref": f"{log.contract_number} - {log.month}/{log.year}" if log.contract_number else None,
-                "action": log.action,
-                "field_name": log.field_name,
-                "old_value": log.old_value,
-                "new_value": log.new_value,
-                "description": log.description,
-                "created_at": log.created_at.isoformat() if log.created_at else None,
-                "user_initials": log.user_initials,
-            })
-    
-    if not log_type or log_type == "quarterly_plan":
-        qp_logs = db.query(QuarterlyPlanAuditLog).order_by(QuarterlyPlanAuditLog.created_at.desc()).offset(skip).limit(limit).all()
-        for log in qp_logs:
-            logs.append({
-                "id": f"qp-{log.id}",
-                "type": "quarterly_plan",
-                "entity_id": log.quarterly_plan_db_id or log.quarterly_plan_id,
-                "entity_ref": log.contract_number,
-                "action": log.action,
-                "field_name": log.field_name,
-                "old_value": log.old_value,
-                "new_value": log.new_value,
-                "description": log.description,
-                "created_at": log.created_at.isoformat() if log.created_at else None,
-                "user_initials": log.user_initials,
-            })
-    
-    if not log_type or log_type == "contract":
-        contract_logs = db.query(ContractAuditLog).order_by(ContractAuditLog.created_at.desc()).offset(skip).limit(limit).all()
-        for log in contract_logs:
-            logs.append({
-                "id": f"contract-{log.id}",
-                "type": "contract",
-                "entity_id": log.contract_db_id or log.contract_id,
-                "entity_ref": log.contract_number,
-                "action": log.action,
-                "field_name": log.field_name,
-                "old_value": log.old_value,
-                "new_value": log.new_value,
-                "description": log.description,
-                "product_name": log.product_name,
-                "topup_quantity": log.topup_quantity,
-                "authority_reference": log.authority_reference,
-                "created_at": log.created_at.isoformat() if log.created_at else None,
-                "user_initials": log.user_initials,
-            })
-    
-    # General audit logs (customers, products, load_ports, inspectors, users)
-    general_types = ["customer", "product", "load_port", "inspector", "user"]
-    if not log_type or log_type in general_types or log_type == "general":
-        query = db.query(GeneralAuditLog).order_by(GeneralAuditLog.created_at.desc())
-        if log_type and log_type in general_types:
-            query = query.filter(GeneralAuditLog.entity_type == log_type.upper())
-        general_logs = query.offset(skip).limit(limit).all()
-        for log in general_logs:
-            logs.append({
-                "id": f"general-{log.id}",
-                "type": log.entity_type.lower() if log.entity_type else "general",
-                "entity_id": log.entity_id,
-                "entity_ref": log.entity_name,
-                "action": log.action,
-                "field_name": log.field_name,
-                "old_value": log.old_value,
-                "new_value": log.new_value,
-                "description": log.description,
-                "created_at": log.created_at.isoformat() if log.created_at else None,
-                "user_initials": log.user_initials,
-            })
-    
-    # Sort all logs by created_at
-    logs.sort(key=lambda x: x["created_at"] or "", reverse=True)
-    
-    return {"items": logs[:limit], "total": len(logs)}
+    """
+    Get unified audit logs from all sources.
+
+    One UNION ALL over the five audit tables, newest first, ordered by
+    (created_at, source, id). Each source is filtered and limited in SQL before
+    the merge, so a page costs `limit` rows per source read from the created_at
+    index. Pass `next_cursor` back as `cursor` for the following page.
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_feed_cursor(cursor)
+        except ValueError:
+            raise to_http_exception(invalid_cursor())
+
+    def load(db: Session):
+        branches = []
+        count_queries = []
+        for source, model, type_value, entity_id, entity_ref in _audit_feed_branches():
+            if log_type:
+                if source == "general":
+                    if log_type != "general" and log_type not in AUDIT_FEED_GENERAL_TYPES:
+                        continue
+                elif AUDIT_FEED_SOURCE_TYPES.get(log_type) != source:
+                    continue
+
+            conditions = []
+            if source == "general" and log_type in AUDIT_FEED_GENERAL_TYPES:
+                conditions.append(GeneralAuditLog.entity_type == log_type.upper())
+            if user_initials:
+                conditions.append(model.user_initials == user_initials.upper())
+            if user_id is not None:
+                conditions.append(model.user_id == user_id)
+            if date_from is not None:
+                conditions.append(model.created_at >= date_from)
+            if date_to is not None:
+                conditions.append(model.created_at < date_to)
+            count_queries.append((model, conditions))
+
+            page_conditions = list(conditions)
+            if after is not None:
+                page_conditions.append(union_branch_keyset_filter(model.created_at, model.id, source, after))
+
+            is_contract = source == "contract"
+            branch = select(
+                literal(source).label("source"),
+                model.id.label("id"),
+                type_value.label("type"),
+                entity_id.label("entity_id"),
+                entity_ref.label("entity_ref"),
+                model.action.label("action"),
+                model.field_name.label("field_name"),
+                model.old_value.label("old_value"),
+                model.new_value.label("new_value"),
+                model.description.label("description"),
+                # Contract-only columns; typed NULLs elsewhere so PostgreSQL can match the branches
+                (model.product_name if is_contract else cast(null(), String)).label("product_name"),
+                (model.topup_quantity if is_contract else cast(null(), Float)).label("topup_quantity"),
+                (model.authority_reference if is_contract else cast(null(), String)).label("authority_reference"),
+                model.created_at.label("created_at"),
+                model.user_initials.label("user_initials"),
+            ).where(*page_conditions).order_by(
+                *feed_order(model.created_at, model.id)
+            ).limit(limit + (0 if after is not None else skip)).subquery()
+            branches.append(select(*branch.c))
+
+        if not branches:
+            return {
+                "items": [],
+                "total": None if total_mode == "none" else 0,
+                "total_is_estimate": False,
+                "next_cursor": None,
+            }
+
+        feed = union_all(*branches).subquery()
+        page = select(feed).order_by(*feed_order(feed.c.created_at, feed.c.source, feed.c.id))
+        if after is None and skip:
+            page = page.offset(skip)
+        rows = db.execute(page.limit(limit)).all()
+
+        items = []
+        for row in rows:
+            item = {
+                "id": f"{row.source}-{row.id}",
+                "type": row.type,
+                "entity_id": row.entity_id,
+                "entity_ref": row.entity_ref,
+                "action": row.action,
+                "field_name": row.field_name,
+                "old_value": row.old_value,
+                "new_value": row.new_value,
+                "description": row.description,
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+                "user_initials": row.user_initials,
+            }
+            if row.source == "contract":
+                item["product_name"] = row.product_name
+                item["topup_quantity"] = row.topup_quantity
+                item["authority_reference"] = row.authority_reference
+            items.append(item)
+
+        next_page = encode_feed_cursor(rows[-1]) if len(rows) == limit else None
+
+        total = None
+        total_is_estimate = False
+        if total_mode != "none":
+            total = 0
+            for model, conditions in count_queries:
+                estimate = None
+                if total_mode == "estimate" and not conditions:
+                    estimate = _estimated_row_count(db, model.__tablename__)
+                if estimate is not None:
+                    total += estimate
+                    total_is_estimate = True
+                else:
+                    total += db.execute(select(func.count()).select_from(model).where(*conditions)).scalar()
+
+        return {"items": items, "total": total, "total_is_estimate": total_is_estimate, "next_cursor": next_page}
+
+    return await run_db(db, load)
 
 
 # =============================================================================
@@ -885,132 +733,38 @@ def get_all_audit_logs(
 # =============================================================================
 
 @router.get("/integrity-check")
-def check_data_integrity(db: Session = Depends(get_db), current_user: models.User = Depends(require_admin)):
-    """Run comprehensive data integrity checks."""
-    from sqlalchemy.orm import joinedload
-    from app.models import ContractProduct
-    
-    issues = []
-    
-    # 1. Check for quantity mismatches between contract and quarterly plans
-    contracts = db.query(Contract).options(
-        joinedload(Contract.contract_products).joinedload(ContractProduct.product)
-    ).all()
-    for contract in contracts:
-        products = contract.get_products_list()
-        quarterly_plans = db.query(QuarterlyPlan).filter(QuarterlyPlan.contract_id == contract.id).all()
-        
-        for product in products:
-            product_name = product.get("name")
-            contract_total = product.get("total_quantity", 0) + product.get("optional_quantity", 0) + product.get("topup_quantity", 0)
-            
-            # Find matching quarterly plan using product_id
-            product_id = product.get("product_id")
-            qp = next((q for q in quarterly_plans if q.product_id == product_id), None)
-            if qp:
-                qp_total = (qp.q1_quantity or 0) + (qp.q2_quantity or 0) + (qp.q3_quantity or 0) + (qp.q4_quantity or 0)
-                # Note: topup quantities are tracked in contract year_quantities, not quarterly plans
-                
-                if abs(contract_total - qp_total) > 0.01:  # Allow small floating point differences
-                    issues.append({
-                        "type": "quantity_mismatch",
-                        "severity": "warning",
-                        "entity": "contract_vs_quarterly",
-                        "contract_id": contract.id,
-                        "contract_number": contract.contract_number,
-                        "product": product_name,
-                        "contract_total": contract_total,
-                        "quarterly_total": qp_total,
-                        "difference": contract_total - qp_total
-                    })
-            elif contract_total > 0:
-                issues.append({
-                    "type": "missing_quarterly_plan",
-                    "severity": "error",
-                    "entity": "quarterly_plan",
-                    "contract_id": contract.id,
-                    "contract_number": contract.contract_number,
-                    "product": product_name,
-                    "message": f"No quarterly plan for {product_name} with contract quantity {contract_total}"
-                })
-    
-    # 2. Check for quarterly vs monthly quantity mismatches
-    quarterly_plans = db.query(QuarterlyPlan).options(
-        joinedload(QuarterlyPlan.product)
-    ).all()
-    for qp in quarterly_plans:
-        monthly_plans = db.query(MonthlyPlan).filter(MonthlyPlan.quarterly_plan_id == qp.id).all()
-        
-        # Group by quarter
-        q_totals = {1: 0, 2: 0, 3: 0, 4: 0}
-        for mp in monthly_plans:
-            quarter = (mp.month - 1) // 3 + 1
-            q_totals[quarter] += mp.month_quantity or 0
-        
-        # Compare
-        qp_values = {
-            1: (qp.q1_quantity or 0),
-            2: (qp.q2_quantity or 0),
-            3: (qp.q3_quantity or 0),
-            4: (qp.q4_quantity or 0)
-        }
-        
-        for q in range(1, 5):
-            if abs(qp_values[q] - q_totals[q]) > 0.01:
-                contract = db.query(Contract).filter(Contract.id == qp.contract_id).first()
-                qp_product_name = qp.product.name if qp.product else "Unknown"
-                issues.append({
-                    "type": "quantity_mismatch",
-                    "severity": "info",
-                    "entity": "quarterly_vs_monthly",
-                    "quarterly_plan_id": qp.id,
-                    "contract_number": contract.contract_number if contract else "Unknown",
-                    "product": qp_product_name,
-                    "quarter": q,
-                    "quarterly_quantity": qp_values[q],
-                    "monthly_total": q_totals[q],
-                    "difference": qp_values[q] - q_totals[q]
-                })
-    
-    # 3. Check for cargos without valid monthly plans
-    orphaned_cargos = db.query(Cargo).filter(
-        ~Cargo.monthly_plan_id.in_(db.query(MonthlyPlan.id))
-    ).all()
-    for cargo in orphaned_cargos:
-        issues.append({
-            "type": "orphaned_cargo",
-            "severity": "error",
-            "entity": "cargo",
-            "cargo_id": cargo.id,
-            "cargo_ref": cargo.cargo_id,
-            "vessel_name": cargo.vessel_name,
-            "monthly_plan_id": cargo.monthly_plan_id,
-            "message": "Cargo references non-existent monthly plan"
-        })
-    
-    # 4. Check for duplicate cargo assignments
-    monthly_plan_ids = db.query(Cargo.monthly_plan_id).group_by(Cargo.monthly_plan_id).having(func.count(Cargo.id) > 1).all()
-    for (mp_id,) in monthly_plan_ids:
-        cargos = db.query(Cargo).filter(Cargo.monthly_plan_id == mp_id).all()
-        issues.append({
-            "type": "duplicate_cargo_assignment",
-            "severity": "warning",
-            "entity": "cargo",
-            "monthly_plan_id": mp_id,
-            "cargo_count": len(cargos),
-            "cargo_ids": [c.id for c in cargos],
-            "message": f"Multiple cargos ({len(cargos)}) assigned to same monthly plan"
-        })
-    
-    return {
-        "total_issues": len(issues),
-        "issues_by_severity": {
-            "error": len([i for i in issues if i["severity"] == "error"]),
-            "warning": len([i for i in issues if i["severity"] == "warning"]),
-            "info": len([i for i in issues if i["severity"] == "info"])
-        },
-        "issues": issues
-    }
+def check_data_integrity(
+    background_tasks: BackgroundTasks,
+    response: Response,
+    refresh: bool = Query(False, description="Ignore the cached report and run the checks again"),
+    background: bool = Query(False, description="Run the checks as a background job; poll /integrity-check/job"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_admin),
+):
+    """
+    Run comprehensive data integrity checks.
+
+    Serves the cached report while it is younger than INTEGRITY_CHECK_CACHE_SECONDS
+    (`cached` and `generated_at` tell how fresh it is). With background=true the
+    checks run after the response and the job state is returned instead.
+    """
+    if background:
+        job = integrity_reports.start_job()
+        if job["status"] == "pending":
+            background_tasks.add_task(integrity_reports.run_job, job["job_id"])
+        response.status_code = 202
+        return job
+
+    return integrity_reports.get(db, max_age=0 if refresh else INTEGRITY_CHECK_CACHE_SECONDS)
+
+
+@router.get("/integrity-check/job")
+def get_integrity_check_job(current_user: models.User = Depends(require_admin)):
+    """State of the latest background integrity check, with its report once done."""
+    job = integrity_reports.job_status()
+    if job is None:
+        raise HTTPException(status_code=404, detail="No integrity check job has been started")
+    return job
 
 
 # =============================================================================
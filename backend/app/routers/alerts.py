@@ -0,0 +1,119 @@
+"""
+Alerts router - laycan alerts computed from the stored laycan dates.
+
+Cargo.laycan_start / laycan_end hold each cargo's parsed laycan (app.laycan), so
+the alert list is one indexed range query on laycan_start instead of parsing
+every cargo's laycan text against its monthly plan and contract.
+"""
+from datetime import date, timedelta
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app import models, schemas
+from app.auth import require_auth
+from app.routers.cargos import COMPLETED_CARGO_STATUSES
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# Days until laycan start at or below which an alert is critical / a warning (overdue is critical)
+CRITICAL_DAYS = 2
+WARNING_DAYS = 7
+
+
+def laycan_severity(days_until: int) -> str:
+    """Alert severity for the days until laycan start (same thresholds as the frontend's alertUtils)."""
+    if days_until <= CRITICAL_DAYS:
+        return "critical"
+    if days_until <= WARNING_DAYS:
+        return "warning"
+    return "info"
+
+
+@router.get("/laycan", response_model=schemas.LaycanAlertList)
+def get_laycan_alerts(
+    within_days: int = Query(14, ge=0, le=365, description="Alert on laycans starting within this many days"),
+    overdue_days: int = Query(30, ge=0, le=365, description="Keep alerting on laycans that started up to this many days ago"),
+    include_completed: bool = Query(False, description="Include cargos that completed loading"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_auth),
+):
+    """
+    Cargos whose laycan starts within `within_days` (or started at most
+    `overdue_days` ago), most urgent first.
+    """
+    today = date.today()
+    stmt = select(
+        models.Cargo.id,
+        models.Cargo.cargo_id,
+        models.Cargo.vessel_name,
+        models.Cargo.contract_id,
+        models.Cargo.contract_type,
+        models.Cargo.laycan_window,
+        models.Cargo.laycan_start,
+        models.Cargo.laycan_end,
+        models.MonthlyPlan.laycan_2_days,
+        models.MonthlyPlan.laycan_5_days,
+        models.Contract.contract_number,
+        models.Customer.name.label("customer_name"),
+    ).join(
+        models.MonthlyPlan, models.Cargo.monthly_plan_id == models.MonthlyPlan.id
+    ).join(
+        models.Contract, models.Cargo.contract_id == models.Contract.id
+    ).outerjoin(
+        models.Customer, models.Cargo.customer_id == models.Customer.id
+    ).where(
+        models.Cargo.laycan_start.between(
+            today - timedelta(days=overdue_days), today + timedelta(days=within_days)
+        )
+    )
+    if not include_completed:
+        stmt = stmt.where(models.Cargo.status.notin_(COMPLETED_CARGO_STATUSES))
+    stmt = stmt.order_by(models.Cargo.laycan_start, models.Cargo.id)
+
+    try:
+        rows = db.execute(stmt).all()
+    except SQLAlchemyError as e:
+        logger.error(f"Database error fetching laycan alerts: {e}")
+        raise HTTPException(status_code=500, detail="Error loading laycan alerts")
+
+    alerts = []
+    counts = {"critical": 0, "warning": 0, "info": 0}
+    for row in rows:
+        days_until = (row.laycan_start - today).days
+        severity = laycan_severity(days_until)
+        counts[severity] += 1
+        if row.contract_type == models.ContractType.FOB:
+            laycan = row.laycan_2_days or row.laycan_5_days
+        else:
+            laycan = row.laycan_window
+        alerts.append({
+            "id": row.id,
+            "cargo_id": row.cargo_id,
+            "vessel_name": row.vessel_name,
+            "contract_id": row.contract_id,
+            "contract_number": row.contract_number,
+            "contract_type": row.contract_type,
+            "customer_name": row.customer_name,
+            "laycan": laycan,
+            "laycan_start": row.laycan_start,
+            "laycan_end": row.laycan_end,
+            "days_until": days_until,
+            "is_overdue": days_until < 0,
+            "severity": severity,
+        })
+
+    return {
+        "as_of": today,
+        "within_days": within_days,
+        "alerts": alerts,
+        "total_count": len(alerts),
+        "critical_count": counts["critical"],
+        "warning_count": counts["warning"],
+        "info_count": counts["info"],
+    }
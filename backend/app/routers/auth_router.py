@@ -28,6 +28,7 @@ from app.auth import (
     generate_invite_token,
     require_auth,
     verify_password,
+    invalidate_cached_user,
     ACCESS_TOKEN_EXPIRE_MINUTES,
 )
 from app.rate_limiter import limiter
@@ -276,6 +277,7 @@ async def change_password(
     
     current_user.password_hash = get_password_hash(change_request.new_password)
     db.commit()
+    invalidate_cached_user(current_user.id)
     
     logger.info(f"User {current_user.email} changed password")
     
@@ -290,5 +292,6 @@ def logout(current_user: models.User = Depends(require_auth)):
     Note: With JWT, logout is handled client-side by removing the token.
     This endpoint exists for logging and potential token blacklisting.
     """
+    invalidate_cached_user(current_user.id)
     logger.info(f"User {current_user.email} logged out")
     return schemas.MessageResponse(message="Logged out successfully")
@@ -1,5 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks, Request
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from typing import List, Optional
 from datetime import datetime
@@ -8,7 +10,7 @@ import uuid
 import json
 import asyncio
 
-from app.database import get_db
+from app.database import get_db, get_async_db, run_db, DbSession
 from app import models, schemas
 from app.models import ContractType, CargoStatus, LCStatus
 from app.audit_utils import log_cargo_action
@@ -35,13 +37,24 @@ from app.errors import (
     invalid_status,
     invalid_status_transition,
     load_port_required_for_loading,
+    invalid_cursor,
     to_http_exception,
     ValidationError,
     ErrorCode,
 )
 from app.version_history import version_service
+from app.reference_data import reference_data
 from app.utils.quantity import get_product_id_by_name, get_product_name_by_id
-from app.auth import require_auth
+from app.utils.pagination import (
+    NEXT_CURSOR_HEADER,
+    apply_keyset,
+    decode_cursor,
+    next_cursor,
+    keyset_streaming_response,
+)
+from app.utils.json_response import fast_json_list, row_json
+from app.projections import CARGO_LIST, cargo_list_records
+from app.auth import require_auth, require_auth_async
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -146,18 +159,12 @@ def validate_status_transition(
 
 def _get_inspector_id_by_name(db: Session, inspector_name: Optional[str]) -> Optional[int]:
     """Get inspector_id from inspector name. Returns None if not found or name is empty."""
-    if not inspector_name:
-        return None
-    inspector = db.query(models.Inspector).filter(models.Inspector.name == inspector_name).first()
-    return inspector.id if inspector else None
+    return reference_data.inspector_id(db, inspector_name)
 
 
 def _get_inspector_name_by_id(db: Session, inspector_id: Optional[int]) -> Optional[str]:
     """Get inspector name from inspector_id. Returns None if not found."""
-    if not inspector_id:
-        return None
-    inspector = db.query(models.Inspector).filter(models.Inspector.id == inspector_id).first()
-    return inspector.name if inspector else None
+    return reference_data.inspector_name(db, inspector_id)
 
 
 def _cargo_to_schema(cargo: models.Cargo, db: Session) -> dict:
@@ -337,16 +344,39 @@ def _cargo_to_broadcast_dict(cargo: models.Cargo, db: Session = None) -> dict:
     }
 
 
+def _cargo_sync_state(cargo: models.Cargo, db: Session) -> dict:
+    """Everything a client may hold for a cargo (API fields plus broadcast extras), JSON-ready."""
+    return jsonable_encoder({**_cargo_to_schema(cargo, db), **_cargo_to_broadcast_dict(cargo, db)})
+
+
+def _sync_delta(before: dict, after: dict, *keys: str) -> dict:
+    """
+    Fields changed between two sync states, plus the identifying `keys`.
+    
+    Sent instead of the full entity; receivers apply it only on top of the
+    version it was computed from and otherwise fetch the entity.
+    """
+    delta = version_service.changed_values(before, after)
+    for key in keys:
+        delta[key] = after.get(key)
+    return delta
+
+
 async def _broadcast_cargo_change(
     change_type: str,
     cargo_id: int,
     cargo_data: Optional[dict] = None,
     user_id: Optional[int] = None,
-    user_initials: Optional[str] = None
+    user_initials: Optional[str] = None,
+    base_version: Optional[int] = None
 ) -> tuple[int, int]:
     """
     Broadcast cargo change to all users viewing port movement page.
     
+    Args:
+        base_version: Set when cargo_data is a delta (changed fields only) on
+            top of this cargo version
+    
     Returns:
         Tuple of (success_count, failure_count)
     """
@@ -360,7 +390,8 @@ async def _broadcast_cargo_change(
             entity_id=cargo_id,
             entity_data=cargo_data,
             changed_by_user_id=user_id,
-            changed_by_initials=user_initials
+            changed_by_initials=user_initials,
+            base_version=base_version
         )
         success, failures = result if result else (0, 0)
         logger.info(f"[BROADCAST] broadcast_data_change completed for cargo:{cargo_id} (success={success}, failures={failures})")
@@ -405,9 +436,14 @@ async def _broadcast_port_op_change(
     port_code: str,
     port_op_data: dict,
     user_id: Optional[int] = None,
-    user_initials: Optional[str] = None
+    user_initials: Optional[str] = None,
+    base_version: Optional[int] = None
 ):
-    """Broadcast port operation change to all users viewing port movement page."""
+    """
+    Broadcast port operation change to all users viewing port movement page.
+    
+    base_version is set when port_op_data is a delta on top of that cargo version.
+    """
     logger.info(f"[BROADCAST] _broadcast_port_op_change called: cargo:{cargo_id} port:{port_code} by user:{user_id}")
     try:
         await presence_manager.broadcast_data_change(
@@ -418,7 +454,10 @@ async def _broadcast_port_op_change(
             entity_id=cargo_id,  # Use cargo_id as the entity_id for easier frontend handling
             entity_data={**port_op_data, "port_code": port_code},
             changed_by_user_id=user_id,
-            changed_by_initials=user_initials
+            changed_by_initials=user_initials,
+            # Several ports of one cargo can change in the same batch window
+            merge_key=f"port_operation:{cargo_id}:{port_code}",
+            base_version=base_version
         )
         logger.info(f"[BROADCAST] broadcast_data_change completed for port_op cargo:{cargo_id} port:{port_code}")
     except Exception as e:
@@ -525,13 +564,18 @@ def update_cargo_status(cargo: models.Cargo, db: Session):
         cargo.status = CargoStatus.PLANNED
 
 
-@router.post("/", response_model=schemas.Cargo)
-async def create_cargo(
+def _create_cargo_in_db(
     cargo: schemas.CargoCreate,
     request: Request,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(require_auth),
-):
+    db: Session,
+    current_user: models.User,
+) -> tuple[dict, dict]:
+    """
+    Blocking part of create_cargo (validation, row locks, insert, commit).
+    
+    Returns:
+        Tuple of (response data, broadcast data)
+    """
     logger.info(f"Creating cargo: vessel={cargo.vessel_name}, contract={cargo.contract_id}, monthly_plan={cargo.monthly_plan_id}")
     
     from sqlalchemy.orm import joinedload
@@ -687,6 +731,20 @@ async def create_cargo(
         logger.error(f"Unexpected error creating cargo: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="An unexpected error occurred")
     
+    return _cargo_to_schema(db_cargo, db), _cargo_to_broadcast_dict(db_cargo, db)
+
+
+@router.post("/", response_model=schemas.Cargo)
+async def create_cargo(
+    cargo: schemas.CargoCreate,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_auth),
+):
+    # DB work (including the monthly plan row lock) runs in the worker thread pool
+    # so a slow lock never stalls the event loop; only the broadcast runs here.
+    response_data, cargo_data = await run_in_threadpool(_create_cargo_in_db, cargo, request, db, current_user)
+    
     # Broadcast the new cargo to all users viewing port movement (non-blocking)
     broadcast_success, broadcast_failures = 0, 0
     try:
@@ -694,8 +752,8 @@ async def create_cargo(
         user_initials = getattr(request.state, 'user_initials', None)
         broadcast_success, broadcast_failures = await _broadcast_cargo_change(
             change_type="created",
-            cargo_id=db_cargo.id,
-            cargo_data=_cargo_to_broadcast_dict(db_cargo, db),
+            cargo_id=response_data["id"],
+            cargo_data=cargo_data,
             user_id=user_id,
             user_initials=user_initials
         )
@@ -704,64 +762,199 @@ async def create_cargo(
         logger.error(f"Failed to broadcast cargo creation: {e}")
         broadcast_failures = 1
     
-    # Convert to response with broadcast status using helper
-    response_data = _cargo_to_schema(db_cargo, db)
     response_data["broadcast_success"] = broadcast_success
     response_data["broadcast_failures"] = broadcast_failures
     return response_data
 
 
+# =============================================================================
+# LIST QUERIES (shared by the list endpoints below and the aggregated /api/views)
+# =============================================================================
+#
+# Each filter function builds on `query` when given - an ORM query or a projected
+# select() from app.projections - and on db.query(models.Cargo) otherwise.
+
+# Statuses after which a cargo no longer shows on the port movement board
+COMPLETED_CARGO_STATUSES = [CargoStatus.COMPLETED_LOADING, CargoStatus.DISCHARGE_COMPLETE]
+
+
+def port_movement_query(db: Session, months: List[int], year: int, query=None):
+    """Cargos for the given months/year, excluding completed cargos and zero-quantity plans."""
+    query = db.query(models.Cargo) if query is None else query
+    return query.join(models.MonthlyPlan, models.Cargo.monthly_plan_id == models.MonthlyPlan.id).filter(
+        models.MonthlyPlan.month.in_(months),
+        models.MonthlyPlan.year == year,
+        models.MonthlyPlan.month_quantity > 0
+    ).filter(
+        # Exclude completed cargos (both Completed Loading and Discharge Complete)
+        models.Cargo.status.notin_(COMPLETED_CARGO_STATUSES)
+    )
+
+
+def completed_cargos_query(db: Session, month: Optional[int] = None, year: Optional[int] = None, query=None):
+    """FOB completed cargos and CIF cargos after loading completion, optionally filtered by month/year."""
+    from sqlalchemy import or_, and_
+    query = db.query(models.Cargo) if query is None else query
+    query = query.filter(
+        or_(
+            # FOB cargos with Completed Loading status
+            and_(
+                models.Cargo.status == CargoStatus.COMPLETED_LOADING,
+                models.Cargo.contract_type == ContractType.FOB
+            ),
+            # CIF cargos with Completed Loading status
+            and_(
+                models.Cargo.status == CargoStatus.COMPLETED_LOADING,
+                models.Cargo.contract_type == ContractType.CIF
+            ),
+            # CIF cargos with Discharge Complete status (should stay in completed cargos for checklist tracking)
+            and_(
+                models.Cargo.status == CargoStatus.DISCHARGE_COMPLETE,
+                models.Cargo.contract_type == ContractType.CIF
+            )
+        )
+    )
+    
+    if month is not None or year is not None:
+        query = query.join(models.MonthlyPlan, models.Cargo.monthly_plan_id == models.MonthlyPlan.id)
+        if month is not None:
+            query = query.filter(models.MonthlyPlan.month == month)
+        if year is not None:
+            query = query.filter(models.MonthlyPlan.year == year)
+    return query
+
+
+def active_loadings_query(db: Session, query=None):
+    """Cargos with at least one port operation in Loading or Completed Loading that are not yet completed."""
+    query = db.query(models.Cargo) if query is None else query
+    return query.join(models.CargoPortOperation, models.CargoPortOperation.cargo_id == models.Cargo.id).filter(
+        models.CargoPortOperation.status.in_([
+            PortOperationStatus.LOADING.value,
+            PortOperationStatus.COMPLETED_LOADING.value
+        ])
+    ).filter(
+        # Exclude completed cargos (both Completed Loading and Discharge Complete)
+        models.Cargo.status.notin_(COMPLETED_CARGO_STATUSES)
+    ).distinct(models.Cargo.id)
+
+
+def in_road_cif_query(db: Session, query=None):
+    """CIF cargos that completed loading but not discharge."""
+    query = db.query(models.Cargo) if query is None else query
+    return query.filter(
+        models.Cargo.contract_type == ContractType.CIF,
+        models.Cargo.discharge_completion_time.is_(None),
+        models.Cargo.status == CargoStatus.COMPLETED_LOADING,
+    )
+
+
+def completed_in_road_cif_query(db: Session, query=None):
+    """CIF cargos that have Discharge Complete status."""
+    query = db.query(models.Cargo) if query is None else query
+    return query.filter(
+        models.Cargo.contract_type == ContractType.CIF,
+        models.Cargo.status == CargoStatus.DISCHARGE_COMPLETE,
+    )
+
+
+def _filtered_cargos_query(
+    db: Session,
+    status: Optional[CargoStatus] = None,
+    contract_type: Optional[ContractType] = None,
+    customer_id: Optional[int] = None,
+    contract_id: Optional[int] = None,
+    month: Optional[int] = None,
+    year: Optional[int] = None,
+):
+    """Projected (CARGO_LIST) select with the GET /api/cargos/ filters applied (unordered)."""
+    query = CARGO_LIST.select()
+    
+    if status:
+        query = query.filter(models.Cargo.status == status)
+    if contract_type:
+        query = query.filter(models.Cargo.contract_type == contract_type)
+    if customer_id:
+        query = query.filter(models.Cargo.customer_id == customer_id)
+    if contract_id:
+        query = query.filter(models.Cargo.contract_id == contract_id)
+    if month or year:
+        query = query.join(models.MonthlyPlan, models.Cargo.monthly_plan_id == models.MonthlyPlan.id)
+        if month:
+            query = query.filter(models.MonthlyPlan.month == month)
+        if year:
+            query = query.filter(models.MonthlyPlan.year == year)
+        # Exclude cargos where the monthly plan has quantity 0 (deferred/cancelled)
+        query = query.filter(models.MonthlyPlan.month_quantity > 0)
+    return query
+
+
+# Keyset for cursor pagination of GET /api/cargos/
+CARGO_KEYSET = (models.Cargo.id,)
+
+
+def _cargo_keyset(cargo) -> list:
+    return [cargo.id]
+
+
 @router.get("/", response_model=List[schemas.Cargo])
 def read_cargos(
+    response: Response,
     status: Optional[CargoStatus] = None,
     contract_type: Optional[ContractType] = None,
     customer_id: Optional[int] = None,
     contract_id: Optional[int] = None,
     month: Optional[int] = None,
     year: Optional[int] = None,
-    skip: int = Query(0, ge=0),
+    skip: int = Query(0, ge=0, description="Deprecated: prefer cursor"),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    fetch_all: bool = Query(False, description="Stream every matching cargo (ignores skip/limit/cursor)"),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(require_auth),
 ):
-    try:
-        from sqlalchemy.orm import joinedload
-        query = db.query(models.Cargo).options(
-            joinedload(models.Cargo.product),
-            joinedload(models.Cargo.inspector),
-            joinedload(models.Cargo.port_operations).joinedload(models.CargoPortOperation.load_port)
+    """
+    List cargos ordered by id with keyset pagination.
+    
+    The cursor of the next page is returned in the X-Next-Cursor header (absent on the last page).
+    """
+    def build_query(session: Session):
+        return _filtered_cargos_query(session, status, contract_type, customer_id, contract_id, month, year)
+    
+    if fetch_all:
+        return keyset_streaming_response(
+            build_query, CARGO_KEYSET, _cargo_keyset,
+            lambda record, session: row_json(record, schemas.Cargo),
+            prepare_batch=cargo_list_records,
         )
+    
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, len(CARGO_KEYSET))
+        except ValueError:
+            raise to_http_exception(invalid_cursor())
+    
+    try:
+        query = apply_keyset(build_query(db), CARGO_KEYSET, after)
+        if after is None and skip:
+            query = query.offset(skip)
+        rows = db.execute(query.limit(limit)).all()
         
-        if status:
-            query = query.filter(models.Cargo.status == status)
-        if contract_type:
-            query = query.filter(models.Cargo.contract_type == contract_type)
-        if customer_id:
-            query = query.filter(models.Cargo.customer_id == customer_id)
-        if contract_id:
-            query = query.filter(models.Cargo.contract_id == contract_id)
-        if month or year:
-            query = query.join(models.MonthlyPlan)
-            if month:
-                query = query.filter(models.MonthlyPlan.month == month)
-            if year:
-                query = query.filter(models.MonthlyPlan.year == year)
-            # Exclude cargos where the monthly plan has quantity 0 (deferred/cancelled)
-            query = query.filter(models.MonthlyPlan.month_quantity > 0)
-        
-        cargos = query.offset(skip).limit(limit).all()
-        return [_cargo_to_schema(c, db) for c in cargos]
+        next_page = next_cursor(rows, limit, _cargo_keyset)
+        if next_page:
+            response.headers[NEXT_CURSOR_HEADER] = next_page
+        return fast_json_list(cargo_list_records(db, rows), schemas.Cargo)
     except SQLAlchemyError as e:
         logger.error(f"Database error reading cargos: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Error loading cargos")
 
 
 @router.get("/port-movement", response_model=List[schemas.Cargo])
-def read_port_movement(
+async def read_port_movement(
     month: Optional[int] = None,
     year: Optional[int] = None,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(require_auth),
+    db: DbSession = Depends(get_async_db),
+    current_user: models.User = Depends(require_auth_async),
 ):
     """Get cargos for specified month (defaults to current month), excluding completed cargos"""
     try:
@@ -772,26 +965,15 @@ def read_port_movement(
             if year is None:
                 year = now.year
         
-        from sqlalchemy import or_, not_
-        from sqlalchemy.orm import joinedload
-        query = db.query(models.Cargo).options(
-            joinedload(models.Cargo.product),
-            joinedload(models.Cargo.inspector),
-            joinedload(models.Cargo.port_operations).joinedload(models.CargoPortOperation.load_port)
-        ).join(models.MonthlyPlan).filter(
-            models.MonthlyPlan.month == month,
-            models.MonthlyPlan.year == year,
-            models.MonthlyPlan.month_quantity > 0
-        ).filter(
-            # Exclude completed cargos (both Completed Loading and Discharge Complete)
-            models.Cargo.status.notin_([CargoStatus.COMPLETED_LOADING, CargoStatus.DISCHARGE_COMPLETE])
-        )
-        cargos = query.all()
-        
-        # Note: Port operations are now the source of truth (normalized)
-        # No backfill needed - cargos without port_operations simply have no ports assigned
+        def load(session: Session):
+            rows = session.execute(port_movement_query(session, [month], year, CARGO_LIST.select())).all()
+            
+            # Note: Port operations are now the source of truth (normalized)
+            # No backfill needed - cargos without port_operations simply have no ports assigned
+            
+            return cargo_list_records(session, rows)
         
-        return [_cargo_to_schema(c, db) for c in cargos]
+        return fast_json_list(await run_db(db, load), schemas.Cargo)
     except SQLAlchemyError as e:
         logger.error(f"Database error in read_port_movement: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Error loading port movement data")
@@ -806,45 +988,12 @@ def read_completed_cargos(
 ):
     """Get FOB completed cargos and CIF cargos after loading completion (including discharge complete), optionally filtered by month/year"""
     try:
-        from sqlalchemy import or_, and_
-        from sqlalchemy.orm import joinedload
-        query = db.query(models.Cargo).options(
-            joinedload(models.Cargo.product),
-            joinedload(models.Cargo.inspector),
-            joinedload(models.Cargo.port_operations).joinedload(models.CargoPortOperation.load_port)
-        ).filter(
-            or_(
-                # FOB cargos with Completed Loading status
-                and_(
-                    models.Cargo.status == CargoStatus.COMPLETED_LOADING,
-                    models.Cargo.contract_type == ContractType.FOB
-                ),
-                # CIF cargos with Completed Loading status
-                and_(
-                    models.Cargo.status == CargoStatus.COMPLETED_LOADING,
-                    models.Cargo.contract_type == ContractType.CIF
-                ),
-                # CIF cargos with Discharge Complete status (should stay in completed cargos for checklist tracking)
-                and_(
-                    models.Cargo.status == CargoStatus.DISCHARGE_COMPLETE,
-                    models.Cargo.contract_type == ContractType.CIF
-                )
-            )
-        )
-        
-        if month is not None or year is not None:
-            query = query.join(models.MonthlyPlan)
-            if month is not None:
-                query = query.filter(models.MonthlyPlan.month == month)
-            if year is not None:
-                query = query.filter(models.MonthlyPlan.year == year)
-        
-        cargos = query.all()
+        rows = db.execute(completed_cargos_query(db, month, year, CARGO_LIST.select())).all()
         
         # Note: Port operations are now the source of truth (normalized)
         # No backfill needed - cargos without port_operations simply have no ports assigned
         
-        return [_cargo_to_schema(c, db) for c in cargos]
+        return fast_json_list(cargo_list_records(db, rows), schemas.Cargo)
     except SQLAlchemyError as e:
         logger.error(f"Database error in read_completed_cargos: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Error loading completed cargos")
@@ -860,27 +1009,12 @@ def read_active_loadings(
     regardless of month/year. Excludes cargos that have completed their lifecycle.
     """
     try:
-        from sqlalchemy.orm import joinedload
-        query = db.query(models.Cargo).options(
-            joinedload(models.Cargo.product),
-            joinedload(models.Cargo.inspector),
-            joinedload(models.Cargo.port_operations).joinedload(models.CargoPortOperation.load_port)
-        ).join(models.CargoPortOperation).filter(
-            models.CargoPortOperation.status.in_([
-                PortOperationStatus.LOADING.value,
-                PortOperationStatus.COMPLETED_LOADING.value
-            ])
-        ).filter(
-            # Exclude completed cargos (both Completed Loading and Discharge Complete)
-            models.Cargo.status.notin_([CargoStatus.COMPLETED_LOADING, CargoStatus.DISCHARGE_COMPLETE])
-        ).distinct(models.Cargo.id)
-
-        cargos = query.all()
+        rows = db.execute(active_loadings_query(db, CARGO_LIST.select())).all()
 
         # Note: Port operations are now the source of truth (normalized)
         # No backfill needed
         
-        return [_cargo_to_schema(c, db) for c in cargos]
+        return fast_json_list(cargo_list_records(db, rows), schemas.Cargo)
     except SQLAlchemyError as e:
         logger.error(f"Database error in read_active_loadings: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Error loading active loadings")
@@ -893,20 +1027,9 @@ def read_in_road_cif(
 ):
     """Get CIF cargos that completed loading but not discharge"""
     try:
-        from sqlalchemy import and_
-        from sqlalchemy.orm import joinedload
-        query = db.query(models.Cargo).options(
-            joinedload(models.Cargo.product),
-            joinedload(models.Cargo.inspector),
-            joinedload(models.Cargo.port_operations).joinedload(models.CargoPortOperation.load_port)
-        ).filter(and_(
-            models.Cargo.contract_type == ContractType.CIF,
-            models.Cargo.discharge_completion_time.is_(None),
-            models.Cargo.status == CargoStatus.COMPLETED_LOADING,
-        ))
-        cargos = query.all()
-        logger.debug(f"In-Road CIF query found {len(cargos)} cargos")
-        return [_cargo_to_schema(c, db) for c in cargos]
+        rows = db.execute(in_road_cif_query(db, CARGO_LIST.select())).all()
+        logger.debug(f"In-Road CIF query found {len(rows)} cargos")
+        return fast_json_list(cargo_list_records(db, rows), schemas.Cargo)
     except SQLAlchemyError as e:
         logger.error(f"Database error in read_in_road_cif: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Error loading in-road CIF cargos")
@@ -919,18 +1042,8 @@ def read_completed_in_road_cif(
 ):
     """Get CIF cargos that have Discharge Complete status"""
     try:
-        from sqlalchemy import and_
-        from sqlalchemy.orm import joinedload
-        query = db.query(models.Cargo).options(
-            joinedload(models.Cargo.product),
-            joinedload(models.Cargo.inspector),
-            joinedload(models.Cargo.port_operations).joinedload(models.CargoPortOperation.load_port)
-        ).filter(and_(
-            models.Cargo.contract_type == ContractType.CIF,
-            models.Cargo.status == CargoStatus.DISCHARGE_COMPLETE,
-        ))
-        cargos = query.all()
-        return [_cargo_to_schema(c, db) for c in cargos]
+        rows = db.execute(completed_in_road_cif_query(db, CARGO_LIST.select())).all()
+        return fast_json_list(cargo_list_records(db, rows), schemas.Cargo)
     except SQLAlchemyError as e:
         logger.error(f"Database error in read_completed_in_road_cif: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Error loading completed in-road CIF cargos")
@@ -966,17 +1079,21 @@ def list_port_operations(
     return ops
 
 
-@router.put("/{cargo_id}/port-operations/{port_code}", response_model=schemas.CargoPortOperation)
-async def upsert_port_operation(
+def _upsert_port_operation_in_db(
     cargo_id: int,
     port_code: str,
     op: schemas.CargoPortOperationUpdate,
-    request: Request,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(require_auth),
-):
-    port_code = (port_code or "").strip().upper()
+    db: Session,
+) -> tuple[dict, dict, Optional[int]]:
+    """
+    Blocking part of upsert_port_operation (row locks, upsert, status recompute, commit).
     
+    Returns:
+        Tuple of (response data, broadcast data, base cargo version). For an
+        existing port operation the broadcast data holds only the changed fields
+        and the base version is the cargo version they apply to; a new port
+        operation is broadcast in full with base version None.
+    """
     # Validate port code against database (normalized)
     load_port = get_load_port_by_code(db, port_code)
     if not load_port:
@@ -1002,7 +1119,11 @@ async def upsert_port_operation(
         models.CargoPortOperation.load_port_id == load_port.id
     ).with_for_update().first()
 
-    if not db_op:
+    before = base_version = None
+    if db_op:
+        before = jsonable_encoder(_port_op_to_broadcast_dict(db_op, cargo))
+        base_version = cargo.version
+    else:
         db_op = models.CargoPortOperation(
             cargo_id=cargo_id, 
             load_port_id=load_port.id,  # Normalized FK
@@ -1036,19 +1157,8 @@ async def upsert_port_operation(
         joinedload(models.CargoPortOperation.load_port)
     ).filter(models.CargoPortOperation.id == db_op.id).first()
     
-    # Broadcast the port operation change to other users
-    user_id = getattr(request.state, 'user_id', None)
-    user_initials = getattr(request.state, 'user_initials', None)
-    await _broadcast_port_op_change(
-        cargo_id=cargo_id,
-        port_code=port_code,
-        port_op_data=_port_op_to_broadcast_dict(db_op, cargo),
-        user_id=user_id,
-        user_initials=user_initials
-    )
-    
     # Return dict with port_code for API compatibility
-    return {
+    response_data = {
         "id": db_op.id,
         "cargo_id": db_op.cargo_id,
         "port_code": db_op.load_port.code if db_op.load_port else port_code,
@@ -1061,22 +1171,52 @@ async def upsert_port_operation(
         "created_at": db_op.created_at,
         "updated_at": db_op.updated_at,
     }
+    broadcast_data = jsonable_encoder(_port_op_to_broadcast_dict(db_op, cargo))
+    if before is not None:
+        broadcast_data = _sync_delta(before, broadcast_data, "id", "cargo_id", "port_code", "cargo_version")
+    return response_data, broadcast_data, base_version
 
 
-@router.put("/{cargo_id}", response_model=schemas.Cargo)
-async def update_cargo(
+@router.put("/{cargo_id}/port-operations/{port_code}", response_model=schemas.CargoPortOperation)
+async def upsert_port_operation(
     cargo_id: int,
-    cargo: schemas.CargoUpdate,
+    port_code: str,
+    op: schemas.CargoPortOperationUpdate,
     request: Request,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(require_auth),
 ):
-    """Update cargo - handles lc_status conversion from string to enum.
+    port_code = (port_code or "").strip().upper()
+    response_data, port_op_data, base_version = await run_in_threadpool(_upsert_port_operation_in_db, cargo_id, port_code, op, db)
     
-    Implements optimistic locking: if client sends 'version', we verify it matches
-    the current version to prevent lost updates from concurrent edits.
+    # Broadcast the port operation change to other users
+    user_id = getattr(request.state, 'user_id', None)
+    user_initials = getattr(request.state, 'user_initials', None)
+    await _broadcast_port_op_change(
+        cargo_id=cargo_id,
+        port_code=port_code,
+        port_op_data=port_op_data,
+        user_id=user_id,
+        user_initials=user_initials,
+        base_version=base_version
+    )
     
-    Also saves version history before making changes (allows undo).
+    return response_data
+
+
+def _update_cargo_in_db(
+    cargo_id: int,
+    cargo: schemas.CargoUpdate,
+    request: Request,
+    db: Session,
+) -> tuple[dict, dict, int]:
+    """
+    Blocking part of update_cargo (row lock, version check, update, commit).
+    
+    Returns:
+        Tuple of (response data, broadcast delta, base version): the delta holds
+        the fields that changed (with id and the new version) on top of the
+        base version the client sent.
     """
     user_id = getattr(request.state, 'user_id', None)
     user_initials = getattr(request.state, 'user_initials', None)
@@ -1108,6 +1248,9 @@ async def update_cargo(
         
         # Version history will be saved AFTER changes are applied
         
+        # State before the update, for the broadcast delta
+        before = _cargo_sync_state(db_cargo, db)
+        
     except HTTPException:
         raise
     except Exception as e:
@@ -1374,27 +1517,50 @@ async def update_cargo(
         logger.error(f"Database error updating cargo {cargo_id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Error saving cargo update")
     
+    after = _cargo_sync_state(db_cargo, db)
+    return _cargo_to_schema(db_cargo, db), _sync_delta(before, after, "id", "version"), before["version"]
+
+
+@router.put("/{cargo_id}", response_model=schemas.Cargo)
+async def update_cargo(
+    cargo_id: int,
+    cargo: schemas.CargoUpdate,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_auth),
+):
+    """Update cargo - handles lc_status conversion from string to enum.
+    
+    Implements optimistic locking: if client sends 'version', we verify it matches
+    the current version to prevent lost updates from concurrent edits.
+    
+    Also saves version history before making changes (allows undo).
+    
+    Other users receive only the changed fields, as a delta on top of the
+    version the client sent.
+    """
+    response_data, cargo_delta, base_version = await run_in_threadpool(_update_cargo_in_db, cargo_id, cargo, request, db)
+    
     # Broadcast the update to all users viewing port movement (non-blocking)
     broadcast_success, broadcast_failures = 0, 0
     try:
         user_id = getattr(request.state, 'user_id', None)
         user_initials = getattr(request.state, 'user_initials', None)
-        logger.info(f"[BROADCAST] Starting broadcast for cargo {db_cargo.id}, user_id={user_id}, initials={user_initials}")
+        logger.info(f"[BROADCAST] Starting broadcast for cargo {cargo_id}, user_id={user_id}, initials={user_initials}")
         broadcast_success, broadcast_failures = await _broadcast_cargo_change(
             change_type="updated",
-            cargo_id=db_cargo.id,
-            cargo_data=_cargo_to_broadcast_dict(db_cargo, db),
+            cargo_id=cargo_id,
+            cargo_data=cargo_delta,
             user_id=user_id,
-            user_initials=user_initials
+            user_initials=user_initials,
+            base_version=base_version
         )
-        logger.info(f"[BROADCAST] Completed broadcast for cargo {db_cargo.id} (success={broadcast_success}, failures={broadcast_failures})")
+        logger.info(f"[BROADCAST] Completed broadcast for cargo {cargo_id} (success={broadcast_success}, failures={broadcast_failures})")
     except Exception as e:
         # Don't fail the request if broadcast fails
         logger.error(f"Failed to broadcast cargo update: {e}", exc_info=True)
         broadcast_failures = 1
     
-    # Convert to response with broadcast status using helper
-    response_data = _cargo_to_schema(db_cargo, db)
     response_data["broadcast_success"] = broadcast_success
     response_data["broadcast_failures"] = broadcast_failures
     return response_data
@@ -1565,21 +1731,14 @@ def sync_combi_cargo_group(
         raise HTTPException(status_code=500, detail="An unexpected error occurred")
 
 
-@router.delete("/{cargo_id}")
-async def delete_cargo(
+def _delete_cargo_in_db(
     cargo_id: int,
     request: Request,
-    reason: Optional[str] = Query(default=None, description="Reason for deletion"),
-    permanent: bool = Query(default=False, description="Permanently delete (skip recycle bin)"),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(require_auth),
-):
-    """
-    Delete a cargo.
-    
-    By default, uses soft delete (moves to recycle bin for 90 days).
-    Use permanent=true to skip the recycle bin (cannot be undone).
-    """
+    reason: Optional[str],
+    permanent: bool,
+    db: Session,
+) -> None:
+    """Blocking part of delete_cargo (audit log, soft/hard delete, commit)."""
     db_cargo = db.query(models.Cargo).filter(models.Cargo.id == cargo_id).first()
     if db_cargo is None:
         raise to_http_exception(cargo_not_found(cargo_id))
@@ -1626,6 +1785,27 @@ async def delete_cargo(
         db.rollback()
         logger.error(f"Database error deleting cargo {cargo_id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Error deleting cargo")
+
+
+@router.delete("/{cargo_id}")
+async def delete_cargo(
+    cargo_id: int,
+    request: Request,
+    reason: Optional[str] = Query(default=None, description="Reason for deletion"),
+    permanent: bool = Query(default=False, description="Permanently delete (skip recycle bin)"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_auth),
+):
+    """
+    Delete a cargo.
+    
+    By default, uses soft delete (moves to recycle bin for 90 days).
+    Use permanent=true to skip the recycle bin (cannot be undone).
+    """
+    await run_in_threadpool(_delete_cargo_in_db, cargo_id, request, reason, permanent, db)
+    
+    user_id = getattr(request.state, 'user_id', None)
+    user_initials = getattr(request.state, 'user_initials', None)
     
     # Broadcast the deletion to all users viewing port movement (non-blocking)
     try:
@@ -1649,7 +1829,7 @@ async def delete_cargo(
 # =============================================================================
 
 @router.post("/cross-contract-combi", response_model=schemas.CrossContractCombiResponse)
-async def create_cross_contract_combi(
+def create_cross_contract_combi(
     combi_data: schemas.CrossContractCombiCreate,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(require_auth),
@@ -1819,7 +1999,7 @@ async def create_cross_contract_combi(
 
 
 @router.delete("/combi-group/{combi_group_id}")
-async def delete_combi_group(
+def delete_combi_group(
     combi_group_id: str,
     permanent: bool = Query(False, description="If true, permanently delete. Otherwise, move to recycle bin."),
     reason: Optional[str] = Query(None, description="Optional reason for deletion"),
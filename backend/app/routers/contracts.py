@@ -9,6 +9,7 @@ from app.auth import require_auth
 from app.utils.fiscal_year import calculate_contract_years, generate_quarterly_plan_periods, generate_monthly_plan_periods
 from app.contract_audit_utils import log_contract_action, log_contract_field_changes, get_contract_snapshot
 from app.utils.quantity import get_product_name_by_id
+from app.utils.json_response import fast_json_list
 import uuid
 import logging
 
@@ -89,6 +90,20 @@ def _contract_to_dict(
     return result
 
 
+def contract_list_query(db: Session, has_remarks: bool = True, has_additives_required: bool = True):
+    """Contracts with everything _contract_to_dict reads (products and amendments) eager-loaded."""
+    query = db.query(models.Contract).options(
+        joinedload(models.Contract.contract_products).joinedload(models.ContractProduct.product),
+        joinedload(models.Contract.authority_amendments).joinedload(models.AuthorityAmendment.product)
+    )
+    
+    if not has_remarks:
+        query = query.options(defer(models.Contract.remarks))
+    if not has_additives_required:
+        query = query.options(defer(models.Contract.additives_required))
+    return query
+
+
 def _sync_contract_products(db: Session, contract: models.Contract, products_data: list, preserve_originals: bool = False):
     """
     Sync contract products - delete existing and create new ones.
@@ -431,15 +446,7 @@ def read_contracts(
         has_remarks = _contracts_has_column(db, "remarks")
         has_additives_required = _contracts_has_column(db, "additives_required")
         
-        query = db.query(models.Contract).options(
-            joinedload(models.Contract.contract_products).joinedload(models.ContractProduct.product),
-            joinedload(models.Contract.authority_amendments).joinedload(models.AuthorityAmendment.product)
-        )
-        
-        if not has_remarks:
-            query = query.options(defer(models.Contract.remarks))
-        if not has_additives_required:
-            query = query.options(defer(models.Contract.additives_required))
+        query = contract_list_query(db, has_remarks, has_additives_required)
         if customer_id:
             query = query.filter(models.Contract.customer_id == customer_id)
         
@@ -453,7 +460,7 @@ def read_contracts(
                 continue
             result.append(_contract_to_dict(contract, has_remarks, has_additives_required))
         
-        return result
+        return fast_json_list(result, schemas.Contract)
     except Exception as e:
         import traceback
         logger.error(f"Error reading contracts: {str(e)}\n{traceback.format_exc()}")
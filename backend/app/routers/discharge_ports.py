@@ -9,6 +9,7 @@ from typing import List
 from app.database import get_db
 from app import models, schemas
 from app.general_audit_utils import log_general_action
+from app.reference_data import reference_data
 from app.auth import require_auth
 import logging
 
@@ -48,6 +49,7 @@ def create_discharge_port(port: schemas.DischargePortCreate, db: Session = Depen
             description=f"Created discharge port: {db_port.name}"
         )
         
+        reference_data.invalidate(db)
         db.commit()
         db.refresh(db_port)
         
@@ -164,6 +166,7 @@ def update_discharge_port(port_id: int, port: schemas.DischargePortUpdate, db: S
                 )
             setattr(db_port, field, value)
         
+        reference_data.invalidate(db)
         db.commit()
         db.refresh(db_port)
         
@@ -205,6 +208,7 @@ def delete_discharge_port(port_id: int, db: Session = Depends(get_db), current_u
         )
         
         db.delete(db_port)
+        reference_data.invalidate(db)
         db.commit()
         
         logger.info(f"Discharge port deleted: {port_name}")
@@ -241,6 +245,7 @@ def seed_default_discharge_ports(db: Session = Depends(get_db), current_user: mo
             )
             db.add(db_port)
         
+        reference_data.invalidate(db)
         db.commit()
         logger.info(f"Seeded {len(default_ports)} default discharge ports")
         return {"message": f"Successfully seeded {len(default_ports)} default discharge ports"}
@@ -8,6 +8,7 @@ from typing import List
 from app.database import get_db
 from app import models, schemas
 from app.general_audit_utils import log_general_action
+from app.reference_data import reference_data
 from app.auth import require_auth
 import logging
 
@@ -53,6 +54,7 @@ def create_inspector(inspector: schemas.InspectorCreate, db: Session = Depends(g
             description=f"Created inspector: {db_inspector.name} ({db_inspector.code})"
         )
         
+        reference_data.invalidate(db)
         db.commit()
         db.refresh(db_inspector)
         
@@ -163,6 +165,7 @@ def update_inspector(inspector_id: int, inspector: schemas.InspectorUpdate, db:
                 )
             setattr(db_inspector, field, value)
         
+        reference_data.invalidate(db)
         db.commit()
         db.refresh(db_inspector)
         
@@ -205,6 +208,7 @@ def delete_inspector(inspector_id: int, db: Session = Depends(get_db), current_u
         )
         
         db.delete(db_inspector)
+        reference_data.invalidate(db)
         db.commit()
         
         logger.info(f"Inspector deleted: {inspector_name}")
@@ -243,6 +247,7 @@ def seed_default_inspectors(db: Session = Depends(get_db), current_user: models.
             )
             db.add(db_inspector)
         
+        reference_data.invalidate(db)
         db.commit()
         logger.info(f"Seeded {len(default_inspectors)} default inspectors")
         return {"message": f"Successfully seeded {len(default_inspectors)} default inspectors"}
@@ -8,6 +8,7 @@ from typing import List
 from app.database import get_db
 from app import models, schemas
 from app.general_audit_utils import log_general_action
+from app.reference_data import reference_data
 from app.auth import require_auth
 import logging
 
@@ -54,6 +55,7 @@ def create_load_port(port: schemas.LoadPortCreate, db: Session = Depends(get_db)
             description=f"Created load port: {db_port.name} ({db_port.code})"
         )
         
+        reference_data.invalidate(db)
         db.commit()
         db.refresh(db_port)
         
@@ -164,6 +166,7 @@ def update_load_port(port_id: int, port: schemas.LoadPortUpdate, db: Session = D
                 )
             setattr(db_port, field, value)
         
+        reference_data.invalidate(db)
         db.commit()
         db.refresh(db_port)
         
@@ -206,6 +209,7 @@ def delete_load_port(port_id: int, db: Session = Depends(get_db), current_user:
         )
         
         db.delete(db_port)
+        reference_data.invalidate(db)
         db.commit()
         
         logger.info(f"Load port deleted: {port_name}")
@@ -244,6 +248,7 @@ def seed_default_load_ports(db: Session = Depends(get_db), current_user: models.
             )
             db.add(db_port)
         
+        reference_data.invalidate(db)
         db.commit()
         logger.info(f"Seeded {len(default_ports)} default load ports")
         return {"message": f"Successfully seeded {len(default_ports)} default load ports"}
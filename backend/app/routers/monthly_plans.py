@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import func, case, cast, String
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import SQLAlchemyError
 from typing import List, Dict, Optional
@@ -6,7 +7,7 @@ from calendar import month_name
 import logging
 import json
 
-from app.database import get_db
+from app.database import get_db, get_async_db, run_db, DbSession
 from app import models, schemas
 from app.monthly_plan_audit_utils import log_monthly_plan_action
 from app.models import CargoStatus
@@ -17,10 +18,11 @@ from app.errors import (
     plan_has_completed_cargos,
     plan_has_cargos,
     invalid_move_direction,
+    invalid_cursor,
     to_http_exception,
 )
 from app.config import MIN_YEAR, MAX_YEAR, get_fiscal_quarter_field
-from app.auth import get_current_user, require_auth
+from app.auth import get_current_user, require_auth, require_auth_async
 from app.utils.quantity import (
     parse_contract_products,
     get_contract_quantity_limits,
@@ -29,6 +31,15 @@ from app.utils.quantity import (
     get_product_id_by_name,
     get_product_name_by_id,
 )
+from app.utils.pagination import (
+    NEXT_CURSOR_HEADER,
+    apply_keyset,
+    decode_cursor,
+    next_cursor,
+    keyset_streaming_response,
+)
+from app.utils.json_response import fast_json_list, row_json
+from app.projections import MONTHLY_PLAN, monthly_plan_records, monthly_plan_enriched_records
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -85,91 +96,95 @@ def _monthly_plan_to_schema(plan: models.MonthlyPlan, db: Session) -> dict:
     }
 
 
-def _monthly_plan_to_enriched(plan: models.MonthlyPlan, db: Session) -> dict:
+# A cargo is "completed" if it has COMPLETED_LOADING (FOB) or DISCHARGE_COMPLETE (CIF)
+COMPLETED_CARGO_STATUSES = (CargoStatus.COMPLETED_LOADING, CargoStatus.DISCHARGE_COMPLETE)
+
+
+def _empty_cargo_info() -> Dict:
+    return {
+        'total_cargos': 0,
+        'completed_cargos': 0,
+        'cargo_ids': [],
+        'completed_cargo_ids': [],
+        'cargo_unique_ids': [],
+        'completed_cargo_unique_ids': [],
+        'has_completed_cargos': False,
+        'is_locked': False,
+    }
+
+
+def _string_agg(db: Session, column):
+    """Dialect-aware comma-separated aggregate (string_agg on PostgreSQL, group_concat on SQLite)."""
+    if db.get_bind().dialect.name == "postgresql":
+        return func.string_agg(cast(column, String), ',')
+    return func.group_concat(column, ',')
+
+
+def _split_agg(value, convert=str) -> List:
+    if not value:
+        return []
+    return [convert(v) for v in str(value).split(',')]
+
+
+def get_cargo_info_bulk(monthly_plan_ids: List[int], db: Session) -> Dict[int, Dict]:
     """
-    Convert a MonthlyPlan model to an enriched schema-compatible dict.
+    Get cargo information for many monthly plans in one aggregated query.
     
-    Includes embedded quarterly_plan and contract info.
+    Counts and cargo ID lists are computed with a single GROUP BY monthly_plan_id,
+    so the cost does not grow with the number of plans requested.
+    Every requested plan ID is present in the result (plans without cargos get empty info).
     """
-    base = _monthly_plan_to_schema(plan, db)
-    
-    # Add quarterly plan if present
-    quarterly_plan_data = None
-    if plan.quarterly_plan:
-        qp = plan.quarterly_plan
-        qp_product_name = None
-        if qp.product_id and qp.product:
-            qp_product_name = qp.product.name
-        elif qp.product_id:
-            qp_product_name = get_product_name_by_id(db, qp.product_id)
-        
-        quarterly_plan_data = {
-            "id": qp.id,
-            "product_name": qp_product_name,
-            "contract_year": qp.contract_year,
-            "q1_quantity": qp.q1_quantity,
-            "q2_quantity": qp.q2_quantity,
-            "q3_quantity": qp.q3_quantity,
-            "q4_quantity": qp.q4_quantity,
-            "contract_id": qp.contract_id,
-        }
-    
-    # Add contract info - prefer direct contract, fall back to quarterly_plan.contract
-    contract_data = None
-    contract = plan.contract or (plan.quarterly_plan.contract if plan.quarterly_plan else None)
-    if contract:
-        customer_data = None
-        if contract.customer:
-            customer_data = {
-                "id": contract.customer.id,
-                "customer_id": contract.customer.customer_id,
-                "name": contract.customer.name,
-            }
-        
-        # Get products from relationship
-        products_data = contract.get_products_list() if hasattr(contract, 'get_products_list') else []
-        
-        contract_data = {
-            "id": contract.id,
-            "contract_id": contract.contract_id,
-            "contract_number": contract.contract_number,
-            "contract_type": contract.contract_type.value if contract.contract_type else None,
-            "contract_category": contract.contract_category.value if contract.contract_category else None,
-            "payment_method": contract.payment_method.value if contract.payment_method else None,
-            "start_period": contract.start_period,
-            "end_period": contract.end_period,
-            "fiscal_start_month": contract.fiscal_start_month,
-            "products": products_data,
-            "tng_lead_days": contract.tng_lead_days,
-            "tng_notes": contract.tng_notes,
-            "cif_destination": contract.cif_destination,
-            "customer_id": contract.customer_id,
-            "customer": customer_data,
+    plan_ids = set(monthly_plan_ids)
+    result = {plan_id: _empty_cargo_info() for plan_id in plan_ids}
+    if not plan_ids:
+        return result
+    
+    is_completed = models.Cargo.status.in_(COMPLETED_CARGO_STATUSES)
+    rows = db.query(
+        models.Cargo.monthly_plan_id,
+        func.count(models.Cargo.id).label('total_cargos'),
+        func.sum(case((is_completed, 1), else_=0)).label('completed_cargos'),
+        _string_agg(db, models.Cargo.id).label('cargo_ids'),
+        _string_agg(db, case((is_completed, models.Cargo.id))).label('completed_cargo_ids'),
+        _string_agg(db, models.Cargo.cargo_id).label('cargo_unique_ids'),
+        _string_agg(db, case((is_completed, models.Cargo.cargo_id))).label('completed_cargo_unique_ids'),
+    ).filter(
+        models.Cargo.monthly_plan_id.in_(plan_ids)
+    ).group_by(models.Cargo.monthly_plan_id).all()
+    
+    for row in rows:
+        completed = int(row.completed_cargos or 0)
+        result[row.monthly_plan_id] = {
+            'total_cargos': row.total_cargos,
+            'completed_cargos': completed,
+            'cargo_ids': _split_agg(row.cargo_ids, int),  # Use numeric id for API calls
+            'completed_cargo_ids': _split_agg(row.completed_cargo_ids, int),  # Use numeric id for API calls
+            'cargo_unique_ids': _split_agg(row.cargo_unique_ids),  # String cargo_id for display
+            'completed_cargo_unique_ids': _split_agg(row.completed_cargo_unique_ids),  # String cargo_id for display
+            'has_completed_cargos': completed > 0,
+            'is_locked': completed > 0,
         }
-    
-    base["quarterly_plan"] = quarterly_plan_data
-    base["contract"] = contract_data
-    return base
+    return result
 
 
 def get_cargo_info(monthly_plan_id: int, db: Session) -> Dict:
     """Get information about cargos linked to this monthly plan"""
-    cargos = db.query(models.Cargo).filter(
-        models.Cargo.monthly_plan_id == monthly_plan_id
-    ).all()
-    
-    # A cargo is "completed" if it has COMPLETED_LOADING (FOB) or DISCHARGE_COMPLETE (CIF)
-    completed_cargos = [c for c in cargos if c.status in (CargoStatus.COMPLETED_LOADING, CargoStatus.DISCHARGE_COMPLETE)]
-    
+    return get_cargo_info_bulk([monthly_plan_id], db)[monthly_plan_id]
+
+
+def _plan_status(plan_id: int, month: int, year: int, cargo_info: Dict) -> Dict:
+    """Build the status payload returned by the status endpoints."""
     return {
-        'total_cargos': len(cargos),
-        'completed_cargos': len(completed_cargos),
-        'cargo_ids': [c.id for c in cargos],  # Use numeric id for API calls
-        'completed_cargo_ids': [c.id for c in completed_cargos],  # Use numeric id for API calls
-        'cargo_unique_ids': [c.cargo_id for c in cargos],  # String cargo_id for display
-        'completed_cargo_unique_ids': [c.cargo_id for c in completed_cargos],  # String cargo_id for display
-        'has_completed_cargos': len(completed_cargos) > 0,
-        'is_locked': len(completed_cargos) > 0
+        'monthly_plan_id': plan_id,
+        'month': month,
+        'year': year,
+        'is_locked': cargo_info['is_locked'],
+        'has_cargos': cargo_info['total_cargos'] > 0,
+        'has_completed_cargos': cargo_info['has_completed_cargos'],
+        'total_cargos': cargo_info['total_cargos'],
+        'completed_cargos': cargo_info['completed_cargos'],
+        'cargo_ids': cargo_info['cargo_ids'],
+        'completed_cargo_ids': cargo_info['completed_cargo_ids']
     }
 
 
@@ -320,41 +335,144 @@ def create_monthly_plan(plan: schemas.MonthlyPlanCreate, db: Session = Depends(g
     return _monthly_plan_to_schema(db_plan, db)
 
 
+def _filtered_monthly_plans_query(db: Session, quarterly_plan_id: Optional[int] = None, contract_id: Optional[int] = None):
+    """Projected (MONTHLY_PLAN) select with the GET /api/monthly-plans/ filters applied (unordered)."""
+    query = MONTHLY_PLAN.select()
+    if quarterly_plan_id:
+        query = query.filter(models.MonthlyPlan.quarterly_plan_id == quarterly_plan_id)
+    if contract_id:
+        # For SPOT contracts - get plans with this contract_id and no quarterly_plan_id
+        query = query.filter(
+            models.MonthlyPlan.contract_id == contract_id,
+            models.MonthlyPlan.quarterly_plan_id.is_(None)
+        )
+    return query
+
+
+# Keyset for cursor pagination of GET /api/monthly-plans/ (chronological, id breaks ties)
+MONTHLY_PLAN_KEYSET = (models.MonthlyPlan.year, models.MonthlyPlan.month, models.MonthlyPlan.id)
+
+
+def _monthly_plan_keyset(plan) -> list:
+    return [plan.year, plan.month, plan.id]
+
+
 @router.get("/", response_model=List[schemas.MonthlyPlan])
 def read_monthly_plans(
+    response: Response,
     quarterly_plan_id: int = None,
     contract_id: int = None,
-    skip: int = Query(0, ge=0),
+    skip: int = Query(0, ge=0, description="Deprecated: prefer cursor"),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    fetch_all: bool = Query(False, description="Stream every matching plan (ignores skip/limit/cursor)"),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(require_auth),
 ):
-    try:
-        query = db.query(models.MonthlyPlan).options(
-            joinedload(models.MonthlyPlan.product)
+    """
+    List monthly plans ordered by (year, month, id) with keyset pagination.
+    
+    The cursor of the next page is returned in the X-Next-Cursor header (absent on the last page).
+    """
+    def build_query(session: Session):
+        return _filtered_monthly_plans_query(session, quarterly_plan_id, contract_id)
+    
+    if fetch_all:
+        return keyset_streaming_response(
+            build_query, MONTHLY_PLAN_KEYSET, _monthly_plan_keyset,
+            lambda record, session: row_json(record, schemas.MonthlyPlan),
+            prepare_batch=monthly_plan_records,
         )
-        if quarterly_plan_id:
-            query = query.filter(models.MonthlyPlan.quarterly_plan_id == quarterly_plan_id)
-        if contract_id:
-            # For SPOT contracts - get plans with this contract_id and no quarterly_plan_id
-            query = query.filter(
-                models.MonthlyPlan.contract_id == contract_id,
-                models.MonthlyPlan.quarterly_plan_id.is_(None)
-            )
-        plans = query.offset(skip).limit(limit).all()
-        return [_monthly_plan_to_schema(p, db) for p in plans]
+    
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, len(MONTHLY_PLAN_KEYSET))
+        except ValueError:
+            raise to_http_exception(invalid_cursor())
+    
+    try:
+        query = apply_keyset(build_query(db), MONTHLY_PLAN_KEYSET, after)
+        if after is None and skip:
+            query = query.offset(skip)
+        rows = db.execute(query.limit(limit)).all()
+        
+        next_page = next_cursor(rows, limit, _monthly_plan_keyset)
+        if next_page:
+            response.headers[NEXT_CURSOR_HEADER] = next_page
+        return fast_json_list(monthly_plan_records(db, rows), schemas.MonthlyPlan)
     except SQLAlchemyError as e:
         logger.error(f"Database error reading monthly plans: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Error loading monthly plans")
 
 
+def bulk_plans_query(db: Session, month_list: List[int], year: int, include_zero_quantity: bool = False, query=None):
+    """
+    Monthly plans for the given months/year across all contracts.
+    
+    Builds on `query` when given (e.g. a projected select() from app.projections).
+    """
+    query = db.query(models.MonthlyPlan) if query is None else query
+    query = query.filter(
+        models.MonthlyPlan.month.in_(month_list),
+        models.MonthlyPlan.year == year
+    )
+    
+    if not include_zero_quantity:
+        query = query.filter(models.MonthlyPlan.month_quantity > 0)
+    
+    return query.order_by(
+        models.MonthlyPlan.quarterly_plan_id,
+        models.MonthlyPlan.month
+    )
+
+
+def cif_tng_plans_query(db: Session, month_list: Optional[List[int]] = None, year: Optional[int] = None, query=None):
+    """
+    Monthly plans of CIF contracts that need TNG tracking, optionally filtered by months/year.
+    
+    Builds on `query` when given (e.g. a projected select() from app.projections).
+    """
+    # Filter for CIF contracts only
+    # Join to get contract type - need to handle both paths (via quarterly_plan or direct)
+    query = db.query(models.MonthlyPlan) if query is None else query
+    query = query.join(
+        models.Contract,
+        (models.MonthlyPlan.contract_id == models.Contract.id) |
+        (models.MonthlyPlan.quarterly_plan.has(models.QuarterlyPlan.contract_id == models.Contract.id))
+    ).filter(
+        models.Contract.contract_type == 'CIF'
+    )
+    
+    # Only include plans with quantity > 0 AND loading_window set
+    query = query.filter(models.MonthlyPlan.month_quantity > 0)
+    query = query.filter(
+        models.MonthlyPlan.loading_window.isnot(None),
+        models.MonthlyPlan.loading_window != ''
+    )
+    
+    # Optional month filter
+    if month_list:
+        query = query.filter(models.MonthlyPlan.month.in_(month_list))
+    
+    # Optional year filter
+    if year:
+        query = query.filter(models.MonthlyPlan.year == year)
+    
+    # Order by year, month
+    return query.order_by(
+        models.MonthlyPlan.year.desc(),
+        models.MonthlyPlan.month.asc()
+    )
+
+
 @router.get("/bulk", response_model=List[schemas.MonthlyPlanEnriched])
-def get_monthly_plans_bulk(
+async def get_monthly_plans_bulk(
     months: str = Query(..., description="Comma-separated months, e.g., '1,2,3'"),
     year: int = Query(..., description="Year to filter by"),
     include_zero_quantity: bool = Query(False, description="Include plans with 0 quantity"),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(require_auth),
+    db: DbSession = Depends(get_async_db),
+    current_user: models.User = Depends(require_auth_async),
 ):
     """
     Get all monthly plans for given months/year across ALL contracts in a single query.
@@ -371,33 +489,12 @@ def get_monthly_plans_bulk(
             if m < 1 or m > 12:
                 raise HTTPException(status_code=400, detail=f"Invalid month: {m}")
         
-        # Build query with eager loading of all related data
-        # Load both quarterly_plan->contract path AND direct contract for SPOT contracts
-        query = db.query(models.MonthlyPlan).options(
-            joinedload(models.MonthlyPlan.quarterly_plan)
-            .joinedload(models.QuarterlyPlan.contract)
-            .joinedload(models.Contract.customer),
-            # Also load direct contract relationship for SPOT contracts
-            joinedload(models.MonthlyPlan.contract)
-            .joinedload(models.Contract.customer),
-            # Load product for product_name
-            joinedload(models.MonthlyPlan.product)
-        ).filter(
-            models.MonthlyPlan.month.in_(month_list),
-            models.MonthlyPlan.year == year
-        )
+        def load(session: Session):
+            stmt = bulk_plans_query(session, month_list, year, include_zero_quantity, MONTHLY_PLAN.select())
+            # Enriched format with product_name and the embedded quarterly plan / contract
+            return monthly_plan_enriched_records(session, session.execute(stmt).all())
         
-        if not include_zero_quantity:
-            query = query.filter(models.MonthlyPlan.month_quantity > 0)
-        
-        query = query.order_by(
-            models.MonthlyPlan.quarterly_plan_id,
-            models.MonthlyPlan.month
-        )
-        
-        plans = query.all()
-        # Convert to enriched format with product_name from product relationship
-        return [_monthly_plan_to_enriched(p, db) for p in plans]
+        return fast_json_list(await run_db(db, load), schemas.MonthlyPlanEnriched)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid month format: {str(e)}")
@@ -421,52 +518,12 @@ def get_cif_monthly_plans_for_tng(
     Used for the Tonnage Memos tab on the homepage.
     """
     try:
-        # Build query with eager loading of all related data
-        query = db.query(models.MonthlyPlan).options(
-            joinedload(models.MonthlyPlan.quarterly_plan)
-            .joinedload(models.QuarterlyPlan.contract)
-            .joinedload(models.Contract.customer),
-            joinedload(models.MonthlyPlan.contract)
-            .joinedload(models.Contract.customer),
-            # Load product for product_name
-            joinedload(models.MonthlyPlan.product)
-        )
-        
-        # Filter for CIF contracts only
-        # Join to get contract type - need to handle both paths (via quarterly_plan or direct)
-        query = query.join(
-            models.Contract,
-            (models.MonthlyPlan.contract_id == models.Contract.id) |
-            (models.MonthlyPlan.quarterly_plan.has(models.QuarterlyPlan.contract_id == models.Contract.id))
-        ).filter(
-            models.Contract.contract_type == 'CIF'
-        )
-        
-        # Only include plans with quantity > 0 AND loading_window set
-        query = query.filter(models.MonthlyPlan.month_quantity > 0)
-        query = query.filter(
-            models.MonthlyPlan.loading_window.isnot(None),
-            models.MonthlyPlan.loading_window != ''
-        )
-        
-        # Optional month filter
+        month_list = None
         if months:
             month_list = [int(m.strip()) for m in months.split(",") if m.strip()]
-            if month_list:
-                query = query.filter(models.MonthlyPlan.month.in_(month_list))
-        
-        # Optional year filter
-        if year:
-            query = query.filter(models.MonthlyPlan.year == year)
-        
-        # Order by year, month
-        query = query.order_by(
-            models.MonthlyPlan.year.desc(),
-            models.MonthlyPlan.month.asc()
-        )
         
-        plans = query.all()
-        return [_monthly_plan_to_enriched(p, db) for p in plans]
+        rows = db.execute(cif_tng_plans_query(db, month_list, year, MONTHLY_PLAN.select())).all()
+        return fast_json_list(monthly_plan_enriched_records(db, rows), schemas.MonthlyPlanEnriched)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid parameter format: {str(e)}")
@@ -488,7 +545,7 @@ def read_monthly_plan(plan_id: int, db: Session = Depends(get_db), current_user:
 
 
 @router.put("/{plan_id}", response_model=schemas.MonthlyPlan)
-async def update_monthly_plan(
+def update_monthly_plan(
     plan_id: int,
     plan: schemas.MonthlyPlanUpdate,
     db: Session = Depends(get_db),
@@ -729,7 +786,7 @@ def _format_delivery_month(month_num: int, year: int) -> str:
 
 
 @router.put("/{plan_id}/move", response_model=schemas.MonthlyPlan)
-async def move_monthly_plan(
+def move_monthly_plan(
     plan_id: int,
     move_request: schemas.MonthlyPlanMoveRequest,
     db: Session = Depends(get_db),
@@ -799,7 +856,7 @@ async def move_monthly_plan(
         raise HTTPException(
             status_code=400,
             detail=f"Cannot move monthly plan. It has {cargo_info['completed_cargos']} completed cargo(s): "
-                   f"{', '.join(cargo_info['completed_cargo_ids'])}. Completed operations cannot be moved."
+                   f"{', '.join(cargo_info['completed_cargo_unique_ids'])}. Completed operations cannot be moved."
         )
     
     # Determine source and target months based on contract type
@@ -1099,31 +1156,20 @@ def get_monthly_plans_status_bulk(plan_ids: List[int], db: Session = Depends(get
     if not plan_ids:
         return []
     
-    # Fetch all plans in one query
-    db_plans = db.query(models.MonthlyPlan).filter(models.MonthlyPlan.id.in_(plan_ids)).all()
-    plans_by_id = {plan.id: plan for plan in db_plans}
+    # Fetch month/year for all plans in one query and cargo info in one grouped query
+    plan_rows = db.query(
+        models.MonthlyPlan.id, models.MonthlyPlan.month, models.MonthlyPlan.year
+    ).filter(models.MonthlyPlan.id.in_(set(plan_ids))).all()
+    plans_by_id = {row.id: row for row in plan_rows}
+    cargo_info_by_plan = get_cargo_info_bulk(list(plans_by_id), db)
     
     results = []
     for plan_id in plan_ids:
-        db_plan = plans_by_id.get(plan_id)
-        if db_plan is None:
+        plan_row = plans_by_id.get(plan_id)
+        if plan_row is None:
             # Skip missing plans instead of erroring
             continue
-        
-        cargo_info = get_cargo_info(plan_id, db)
-        
-        results.append({
-            'monthly_plan_id': plan_id,
-            'month': db_plan.month,
-            'year': db_plan.year,
-            'is_locked': cargo_info['is_locked'],
-            'has_cargos': cargo_info['total_cargos'] > 0,
-            'has_completed_cargos': cargo_info['has_completed_cargos'],
-            'total_cargos': cargo_info['total_cargos'],
-            'completed_cargos': cargo_info['completed_cargos'],
-            'cargo_ids': cargo_info['cargo_ids'],
-            'completed_cargo_ids': cargo_info['completed_cargo_ids']
-        })
+        results.append(_plan_status(plan_id, plan_row.month, plan_row.year, cargo_info_by_plan[plan_id]))
     
     return results
 
@@ -1137,18 +1183,7 @@ def get_monthly_plan_status(plan_id: int, db: Session = Depends(get_db), current
     
     cargo_info = get_cargo_info(plan_id, db)
     
-    return {
-        'monthly_plan_id': plan_id,
-        'month': db_plan.month,
-        'year': db_plan.year,
-        'is_locked': cargo_info['is_locked'],
-        'has_cargos': cargo_info['total_cargos'] > 0,
-        'has_completed_cargos': cargo_info['has_completed_cargos'],
-        'total_cargos': cargo_info['total_cargos'],
-        'completed_cargos': cargo_info['completed_cargos'],
-        'cargo_ids': cargo_info['cargo_ids'],
-        'completed_cargo_ids': cargo_info['completed_cargo_ids']
-    }
+    return _plan_status(plan_id, db_plan.month, db_plan.year, cargo_info)
 
 
 @router.post("/{plan_id}/authority-topup", response_model=schemas.MonthlyPlan)
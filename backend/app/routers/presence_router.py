@@ -14,13 +14,17 @@ import logging
 
 from app.database import get_db
 from app.presence import presence_manager
-from app.auth import decode_token, require_auth
+from app.wire import Frame, negotiate
+from app.auth import decode_token, require_auth, require_admin
 from app import models
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/ws", tags=["Presence"])
 
+# Same reply to every heartbeat: encoded once per wire format for the process
+_HEARTBEAT_ACK = Frame({"type": "heartbeat_ack"})
+
 
 async def get_user_from_token(token: str, db: Session) -> Optional[models.User]:
     """Validate JWT token and return user."""
@@ -52,7 +56,9 @@ async def presence_websocket(
     websocket: WebSocket,
     resource_type: str,
     resource_id: str,
-    token: Optional[str] = Query(None)
+    token: Optional[str] = Query(None),
+    since: Optional[int] = Query(None),
+    epoch: Optional[str] = Query(None)
 ):
     """
     WebSocket endpoint for presence tracking.
@@ -66,13 +72,21 @@ async def presence_websocket(
     
     Query params:
     - token: JWT token for authentication
+    - since, epoch: resume point (last "seq" received and its "epoch") after a reconnect
+    
+    Subprotocols (wire format, see app.wire): "oil-lifting.compact.v1" (short keys);
+    none means plain JSON. Keep-alive also works through WebSocket ping frames, so
+    heartbeat messages are optional.
     
     Messages received:
-    - {"type": "heartbeat"} - Keep connection alive
+    - {"type": "heartbeat"} - Keep connection alive (JSON clients)
     - {"type": "editing", "field": "vessel_name"} - User started editing a field
     - {"type": "stopped_editing"} - User stopped editing
     
     Messages sent:
+    - {"type": "sync_state", "epoch": "...", "seq": N} - Stream position, first after connecting
+    - {"type": "data_sync" | "data_sync_batch", "seq": N, ...} - Data changes (batch with replay=true after a resume)
+    - {"type": "resync_required", ...} - Missed changes are no longer buffered; reload the data
     - {"type": "presence", "users": [...], "count": N} - Current users on resource
     - {"type": "user_editing", "user": {...}, "field": "..."} - Another user is editing
     - {"type": "data_changed", "user": {...}} - Another user saved changes
@@ -81,6 +95,7 @@ async def presence_websocket(
     
     db = SessionLocal()
     user = None
+    wire = negotiate(websocket.scope.get("subprotocols") or [])
     
     try:
         # SECURITY: Authenticate user BEFORE accepting connection
@@ -100,18 +115,26 @@ async def presence_websocket(
             resource_id=resource_id,
             user_id=user.id,
             initials=user.initials,
-            full_name=user.full_name
+            full_name=user.full_name,
+            since=since,
+            epoch=epoch,
+            wire=wire
         )
         
         if not success:
-            # Connection was rejected (e.g., too many connections)
-            # Connection was already accepted by connect(), so send error and close
+            # Connection was rejected (e.g., too many connections) before being
+            # accepted: accept it so the client can read the error, then close
             try:
-                await websocket.send_json({
+                await websocket.accept(subprotocol=wire.subprotocol)
+                payload = Frame({
                     "type": "error",
                     "code": "CONNECTION_LIMIT_EXCEEDED",
                     "message": error_message
-                })
+                }).encode(wire)
+                if isinstance(payload, bytes):
+                    await websocket.send_bytes(payload)
+                else:
+                    await websocket.send_text(payload)
                 await websocket.close(code=4002)
             except Exception:
                 pass  # Connection may already be closed
@@ -127,8 +150,9 @@ async def presence_websocket(
                 msg_type = message.get("type")
                 
                 if msg_type == "heartbeat":
-                    # Just acknowledge - connection is still alive
-                    await websocket.send_json({"type": "heartbeat_ack"})
+                    # Just acknowledge - connection is still alive (through the send queue,
+                    # so it never interleaves with a broadcast on this socket)
+                    await presence_manager.send_to_user(resource_type, resource_id, user.id, _HEARTBEAT_ACK)
                 
                 elif msg_type == "editing":
                     # Broadcast that this user is editing a field
@@ -144,7 +168,10 @@ async def presence_websocket(
                             },
                             "field": message.get("field")
                         },
-                        exclude_user_id=user.id
+                        exclude_user_id=user.id,
+                        # Only the latest editing state per user matters
+                        coalesce_key=f"editing:{user.id}",
+                        droppable=True
                     )
                 
                 elif msg_type == "stopped_editing":
@@ -160,7 +187,11 @@ async def presence_websocket(
                                 "full_name": user.full_name
                             }
                         },
-                        exclude_user_id=user.id
+                        exclude_user_id=user.id,
+                        # Replaces a queued "editing" for this user. Never dropped: a lost stop
+                        # would leave the user shown as editing on the other clients
+                        coalesce_key=f"editing:{user.id}",
+                        droppable=False
                     )
                 
             except json.JSONDecodeError:
@@ -199,6 +230,15 @@ def get_presence(
     }
 
 
+@router.get("/metrics")
+def get_fanout_metrics(current_user: models.User = Depends(require_admin)):
+    """
+    WebSocket fan-out metrics of this worker: messages queued/sent/coalesced/dropped,
+    evicted slow consumers, send timeouts and queue-to-wire latency percentiles.
+    """
+    return presence_manager.get_metrics()
+
+
 async def notify_data_changed(
     resource_type: str,
     resource_id: str,
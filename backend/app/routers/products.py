@@ -8,6 +8,7 @@ from typing import List
 from app.database import get_db
 from app import models, schemas
 from app.general_audit_utils import log_general_action
+from app.reference_data import reference_data
 from app.auth import require_auth
 import logging
 
@@ -57,6 +58,7 @@ def create_product(
             description=f"Created product: {db_product.name} ({db_product.code})"
         )
         
+        reference_data.invalidate(db)
         db.commit()
         db.refresh(db_product)
         
@@ -176,6 +178,7 @@ def update_product(
                 )
             setattr(db_product, field, value)
         
+        reference_data.invalidate(db)
         db.commit()
         db.refresh(db_product)
         
@@ -222,6 +225,7 @@ def delete_product(
         )
         
         db.delete(db_product)
+        reference_data.invalidate(db)
         db.commit()
         
         logger.info(f"Product deleted: {product_name}")
@@ -263,6 +267,7 @@ def seed_default_products(
             )
             db.add(db_product)
         
+        reference_data.invalidate(db)
         db.commit()
         logger.info(f"Seeded {len(default_products)} default products")
         return {"message": f"Successfully seeded {len(default_products)} default products"}
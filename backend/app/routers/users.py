@@ -22,6 +22,7 @@ from app.auth import (
     require_auth,
     generate_invite_token,
     get_password_hash,
+    invalidate_cached_user,
 )
 from app.general_audit_utils import log_general_action
 
@@ -226,6 +227,7 @@ def update_user(
     
     try:
         db.commit()
+        invalidate_cached_user(user.id)
         db.refresh(user)
     except IntegrityError as e:
         db.rollback()
@@ -279,6 +281,7 @@ def deactivate_user(
     )
     
     db.commit()
+    invalidate_cached_user(user.id)
     db.refresh(user)
     
     logger.info(f"User {user.email} deactivated by {current_user.email}")
@@ -324,6 +327,7 @@ def activate_user(
     )
     
     db.commit()
+    invalidate_cached_user(user.id)
     db.refresh(user)
     
     logger.info(f"User {user.email} activated by {current_user.email}")
@@ -453,6 +457,7 @@ def delete_user(
     
     db.delete(user)
     db.commit()
+    invalidate_cached_user(user_id_to_delete)
     
     logger.info(f"User {email} deleted by {current_user.email}")
     
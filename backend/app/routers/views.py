@@ -0,0 +1,144 @@
+"""
+Aggregated page views - one request per page instead of a fan-out of list calls.
+
+Each view builds all of a page's datasets in a single DB session. Small shared
+rows (customers, contracts, products, ports, inspectors) are loaded once up
+front; the cargo and monthly plan lists are column-projected reads
+(app.projections) that resolve what they reference once per dataset.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import desc
+from typing import List, Optional
+from datetime import datetime, timezone
+import logging
+
+from app.database import get_db
+from app import models, schemas
+from app.auth import require_auth
+from app.routers.cargos import (
+    port_movement_query,
+    active_loadings_query,
+    completed_cargos_query,
+    in_road_cif_query,
+    completed_in_road_cif_query,
+)
+from app.routers.monthly_plans import (
+    _monthly_plan_to_schema,
+    bulk_plans_query,
+    cif_tng_plans_query,
+)
+from app.routers.contracts import _contracts_has_column, _contract_to_dict, contract_list_query
+from app.projections import CARGO_LIST, MONTHLY_PLAN, cargo_list_records, monthly_plan_enriched_records
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+def _parse_month_list(months: Optional[str]) -> List[int]:
+    """Parse a comma-separated month list, raising 400 on anything outside 1-12."""
+    if not months:
+        return []
+    try:
+        month_list = [int(m.strip()) for m in months.split(",") if m.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid month format: {months}")
+    for m in month_list:
+        if m < 1 or m > 12:
+            raise HTTPException(status_code=400, detail=f"Invalid month: {m}")
+    return month_list
+
+
+def _sort_key(row):
+    return (row.sort_order or 0, row.name)
+
+
+@router.get("/home", response_model=schemas.HomeViewSnapshot)
+def get_home_view(
+    months: Optional[str] = Query(None, description="Comma-separated port movement months, e.g. '1,2,3' (defaults to current month)"),
+    year: Optional[int] = Query(None, description="Port movement year (defaults to current year)"),
+    completed_month: Optional[int] = Query(None, description="Completed cargos month filter (optional)"),
+    completed_year: Optional[int] = Query(None, description="Completed cargos year filter (optional)"),
+    tng_months: Optional[str] = Query(None, description="Comma-separated TNG months (optional)"),
+    tng_year: Optional[int] = Query(None, description="TNG year filter (optional)"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_auth),
+):
+    """
+    Home page snapshot.
+
+    Returns the same rows as contracts/, cargos/port-movement, cargos/active-loadings,
+    cargos/completed-cargos, cargos/in-road-cif, cargos/completed-in-road-cif,
+    monthly-plans/bulk and monthly-plans/cif-tng, plus the monthly plans referenced
+    by the in-road CIF cargos and the dropdown reference lists.
+    """
+    now = datetime.now()
+    month_list = _parse_month_list(months) or [now.month]
+    year = year or now.year
+    tng_month_list = _parse_month_list(tng_months)
+
+    try:
+        # Shared rows - loaded once so the contracts' many-to-ones (customer, product) and the
+        # referenced plans below are served from the identity map.
+        # The identity map is weak-referencing, so these lists must stay alive until the end.
+        customers = db.query(models.Customer).all()
+        products = db.query(models.Product).all()
+        load_ports = db.query(models.LoadPort).all()
+        inspectors = db.query(models.Inspector).all()
+        discharge_ports = db.query(models.DischargePort).filter(models.DischargePort.is_active == True).all()
+
+        has_remarks = _contracts_has_column(db, "remarks")
+        has_additives_required = _contracts_has_column(db, "additives_required")
+        contracts = contract_list_query(db, has_remarks, has_additives_required).order_by(
+            desc(models.Contract.created_at)
+        ).all()
+
+        def load_cargos(stmt):
+            return cargo_list_records(db, db.execute(stmt).all())
+
+        def load_plans(stmt):
+            return monthly_plan_enriched_records(db, db.execute(stmt).all())
+
+        port_movement = load_cargos(port_movement_query(db, month_list, year, CARGO_LIST.select()))
+        active_loadings = load_cargos(active_loadings_query(db, CARGO_LIST.select()))
+        completed_cargos = load_cargos(completed_cargos_query(db, completed_month, completed_year, CARGO_LIST.select()))
+        in_road_cif = load_cargos(in_road_cif_query(db, CARGO_LIST.select()))
+        completed_in_road_cif = load_cargos(completed_in_road_cif_query(db, CARGO_LIST.select()))
+
+        monthly_plans = load_plans(bulk_plans_query(db, month_list, year, query=MONTHLY_PLAN.select()))
+        cif_tng_plans = load_plans(cif_tng_plans_query(db, tng_month_list, tng_year, MONTHLY_PLAN.select()))
+
+        # Embed the plans behind the CIF cargos (delivery windows) instead of one GET per plan
+        referenced_plan_ids = {c["monthly_plan_id"] for c in in_road_cif + completed_in_road_cif}
+        referenced_plans = []
+        if referenced_plan_ids:
+            referenced_plans = [
+                _monthly_plan_to_schema(p, db)
+                for p in db.query(models.MonthlyPlan).filter(models.MonthlyPlan.id.in_(referenced_plan_ids)).all()
+            ]
+
+        return {
+            "customers": customers,
+            "contracts": [
+                _contract_to_dict(c, has_remarks, has_additives_required)
+                for c in contracts
+                # Skip contracts without customer_id (old data from before migration)
+                if c.customer_id is not None
+            ],
+            "port_movement": port_movement,
+            "active_loadings": active_loadings,
+            "completed_cargos": completed_cargos,
+            "in_road_cif": in_road_cif,
+            "completed_in_road_cif": completed_in_road_cif,
+            "monthly_plans": monthly_plans,
+            "cif_tng_plans": cif_tng_plans,
+            "referenced_monthly_plans": referenced_plans,
+            "load_port_codes": [p.code for p in sorted(load_ports, key=_sort_key) if p.is_active],
+            "inspector_names": [i.name for i in sorted(inspectors, key=_sort_key) if i.is_active],
+            "discharge_ports": sorted(discharge_ports, key=_sort_key),
+            "generated_at": datetime.now(timezone.utc),
+        }
+    except SQLAlchemyError as e:
+        logger.error(f"Database error in get_home_view: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Error loading home page data")
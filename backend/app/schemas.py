@@ -875,6 +875,72 @@ class WeeklyQuantityComparisonResponse(BaseModel):
     contracts: List[WeeklyQuantityContract]
 
 
+# Aggregated page views
+class HomeViewSnapshot(BaseModel):
+    """Everything the Home page needs for its first paint, built in one DB session."""
+    customers: List[Customer]
+    contracts: List[Contract]
+    port_movement: List[Cargo]
+    active_loadings: List[Cargo]
+    completed_cargos: List[Cargo]
+    in_road_cif: List[Cargo]
+    completed_in_road_cif: List[Cargo]
+    monthly_plans: List[MonthlyPlanEnriched]  # Same rows as /api/monthly-plans/bulk
+    cif_tng_plans: List[MonthlyPlanEnriched]  # Same rows as /api/monthly-plans/cif-tng
+    referenced_monthly_plans: List[MonthlyPlan]  # Plans of the in-road / completed in-road CIF cargos
+    load_port_codes: List[str]
+    inspector_names: List[str]
+    discharge_ports: List[DischargePort]
+    generated_at: datetime
+
+
+# Laycan alerts
+class LaycanAlert(BaseModel):
+    """A cargo whose laycan starts soon (or has passed) - severity from days_until."""
+    id: int
+    cargo_id: str
+    vessel_name: str
+    contract_id: int
+    contract_number: Optional[str] = None
+    contract_type: ContractType
+    customer_name: Optional[str] = None
+    laycan: Optional[str] = None  # Laycan text the dates were parsed from
+    laycan_start: date
+    laycan_end: date
+    days_until: int  # Negative when overdue
+    is_overdue: bool
+    severity: str = Field(..., pattern="^(critical|warning|info)$")
+
+
+class LaycanAlertList(BaseModel):
+    """Laycan alerts ordered by laycan start, most urgent first."""
+    as_of: date
+    within_days: int
+    alerts: List[LaycanAlert]
+    total_count: int
+    critical_count: int
+    warning_count: int
+    info_count: int
+
+
+# Batch document generation
+class DocumentBatchRequest(BaseModel):
+    """Select documents for a ZIP batch: explicit IDs, or every cargo/plan of a month."""
+    document_type: str = Field(..., pattern="^(nomination|tng)$")
+    month: Optional[int] = Field(None, ge=1, le=12)
+    year: Optional[int] = Field(None, ge=2000, le=2100)
+    cargo_ids: Optional[List[int]] = None  # nomination batches
+    monthly_plan_ids: Optional[List[int]] = None  # TNG batches
+
+    @model_validator(mode='after')
+    def validate_selection(self):
+        ids = self.cargo_ids if self.document_type == "nomination" else self.monthly_plan_ids
+        if not ids and not (self.month and self.year):
+            id_field = "cargo_ids" if self.document_type == "nomination" else "monthly_plan_ids"
+            raise ValueError(f"Provide {id_field} or both month and year")
+        return self
+
+
 # =============================================================================
 # AUTH/USER SCHEMAS
 # =============================================================================
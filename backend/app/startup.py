@@ -1,11 +1,18 @@
 """
 Startup script to ensure admin/test users and reference data exist.
 This runs automatically when the FastAPI app starts.
+
+run_startup() is the whole boot pipeline: fingerprinted schema check, all seeders
+in one transaction, reference data cache warm-up, with per-phase timings logged.
+Unchanged work is skipped, so worker restarts take milliseconds.
 """
+import hashlib
 import logging
-from app.database import SessionLocal
+import time
+from sqlalchemy.orm import Session
+from app.database import SessionLocal, ensure_schema, get_startup_fingerprint, set_startup_fingerprint
 from app.models import User, UserRole, UserStatus, DischargePort, Product, LoadPort, Inspector
-from app.auth import get_password_hash
+from app.auth import get_password_hash, verify_password
 
 logger = logging.getLogger(__name__)
 
@@ -105,113 +112,110 @@ Stern-centre manifold Max:      130
     },
 ]
 
-def ensure_user(email: str, password: str, full_name: str, initials: str, role: UserRole):
-    """Ensure a user exists, create or update if needed."""
-    db = SessionLocal()
+# Admin and test accounts (re)created on every environment
+SEED_USERS = [
+    {"email": "admin@admin.com", "password": "admin", "full_name": "Admin User", "initials": "ADM", "role": UserRole.ADMIN},
+    {"email": "mek@test.com", "password": "password", "full_name": "Test User MEK", "initials": "MEK1", "role": UserRole.USER},
+    {"email": "azn@test.com", "password": "password", "full_name": "Test User AZN", "initials": "AZN", "role": UserRole.USER},
+    {"email": "mfo@test.com", "password": "password", "full_name": "Test User MFO", "initials": "MFO", "role": UserRole.USER},
+    {"email": "na@test.com", "password": "password", "full_name": "Test User NA", "initials": "NA", "role": UserRole.USER},
+]
+
+
+def ensure_user(db: Session, email: str, password: str, full_name: str, initials: str, role: UserRole):
+    """Ensure a user exists, create or update if needed (no commit)."""
+    user = db.query(User).filter(User.email == email).first()
     
-    try:
-        user = db.query(User).filter(User.email == email).first()
-        
-        if user:
-            # Update password and details to ensure they're correct
+    if user:
+        # Only re-hash if the stored password is wrong (hashing is the slow part of startup)
+        if not user.password_hash or not verify_password(password, user.password_hash):
             user.password_hash = get_password_hash(password)
-            user.status = UserStatus.ACTIVE
-            user.role = role
-            # Only update initials if they don't conflict with another user
-            existing_with_initials = db.query(User).filter(
-                User.initials == initials,
-                User.id != user.id
-            ).first()
-            if not existing_with_initials:
-                user.initials = initials
-            db.commit()
-            logger.info(f"✅ User updated: {email} (Initials: {user.initials})")
-        else:
-            # Check if initials are available
-            existing_with_initials = db.query(User).filter(User.initials == initials).first()
-            if existing_with_initials:
-                logger.warning(f"⚠️  Initials {initials} already taken, skipping user {email}")
-                return
-            
-            # Create user
-            user = User(
-                email=email,
-                password_hash=get_password_hash(password),
-                full_name=full_name,
-                initials=initials,
-                role=role,
-                status=UserStatus.ACTIVE,
-                invite_token=None,
-                invite_token_expires=None,
-                created_by_id=None
-            )
-            db.add(user)
-            db.commit()
-            logger.info(f"✅ User created: {email} (Initials: {initials})")
-        
-        db.refresh(user)
+        user.status = UserStatus.ACTIVE
+        user.role = role
+        # Only update initials if they don't conflict with another user
+        existing_with_initials = db.query(User).filter(
+            User.initials == initials,
+            User.id != user.id
+        ).first()
+        if not existing_with_initials:
+            user.initials = initials
+        db.flush()
+        logger.info(f"✅ User updated: {email} (Initials: {user.initials})")
+    else:
+        # Check if initials are available
+        existing_with_initials = db.query(User).filter(User.initials == initials).first()
+        if existing_with_initials:
+            logger.warning(f"⚠️  Initials {initials} already taken, skipping user {email}")
+            return
         
-    except Exception as e:
-        db.rollback()
-        logger.error(f"❌ Error ensuring user {email}: {e}")
-        # Don't raise - allow app to start even if user creation fails
-    finally:
-        db.close()
-
-def ensure_admin_user():
-    """Ensure admin user exists, create if it doesn't."""
-    ensure_user(
-        email="admin@admin.com",
-        password="admin",
-        full_name="Admin User",
-        initials="ADM",
-        role=UserRole.ADMIN
-    )
-
-def ensure_test_users():
-    """Ensure test users exist, create if they don't."""
-    test_users = [
-        {"email": "mek@test.com", "password": "password", "full_name": "Test User MEK", "initials": "MEK1", "role": UserRole.USER},
-        {"email": "azn@test.com", "password": "password", "full_name": "Test User AZN", "initials": "AZN", "role": UserRole.USER},
-        {"email": "mfo@test.com", "password": "password", "full_name": "Test User MFO", "initials": "MFO", "role": UserRole.USER},
-        {"email": "na@test.com", "password": "password", "full_name": "Test User NA", "initials": "NA", "role": UserRole.USER},
-    ]
+        # Create user
+        user = User(
+            email=email,
+            password_hash=get_password_hash(password),
+            full_name=full_name,
+            initials=initials,
+            role=role,
+            status=UserStatus.ACTIVE,
+            invite_token=None,
+            invite_token_expires=None,
+            created_by_id=None
+        )
+        db.add(user)
+        db.flush()
+        logger.info(f"✅ User created: {email} (Initials: {initials})")
+
+
+def _seed_users_fingerprint(db: Session) -> str:
+    """Hash of the seed definitions and the current rows of the seed users."""
+    digest = hashlib.sha256()
+    for data in SEED_USERS:
+        digest.update(repr(sorted((k, str(v)) for k, v in data.items())).encode("utf-8"))
+    rows = db.query(
+        User.email, User.password_hash, User.status, User.role, User.initials
+    ).filter(User.email.in_([u["email"] for u in SEED_USERS])).order_by(User.email).all()
+    for row in rows:
+        digest.update(repr(tuple(str(v) for v in row)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def ensure_seed_users(db: Session):
+    """
+    Ensure admin/test users exist with their default password, role and status.
     
-    for user_data in test_users:
-        ensure_user(**user_data)
+    Skipped entirely when neither the seed definitions nor the seed users' rows changed
+    since the last run (no bcrypt work at all on a normal restart).
+    """
+    if get_startup_fingerprint("seed_users") == _seed_users_fingerprint(db):
+        logger.info(f"ℹ️  Seed users unchanged ({len(SEED_USERS)} users)")
+        return
+    
+    for user_data in SEED_USERS:
+        ensure_user(db, **user_data)
+    set_startup_fingerprint(db, "seed_users", _seed_users_fingerprint(db))
 
 
-def ensure_discharge_ports():
+def ensure_discharge_ports(db: Session):
     """Ensure default discharge ports exist, create if they don't."""
-    db = SessionLocal()
+    # Check if any discharge ports exist
+    existing_count = db.query(DischargePort).count()
     
-    try:
-        # Check if any discharge ports exist
-        existing_count = db.query(DischargePort).count()
+    if existing_count == 0:
+        # Seed default discharge ports
+        for port_data in DEFAULT_DISCHARGE_PORTS:
+            port = DischargePort(
+                name=port_data["name"],
+                restrictions=port_data["restrictions"],
+                voyage_days_suez=port_data["voyage_days_suez"],
+                voyage_days_cape=port_data["voyage_days_cape"],
+                is_active=True,
+                sort_order=port_data["sort_order"]
+            )
+            db.add(port)
         
-        if existing_count == 0:
-            # Seed default discharge ports
-            for port_data in DEFAULT_DISCHARGE_PORTS:
-                port = DischargePort(
-                    name=port_data["name"],
-                    restrictions=port_data["restrictions"],
-                    voyage_days_suez=port_data["voyage_days_suez"],
-                    voyage_days_cape=port_data["voyage_days_cape"],
-                    is_active=True,
-                    sort_order=port_data["sort_order"]
-                )
-                db.add(port)
-            
-            db.commit()
-            logger.info(f"✅ Seeded {len(DEFAULT_DISCHARGE_PORTS)} default discharge ports")
-        else:
-            logger.info(f"ℹ️  Discharge ports already exist ({existing_count} ports)")
-            
-    except Exception as e:
-        db.rollback()
-        logger.error(f"❌ Error seeding discharge ports: {e}")
-    finally:
-        db.close()
+        db.flush()
+        logger.info(f"✅ Seeded {len(DEFAULT_DISCHARGE_PORTS)} default discharge ports")
+    else:
+        logger.info(f"ℹ️  Discharge ports already exist ({existing_count} ports)")
 
 
 # Default products
@@ -224,34 +228,25 @@ DEFAULT_PRODUCTS = [
 ]
 
 
-def ensure_products():
+def ensure_products(db: Session):
     """Ensure default products exist, create if they don't."""
-    db = SessionLocal()
-
-    try:
-        existing_count = db.query(Product).count()
-
-        if existing_count == 0:
-            for product_data in DEFAULT_PRODUCTS:
-                product = Product(
-                    code=product_data["code"],
-                    name=product_data["name"],
-                    description=product_data["description"],
-                    is_active=True,
-                    sort_order=product_data["sort_order"]
-                )
-                db.add(product)
-
-            db.commit()
-            logger.info(f"✅ Seeded {len(DEFAULT_PRODUCTS)} default products")
-        else:
-            logger.info(f"ℹ️  Products already exist ({existing_count} products)")
+    existing_count = db.query(Product).count()
+
+    if existing_count == 0:
+        for product_data in DEFAULT_PRODUCTS:
+            product = Product(
+                code=product_data["code"],
+                name=product_data["name"],
+                description=product_data["description"],
+                is_active=True,
+                sort_order=product_data["sort_order"]
+            )
+            db.add(product)
 
-    except Exception as e:
-        db.rollback()
-        logger.error(f"❌ Error seeding products: {e}")
-    finally:
-        db.close()
+        db.flush()
+        logger.info(f"✅ Seeded {len(DEFAULT_PRODUCTS)} default products")
+    else:
+        logger.info(f"ℹ️  Products already exist ({existing_count} products)")
 
 
 # Default load ports
@@ -263,35 +258,26 @@ DEFAULT_LOAD_PORTS = [
 ]
 
 
-def ensure_load_ports():
+def ensure_load_ports(db: Session):
     """Ensure default load ports exist, create if they don't."""
-    db = SessionLocal()
-
-    try:
-        existing_count = db.query(LoadPort).count()
-
-        if existing_count == 0:
-            for port_data in DEFAULT_LOAD_PORTS:
-                port = LoadPort(
-                    code=port_data["code"],
-                    name=port_data["name"],
-                    country=port_data["country"],
-                    description=port_data["description"],
-                    is_active=True,
-                    sort_order=port_data["sort_order"]
-                )
-                db.add(port)
-
-            db.commit()
-            logger.info(f"✅ Seeded {len(DEFAULT_LOAD_PORTS)} default load ports")
-        else:
-            logger.info(f"ℹ️  Load ports already exist ({existing_count} ports)")
+    existing_count = db.query(LoadPort).count()
+
+    if existing_count == 0:
+        for port_data in DEFAULT_LOAD_PORTS:
+            port = LoadPort(
+                code=port_data["code"],
+                name=port_data["name"],
+                country=port_data["country"],
+                description=port_data["description"],
+                is_active=True,
+                sort_order=port_data["sort_order"]
+            )
+            db.add(port)
 
-    except Exception as e:
-        db.rollback()
-        logger.error(f"❌ Error seeding load ports: {e}")
-    finally:
-        db.close()
+        db.flush()
+        logger.info(f"✅ Seeded {len(DEFAULT_LOAD_PORTS)} default load ports")
+    else:
+        logger.info(f"ℹ️  Load ports already exist ({existing_count} ports)")
 
 
 # Default inspectors
@@ -304,32 +290,85 @@ DEFAULT_INSPECTORS = [
 ]
 
 
-def ensure_inspectors():
+def ensure_inspectors(db: Session):
     """Ensure default inspectors exist, create if they don't."""
-    db = SessionLocal()
+    existing_count = db.query(Inspector).count()
+
+    if existing_count == 0:
+        for inspector_data in DEFAULT_INSPECTORS:
+            inspector = Inspector(
+                code=inspector_data["code"],
+                name=inspector_data["name"],
+                description=inspector_data["description"],
+                is_active=True,
+                sort_order=inspector_data["sort_order"]
+            )
+            db.add(inspector)
+
+        db.flush()
+        logger.info(f"✅ Seeded {len(DEFAULT_INSPECTORS)} default inspectors")
+    else:
+        logger.info(f"ℹ️  Inspectors already exist ({existing_count} inspectors)")
 
-    try:
-        existing_count = db.query(Inspector).count()
-
-        if existing_count == 0:
-            for inspector_data in DEFAULT_INSPECTORS:
-                inspector = Inspector(
-                    code=inspector_data["code"],
-                    name=inspector_data["name"],
-                    description=inspector_data["description"],
-                    is_active=True,
-                    sort_order=inspector_data["sort_order"]
-                )
-                db.add(inspector)
-
-            db.commit()
-            logger.info(f"✅ Seeded {len(DEFAULT_INSPECTORS)} default inspectors")
-        else:
-            logger.info(f"ℹ️  Inspectors already exist ({existing_count} inspectors)")
 
+def ensure_laycan_dates(db: Session):
+    """
+    Parse the laycan dates of existing monthly plans and cargos.
+    
+    New writes keep them up to date (app.laycan), so this only runs once per
+    LAYCAN_PARSER_VERSION.
+    """
+    from app.laycan import LAYCAN_PARSER_VERSION, backfill_laycan_dates
+    
+    if get_startup_fingerprint("laycan_dates") == LAYCAN_PARSER_VERSION:
+        logger.info(f"ℹ️  Laycan dates up to date (parser v{LAYCAN_PARSER_VERSION})")
+        return
+    
+    updated = backfill_laycan_dates(db)
+    set_startup_fingerprint(db, "laycan_dates", LAYCAN_PARSER_VERSION)
+    logger.info(f"✅ Parsed laycan dates (parser v{LAYCAN_PARSER_VERSION}, {updated} rows updated)")
+
+
+def run_startup():
+    """
+    Boot pipeline, run once per worker at import of app.main.
+    
+    Phases: schema check, seeders and data backfills (one session, one commit),
+    reference data cache.
+    A seeding failure is logged and rolled back so the app can still start.
+    """
+    from app.reference_data import reference_data
+    
+    timings = []
+    started = time.perf_counter()
+    
+    phase_start = time.perf_counter()
+    ensure_schema()
+    timings.append(("schema", time.perf_counter() - phase_start))
+    
+    phase_start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        ensure_seed_users(db)
+        ensure_discharge_ports(db)
+        ensure_products(db)
+        ensure_load_ports(db)
+        ensure_inspectors(db)
+        ensure_laycan_dates(db)
+        db.commit()
     except Exception as e:
         db.rollback()
-        logger.error(f"❌ Error seeding inspectors: {e}")
+        logger.error(f"❌ Error running startup seeders: {e}", exc_info=True)
+        # Don't raise - allow app to start even if seeding fails
     finally:
         db.close()
-
+    timings.append(("seed", time.perf_counter() - phase_start))
+    
+    phase_start = time.perf_counter()
+    # Load products/ports/inspectors into the in-memory reference data cache
+    reference_data.warm()
+    timings.append(("reference data", time.perf_counter() - phase_start))
+    
+    total_ms = (time.perf_counter() - started) * 1000
+    phases = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in timings)
+    logger.info(f"Startup complete in {total_ms:.0f}ms ({phases})")
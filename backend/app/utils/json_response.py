@@ -0,0 +1,170 @@
+"""
+Fast JSON responses for large list endpoints.
+
+List endpoints build plain dicts per row (app.projections records,
+_contract_to_dict, ...) in exactly the shape of their response model.
+Returning them through `response_model=List[...]` makes FastAPI validate every
+row into a model and dump it back to a dict before encoding it with the stdlib
+json module - most of the response time for a thousand cargos.
+
+`fast_json_list` skips that round trip: each row is projected onto the model's
+fields (same keys, order and defaults as the validated output; nested models
+included) and the list is encoded in one call with orjson, or stdlib json when
+orjson is not installed. The output matches Pydantic's JSON: ints in float
+fields become floats and UTC datetimes end in "Z". The endpoint keeps its
+response_model for the OpenAPI schema.
+
+Set FAST_JSON_RESPONSES=false to send list responses through the regular
+validation again (e.g. while debugging a serializer).
+
+Usage:
+    from app.utils.json_response import fast_json_list
+
+    @router.get("/port-movement", response_model=List[schemas.Cargo])
+    def read_port_movement(...):
+        return fast_json_list([_cargo_to_schema(c, db) for c in cargos], schemas.Cargo)
+"""
+
+import json
+import os
+import typing
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+# Serialize prevalidated list rows directly (false: validate through response_model)
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "true").lower() == "true"
+
+
+def _default(value: Any) -> Any:
+    """Values the JSON encoders don't handle natively."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return _isoformat_z(value)
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _isoformat_z(value: datetime) -> str:
+    """ISO 8601 like Pydantic: UTC as "Z" instead of "+00:00"."""
+    text = value.isoformat()
+    if value.utcoffset() == timedelta(0) and text.endswith("+00:00"):
+        return text[:-6] + "Z"
+    return text
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content as compact JSON bytes (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+    return json.dumps(content, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response whose content is encoded with `dumps`, without validation."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# Field plan of a model: (name, default, nested plan or None, nested value is a list, float field)
+_FieldPlan = List[Tuple[str, Any, Optional["_FieldPlan"], bool, bool]]
+_plans: Dict[Type[BaseModel], _FieldPlan] = {}
+
+
+def _nested_model(annotation: Any) -> Tuple[Optional[Type[BaseModel]], bool]:
+    """The model inside Optional[Model] / Optional[List[Model]], and whether it's a list."""
+    origin = typing.get_origin(annotation)
+    if origin is Union:
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        if len(args) != 1:
+            return None, False
+        return _nested_model(args[0])
+    if origin in (list, List):
+        args = typing.get_args(annotation)
+        model, _ = _nested_model(args[0]) if args else (None, False)
+        return model, model is not None
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    return None, False
+
+
+def _is_float(annotation: Any) -> bool:
+    """float or Optional[float] - Pydantic emits ints in these fields as floats (5 -> 5.0)."""
+    if typing.get_origin(annotation) is Union:
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        return len(args) == 1 and args[0] is float
+    return annotation is float
+
+
+def _field_plan(model: Type[BaseModel]) -> _FieldPlan:
+    plan = _plans.get(model)
+    if plan is None:
+        plan = []
+        for name, field in model.model_fields.items():
+            default = None if field.is_required() else field.get_default(call_default_factory=True)
+            nested, is_list = _nested_model(field.annotation)
+            plan.append((name, default, _field_plan(nested) if nested else None, is_list, _is_float(field.annotation)))
+        _plans[model] = plan
+    return plan
+
+
+def _project(row: Any, plan: _FieldPlan) -> Any:
+    if not isinstance(row, dict):
+        return row
+    out = {}
+    for name, default, nested, is_list, is_float in plan:
+        value = row.get(name, default)
+        if value is not None:
+            if nested is not None:
+                value = [_project(item, nested) for item in value] if is_list else _project(value, nested)
+            elif is_float and type(value) is not float:
+                value = float(value)
+        out[name] = value
+    return out
+
+
+def project_rows(rows: List[dict], model: Type[BaseModel]) -> List[dict]:
+    """Rows reduced to the model's fields, in field order, with missing fields defaulted."""
+    plan = _field_plan(model)
+    return [_project(row, plan) for row in rows]
+
+
+def row_json(row: dict, model: Type[BaseModel]) -> str:
+    """One row as a JSON string, for streamed listings (validated when FAST_JSON_RESPONSES is off)."""
+    if not FAST_JSON_RESPONSES:
+        return model.model_validate(row).model_dump_json()
+    return dumps(_project(row, _field_plan(model))).decode("utf-8")
+
+
+def fast_json_list(rows: List[dict], model: Type[BaseModel]) -> Union[Response, List[dict]]:
+    """
+    Response for a list endpoint declared with response_model=List[model].
+
+    Rows must already hold valid values for the model (they come from the
+    endpoint's own serializer); they are projected and encoded without
+    validation. With FAST_JSON_RESPONSES disabled the rows are returned as-is
+    for FastAPI to validate.
+    """
+    if not FAST_JSON_RESPONSES:
+        return rows
+    return FastJSONResponse(project_rows(rows, model))
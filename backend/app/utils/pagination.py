@@ -0,0 +1,188 @@
+"""
+Keyset (cursor) pagination helpers for list endpoints.
+
+Instead of OFFSET, each page continues strictly after the sort key of the last
+row of the previous page: WHERE (year, month, id) > (:y, :m, :id). The database
+can seek straight to that position on the index, so page 500 costs the same as
+page 1, and rows inserted mid-scan never shift later pages.
+
+Cursors are opaque to clients: a URL-safe base64 token of the last sort key.
+They are returned in the X-Next-Cursor response header so list responses keep
+their plain-array shape.
+
+"Fetch all" mode pages internally with the same keyset and streams a JSON array,
+so clients can load a full multi-year dataset without offset scans or truncation.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy import or_, true, tuple_
+
+# Response header carrying the cursor of the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Rows fetched per internal page when streaming a full result set
+STREAM_BATCH_SIZE = 500
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode a sort key (list of JSON-serializable values) as an opaque cursor."""
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, key_length: int) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the token is malformed or does not match the expected key length
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Malformed cursor: {e}")
+    if not isinstance(values, list) or len(values) != key_length:
+        raise ValueError("Cursor does not match this listing")
+    return values
+
+
+def apply_keyset(query, key_columns: Sequence, after: Optional[Sequence[Any]] = None):
+    """Order a query by its keyset columns and, if given, continue strictly after `after`."""
+    if after is not None:
+        query = query.filter(tuple_(*key_columns) > tuple_(*after))
+    return query.order_by(*key_columns)
+
+
+def next_cursor(rows: Sequence, limit: int, key_func: Callable[[Any], Sequence[Any]]) -> Optional[str]:
+    """Cursor for the page after `rows`, or None when this was the last page."""
+    if len(rows) < limit or not rows:
+        return None
+    return encode_cursor(key_func(rows[-1]))
+
+
+def keyset_streaming_response(
+    build_query: Callable[[Any], Any],
+    key_columns: Sequence,
+    key_func: Callable[[Any], Sequence[Any]],
+    serialize: Callable[[Any, Any], str],
+    batch_size: int = STREAM_BATCH_SIZE,
+    prepare_batch: Optional[Callable[[Any, Sequence], Sequence]] = None,
+):
+    """
+    Stream every row of a listing as a JSON array, fetching `batch_size` rows at a time.
+
+    The generator runs after the endpoint has returned, so it owns its own session
+    (the request-scoped one may already be closed). The identity map is cleared
+    between batches to keep memory flat on large result sets.
+
+    Args:
+        build_query: Callable taking a session and returning the filtered (unordered)
+            ORM query or select() statement
+        key_columns: Keyset sort columns, unique in combination
+        key_func: Extracts the keyset values from a row
+        serialize: Callable taking (item, session) and returning the item as a JSON string
+        prepare_batch: Optional callable taking (session, rows) and returning the items
+            to serialize, e.g. records with what the batch references loaded in one go
+    """
+    from fastapi.responses import StreamingResponse
+    from sqlalchemy.sql import Select
+    from app.database import SessionLocal
+
+    def generate_rows() -> Iterator[str]:
+        db = SessionLocal()
+        try:
+            after = None
+            while True:
+                query = apply_keyset(build_query(db), key_columns, after).limit(batch_size)
+                rows = db.execute(query).all() if isinstance(query, Select) else query.all()
+                items = prepare_batch(db, rows) if prepare_batch else rows
+                for item in items:
+                    yield serialize(item, db)
+                if len(rows) < batch_size:
+                    return
+                after = key_func(rows[-1])
+                db.expunge_all()
+        finally:
+            db.close()
+
+    return StreamingResponse(stream_json_array(generate_rows()), media_type="application/json")
+
+
+def stream_json_array(items: Iterable[str]) -> Iterator[str]:
+    """Wrap already-encoded JSON objects into a streamed JSON array."""
+    yield "["
+    first = True
+    for item in items:
+        if not first:
+            yield ","
+        yield item
+        first = False
+    yield "]"
+
+
+def feed_order(created_column, *tiebreak_columns) -> tuple:
+    """
+    ORDER BY of a newest-first feed: created_at DESC, then the tie-breakers DESC.
+
+    Rows without a created_at (legacy data) sort first, where PostgreSQL puts NULLs
+    in a descending scan of the (created_at, id) index, so the index still serves
+    the order; the cursors below carry the NULL through.
+    """
+    return (created_column.desc().nulls_first(), *(column.desc() for column in tiebreak_columns))
+
+
+def union_branch_keyset_filter(created_column, id_column, source: str, after: Sequence[Any]):
+    """
+    Keyset predicate for one branch of a newest-first UNION ALL feed.
+
+    The feed is ordered by (created_at, source, id) DESC (see feed_order), where
+    `source` is a constant per branch. Comparing that constant in Python reduces
+    the tuple comparison to (created_at, id), which a (created_at, id) index can serve.
+
+    Args:
+        after: (created_at, source, id) of the last row of the previous page;
+            created_at is None while paging through the undated rows
+    """
+    after_created_at, after_source, after_id = after
+    if after_created_at is None:
+        # Still in the undated rows at the head of the feed: every dated row follows
+        if source < after_source:
+            return true()
+        if source > after_source:
+            return created_column.isnot(None)
+        return or_(created_column.isnot(None), id_column < after_id)
+    # Dated cursor: undated rows are all behind it, and NULL never compares true
+    if source < after_source:
+        return created_column <= after_created_at
+    if source > after_source:
+        return created_column < after_created_at
+    return tuple_(created_column, id_column) < tuple_(after_created_at, after_id)
+
+
+def decode_feed_cursor(cursor: str) -> List[Any]:
+    """
+    Decode a (created_at, source, id) feed cursor.
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    values = decode_cursor(cursor, 3)
+    if values[0] is not None:
+        try:
+            values[0] = datetime.fromisoformat(values[0])
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Malformed cursor: {e}")
+    if not isinstance(values[1], str) or not isinstance(values[2], int):
+        raise ValueError("Cursor does not match this listing")
+    return values
+
+
+def encode_feed_cursor(row) -> str:
+    """Cursor after a feed row with created_at, source and id attributes."""
+    created_at = row.created_at.isoformat() if row.created_at is not None else None
+    return encode_cursor([created_at, row.source, row.id])
@@ -200,9 +200,8 @@ def get_product_id_by_name(db, product_name: str) -> Optional[int]:
     Returns:
         Product ID or None if not found
     """
-    from app import models
-    product = db.query(models.Product).filter(models.Product.name == product_name).first()
-    return product.id if product else None
+    from app.reference_data import reference_data
+    return reference_data.product_id(db, product_name)
 
 
 def get_product_name_by_id(db, product_id: int) -> Optional[str]:
@@ -216,9 +215,8 @@ def get_product_name_by_id(db, product_id: int) -> Optional[str]:
     Returns:
         Product name or None if not found
     """
-    from app import models
-    product = db.query(models.Product).filter(models.Product.id == product_id).first()
-    return product.name if product else None
+    from app.reference_data import reference_data
+    return reference_data.product_name(db, product_id)
 
 
 def get_products_list(contract) -> List[Dict[str, Any]]:
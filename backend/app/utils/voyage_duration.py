@@ -46,12 +46,9 @@ def get_single_route_voyage_duration(destination: str, db: Session = None) -> Op
     if db is None:
         return None
 
-    from app import models
-
-    discharge_port = db.query(models.DischargePort).filter(
-        models.DischargePort.name == destination
-    ).first()
+    from app.reference_data import reference_data
 
+    discharge_port = reference_data.discharge_port(db, destination)
     if not discharge_port:
         return None
 
@@ -63,7 +60,7 @@ def get_voyage_duration(destination: str, route: str, db: Session = None) -> Opt
     """
     Get voyage duration in days for a destination and route.
 
-    Fetches from database if db session provided, otherwise returns None.
+    Looks up the cached discharge port if db session provided, otherwise returns None.
     For single-route destinations, returns the available route duration regardless of route param.
 
     Args:
@@ -77,25 +74,9 @@ def get_voyage_duration(destination: str, route: str, db: Session = None) -> Opt
     if db is None:
         return None
 
-    from app import models
-
-    discharge_port = db.query(models.DischargePort).filter(
-        models.DischargePort.name == destination
-    ).first()
-
-    if not discharge_port:
-        return None
-
-    # For single-route destinations, return the only available route (suez)
-    if is_single_route_destination(destination):
-        return discharge_port.voyage_days_suez
-
-    if route and route.upper() == "SUEZ":
-        return discharge_port.voyage_days_suez
-    elif route and route.upper() == "CAPE":
-        return discharge_port.voyage_days_cape
+    from app.reference_data import reference_data
 
-    return None
+    return get_voyage_duration_from_port(reference_data.discharge_port(db, destination), route)
 
 
 def get_voyage_duration_from_port(discharge_port, route: str) -> Optional[int]:
@@ -103,7 +84,7 @@ def get_voyage_duration_from_port(discharge_port, route: str) -> Optional[int]:
     Get voyage duration from a DischargePort model instance.
 
     Args:
-        discharge_port: DischargePort model instance
+        discharge_port: DischargePort model instance (or cached DischargePortRef)
         route: Route name ("SUEZ" or "CAPE") - ignored for single-route destinations
 
     Returns:
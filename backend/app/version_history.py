@@ -55,7 +55,8 @@ class VersionHistoryService:
     }
     
     # Fields to exclude from snapshots (sensitive or computed)
-    EXCLUDE_FIELDS = {"_sa_instance_state", "password_hash"}
+    # (laycan_start/laycan_end are derived from the laycan text fields on flush - app.laycan)
+    EXCLUDE_FIELDS = {"_sa_instance_state", "password_hash", "laycan_start", "laycan_end"}
     
     def _entity_to_dict(self, entity: Base) -> Dict[str, Any]:
         """Convert a SQLAlchemy model to a dictionary for JSON serialization."""
@@ -130,26 +131,29 @@ class VersionHistoryService:
         
         return info
     
+    def changed_values(self, old_data: Dict, new_data: Dict) -> Dict[str, Any]:
+        """Fields whose value differs between two snapshots, with their new values."""
+        return {
+            key: new_data.get(key)
+            for key in set(old_data.keys()) | set(new_data.keys())
+            if old_data.get(key) != new_data.get(key)
+        }
+    
     def _compare_snapshots(self, old_data: Dict, new_data: Dict) -> tuple[List[str], str]:
         """Compare two snapshots and return changed fields and summary."""
         changed_fields = []
         changes = []
         
-        all_keys = set(old_data.keys()) | set(new_data.keys())
-        
-        for key in all_keys:
+        for key, new_val in self.changed_values(old_data, new_data).items():
             old_val = old_data.get(key)
-            new_val = new_data.get(key)
-            
-            if old_val != new_val:
-                changed_fields.append(key)
-                # Create human-readable change description
-                if old_val is None:
-                    changes.append(f"{key}: set to '{new_val}'")
-                elif new_val is None:
-                    changes.append(f"{key}: cleared (was '{old_val}')")
-                else:
-                    changes.append(f"{key}: '{old_val}' → '{new_val}'")
+            changed_fields.append(key)
+            # Create human-readable change description
+            if old_val is None:
+                changes.append(f"{key}: set to '{new_val}'")
+            elif new_val is None:
+                changes.append(f"{key}: cleared (was '{old_val}')")
+            else:
+                changes.append(f"{key}: '{old_val}' → '{new_val}'")
         
         summary = "; ".join(changes) if changes else "No changes"
         return changed_fields, summary
@@ -0,0 +1,342 @@
+"""
+Weekly quantity snapshots for the weekly quantity comparison (Reconciliation page).
+
+"Previous week" figures are monthly plan quantities as they stood at the end of
+the most recent Thursday (week = Sunday -> Thursday, UTC). They used to be
+rebuilt on every request by replaying all monthly plan audit logs since that
+boundary. Now they are materialized once per (week boundary, year) into
+`weekly_quantity_snapshots`:
+- lazily, by the first comparison request after the boundary, or
+- ahead of time / for past weeks by `snapshot_weekly_quantities.py`.
+
+Materializing still replays the audit logs (current quantity minus every change
+after the boundary), so a snapshot taken days late is identical to one taken
+right at the boundary.
+
+Usage:
+    from app import weekly_snapshots
+
+    snapshot_at = weekly_snapshots.most_recent_thursday_end(now)
+    weekly_snapshots.ensure_snapshot(db, snapshot_at, year)
+    info, previous = weekly_snapshots.load_snapshot(db, snapshot_at, year)
+"""
+import json
+import logging
+import re
+from datetime import datetime, time, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import models
+
+logger = logging.getLogger(__name__)
+
+MONTH_NAMES = ['', 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+# (contract_id, product_name) and (contract_id, product_name, month)
+ContractProduct = Tuple[int, str]
+QuantityKey = Tuple[int, str, int]
+
+
+def most_recent_thursday_end(now: datetime) -> datetime:
+    """
+    Week definition: Sunday -> Thursday.
+    Snapshot at the end of the most recent Thursday (23:59:59.999999) in UTC.
+    """
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    target = 3  # Thursday
+    dow = now.weekday()  # Monday=0 ... Sunday=6
+    days_back = (dow - target) % 7
+    thursday_date = (now - timedelta(days=days_back)).date()
+    return datetime.combine(thursday_date, time.max, tzinfo=timezone.utc)
+
+
+def past_week_boundaries(now: datetime, weeks: int) -> List[datetime]:
+    """The last `weeks` Thursday boundaries that have already passed, newest first."""
+    boundary = most_recent_thursday_end(now)
+    if boundary > now.replace(tzinfo=now.tzinfo or timezone.utc):
+        boundary -= timedelta(days=7)
+    return [boundary - timedelta(days=7 * i) for i in range(weeks)]
+
+
+def _parse_float(val: Optional[str]) -> float:
+    if val is None:
+        return 0.0
+    try:
+        return float(val)
+    except Exception:
+        return 0.0
+
+
+# =============================================================================
+# Live quantities and audit replay
+# =============================================================================
+
+def current_quantities(db: Session, year: int) -> Tuple[Dict[ContractProduct, dict], Dict[QuantityKey, float]]:
+    """Live totals by contract/product/month for the year, plus display info per contract/product."""
+    rows = (
+        db.query(
+            models.Contract.id.label("contract_id"),
+            models.Contract.contract_number.label("contract_number"),
+            models.Customer.name.label("contract_name"),
+            models.Product.name.label("product_name"),
+            models.MonthlyPlan.month.label("month"),
+            func.coalesce(func.sum(models.MonthlyPlan.month_quantity), 0.0).label("qty"),
+        )
+        .join(models.QuarterlyPlan, models.QuarterlyPlan.id == models.MonthlyPlan.quarterly_plan_id)
+        .join(models.Contract, models.Contract.id == models.QuarterlyPlan.contract_id)
+        .join(models.Customer, models.Customer.id == models.Contract.customer_id)
+        .outerjoin(models.Product, models.Product.id == models.QuarterlyPlan.product_id)
+        .filter(models.MonthlyPlan.year == year)
+        .group_by(models.Contract.id, models.Contract.contract_number, models.Customer.name, models.Product.name, models.MonthlyPlan.month)
+        .all()
+    )
+
+    info: Dict[ContractProduct, dict] = {}
+    quantities: Dict[QuantityKey, float] = {}
+    for r in rows:
+        product_name = r.product_name or "Unknown"
+        info[(int(r.contract_id), product_name)] = {
+            "contract_number": r.contract_number,
+            "contract_name": r.contract_name,
+            "product_name": product_name,
+        }
+        quantities[(int(r.contract_id), product_name, int(r.month))] = float(r.qty or 0.0)
+    return info, quantities
+
+
+def _quantity_logs_since(db: Session, since: datetime, moves_only: bool = False):
+    """Monthly plan audit logs after `since` that change quantities, with the quarterly plan's product."""
+    query = (
+        db.query(models.MonthlyPlanAuditLog, models.Product.name.label("product_name"))
+        .outerjoin(models.QuarterlyPlan, models.QuarterlyPlan.id == models.MonthlyPlanAuditLog.quarterly_plan_id)
+        .outerjoin(models.Product, models.Product.id == models.QuarterlyPlan.product_id)
+        .filter(models.MonthlyPlanAuditLog.created_at > since)
+        .filter(models.MonthlyPlanAuditLog.contract_id.isnot(None))
+    )
+    if moves_only:
+        query = query.filter(models.MonthlyPlanAuditLog.action.in_(["DEFER", "ADVANCE"]))
+    else:
+        query = query.filter(
+            (models.MonthlyPlanAuditLog.field_name == "month_quantity")
+            | (models.MonthlyPlanAuditLog.action == "DELETE")
+            | (models.MonthlyPlanAuditLog.action.in_(["DEFER", "ADVANCE"]))
+        )
+    return query.order_by(models.MonthlyPlanAuditLog.created_at.asc()).all()
+
+
+def _move_effects(db: Session, logs, year: int) -> Iterator[Tuple[QuantityKey, float, str]]:
+    """
+    (key, quantity delta, remark) for each month touched by the DEFER/ADVANCE logs in `logs`.
+
+    The moved quantity comes from the monthly plan (loaded in one query for all
+    logs), falling back to the "<n> KT" figure in the log description.
+    """
+    move_logs = [row for row in logs if row[0].action in ("DEFER", "ADVANCE")]
+    plan_ids = {row[0].monthly_plan_id for row in move_logs if row[0].monthly_plan_id}
+    plan_quantities = dict(
+        db.query(models.MonthlyPlan.id, models.MonthlyPlan.month_quantity)
+        .filter(models.MonthlyPlan.id.in_(plan_ids)).all()
+    ) if plan_ids else {}
+
+    for log, product_name in move_logs:
+        product_name = product_name or "Unknown"
+        cid = int(log.contract_id)
+        try:
+            old_parts = log.old_value.split("/") if log.old_value else []
+            new_parts = log.new_value.split("/") if log.new_value else []
+            if len(old_parts) != 2 or len(new_parts) != 2:
+                continue
+            old_month, old_year = int(old_parts[0]), int(old_parts[1])
+            new_month, new_year = int(new_parts[0]), int(new_parts[1])
+
+            qty = float(plan_quantities.get(log.monthly_plan_id) or 0.0)
+            if qty == 0.0 and log.description:
+                match = re.search(r'([\d,]+(?:\.\d+)?)\s*KT', log.description)
+                if match:
+                    qty = float(match.group(1).replace(',', ''))
+            if qty <= 0:
+                continue
+
+            contract_num = log.contract_number or str(cid)
+            action_verb = "deferred" if log.action == "DEFER" else "advanced"
+            qty_str = f"{qty:g}" if qty == int(qty) else f"{qty:.1f}"
+
+            # -qty from the old month, +qty to the new month (within the target year)
+            if old_year == year:
+                yield (cid, product_name, old_month), -qty, f"{contract_num}: {qty_str} KT {action_verb} to {MONTH_NAMES[new_month]}"
+            if new_year == year:
+                yield (cid, product_name, new_month), qty, f"{contract_num}: {qty_str} KT {action_verb} from {MONTH_NAMES[old_month]}"
+        except Exception as e:
+            logger.warning(f"Failed to parse DEFER/ADVANCE log {log.id}: {e}")
+
+
+def move_remarks_since(db: Session, since: datetime, year: int) -> Dict[QuantityKey, List[str]]:
+    """DEFER/ADVANCE remarks per contract/product/month for moves after `since`."""
+    remarks: Dict[QuantityKey, List[str]] = {}
+    for key, _, remark in _move_effects(db, _quantity_logs_since(db, since, moves_only=True), year):
+        remarks.setdefault(key, []).append(remark)
+    return remarks
+
+
+def replay_quantities_at(
+    db: Session, snapshot_at: datetime, year: int
+) -> Tuple[Dict[ContractProduct, dict], Dict[QuantityKey, float]]:
+    """Quantities as they stood at `snapshot_at`: live totals minus every logged change since."""
+    info, quantities = current_quantities(db, year)
+    logs = _quantity_logs_since(db, snapshot_at)
+
+    delta_by_key: Dict[QuantityKey, float] = {}
+    for log, product_name in logs:
+        product_name = product_name or "Unknown"
+        info.setdefault((int(log.contract_id), product_name), {
+            "contract_number": log.contract_number,
+            "contract_name": log.contract_name,
+            "product_name": product_name,
+        })
+        if log.action in ("DEFER", "ADVANCE"):
+            continue  # Applied below with one plan lookup for all moves
+
+        m = int(log.month) if log.month else None
+        if m is None:
+            continue
+
+        delta = 0.0
+        if log.action in ("UPDATE", "CREATE") and log.field_name == "month_quantity":
+            delta = _parse_float(log.new_value) - _parse_float(log.old_value)
+        elif log.action == "DELETE":
+            if log.field_name == "month_quantity" and log.old_value is not None and log.new_value is not None:
+                delta = _parse_float(log.new_value) - _parse_float(log.old_value)
+            else:
+                qty_removed = 0.0
+                try:
+                    if log.monthly_plan_snapshot:
+                        snap = json.loads(log.monthly_plan_snapshot)
+                        qty_removed = float(snap.get("month_quantity") or 0.0)
+                except Exception:
+                    qty_removed = 0.0
+                delta = -qty_removed
+
+        if abs(delta) > 1e-9:
+            key = (int(log.contract_id), product_name, m)
+            delta_by_key[key] = delta_by_key.get(key, 0.0) + delta
+
+    for key, delta, _ in _move_effects(db, logs, year):
+        delta_by_key[key] = delta_by_key.get(key, 0.0) + delta
+
+    previous: Dict[QuantityKey, float] = {}
+    for (cid, product_name) in info:
+        for m in range(1, 13):
+            key = (cid, product_name, m)
+            prev = quantities.get(key, 0.0) - delta_by_key.get(key, 0.0)
+            if prev < 0 and abs(prev) < 1e-6:
+                prev = 0.0
+            previous[key] = prev
+    return info, previous
+
+
+# =============================================================================
+# Materialized snapshots
+# =============================================================================
+
+def snapshot_exists(db: Session, snapshot_at: datetime, year: int) -> bool:
+    return db.query(models.WeeklyQuantitySnapshotRun.year).filter(
+        models.WeeklyQuantitySnapshotRun.snapshot_at == snapshot_at,
+        models.WeeklyQuantitySnapshotRun.year == year,
+    ).first() is not None
+
+
+def materialize_snapshot(db: Session, snapshot_at: datetime, year: int, replace: bool = False) -> int:
+    """
+    Write the snapshot rows for one (week boundary, year) in the caller's transaction.
+
+    Args:
+        replace: Delete an existing snapshot first (backfill --force)
+
+    Returns:
+        Number of snapshot rows written
+    """
+    if replace:
+        db.query(models.WeeklyQuantitySnapshot).filter(
+            models.WeeklyQuantitySnapshot.snapshot_at == snapshot_at,
+            models.WeeklyQuantitySnapshot.year == year,
+        ).delete(synchronize_session=False)
+        db.query(models.WeeklyQuantitySnapshotRun).filter(
+            models.WeeklyQuantitySnapshotRun.snapshot_at == snapshot_at,
+            models.WeeklyQuantitySnapshotRun.year == year,
+        ).delete(synchronize_session=False)
+
+    info, previous = replay_quantities_at(db, snapshot_at, year)
+    rows = [
+        {
+            "snapshot_at": snapshot_at,
+            "year": year,
+            "month": month,
+            "contract_id": cid,
+            "contract_number": info[(cid, product_name)].get("contract_number"),
+            "contract_name": info[(cid, product_name)].get("contract_name"),
+            "product_name": product_name,
+            "quantity": quantity,
+        }
+        for (cid, product_name, month), quantity in previous.items()
+        if abs(quantity) > 1e-9
+    ]
+    if rows:
+        db.bulk_insert_mappings(models.WeeklyQuantitySnapshot, rows)
+    db.add(models.WeeklyQuantitySnapshotRun(snapshot_at=snapshot_at, year=year, row_count=len(rows)))
+    db.flush()
+    return len(rows)
+
+
+def ensure_snapshot(db: Session, snapshot_at: datetime, year: int) -> bool:
+    """
+    Materialize the snapshot for (snapshot_at, year) unless it already exists.
+
+    Commits its own work. If another worker materializes the same snapshot
+    concurrently, the loser's insert fails on the run key and is rolled back.
+
+    Returns:
+        True if this call created the snapshot
+    """
+    if snapshot_exists(db, snapshot_at, year):
+        return False
+    try:
+        row_count = materialize_snapshot(db, snapshot_at, year)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    logger.info(f"Weekly quantity snapshot {snapshot_at.isoformat()} / {year} materialized ({row_count} rows)")
+    return True
+
+
+def load_snapshot(
+    db: Session, snapshot_at: datetime, year: int
+) -> Tuple[Dict[ContractProduct, dict], Dict[QuantityKey, float]]:
+    """Snapshot quantities by contract/product/month, plus display info per contract/product."""
+    rows = db.query(
+        models.WeeklyQuantitySnapshot.contract_id,
+        models.WeeklyQuantitySnapshot.contract_number,
+        models.WeeklyQuantitySnapshot.contract_name,
+        models.WeeklyQuantitySnapshot.product_name,
+        models.WeeklyQuantitySnapshot.month,
+        models.WeeklyQuantitySnapshot.quantity,
+    ).filter(
+        models.WeeklyQuantitySnapshot.snapshot_at == snapshot_at,
+        models.WeeklyQuantitySnapshot.year == year,
+    ).all()
+
+    info: Dict[ContractProduct, dict] = {}
+    quantities: Dict[QuantityKey, float] = {}
+    for r in rows:
+        info.setdefault((r.contract_id, r.product_name), {
+            "contract_number": r.contract_number,
+            "contract_name": r.contract_name,
+            "product_name": r.product_name,
+        })
+        quantities[(r.contract_id, r.product_name, r.month)] = float(r.quantity)
+    return info, quantities
@@ -0,0 +1,130 @@
+"""
+Wire formats of the real-time WebSocket endpoint (/api/ws/presence/...).
+
+Clients pick a format through the WebSocket subprotocol handshake
+(`new WebSocket(url, [...protocols])`); the server accepts the first one it
+supports. Without a subprotocol the connection speaks plain JSON, as before.
+
+- "json" (no subprotocol): JSON text frames
+- "oil-lifting.compact.v1": JSON text frames with short keys (see COMPACT_KEYS)
+
+Compact connections rely on WebSocket ping frames (uvicorn's
+--ws-ping-interval) for keep-alive instead of {"type": "heartbeat"} messages.
+
+Each outgoing message is wrapped in a `Frame`, which encodes it at most once
+per format however many connections receive it.
+
+Usage:
+    from app.wire import Frame, negotiate
+
+    wire = negotiate(websocket.scope.get("subprotocols", []))
+    await websocket.accept(subprotocol=wire.subprotocol)
+    payload = Frame({"type": "presence", ...}).encode(wire)
+"""
+import json
+from typing import Any, Dict, Optional, Sequence
+
+# Keys shortened by the compact formats. Codes are the base-36 position in this
+# tuple, so entries may only be appended; a client that needs to understand new
+# keys requires a new protocol version. The frontend mirrors this list
+# (frontend/src/utils/wireProtocol.ts).
+COMPACT_KEYS = (
+    # Envelope
+    "type", "resource_type", "resource_id", "users", "count", "user", "field",
+    "code", "message", "epoch", "seq", "replay", "reason", "events",
+    # Presence users
+    "user_id", "initials", "full_name", "connected_at",
+    # Data changes
+    "change_type", "entity_type", "entity_id", "entity_data", "changed_by", "timestamp",
+    # Cargo / port operation payloads
+    "id", "cargo_id", "vessel_name", "customer_id", "customer_name", "product_name",
+    "contract_id", "contract_type", "cargo_quantity", "status", "laycan_window",
+    "load_ports", "monthly_plan_id", "combi_group_id", "lc_status", "inspector_name",
+    "notes", "port_code", "eta", "berthed", "commenced", "etc", "cargo_status",
+    "cargo_version",
+)
+
+
+def _base36(n: int) -> str:
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    code = ""
+    while True:
+        n, r = divmod(n, 36)
+        code = digits[r] + code
+        if n == 0:
+            return code
+
+
+_KEY_TO_CODE: Dict[str, str] = {key: _base36(i) for i, key in enumerate(COMPACT_KEYS)}
+_CODES = frozenset(_KEY_TO_CODE.values())
+
+
+def compact_keys(value: Any) -> Any:
+    """
+    Replace known dict keys with their codes, recursively.
+
+    Other keys are kept, as strings (a non-str key such as an int id would
+    otherwise fail here); one that looks like a code (or starts with "~") is
+    escaped with a leading "~" so decoding stays unambiguous.
+    """
+    if isinstance(value, dict):
+        out = {}
+        for key, item in value.items():
+            key = str(key)
+            code = _KEY_TO_CODE.get(key)
+            if code is None:
+                code = f"~{key}" if key in _CODES or key.startswith("~") else key
+            out[code] = compact_keys(item)
+        return out
+    if isinstance(value, (list, tuple)):
+        return [compact_keys(item) for item in value]
+    return value
+
+
+class WireFormat:
+    """How messages are encoded for one kind of connection."""
+
+    name = "json"
+    subprotocol: Optional[str] = None
+
+    def encode(self, message: dict) -> str:
+        return json.dumps(message, separators=(",", ":"))
+
+
+class CompactJsonFormat(WireFormat):
+    name = "compact"
+    subprotocol = "oil-lifting.compact.v1"
+
+    def encode(self, message: dict) -> str:
+        return json.dumps(compact_keys(message), separators=(",", ":"))
+
+
+JSON = WireFormat()
+
+# Subprotocol -> format, for the formats this process can speak
+FORMATS: Dict[str, WireFormat] = {f.subprotocol: f for f in (CompactJsonFormat(),)}
+
+
+def negotiate(offered: Sequence[str]) -> WireFormat:
+    """First offered subprotocol the server supports, else plain JSON."""
+    for subprotocol in offered:
+        wire = FORMATS.get(subprotocol)
+        if wire is not None:
+            return wire
+    return JSON
+
+
+class Frame:
+    """A message to send, encoded lazily and at most once per wire format."""
+
+    __slots__ = ("message", "_encoded")
+
+    def __init__(self, message: dict) -> None:
+        self.message = message
+        self._encoded: Dict[str, str] = {}
+
+    def encode(self, wire: WireFormat) -> str:
+        payload = self._encoded.get(wire.name)
+        if payload is None:
+            payload = self._encoded[wire.name] = wire.encode(self.message)
+        return payload
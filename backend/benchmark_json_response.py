@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Benchmark: serialization time of a list response per 1,000 cargos.
+
+Compares the two ways a list endpoint (e.g. /api/cargos/port-movement) turns its
+cargo dicts (app.projections.cargo_list_records) into a response body:
+
+- before: response_model=List[schemas.Cargo] - FastAPI validates every row into
+  a model, dumps it back to JSON-compatible dicts and encodes them with the
+  stdlib json module (what fastapi.routing.serialize_response + JSONResponse do)
+- after:  app.utils.json_response.fast_json_list - rows projected onto the
+  model's fields and encoded in one orjson call
+
+Rows are synthetic by default, shaped like the list endpoints' cargo dicts with
+two port operations each; --from-db serializes real cargos from the configured
+database instead (run from the backend directory with the server's .env).
+
+    python benchmark_json_response.py --rows 1000 --repeat 20
+    python benchmark_json_response.py --from-db
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional
+
+from pydantic import TypeAdapter
+
+from app import schemas
+from app.utils import json_response
+from app.utils.json_response import FastJSONResponse, project_rows
+
+
+def _synthetic_rows(count: int) -> List[dict]:
+    now = datetime(2026, 1, 1, 8, 30, tzinfo=timezone.utc)
+    rows = []
+    for i in range(1, count + 1):
+        rows.append({
+            "id": i,
+            "cargo_id": f"CGO-{i:06d}",
+            "vessel_name": f"VESSEL {i % 97}",
+            "customer_id": i % 40 + 1,
+            "product_name": ("GASOIL", "JET A-1", "FUEL OIL")[i % 3],
+            "contract_id": i % 120 + 1,
+            "contract_type": "FOB" if i % 2 else "CIF",
+            "combi_group_id": None,
+            "lc_status": None,
+            "load_ports": "MAA,SHU",
+            "inspector_name": "SGS",
+            # Whole quantities come back from the database as ints now and then
+            "cargo_quantity": 35 + i % 10 if i % 4 == 0 else 35.5 + i % 10,
+            "laycan_window": "01-03/01/2026",
+            "eta": "2026-01-02 06:00",
+            "berthed": None,
+            "commenced": None,
+            "etc": None,
+            "eta_load_port": datetime(2026, 1, 2, 6, 0),
+            "loading_start_time": None,
+            "loading_completion_time": None,
+            "etd_load_port": None,
+            "eta_discharge_port": None,
+            "discharge_port_location": "ROTTERDAM" if i % 2 == 0 else None,
+            "discharge_completion_time": None,
+            "five_nd_date": None,
+            "nd_completed": False,
+            "nd_days": None,
+            "nd_delivery_window": None,
+            "notes": "Nominated; awaiting Q88" if i % 5 == 0 else None,
+            "sailing_fax_entry_completed": False,
+            "sailing_fax_entry_initials": None,
+            "sailing_fax_entry_date": None,
+            "documents_mailing_completed": False,
+            "documents_mailing_initials": None,
+            "documents_mailing_date": None,
+            "inspector_invoice_completed": False,
+            "inspector_invoice_initials": None,
+            "inspector_invoice_date": None,
+            "status": "Planned",
+            "monthly_plan_id": i,
+            "version": 3,
+            "created_at": now - timedelta(days=i % 60),
+            "updated_at": now,
+            "port_operations": [
+                {
+                    "id": i * 2 + n,
+                    "cargo_id": i,
+                    "port_code": port,
+                    "status": "Planned",
+                    "eta": None,
+                    "berthed": None,
+                    "commenced": None,
+                    "etc": None,
+                    "notes": None,
+                    "created_at": now,
+                    "updated_at": None,
+                }
+                for n, port in enumerate(("MAA", "SHU"))
+            ],
+        })
+    return rows
+
+
+def _db_rows(limit: int) -> List[dict]:
+    from app.database import SessionLocal
+    from app import models
+    from app.projections import CARGO_LIST, cargo_list_records
+
+    db = SessionLocal()
+    try:
+        rows = db.execute(CARGO_LIST.select().order_by(models.Cargo.id).limit(limit)).all()
+        return cargo_list_records(db, rows)
+    finally:
+        db.close()
+
+
+def _validated_json(adapter: TypeAdapter, rows: List[dict]) -> bytes:
+    """The response_model path: validate, dump to JSON-compatible data, stdlib json."""
+    content = adapter.dump_python(adapter.validate_python(rows), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def _typed_json(body: bytes) -> Any:
+    """Decoded JSON with floats tagged, so 5 and 5.0 compare as different."""
+    return json.loads(body, parse_float=lambda text: ("float", float(text)))
+
+
+def _first_difference(before: bytes, after: bytes) -> Optional[str]:
+    """Where the two bodies differ (first row and field), or None if they match."""
+    expected, actual = _typed_json(before), _typed_json(after)
+    if expected == actual:
+        return None
+    if len(expected) != len(actual):
+        return f"{len(expected)} rows validated, {len(actual)} rows on the fast path"
+    for index, (row, fast_row) in enumerate(zip(expected, actual)):
+        if row != fast_row:
+            if list(row) != list(fast_row):
+                return f"row {index}: keys {list(row)} != {list(fast_row)}"
+            for key in row:
+                if row[key] != fast_row[key]:
+                    return f"row {index}, {key}: validated {row[key]!r}, fast path {fast_row[key]!r}"
+    return "bodies differ"
+
+
+def _fast_json(rows: List[dict]) -> bytes:
+    return FastJSONResponse(project_rows(rows, schemas.Cargo)).body
+
+
+def _time_ms(fn, repeat: int) -> List[float]:
+    fn()  # warm-up (builds the pydantic/projection plans)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1000, help="Cargos per response (default 1000)")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per variant (default 20)")
+    parser.add_argument("--from-db", action="store_true", help="Serialize real cargos from the database")
+    args = parser.parse_args()
+
+    rows = _db_rows(args.rows) if args.from_db else _synthetic_rows(args.rows)
+    if not rows:
+        print("No cargos to serialize", file=sys.stderr)
+        return 1
+
+    adapter = TypeAdapter(List[schemas.Cargo])
+    before = _validated_json(adapter, rows)
+    after = _fast_json(rows)
+    difference = _first_difference(before, after)
+    if difference:
+        print(f"ERROR: fast path output differs from the validated output - {difference}", file=sys.stderr)
+        return 1
+
+    per_1000 = 1000 / len(rows)
+    encoder = "orjson" if json_response.orjson is not None else "stdlib json (orjson not installed)"
+    print(f"{len(rows)} cargos, {args.repeat} runs, fast path encoder: {encoder}")
+    print(f"{'variant':<28}{'median ms/1000':>16}{'p95 ms/1000':>14}{'bytes':>10}")
+    results = {}
+    for name, fn, body in (
+        ("response_model + json", lambda: _validated_json(adapter, rows), before),
+        ("fast_json_list", lambda: _fast_json(rows), after),
+    ):
+        samples = sorted(s * per_1000 for s in _time_ms(fn, args.repeat))
+        median = statistics.median(samples)
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        results[name] = median
+        print(f"{name:<28}{median:>16.2f}{p95:>14.2f}{len(body):>10}")
+
+    speedup = results["response_model + json"] / results["fast_json_list"]
+    print(f"speedup: {speedup:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
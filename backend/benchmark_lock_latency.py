@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark: latency of unrelated endpoints while a combi-group write is blocked on row locks.
+
+What it does:
+1. Measures baseline latency of a few read endpoints (health, products, config).
+2. Opens a transaction that holds `SELECT ... FOR UPDATE` on every cargo of a combi
+   group (on SQLite: the database write lock), exactly like a long combi-group write.
+3. Fires concurrent PUT /api/cargos/{id} requests for those cargos - they block on
+   the lock inside the server.
+4. Measures the same read endpoints again while the lock is held, then releases it.
+
+Before DB work was moved off the event loop, step 4 stalled until the lock was
+released (p99 ~ hold time). Now only the blocked writers wait.
+
+Run against a DEV server and database (the writers bump cargo versions):
+
+    uvicorn app.main:app --port 8000 &
+    python benchmark_lock_latency.py --hold 5 --writers 4
+
+The token is minted for the first admin user with the app's own JWT settings,
+so run it from the backend directory with the same .env as the server.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import text
+
+from app.database import engine, SessionLocal
+from app import models
+from app.auth import create_access_token
+
+READ_PATHS = ["/api/health", "/api/products/", "/api/config/load-ports"]
+
+
+def _request(base_url: str, token: str, method: str, path: str, body: dict = None, timeout: float = 120):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method)
+    req.add_header("Authorization", f"Bearer {token}")
+    if data is not None:
+        req.add_header("Content-Type", "application/json")
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            resp.read()
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def _admin_token() -> str:
+    db = SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.role == models.UserRole.ADMIN).first()
+        if not user:
+            sys.exit("No admin user found - start the server once so it seeds one.")
+        return create_access_token({"sub": str(user.id), "initials": user.initials})
+    finally:
+        db.close()
+
+
+def _pick_cargos():
+    """Cargos of one combi group, or a single cargo if no combi group exists."""
+    db = SessionLocal()
+    try:
+        cargo = db.query(models.Cargo).filter(models.Cargo.combi_group_id.isnot(None)).first()
+        if cargo:
+            cargos = db.query(models.Cargo).filter(models.Cargo.combi_group_id == cargo.combi_group_id).all()
+        else:
+            cargos = db.query(models.Cargo).limit(1).all()
+        if not cargos:
+            sys.exit("No cargos in the database - create at least one cargo first.")
+        return [(c.id, c.version or 1, c.notes) for c in cargos], cargos[0].combi_group_id
+    finally:
+        db.close()
+
+
+def _measure(base_url: str, token: str, duration: float, concurrency: int) -> list:
+    """Issue read requests for `duration` seconds and return latencies in ms."""
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(i: int):
+        n = i
+        while time.monotonic() < deadline:
+            path = READ_PATHS[n % len(READ_PATHS)]
+            n += 1
+            start = time.perf_counter()
+            _request(base_url, token, "GET", path)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    return latencies
+
+
+def _report(label: str, latencies: list):
+    if not latencies:
+        print(f"{label:<14} no samples")
+        return
+    ordered = sorted(latencies)
+    p = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    print(
+        f"{label:<14} n={len(ordered):<6} p50={statistics.median(ordered):8.1f}ms "
+        f"p95={p(0.95):8.1f}ms p99={p(0.99):8.1f}ms max={ordered[-1]:8.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", help="Bearer token (default: minted for the first admin user)")
+    parser.add_argument("--hold", type=float, default=5.0, help="Seconds to hold the row locks")
+    parser.add_argument("--writers", type=int, default=4, help="Concurrent blocked cargo updates")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent readers")
+    args = parser.parse_args()
+
+    token = args.token or _admin_token()
+    cargos, combi_group_id = _pick_cargos()
+    print(f"Locking {len(cargos)} cargo(s) (combi group: {combi_group_id or 'none'}) for {args.hold}s")
+
+    _report("baseline", _measure(args.base_url, token, args.hold, args.concurrency))
+
+    conn = engine.connect()
+    trans = conn.begin()
+    ids = [c[0] for c in cargos]
+    if engine.dialect.name == "sqlite":
+        # SQLite has no row locks - a pending write takes the database write lock instead
+        conn.execute(text(f"UPDATE cargos SET version = version WHERE id IN ({','.join(map(str, ids))})"))
+    else:
+        conn.execute(text("SELECT id FROM cargos WHERE id = ANY(:ids) FOR UPDATE"), {"ids": ids})
+
+    writers = ThreadPoolExecutor(max_workers=args.writers)
+    for i in range(args.writers):
+        cargo_id, version, notes = cargos[i % len(cargos)]
+        writers.submit(
+            _request, args.base_url, token, "PUT", f"/api/cargos/{cargo_id}",
+            {"version": version, "notes": notes},
+        )
+
+    try:
+        time.sleep(0.2)  # let the writers reach the lock
+        _report("under lock", _measure(args.base_url, token, max(args.hold - 0.2, 0.5), args.concurrency))
+    finally:
+        trans.rollback()
+        conn.close()
+        writers.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    main()
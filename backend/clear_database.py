@@ -13,6 +13,8 @@ from app.models import (
     QuarterlyPlanAuditLog,
     ContractAuditLog,
     GeneralAuditLog,
+    WeeklyQuantitySnapshot,
+    WeeklyQuantitySnapshotRun,
     EntityVersion,
     DeletedEntity,
     CargoPortOperation,
@@ -53,6 +55,9 @@ def clear_database():
                 "quarterly_plan_audit_logs",
                 "contract_audit_logs",
                 "general_audit_logs",
+                # Weekly quantity snapshots (derived from plans and audit logs)
+                "weekly_quantity_snapshots",
+                "weekly_quantity_snapshot_runs",
                 # Version history
                 "entity_versions",
                 "deleted_entities",
@@ -103,6 +108,13 @@ def clear_database():
             db.query(GeneralAuditLog).delete()
             print("  ✓ Cleared general_audit_logs")
             
+            # Delete weekly quantity snapshots (derived from plans and audit logs)
+            db.query(WeeklyQuantitySnapshot).delete()
+            print("  ✓ Cleared weekly_quantity_snapshots")
+            
+            db.query(WeeklyQuantitySnapshotRun).delete()
+            print("  ✓ Cleared weekly_quantity_snapshot_runs")
+            
             # Delete version history
             db.query(EntityVersion).delete()
             print("  ✓ Cleared entity_versions")
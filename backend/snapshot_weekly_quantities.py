@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Materialize weekly quantity snapshots (previous-week figures of the weekly
+quantity comparison) for past week boundaries.
+
+The comparison endpoint creates the current week's snapshot on its first request
+after Thursday midnight (UTC); run this from cron shortly after the boundary so
+no request pays for it, or once after deploying to backfill earlier weeks:
+
+    python snapshot_weekly_quantities.py                 # latest boundary, all plan years
+    python snapshot_weekly_quantities.py --weeks 12      # backfill the last 12 weeks
+    python snapshot_weekly_quantities.py --year 2026 --weeks 4 --force
+
+Snapshots are rebuilt from the current plans and the monthly plan audit log, so
+backfilled weeks are only as accurate as the audit history they replay.
+"""
+
+import argparse
+import sys
+from datetime import datetime, timezone
+
+from app.database import SessionLocal, ensure_schema
+from app import models, weekly_snapshots
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weeks", type=int, default=1, help="Number of past week boundaries to materialize (default: 1)")
+    parser.add_argument("--year", type=int, action="append", help="Plan year (repeatable, default: every year with monthly plans)")
+    parser.add_argument("--force", action="store_true", help="Rebuild snapshots that already exist")
+    args = parser.parse_args()
+
+    if args.weeks < 1:
+        parser.error("--weeks must be at least 1")
+
+    ensure_schema()
+    db = SessionLocal()
+    try:
+        years = args.year or sorted(
+            y for (y,) in db.query(models.MonthlyPlan.year).distinct().all() if y is not None
+        )
+        if not years:
+            print("No monthly plans found - nothing to snapshot")
+            return 0
+
+        boundaries = weekly_snapshots.past_week_boundaries(datetime.now(timezone.utc), args.weeks)
+        for snapshot_at in boundaries:
+            for year in years:
+                if not args.force and weekly_snapshots.snapshot_exists(db, snapshot_at, year):
+                    print(f"  - {snapshot_at:%Y-%m-%d} / {year}: already materialized")
+                    continue
+                row_count = weekly_snapshots.materialize_snapshot(db, snapshot_at, year, replace=args.force)
+                db.commit()
+                print(f"  ✓ {snapshot_at:%Y-%m-%d} / {year}: {row_count} rows")
+        return 0
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Snapshot failed: {e}")
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,17 @@
+"""
+Shared pytest setup for the backend unit tests.
+
+Run from the backend directory:
+
+    python -m pytest -q tests
+
+The tests cover pure helpers only. They import app modules without starting the
+app, so a throwaway SQLite database and the development JWT key are enough.
+"""
+import os
+import sys
+
+os.environ.setdefault("USE_SQLITE", "true")
+os.environ.setdefault("DEV_MODE", "true")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
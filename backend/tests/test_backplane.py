@@ -0,0 +1,152 @@
+import asyncio
+import contextlib
+import json
+
+from app import presence
+from app.backplane import PostgresBackplane, UnixSocketBackplane, UnixSocketBroker
+from app.presence import PresenceManager
+
+
+class Inbox:
+    def __init__(self):
+        self.messages = []
+        self.received = asyncio.Event()
+
+    async def __call__(self, message):
+        self.messages.append(message)
+        self.received.set()
+
+    async def next(self):
+        await asyncio.wait_for(self.received.wait(), timeout=5)
+        self.received.clear()
+        return self.messages[-1]
+
+
+def test_unix_broker_relays_between_workers_but_not_back_to_the_sender(tmp_path):
+    async def scenario():
+        broker = UnixSocketBroker(str(tmp_path / "backplane.sock"))
+        await broker.start()
+        first, second = UnixSocketBackplane(broker.path), UnixSocketBackplane(broker.path)
+        first_inbox, second_inbox = Inbox(), Inbox()
+        await first.start(first_inbox)
+        await second.start(second_inbox)
+        try:
+            await first.publish({"kind": "hello", "resources": {}})
+            received = await second_inbox.next()
+            await second.publish({"kind": "bye"})
+            await first_inbox.next()
+        finally:
+            await first.stop()
+            await second.stop()
+            await broker.stop()
+        return first, received, first_inbox.messages, second_inbox.messages
+
+    first, received, first_messages, second_messages = asyncio.run(scenario())
+    assert received == {"kind": "hello", "resources": {}, "origin": first.worker_id}
+    assert [m["kind"] for m in first_messages] == ["bye"]
+    assert [m["kind"] for m in second_messages] == ["hello"]
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.scope = {"subprotocols": []}
+        self.sent = []
+        self.changed = asyncio.Event()
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+        self.changed.set()
+
+
+def test_data_changes_reach_viewers_on_another_worker(tmp_path, monkeypatch):
+    monkeypatch.setattr(presence, "DATA_SYNC_BATCH_MS", 0)
+
+    async def scenario():
+        broker = UnixSocketBroker(str(tmp_path / "backplane.sock"))
+        await broker.start()
+        workers = [PresenceManager(), PresenceManager()]
+        for worker in workers:
+            await worker.start_backplane(UnixSocketBackplane(broker.path))
+        ws = FakeWebSocket()
+        try:
+            await workers[1].connect(ws, "page", "port-movement", 1, "AB", "A B")
+            await workers[0].broadcast_data_change(
+                "page", "port-movement", "updated", "cargo", 5,
+                entity_data={"id": 5}, changed_by_user_id=2, changed_by_initials="CD",
+            )
+            while not any(m["type"] == "data_sync" for m in ws.sent):
+                ws.changed.clear()
+                await asyncio.wait_for(ws.changed.wait(), timeout=5)
+        finally:
+            await workers[1].disconnect("page", "port-movement", 1)
+            for worker in workers:
+                await worker.stop_backplane()
+            await broker.stop()
+        return ws
+
+    ws = asyncio.run(scenario())
+    data_sync, = [m for m in ws.sent if m["type"] == "data_sync"]
+    assert (data_sync["entity_id"], data_sync["seq"]) == (5, 1)
+
+
+class FakeConnection:
+    closed = False
+
+    def __init__(self, notifications):
+        self.notifications = notifications
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def execute(self, query, params):
+        self.notifications.append(params[1])
+
+
+def _postgres_pair():
+    sender, receiver = PostgresBackplane("postgresql://test"), PostgresBackplane("postgresql://test")
+    notifications = []
+
+    async def connect():
+        return FakeConnection(notifications)
+
+    sender._connect = connect
+    return sender, receiver, notifications
+
+
+def test_postgres_backplane_chunks_large_messages():
+    async def scenario():
+        sender, receiver, notifications = _postgres_pair()
+        inbox = Inbox()
+        receiver._handler = inbox
+        message = {"kind": "sync_events", "events": [{"entity_data": "x" * 5000} for _ in range(4)]}
+        await sender.publish(message)
+        for part in reversed(notifications):  # arrival order must not matter
+            await receiver._receive(part)
+        return sender, message, notifications, inbox.messages, receiver._partial
+
+    sender, message, notifications, received, partial = asyncio.run(scenario())
+    assert len(notifications) > 1
+    assert all(len(part.encode("utf-8")) < 8000 for part in notifications)
+    assert received == [{**message, "origin": sender.worker_id}]
+    assert partial == {}
+
+
+def test_postgres_backplane_bounds_incomplete_messages(monkeypatch):
+    monkeypatch.setattr(PostgresBackplane, "MAX_PARTIAL_MESSAGES", 3)
+
+    async def scenario():
+        receiver = PostgresBackplane("postgresql://test")
+        receiver._handler = Inbox()
+        for n in range(5):
+            # First of two chunks only: never completes
+            await receiver._receive(f"#other msg{n} 0 2\n{{")
+        # Out-of-range chunks are rejected rather than buffered
+        await receiver._receive("#other bad 5 2\n{")
+        return receiver._partial
+
+    partial = asyncio.run(scenario())
+    assert [key[1] for key in partial] == ["msg2", "msg3", "msg4"]
@@ -0,0 +1,60 @@
+from datetime import date
+
+import pytest
+
+from app import laycan
+from app.laycan import parse_laycan, stored_laycan
+
+
+@pytest.mark.parametrize("text, month, year, expected", [
+    # Full date with month name - the reference month/year is ignored
+    ("15-20 Nov 2024", 1, 2026, (date(2024, 11, 15), date(2024, 11, 20))),
+    ("15 Nov 2024", 1, 2026, (date(2024, 11, 15), date(2024, 11, 15))),
+    ("3-5 JAN 2025", None, None, (date(2025, 1, 3), date(2025, 1, 5))),
+    # Day range with month, in the reference year
+    ("02-03/11", 1, 2025, (date(2025, 11, 2), date(2025, 11, 3))),
+    # Day range / single day in the reference month
+    ("02-03", 4, 2025, (date(2025, 4, 2), date(2025, 4, 3))),
+    ("15", 5, 2025, (date(2025, 5, 15), date(2025, 5, 15))),
+    # Out-of-range days roll over like JavaScript's Date
+    ("30-31", 2, 2025, (date(2025, 3, 2), date(2025, 3, 3))),
+    ("31", 12, 2025, (date(2025, 12, 31), date(2025, 12, 31))),
+    ("31-32", 12, 2025, (date(2025, 12, 31), date(2026, 1, 1))),
+])
+def test_parse_laycan_formats(text, month, year, expected):
+    assert parse_laycan(text, month, year) == expected
+
+
+@pytest.mark.parametrize("text", [None, "", "   ", "TBA", "-", "sometime soon"])
+def test_parse_laycan_unparseable(text):
+    assert parse_laycan(text, 5, 2025) is None
+
+
+def test_parse_laycan_unknown_month_name_falls_through_to_day_range():
+    # "Foo" is no month, so the day range is read against the reference month
+    assert parse_laycan("1-3 Foo 2024", 4, 2025) == (date(2025, 4, 1), date(2025, 4, 3))
+
+
+def test_parse_laycan_needs_the_missing_reference():
+    assert parse_laycan("02-03/11", month=5, year=None) is None
+    assert parse_laycan("02-03", month=None, year=2025) is None
+    assert parse_laycan("15", month=5, year=None) is None
+    # A full date needs no reference at all
+    assert parse_laycan("15 Nov 2024", month=5, year=None) == (date(2024, 11, 15), date(2024, 11, 15))
+
+
+def test_parse_laycan_uses_today_only_without_any_reference(monkeypatch):
+    class FixedDate(date):
+        @classmethod
+        def today(cls):
+            return cls(2026, 7, 1)
+
+    monkeypatch.setattr(laycan, "date", FixedDate)
+    assert parse_laycan("02-03") == (date(2026, 7, 2), date(2026, 7, 3))
+    assert parse_laycan("02-03", 4, 2025) == (date(2025, 4, 2), date(2025, 4, 3))
+
+
+def test_stored_laycan_never_reads_the_current_date():
+    assert stored_laycan("02-03", None, None) is None
+    assert stored_laycan("15 Nov 2024", None, None) is None
+    assert stored_laycan("02-03", 4, 2025) == (date(2025, 4, 2), date(2025, 4, 3))
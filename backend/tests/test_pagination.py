@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine, insert, literal, select, union_all
+
+from app.utils.pagination import (
+    decode_cursor,
+    decode_feed_cursor,
+    encode_cursor,
+    encode_feed_cursor,
+    feed_order,
+    union_branch_keyset_filter,
+)
+
+
+class Row:
+    def __init__(self, created_at, source, id):
+        self.created_at = created_at
+        self.source = source
+        self.id = id
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor([2026, 3, 17]), 3) == [2026, 3, 17]
+
+
+@pytest.mark.parametrize("cursor", ["not base64 json!", encode_cursor({"a": 1}), encode_cursor([1, 2])])
+def test_decode_cursor_rejects_foreign_tokens(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 3)
+
+
+def test_feed_cursor_round_trip():
+    created_at = datetime(2026, 1, 2, 3, 4, 5)
+    assert decode_feed_cursor(encode_feed_cursor(Row(created_at, "cargo", 7))) == [created_at, "cargo", 7]
+
+
+def test_feed_cursor_carries_a_missing_created_at():
+    assert decode_feed_cursor(encode_feed_cursor(Row(None, "general", 3))) == [None, "general", 3]
+
+
+@pytest.mark.parametrize("values", [["yesterday", "cargo", 1], ["2026-01-01T00:00:00", 5, 1], [None, "cargo", "1"]])
+def test_decode_feed_cursor_rejects_malformed_keys(values):
+    with pytest.raises(ValueError):
+        decode_feed_cursor(encode_cursor(values))
+
+
+@pytest.fixture
+def feed_tables():
+    """Two audit-like tables, with undated rows and created_at ties across both."""
+    engine = create_engine("sqlite://")
+    metadata = MetaData()
+    tables = {
+        source: Table(f"{source}_log", metadata,
+                      Column("id", Integer, primary_key=True),
+                      Column("created_at", DateTime, nullable=True),
+                      Column("note", String))
+        for source in ("cargo", "general")
+    }
+    metadata.create_all(engine)
+    base = datetime(2026, 1, 1)
+    with engine.begin() as conn:
+        for source, table in tables.items():
+            for i in range(1, 8):
+                created_at = None if i % 3 == 0 else base + timedelta(hours=i % 4)
+                conn.execute(insert(table).values(id=i, created_at=created_at, note=f"{source}{i}"))
+    return engine, tables
+
+
+def _page(conn, tables, after, limit):
+    branches = []
+    for source, table in tables.items():
+        conditions = []
+        if after is not None:
+            conditions.append(union_branch_keyset_filter(table.c.created_at, table.c.id, source, after))
+        branch = select(
+            literal(source).label("source"), table.c.id, table.c.created_at
+        ).where(*conditions).order_by(*feed_order(table.c.created_at, table.c.id)).limit(limit).subquery()
+        branches.append(select(*branch.c))
+    feed = union_all(*branches).subquery()
+    return conn.execute(
+        select(feed).order_by(*feed_order(feed.c.created_at, feed.c.source, feed.c.id)).limit(limit)
+    ).all()
+
+
+def test_keyset_pages_reach_every_row_including_undated_ones(feed_tables):
+    engine, tables = feed_tables
+    with engine.connect() as conn:
+        everything = [(r.source, r.id) for r in _page(conn, tables, None, 100)]
+
+        paged = []
+        after = None
+        while True:
+            rows = _page(conn, tables, after, 3)
+            paged.extend((r.source, r.id) for r in rows)
+            if len(rows) < 3:
+                break
+            after = decode_feed_cursor(encode_feed_cursor(rows[-1]))
+
+    assert len(everything) == 14
+    assert paged == everything
+    # Undated rows lead the feed, newest source/id first
+    assert everything[:4] == [("general", 6), ("general", 3), ("cargo", 6), ("cargo", 3)]
@@ -0,0 +1,126 @@
+import asyncio
+import json
+
+import pytest
+
+from app import presence
+from app.presence import PresenceManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.scope = {"subprotocols": []}
+        self.sent = []
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+
+@pytest.fixture(autouse=True)
+def unbatched(monkeypatch):
+    monkeypatch.setattr(presence, "DATA_SYNC_BATCH_MS", 0)
+
+
+async def _settle():
+    # Let the writer tasks drain their queues
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def _connect(manager, user_id, since=None, epoch=None):
+    ws = FakeWebSocket()
+    ok, _ = await manager.connect(ws, "page", "port-movement", user_id, "U", "User", since=since, epoch=epoch)
+    assert ok
+    await _settle()
+    return ws
+
+
+async def _change(manager, cargo_id, user_id=2):
+    await manager.broadcast_data_change(
+        "page", "port-movement", "updated", "cargo", cargo_id,
+        entity_data={"id": cargo_id}, changed_by_user_id=user_id, changed_by_initials="OT",
+    )
+    await _settle()
+
+
+async def _disconnect_all(manager):
+    # Stops the writer tasks before the event loop closes
+    for key in list(manager.connections):
+        resource_type, _, resource_id = key.partition(":")
+        for user_id in list(manager.connections.get(key, {})):
+            await manager.disconnect(resource_type, resource_id, user_id)
+
+
+def _run(scenario):
+    async def run():
+        manager = PresenceManager()
+        try:
+            return await scenario(manager)
+        finally:
+            await _disconnect_all(manager)
+    return asyncio.run(run())
+
+
+def _of_type(ws, message_type):
+    return [m for m in ws.sent if m["type"] == message_type]
+
+
+def test_changes_are_numbered_per_resource():
+    async def scenario(manager):
+        ws = await _connect(manager, 1)
+        await _change(manager, 10)
+        await _change(manager, 11)
+        return ws
+
+    ws = _run(scenario)
+    assert [m["seq"] for m in _of_type(ws, "data_sync")] == [1, 2]
+
+
+def test_resume_replays_a_change_made_while_nobody_was_connected():
+    async def scenario(manager):
+        ws = await _connect(manager, 1)
+        await _change(manager, 10)
+        await manager.disconnect("page", "port-movement", 1)
+
+        await _change(manager, 11)
+        resumed = await _connect(manager, 1, since=1, epoch=manager.stream_epoch)
+        return ws, resumed
+
+    ws, resumed = _run(scenario)
+    assert _of_type(ws, "data_sync")[0]["seq"] == 1
+    replay, = _of_type(resumed, "data_sync_batch")
+    assert replay["replay"] is True
+    assert [(e["seq"], e["entity_id"]) for e in replay["events"]] == [(2, 11)]
+    assert _of_type(resumed, "sync_state")[0]["seq"] == 2
+    assert not _of_type(resumed, "resync_required")
+
+
+def test_resume_skips_own_changes():
+    async def scenario(manager):
+        await _change(manager, 10, user_id=1)
+        await _change(manager, 11, user_id=2)
+        return await _connect(manager, 1, since=0, epoch=manager.stream_epoch)
+
+    resumed = _run(scenario)
+    replay, = _of_type(resumed, "data_sync_batch")
+    assert [e["entity_id"] for e in replay["events"]] == [11]
+
+
+@pytest.mark.parametrize("reason", ["epoch", "buffer_exceeded"])
+def test_resume_requires_resync_when_the_gap_cannot_be_replayed(monkeypatch, reason):
+    monkeypatch.setattr(presence, "SYNC_REPLAY_BUFFER_SIZE", 2)
+
+    async def scenario(manager):
+        for cargo_id in range(4):
+            await _change(manager, cargo_id)
+        epoch = manager.stream_epoch if reason == "buffer_exceeded" else "other-worker"
+        return await _connect(manager, 1, since=1, epoch=epoch)
+
+    resumed = _run(scenario)
+    resync, = _of_type(resumed, "resync_required")
+    assert resync["reason"] == reason
+    assert resync["seq"] == 4
+    assert not _of_type(resumed, "data_sync_batch")
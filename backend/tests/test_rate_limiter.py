@@ -0,0 +1,130 @@
+import threading
+
+from fastapi import FastAPI, Request as FastAPIRequest
+from fastapi.testclient import TestClient
+from slowapi.errors import RateLimitExceeded
+from starlette.requests import Request
+
+from app import rate_limiter
+from app.rate_limiter import BackendLimiter, MemoryRateLimitBackend, RateLimiter, get_client_ip, rate_limit_exceeded_handler
+
+
+def test_memory_backend_counts_hits_in_the_current_window():
+    backend = MemoryRateLimitBackend(stripes=4)
+    assert backend.hit("a", 60, 0.0) == (1, 0)
+    assert backend.hit("a", 60, 30.0) == (2, 0)
+    assert backend.hit("a", 60, 59.9, amount=3) == (5, 0)
+    assert backend.hit("b", 60, 59.9) == (1, 0)
+
+
+def test_memory_backend_rolls_windows():
+    backend = MemoryRateLimitBackend(stripes=4)
+    backend.hit("a", 60, 10.0, amount=4)
+    # Next window: the previous count carries over
+    assert backend.hit("a", 60, 70.0) == (1, 4)
+    # A skipped window resets both
+    assert backend.hit("a", 60, 200.0) == (1, 0)
+
+
+def test_memory_backend_peek_does_not_count():
+    backend = MemoryRateLimitBackend(stripes=4)
+    assert backend.peek("a", 60, 0.0) == (0, 0)
+    backend.hit("a", 60, 10.0, amount=2)
+    assert backend.peek("a", 60, 20.0) == (2, 0)
+    assert backend.peek("a", 60, 70.0) == (0, 2)
+    assert backend.peek("a", 60, 130.0) == (0, 0)
+    assert backend.hit("a", 60, 20.0) == (3, 0)
+
+
+def test_memory_backend_clear_and_reset():
+    backend = MemoryRateLimitBackend(stripes=4)
+    backend.hit("a", 60, 0.0)
+    backend.hit("b", 60, 0.0)
+    backend.clear("a")
+    assert backend.peek("a", 60, 0.0) == (0, 0)
+    assert backend.peek("b", 60, 0.0) == (1, 0)
+    backend.reset()
+    assert backend.peek("b", 60, 0.0) == (0, 0)
+
+
+def test_memory_backend_evicts_idle_keys():
+    backend = MemoryRateLimitBackend(stripes=1, sweep_interval=10.0)
+    for i in range(100):
+        backend.hit(f"client-{i}", 60, 0.0)
+    # Two windows later the next touch of the stripe sweeps the idle keys
+    backend.hit("late", 60, 120.0)
+    assert list(backend._stripes[0].entries) == ["late"]
+
+
+def test_rate_limiter_blocks_over_the_limit(monkeypatch):
+    monkeypatch.setattr(rate_limiter.time, "time", lambda: 1_000_020.0)
+    limiter = RateLimiter(3, 60, MemoryRateLimitBackend(stripes=4))
+    results = [limiter.hit("1.2.3.4") for _ in range(4)]
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert results[2].remaining == 0
+    assert results[3].retry_after >= 1
+    assert limiter.hit("5.6.7.8").allowed
+    assert limiter.get_remaining("5.6.7.8") == 2
+
+
+def _request(peer, forwarded=None):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "headers": headers, "client": (peer, 1234)})
+
+
+def test_client_ip_ignores_forwarded_for_without_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "TRUSTED_PROXIES", [])
+    assert get_client_ip(_request("203.0.113.9", "198.51.100.1")) == "203.0.113.9"
+
+
+def test_client_ip_behind_a_trusted_proxy(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "TRUSTED_PROXIES", rate_limiter._parse_trusted_proxies("10.0.0.0/8, 127.0.0.1"))
+    # The right-most address that isn't one of our proxies is the client; spoofed entries before it are ignored
+    assert get_client_ip(_request("10.0.0.2", "1.1.1.1, 198.51.100.1, 10.0.0.7")) == "198.51.100.1"
+    assert get_client_ip(_request("127.0.0.1")) == "127.0.0.1"
+    # Untrusted peers can't pick their key
+    assert get_client_ip(_request("203.0.113.9", "198.51.100.1")) == "203.0.113.9"
+
+
+def test_client_ip_warns_once_about_an_untrusted_forwarder(monkeypatch, caplog):
+    monkeypatch.setattr(rate_limiter, "TRUSTED_PROXIES", [])
+    monkeypatch.setattr(rate_limiter, "_untrusted_forwarded_warned", False)
+    get_client_ip(_request("203.0.113.9", "198.51.100.1"))
+    get_client_ip(_request("203.0.113.9", "198.51.100.2"))
+    assert [r.getMessage() for r in caplog.records].count(
+        "X-Forwarded-For received from 203.0.113.9, which is not in TRUSTED_PROXIES: "
+        "rate limits are keyed on 203.0.113.9. If it is your reverse proxy, add it to TRUSTED_PROXIES."
+    ) == 1
+
+
+class BlockingMemoryBackend(MemoryRateLimitBackend):
+    blocking = True
+
+    def __init__(self):
+        super().__init__(stripes=4)
+        self.threads = set()
+
+    def hit(self, key, window, now, amount=1):
+        self.threads.add(threading.get_ident())
+        return super().hit(key, window, now, amount)
+
+
+def test_route_limits_run_off_the_event_loop_with_a_blocking_backend(monkeypatch):
+    backend = BlockingMemoryBackend()
+    monkeypatch.setattr(rate_limiter, "rate_limit_backend", backend)
+    limiter = BackendLimiter(key_func=get_client_ip, storage_uri="backend://")
+    app = FastAPI()
+    app.state.limiter = limiter
+    app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
+    loop_threads = set()
+
+    @app.post("/login")
+    @limiter.limit("2/minute")
+    async def login(request: FastAPIRequest):
+        loop_threads.add(threading.get_ident())
+        return {"ok": True}
+
+    with TestClient(app) as client:
+        assert [client.post("/login").status_code for _ in range(3)] == [200, 200, 429]
+
+    assert backend.threads and not backend.threads & loop_threads
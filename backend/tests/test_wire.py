@@ -0,0 +1,65 @@
+import json
+
+from app.wire import COMPACT_KEYS, JSON, CompactJsonFormat, Frame, WireFormat, compact_keys, negotiate
+
+
+def test_compact_keys_replaces_known_keys_by_position():
+    assert compact_keys({"type": "x", "resource_type": "cargo"}) == {"0": "x", "1": "cargo"}
+    assert compact_keys({COMPACT_KEYS[10]: 1, COMPACT_KEYS[36]: 2}) == {"a": 1, "10": 2}
+
+
+def test_compact_keys_recurses_into_dicts_and_lists():
+    message = {"users": [{"user_id": 1, "initials": "AB"}], "entity_data": {"vessel_name": "V"}}
+    assert compact_keys(message) == {
+        "3": [{"e": 1, "f": "AB"}],
+        "l": {"q": "V"},
+    }
+    assert compact_keys(("type", {"type": 1})) == ["type", {"0": 1}]
+
+
+def test_compact_keys_keeps_and_escapes_unknown_keys():
+    # Unknown keys pass through; ones that collide with a code or start with "~" are escaped
+    assert compact_keys({"unknown_field": 1}) == {"unknown_field": 1}
+    assert compact_keys({"0": 1, "~x": 2}) == {"~0": 1, "~~x": 2}
+
+
+def test_compact_keys_stringifies_non_str_keys():
+    assert compact_keys({40: "a", 1: "b"}) == {"40": "a", "~1": "b"}
+    assert json.loads(CompactJsonFormat().encode({"entity_data": {40: 1}})) == {"l": {"40": 1}}
+
+
+def test_compact_keys_leaves_values_alone():
+    assert compact_keys({"field": "type"}) == {"6": "type"}
+    assert compact_keys(5) == 5
+    assert compact_keys(None) is None
+
+
+class CountingFormat(WireFormat):
+    name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, message):
+        self.calls += 1
+        return super().encode(message)
+
+
+def test_frame_encodes_once_per_wire_format():
+    counting = CountingFormat()
+    frame = Frame({"type": "presence_update", "count": 2})
+
+    first = frame.encode(counting)
+    assert frame.encode(counting) is first
+    assert counting.calls == 1
+
+    assert json.loads(frame.encode(JSON)) == {"type": "presence_update", "count": 2}
+    assert json.loads(frame.encode(CompactJsonFormat())) == {"0": "presence_update", "4": 2}
+    assert counting.calls == 1
+
+
+def test_negotiate_falls_back_to_json():
+    assert negotiate([]) is JSON
+    assert negotiate(["unknown.v9"]) is JSON
+    assert negotiate(["unknown.v9", CompactJsonFormat.subprotocol]).name == "compact"
+    assert negotiate(["oil-lifting.msgpack.v1"]) is JSON
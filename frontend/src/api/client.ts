@@ -244,12 +244,13 @@ export interface MonthlyPlanTopUpRequest {
 
 // Monthly Plan API
 export const monthlyPlanAPI = {
+  // fetch_all streams the complete list (the paginated endpoint stops at `limit` rows)
   getAll: (quarterlyPlanId?: number) => {
-    const params = quarterlyPlanId ? { quarterly_plan_id: quarterlyPlanId } : {}
+    const params = quarterlyPlanId ? { quarterly_plan_id: quarterlyPlanId, fetch_all: true } : { fetch_all: true }
     return client.get('/api/monthly-plans/', { params })
   },
   getByContractId: (contractId: number) => {
-    return client.get('/api/monthly-plans/', { params: { contract_id: contractId } })
+    return client.get('/api/monthly-plans/', { params: { contract_id: contractId, fetch_all: true } })
   },
   // Bulk endpoint - gets all monthly plans for given months/year with embedded contract/customer data
   // Replaces ~100+ API calls with a single call
@@ -283,9 +284,39 @@ export const monthlyPlanAPI = {
     client.post(`/api/monthly-plans/${id}/authority-topup`, topup),
 }
 
+// Aggregated page views - one request instead of a fan-out of list calls
+export interface HomeViewParams {
+  months?: number[]
+  year?: number
+  completedMonth?: number | null
+  completedYear?: number | null
+  tngMonths?: number[]
+  tngYear?: number
+}
+
+export const viewsAPI = {
+  getHome: (params: HomeViewParams = {}) => {
+    const query: any = {}
+    if (params.months && params.months.length > 0) query.months = params.months.join(',')
+    if (params.year) query.year = params.year
+    if (params.completedMonth) query.completed_month = params.completedMonth
+    if (params.completedYear) query.completed_year = params.completedYear
+    if (params.tngMonths && params.tngMonths.length > 0) query.tng_months = params.tngMonths.join(',')
+    if (params.tngYear) query.tng_year = params.tngYear
+    return client.get('/api/views/home', { params: query })
+  },
+}
+
+export const alertsAPI = {
+  // Laycan alerts from the stored laycan dates (most urgent first)
+  getLaycan: (withinDays: number = 14) =>
+    client.get('/api/alerts/laycan', { params: { within_days: withinDays } }),
+}
+
 // Cargo API
 export const cargoAPI = {
-  getAll: (params?: any) => client.get('/api/cargos/', { params }),
+  // fetch_all streams the complete list (the paginated endpoint stops at `limit` rows)
+  getAll: (params?: any) => client.get('/api/cargos/', { params: { fetch_all: true, ...params } }),
   getPortMovement: (month?: number, year?: number) => {
     const params: any = {}
     if (month) params.month = month
@@ -346,6 +377,18 @@ export const documentsAPI = {
           : 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
       }
     }),
+  // ZIP of nominations or TNG memos - by explicit IDs, or every cargo/plan of a month
+  generateBatch: (request: {
+    document_type: 'nomination' | 'tng'
+    month?: number
+    year?: number
+    cargo_ids?: number[]
+    monthly_plan_ids?: number[]
+  }) =>
+    client.post('/api/documents/batch', request, {
+      responseType: 'arraybuffer',
+      headers: { 'Accept': 'application/zip' }
+    }),
 }
 
 // Version History API
@@ -1,93 +1,89 @@
-import { useMemo } from 'react'
-import type { Cargo, MonthlyPlan, Contract, Customer } from '../types'
-import { parseLaycanDate } from '../utils/laycanParser'
-import { getLaycanAlertSeverity, type LaycanAlert } from '../utils/alertUtils'
+import { useEffect, useMemo, useState } from 'react'
+import type { Cargo, MonthlyPlan } from '../types'
+import { alertsAPI } from '../api/client'
+import { AlertSeverity, type LaycanAlert } from '../utils/alertUtils'
 
 interface UseLaycanAlertsProps {
+  // Loaded cargos and plans - alerts are refetched when any of them changes
   cargos: Cargo[]
   monthlyPlans: MonthlyPlan[]
-  contracts: Contract[]
-  customers: Customer[]
   maxDays?: number // Only show alerts within X days (default: 14)
 }
 
+interface LaycanAlertRow {
+  id: number
+  cargo_id: string
+  vessel_name: string
+  contract_number?: string | null
+  customer_name?: string | null
+  laycan?: string | null
+  laycan_start: string
+  days_until: number
+  is_overdue: boolean
+  severity: string
+}
+
+// "2026-01-15" as a local date (new Date(string) would read it as UTC midnight)
+function toLocalDate(value: string): Date {
+  const [year, month, day] = value.split('-').map(Number)
+  return new Date(year, month - 1, day)
+}
+
+function toAlert(row: LaycanAlertRow): LaycanAlert {
+  return {
+    id: `cargo-${row.id}`,
+    cargoId: row.id,
+    cargoCargoId: row.cargo_id,
+    vesselName: row.vessel_name,
+    contractNumber: row.contract_number || '',
+    laycan: row.laycan || '',
+    daysUntil: row.days_until,
+    severity: row.severity as AlertSeverity,
+    laycanDate: toLocalDate(row.laycan_start),
+    isOverdue: row.is_overdue,
+    customerName: row.customer_name || undefined,
+  }
+}
+
 /**
- * Hook to calculate laycan alerts from cargos and monthly plans
+ * Hook to load laycan alerts from the server (/api/alerts/laycan).
+ *
+ * Laycans are parsed and stored on every write, so the server answers with one
+ * indexed query; the loaded cargos and plans only tell the hook when to refetch.
  */
 export function useLaycanAlerts({
   cargos,
   monthlyPlans,
-  contracts,
-  customers,
   maxDays = 14,
 }: UseLaycanAlertsProps) {
-  const alerts = useMemo(() => {
-    const alertList: LaycanAlert[] = []
-
-    // Process cargos with laycan dates
-    cargos.forEach((cargo) => {
-      // Get laycan from monthly plan (priority: laycan_2_days > laycan_5_days)
-      const monthlyPlan = monthlyPlans.find((mp) => mp.id === cargo.monthly_plan_id)
-      if (!monthlyPlan) return
-
-      const contract = contracts.find((c) => c.id === cargo.contract_id)
-      if (!contract) return
-
-      // For FOB contracts, use laycan_2_days or laycan_5_days
-      let laycanString: string | undefined
-      if (contract.contract_type === 'FOB') {
-        laycanString = monthlyPlan.laycan_2_days || monthlyPlan.laycan_5_days
-      } else {
-        // For CIF, use cargo's laycan_window if available
-        laycanString = cargo.laycan_window
-      }
-
-      if (!laycanString) return
-
-      // Parse laycan date
-      const laycanDate = parseLaycanDate(
-        laycanString,
-        monthlyPlan.month,
-        monthlyPlan.year
-      )
-
-      if (!laycanDate.isValid || laycanDate.daysUntil === null) return
-
-      // Only include alerts within maxDays threshold
-      if (laycanDate.daysUntil > maxDays) return
-
-      const severity = getLaycanAlertSeverity(laycanDate.daysUntil)
-      if (severity === 'none') return
-
-      const customer = customers.find((c) => c.id === cargo.customer_id)
-
-      alertList.push({
-        id: `cargo-${cargo.id}`,
-        cargoId: cargo.id,
-        cargoCargoId: cargo.cargo_id,
-        vesselName: cargo.vessel_name,
-        contractNumber: contract.contract_number,
-        laycan: laycanString,
-        daysUntil: laycanDate.daysUntil,
-        severity,
-        laycanDate: laycanDate.startDate!,
-        isOverdue: laycanDate.isOverdue,
-        customerName: customer?.name,
+  const [alerts, setAlerts] = useState<LaycanAlert[]>([])
+
+  // Changes whenever a loaded cargo or plan is added, removed or edited
+  const dataSignature = useMemo(
+    () => [
+      cargos.map((c) => `${c.id}:${c.version ?? ''}:${c.status}`).join(','),
+      monthlyPlans.map((mp) => `${mp.id}:${mp.version ?? ''}`).join(','),
+    ].join('|'),
+    [cargos, monthlyPlans]
+  )
+
+  useEffect(() => {
+    let cancelled = false
+    alertsAPI.getLaycan(maxDays)
+      .then((response) => {
+        if (!cancelled) setAlerts((response.data.alerts as LaycanAlertRow[]).map(toAlert))
       })
-    })
-
-    // Process monthly plans without cargos (not created yet)
-    // Note: monthlyPlans need to have quarterly_plan_id to find the contract
-    // For now, we'll skip monthly plans without cargos since we need quarterly plan info
-    // This can be enhanced later if needed
-
-    // Sort by days until (most urgent first)
-    return alertList.sort((a, b) => a.daysUntil - b.daysUntil)
-  }, [cargos, monthlyPlans, contracts, customers, maxDays])
+      .catch((error) => {
+        console.error('Error loading laycan alerts:', error)
+      })
+    return () => {
+      cancelled = true
+    }
+  }, [dataSignature, maxDays])
 
-  const criticalAlerts = alerts.filter((a) => a.severity === 'critical')
-  const warningAlerts = alerts.filter((a) => a.severity === 'warning')
-  const infoAlerts = alerts.filter((a) => a.severity === 'info')
+  const criticalAlerts = alerts.filter((a) => a.severity === AlertSeverity.CRITICAL)
+  const warningAlerts = alerts.filter((a) => a.severity === AlertSeverity.WARNING)
+  const infoAlerts = alerts.filter((a) => a.severity === AlertSeverity.INFO)
 
   return {
     alerts,
@@ -100,4 +96,3 @@ export function useLaycanAlerts({
     infoCount: infoAlerts.length,
   }
 }
-
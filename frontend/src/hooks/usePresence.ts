@@ -6,6 +6,7 @@
  */
 import { useState, useEffect, useCallback, useRef } from 'react'
 import { useAuth } from '../contexts/AuthContext'
+import { WIRE_PROTOCOLS, decodeFrame, usesPingKeepalive } from '../utils/wireProtocol'
 
 export interface PresenceUser {
   user_id: number
@@ -166,7 +167,7 @@ export function usePresence(
       try {
         const wsUrl = getWsUrl()
         console.log(`[Presence] Connecting to ${wsUrl}`)
-        const ws = new WebSocket(wsUrl)
+        const ws = new WebSocket(wsUrl, WIRE_PROTOCOLS)
         wsRef.current = ws
         
         ws.onopen = () => {
@@ -178,10 +179,12 @@ export function usePresence(
           setState(prev => ({ ...prev, isConnected: true, error: null }))
           reconnectAttemptsRef.current = 0
           
-          // Start heartbeat
+          // Start heartbeat (not needed when the server keeps the connection alive with pings)
           if (heartbeatRef.current) {
             clearInterval(heartbeatRef.current)
+            heartbeatRef.current = null
           }
+          if (usesPingKeepalive(ws)) return
           heartbeatRef.current = setInterval(() => {
             if (ws.readyState === WebSocket.OPEN) {
               ws.send(JSON.stringify({ type: 'heartbeat' }))
@@ -193,7 +196,7 @@ export function usePresence(
           if (!mountedRef.current) return
           
           try {
-            const data = JSON.parse(event.data)
+            const data = decodeFrame(ws, event.data)
             
             switch (data.type) {
               case 'presence':
@@ -4,9 +4,23 @@
  * Connects to WebSocket and receives push notifications when data changes
  * on the server. This enables an "Excel-like" experience where changes made
  * by one user appear instantly for all other users.
+ * 
+ * The server merges changes made within a short window into one
+ * `data_sync_batch` frame (latest change per entity); its events are applied
+ * in the same message handler, so React renders them as one update.
+ * 
+ * Every change carries a sequence number ("seq") within the server's stream
+ * ("epoch"). On reconnect the hook sends the last one it saw, and the server
+ * replays only the missed changes - or answers `resync_required` when it no
+ * longer has them, in which case `onResync` should reload the page's data.
+ * 
+ * An "updated" event with `base_version` is a delta: `entity_data` holds only
+ * the changed fields, on top of that entity version. A receiver holding a
+ * different version should fetch the entity instead of applying it.
  */
 import { useState, useEffect, useCallback, useRef } from 'react'
 import { useAuth } from '../contexts/AuthContext'
+import { WIRE_PROTOCOLS, decodeFrame, usesPingKeepalive } from '../utils/wireProtocol'
 
 export interface DataSyncEvent {
   change_type: 'created' | 'updated' | 'deleted'
@@ -18,6 +32,9 @@ export interface DataSyncEvent {
     initials: string
   } | null
   timestamp: string
+  seq?: number
+  /** Set when entity_data is a delta on top of this entity version */
+  base_version?: number
 }
 
 export interface RealTimeSyncState {
@@ -29,10 +46,14 @@ export interface RealTimeSyncState {
 interface UseRealTimeSyncOptions {
   /** Called when data changes are received */
   onDataSync?: (event: DataSyncEvent) => void
+  /** Called once per received frame with all its changes (before the per-event callbacks) */
+  onDataSyncBatch?: (events: DataSyncEvent[]) => void
   /** Called when a specific entity type changes */
   onCargoChange?: (event: DataSyncEvent) => void
   onMonthlyPlanChange?: (event: DataSyncEvent) => void
   onPortOperationChange?: (event: DataSyncEvent) => void
+  /** Called when changes were missed and cannot be replayed; reload the data */
+  onResync?: () => void
   /** Auto-reconnect on disconnect (default: true) */
   autoReconnect?: boolean
   /** Heartbeat interval in ms (default: 30000) */
@@ -83,6 +104,9 @@ export function useRealTimeSync(
   const reconnectAttemptsRef = useRef(0)
   const isCleaningUpRef = useRef(false)
   const mountedRef = useRef(true)
+  // Resume point: last change seq received and the server stream it belongs to
+  const lastSeqRef = useRef<number | null>(null)
+  const epochRef = useRef<string | null>(null)
   
   // Store callbacks in refs to avoid dependency issues
   const callbacksRef = useRef(options)
@@ -119,7 +143,11 @@ export function useRealTimeSync(
       }
     }
     
-    return `${protocol}//${host}/api/ws/presence/page/${pageName}?token=${token}`
+    let url = `${protocol}//${host}/api/ws/presence/page/${pageName}?token=${token}`
+    if (lastSeqRef.current !== null && epochRef.current) {
+      url += `&since=${lastSeqRef.current}&epoch=${epochRef.current}`
+    }
+    return url
   }, [pageName, token])
   
   // Connect on mount, disconnect on unmount
@@ -147,7 +175,7 @@ export function useRealTimeSync(
       try {
         const wsUrl = getWsUrl()
         console.log(`[RealTimeSync] Connecting to ${wsUrl}`)
-        const ws = new WebSocket(wsUrl)
+        const ws = new WebSocket(wsUrl, WIRE_PROTOCOLS)
         wsRef.current = ws
         
         ws.onopen = () => {
@@ -159,10 +187,12 @@ export function useRealTimeSync(
           setState(prev => ({ ...prev, isConnected: true, error: null }))
           reconnectAttemptsRef.current = 0
           
-          // Start heartbeat
+          // Start heartbeat (not needed when the server keeps the connection alive with pings)
           if (heartbeatRef.current) {
             clearInterval(heartbeatRef.current)
+            heartbeatRef.current = null
           }
+          if (usesPingKeepalive(ws)) return
           heartbeatRef.current = setInterval(() => {
             if (ws.readyState === WebSocket.OPEN) {
               ws.send(JSON.stringify({ type: 'heartbeat' }))
@@ -174,38 +204,76 @@ export function useRealTimeSync(
           if (!mountedRef.current) return
           
           try {
-            const data = JSON.parse(event.data)
+            const data = decodeFrame(ws, event.data)
+            
+            // Stream position (sent first after connecting)
+            if (data.type === 'sync_state') {
+              epochRef.current = data.epoch
+              lastSeqRef.current = data.seq
+              return
+            }
             
-            // Handle data sync events
-            if (data.type === 'data_sync') {
-              const syncEvent: DataSyncEvent = {
-                change_type: data.change_type,
-                entity_type: data.entity_type,
-                entity_id: data.entity_id,
-                entity_data: data.entity_data,
-                changed_by: data.changed_by,
-                timestamp: data.timestamp,
+            if (data.type === 'resync_required') {
+              console.log(`[RealTimeSync] Missed changes are no longer available (${data.reason}) - reloading`)
+              epochRef.current = data.epoch
+              lastSeqRef.current = data.seq
+              if (callbacksRef.current.onResync) {
+                callbacksRef.current.onResync()
               }
+              return
+            }
+            
+            // Handle data sync events (single change or a merged batch)
+            if (data.type === 'data_sync' || data.type === 'data_sync_batch') {
+              const rawEvents: any[] = data.type === 'data_sync' ? [data] : (data.events || [])
+              const syncEvents: DataSyncEvent[] = rawEvents.map((raw) => ({
+                change_type: raw.change_type,
+                entity_type: raw.entity_type,
+                entity_id: raw.entity_id,
+                entity_data: raw.entity_data,
+                changed_by: raw.changed_by,
+                timestamp: raw.timestamp,
+                seq: raw.seq,
+                base_version: raw.base_version,
+              }))
+              if (syncEvents.length === 0) return
               
-              console.log(`[RealTimeSync] ${syncEvent.change_type} ${syncEvent.entity_type}:${syncEvent.entity_id} by ${syncEvent.changed_by?.initials || 'unknown'}`)
-              
-              // Update state
-              setState(prev => ({ ...prev, lastEvent: syncEvent }))
-              
-              // Call generic callback
-              if (callbacksRef.current.onDataSync) {
-                callbacksRef.current.onDataSync(syncEvent)
+              const frameSeq = data.seq ?? syncEvents[syncEvents.length - 1].seq
+              if (typeof frameSeq === 'number') {
+                lastSeqRef.current = Math.max(lastSeqRef.current ?? 0, frameSeq)
               }
               
-              // Call entity-specific callbacks
-              if (syncEvent.entity_type === 'cargo' && callbacksRef.current.onCargoChange) {
-                callbacksRef.current.onCargoChange(syncEvent)
+              if (data.type === 'data_sync_batch') {
+                console.log(`[RealTimeSync] ${data.replay ? 'replayed' : 'batch of'} ${syncEvents.length} changes`)
+              } else {
+                const syncEvent = syncEvents[0]
+                console.log(`[RealTimeSync] ${syncEvent.change_type} ${syncEvent.entity_type}:${syncEvent.entity_id} by ${syncEvent.changed_by?.initials || 'unknown'}`)
               }
-              if (syncEvent.entity_type === 'monthly_plan' && callbacksRef.current.onMonthlyPlanChange) {
-                callbacksRef.current.onMonthlyPlanChange(syncEvent)
+              
+              // Update state once per frame; the callbacks' state updates below are
+              // batched by React into the same render
+              setState(prev => ({ ...prev, lastEvent: syncEvents[syncEvents.length - 1] }))
+              
+              if (callbacksRef.current.onDataSyncBatch) {
+                callbacksRef.current.onDataSyncBatch(syncEvents)
               }
-              if (syncEvent.entity_type === 'port_operation' && callbacksRef.current.onPortOperationChange) {
-                callbacksRef.current.onPortOperationChange(syncEvent)
+              
+              for (const syncEvent of syncEvents) {
+                // Call generic callback
+                if (callbacksRef.current.onDataSync) {
+                  callbacksRef.current.onDataSync(syncEvent)
+                }
+                
+                // Call entity-specific callbacks
+                if (syncEvent.entity_type === 'cargo' && callbacksRef.current.onCargoChange) {
+                  callbacksRef.current.onCargoChange(syncEvent)
+                }
+                if (syncEvent.entity_type === 'monthly_plan' && callbacksRef.current.onMonthlyPlanChange) {
+                  callbacksRef.current.onMonthlyPlanChange(syncEvent)
+                }
+                if (syncEvent.entity_type === 'port_operation' && callbacksRef.current.onPortOperationChange) {
+                  callbacksRef.current.onPortOperationChange(syncEvent)
+                }
               }
             }
             // Ignore presence messages - we're only interested in data changes
@@ -256,6 +324,9 @@ export function useRealTimeSync(
     return () => {
       isCleaningUpRef.current = true
       mountedRef.current = false
+      // A new mount loads its data fresh; resuming only applies within one connection lifecycle
+      lastSeqRef.current = null
+      epochRef.current = null
       
       clearTimeout(connectTimeout)
       
@@ -1,4 +1,4 @@
-import { useState, useEffect, useRef, useCallback, memo } from 'react'
+import { useState, useEffect, useRef, useCallback, useMemo, memo } from 'react'
 import {
   Box,
   Tabs,
@@ -37,7 +37,7 @@ import {
 import { FileDownload, Search, Description, Clear, History, ChevronLeft, ChevronRight, Highlight, PictureAsPdf } from '@mui/icons-material'
 import { alpha } from '@mui/material/styles'
 import { format } from 'date-fns'
-import client, { cargoAPI, customerAPI, contractAPI, monthlyPlanAPI, documentsAPI, highlightsAPI } from '../api/client'
+import client, { cargoAPI, customerAPI, contractAPI, monthlyPlanAPI, documentsAPI, highlightsAPI, viewsAPI } from '../api/client'
 import type { Cargo, Customer, Contract, MonthlyPlan, CargoStatus, ContractProduct, LCStatus, CargoPortOperation, PortOperationStatus } from '../types'
 import { parseLaycanDate } from '../utils/laycanParser'
 import { calculateETADate, setVoyageDurations, type DischargePort } from '../utils/voyageDuration'
@@ -828,155 +828,190 @@ export default function HomePage() {
   const notifyCargoEditing = cargoPresence.notifyEditing
   const notifyCargoStoppedEditing = cargoPresence.notifyStoppedEditing
 
-  // Real-time sync for port movement page - receives live updates when other users make changes
-  useRealTimeSync('port-movement', {
-    onCargoChange: useCallback((event: DataSyncEvent) => {
-      console.log(`[RealTimeSync] Cargo ${event.change_type}:`, event.entity_id, event.entity_data)
+  // Latest cargo lists, for checking the version a data_sync delta applies to
+  const loadedCargosRef = useRef<Cargo[][]>([])
+  loadedCargosRef.current = [portMovement, activeLoadings, completedCargos, inRoadCIF, completedInRoadCIF]
+  const findLoadedCargo = (cargoId: number): Cargo | undefined => {
+    for (const list of loadedCargosRef.current) {
+      const cargo = list.find(c => c.id === cargoId)
+      if (cargo) return cargo
+    }
+    return undefined
+  }
+
+  // Applies a cargo change carrying the full cargo (or a delta already merged into it)
+  const applyCargoChange = useCallback((event: DataSyncEvent) => {
+    console.log(`[RealTimeSync] Cargo ${event.change_type}:`, event.entity_id, event.entity_data)
+    
+    if (event.change_type === 'created' && event.entity_data) {
+      // Add new cargo to the appropriate list based on status and contract type
+      const newCargo = event.entity_data as unknown as Cargo
+      const isCIF = newCargo.contract_type === 'CIF'
       
-      if (event.change_type === 'created' && event.entity_data) {
-        // Add new cargo to the appropriate list based on status and contract type
-        const newCargo = event.entity_data as unknown as Cargo
-        const isCIF = newCargo.contract_type === 'CIF'
-        
-        if (isCIF) {
-          // CIF cargos: Completed Loading goes to both Completed Cargos AND In-Road CIF
-          if (newCargo.status === 'Completed Loading') {
-            // Add to Completed Cargos tab
-            setCompletedCargos(prev => {
-              if (prev.some(c => c.id === newCargo.id)) return prev
-              return [...prev, newCargo]
-            })
-            // Also add to In-Road CIF tab
-            setInRoadCIF(prev => {
-              if (prev.some(c => c.id === newCargo.id)) return prev
-              return [...prev, newCargo]
-            })
-          } else if (newCargo.status === 'Discharge Complete') {
-            setCompletedInRoadCIF(prev => {
-              if (prev.some(c => c.id === newCargo.id)) return prev
-              return [...prev, newCargo]
-            })
-          } else if (newCargo.status === 'Loading') {
-            setActiveLoadings(prev => {
-              if (prev.some(c => c.id === newCargo.id)) return prev
-              return [...prev, newCargo]
-            })
-          } else {
-            setPortMovement(prev => {
-              if (prev.some(c => c.id === newCargo.id)) return prev
-              return [...prev, newCargo]
-            })
-          }
+      if (isCIF) {
+        // CIF cargos: Completed Loading goes to both Completed Cargos AND In-Road CIF
+        if (newCargo.status === 'Completed Loading') {
+          // Add to Completed Cargos tab
+          setCompletedCargos(prev => {
+            if (prev.some(c => c.id === newCargo.id)) return prev
+            return [...prev, newCargo]
+          })
+          // Also add to In-Road CIF tab
+          setInRoadCIF(prev => {
+            if (prev.some(c => c.id === newCargo.id)) return prev
+            return [...prev, newCargo]
+          })
+        } else if (newCargo.status === 'Discharge Complete') {
+          setCompletedInRoadCIF(prev => {
+            if (prev.some(c => c.id === newCargo.id)) return prev
+            return [...prev, newCargo]
+          })
+        } else if (newCargo.status === 'Loading') {
+          setActiveLoadings(prev => {
+            if (prev.some(c => c.id === newCargo.id)) return prev
+            return [...prev, newCargo]
+          })
         } else {
-          // FOB cargos
-          if (newCargo.status === 'Loading') {
-            setActiveLoadings(prev => {
-              if (prev.some(c => c.id === newCargo.id)) return prev
-              return [...prev, newCargo]
-            })
-          } else if (newCargo.status === 'Completed Loading' || newCargo.status === 'Discharge Complete') {
-            setCompletedCargos(prev => {
-              if (prev.some(c => c.id === newCargo.id)) return prev
-              return [...prev, newCargo]
-            })
-          } else {
-            setPortMovement(prev => {
-              if (prev.some(c => c.id === newCargo.id)) return prev
-              return [...prev, newCargo]
-            })
-          }
+          setPortMovement(prev => {
+            if (prev.some(c => c.id === newCargo.id)) return prev
+            return [...prev, newCargo]
+          })
         }
-      } else if (event.change_type === 'updated' && event.entity_data) {
-        const updatedCargo = event.entity_data as unknown as Cargo
-        const isCIF = updatedCargo.contract_type === 'CIF'
-        
-        // Update in all lists first (cargo data might have changed)
-        const updateInList = (prev: Cargo[]) => 
-          prev.map(c => c.id === updatedCargo.id ? { ...c, ...updatedCargo } : c)
-        
-        setPortMovement(updateInList)
-        setActiveLoadings(updateInList)
-        setCompletedCargos(updateInList)
-        setInRoadCIF(updateInList)
-        setCompletedInRoadCIF(updateInList)
-        
-        // Handle status transitions - move cargo between lists if needed
-        if (isCIF) {
-          // CIF cargo transitions
-          if (updatedCargo.status === 'Loading') {
-            setPortMovement(prev => prev.filter(c => c.id !== updatedCargo.id))
-            setActiveLoadings(prev => {
-              if (prev.some(c => c.id === updatedCargo.id)) return prev
-              return [...prev, updatedCargo]
-            })
-          } else if (updatedCargo.status === 'Completed Loading') {
-            // CIF: Completed Loading -> Completed Cargos AND In-Road CIF
-            setPortMovement(prev => prev.filter(c => c.id !== updatedCargo.id))
-            setActiveLoadings(prev => prev.filter(c => c.id !== updatedCargo.id))
-            // Add to Completed Cargos tab
-            setCompletedCargos(prev => {
-              if (prev.some(c => c.id === updatedCargo.id)) return prev
-              return [...prev, updatedCargo]
-            })
-            // Also add to In-Road CIF tab
-            setInRoadCIF(prev => {
-              if (prev.some(c => c.id === updatedCargo.id)) return prev
-              return [...prev, updatedCargo]
-            })
-          } else if (updatedCargo.status === 'Discharge Complete') {
-            // CIF: Discharge Complete -> Completed In-Road CIF
-            setInRoadCIF(prev => prev.filter(c => c.id !== updatedCargo.id))
-            setActiveLoadings(prev => prev.filter(c => c.id !== updatedCargo.id))
-            setCompletedCargos(prev => prev.filter(c => c.id !== updatedCargo.id))
-            setCompletedInRoadCIF(prev => {
-              if (prev.some(c => c.id === updatedCargo.id)) return prev
-              return [...prev, updatedCargo]
-            })
-          } else if (updatedCargo.status === 'Planned') {
-            // Move back to port movement
-            setActiveLoadings(prev => prev.filter(c => c.id !== updatedCargo.id))
-            setInRoadCIF(prev => prev.filter(c => c.id !== updatedCargo.id))
-            setCompletedInRoadCIF(prev => prev.filter(c => c.id !== updatedCargo.id))
-            setCompletedCargos(prev => prev.filter(c => c.id !== updatedCargo.id))
-            setPortMovement(prev => {
-              if (prev.some(c => c.id === updatedCargo.id)) return prev
-              return [...prev, updatedCargo]
-            })
-          }
+      } else {
+        // FOB cargos
+        if (newCargo.status === 'Loading') {
+          setActiveLoadings(prev => {
+            if (prev.some(c => c.id === newCargo.id)) return prev
+            return [...prev, newCargo]
+          })
+        } else if (newCargo.status === 'Completed Loading' || newCargo.status === 'Discharge Complete') {
+          setCompletedCargos(prev => {
+            if (prev.some(c => c.id === newCargo.id)) return prev
+            return [...prev, newCargo]
+          })
         } else {
-          // FOB cargo transitions
-          if (updatedCargo.status === 'Loading') {
-            setPortMovement(prev => prev.filter(c => c.id !== updatedCargo.id))
-            setActiveLoadings(prev => {
-              if (prev.some(c => c.id === updatedCargo.id)) return prev
-              return [...prev, updatedCargo]
-            })
-          } else if (updatedCargo.status === 'Completed Loading' || updatedCargo.status === 'Discharge Complete') {
-            setPortMovement(prev => prev.filter(c => c.id !== updatedCargo.id))
-            setActiveLoadings(prev => prev.filter(c => c.id !== updatedCargo.id))
-            setCompletedCargos(prev => {
-              if (prev.some(c => c.id === updatedCargo.id)) return prev
-              return [...prev, updatedCargo]
-            })
-          } else if (updatedCargo.status === 'Planned') {
-            setActiveLoadings(prev => prev.filter(c => c.id !== updatedCargo.id))
-            setCompletedCargos(prev => prev.filter(c => c.id !== updatedCargo.id))
-            setPortMovement(prev => {
-              if (prev.some(c => c.id === updatedCargo.id)) return prev
-              return [...prev, updatedCargo]
-            })
-          }
+          setPortMovement(prev => {
+            if (prev.some(c => c.id === newCargo.id)) return prev
+            return [...prev, newCargo]
+          })
+        }
+      }
+    } else if (event.change_type === 'updated' && event.entity_data) {
+      const updatedCargo = event.entity_data as unknown as Cargo
+      const isCIF = updatedCargo.contract_type === 'CIF'
+      
+      // Update in all lists first (cargo data might have changed)
+      const updateInList = (prev: Cargo[]) => 
+        prev.map(c => c.id === updatedCargo.id ? { ...c, ...updatedCargo } : c)
+      
+      setPortMovement(updateInList)
+      setActiveLoadings(updateInList)
+      setCompletedCargos(updateInList)
+      setInRoadCIF(updateInList)
+      setCompletedInRoadCIF(updateInList)
+      
+      // Handle status transitions - move cargo between lists if needed
+      if (isCIF) {
+        // CIF cargo transitions
+        if (updatedCargo.status === 'Loading') {
+          setPortMovement(prev => prev.filter(c => c.id !== updatedCargo.id))
+          setActiveLoadings(prev => {
+            if (prev.some(c => c.id === updatedCargo.id)) return prev
+            return [...prev, updatedCargo]
+          })
+        } else if (updatedCargo.status === 'Completed Loading') {
+          // CIF: Completed Loading -> Completed Cargos AND In-Road CIF
+          setPortMovement(prev => prev.filter(c => c.id !== updatedCargo.id))
+          setActiveLoadings(prev => prev.filter(c => c.id !== updatedCargo.id))
+          // Add to Completed Cargos tab
+          setCompletedCargos(prev => {
+            if (prev.some(c => c.id === updatedCargo.id)) return prev
+            return [...prev, updatedCargo]
+          })
+          // Also add to In-Road CIF tab
+          setInRoadCIF(prev => {
+            if (prev.some(c => c.id === updatedCargo.id)) return prev
+            return [...prev, updatedCargo]
+          })
+        } else if (updatedCargo.status === 'Discharge Complete') {
+          // CIF: Discharge Complete -> Completed In-Road CIF
+          setInRoadCIF(prev => prev.filter(c => c.id !== updatedCargo.id))
+          setActiveLoadings(prev => prev.filter(c => c.id !== updatedCargo.id))
+          setCompletedCargos(prev => prev.filter(c => c.id !== updatedCargo.id))
+          setCompletedInRoadCIF(prev => {
+            if (prev.some(c => c.id === updatedCargo.id)) return prev
+            return [...prev, updatedCargo]
+          })
+        } else if (updatedCargo.status === 'Planned') {
+          // Move back to port movement
+          setActiveLoadings(prev => prev.filter(c => c.id !== updatedCargo.id))
+          setInRoadCIF(prev => prev.filter(c => c.id !== updatedCargo.id))
+          setCompletedInRoadCIF(prev => prev.filter(c => c.id !== updatedCargo.id))
+          setCompletedCargos(prev => prev.filter(c => c.id !== updatedCargo.id))
+          setPortMovement(prev => {
+            if (prev.some(c => c.id === updatedCargo.id)) return prev
+            return [...prev, updatedCargo]
+          })
+        }
+      } else {
+        // FOB cargo transitions
+        if (updatedCargo.status === 'Loading') {
+          setPortMovement(prev => prev.filter(c => c.id !== updatedCargo.id))
+          setActiveLoadings(prev => {
+            if (prev.some(c => c.id === updatedCargo.id)) return prev
+            return [...prev, updatedCargo]
+          })
+        } else if (updatedCargo.status === 'Completed Loading' || updatedCargo.status === 'Discharge Complete') {
+          setPortMovement(prev => prev.filter(c => c.id !== updatedCargo.id))
+          setActiveLoadings(prev => prev.filter(c => c.id !== updatedCargo.id))
+          setCompletedCargos(prev => {
+            if (prev.some(c => c.id === updatedCargo.id)) return prev
+            return [...prev, updatedCargo]
+          })
+        } else if (updatedCargo.status === 'Planned') {
+          setActiveLoadings(prev => prev.filter(c => c.id !== updatedCargo.id))
+          setCompletedCargos(prev => prev.filter(c => c.id !== updatedCargo.id))
+          setPortMovement(prev => {
+            if (prev.some(c => c.id === updatedCargo.id)) return prev
+            return [...prev, updatedCargo]
+          })
         }
-      } else if (event.change_type === 'deleted') {
-        // Remove from all lists
-        const removeFromList = (prev: Cargo[]) => prev.filter(c => c.id !== event.entity_id)
-        setPortMovement(removeFromList)
-        setActiveLoadings(removeFromList)
-        setCompletedCargos(removeFromList)
-        setInRoadCIF(removeFromList)
-        setCompletedInRoadCIF(removeFromList)
       }
-    }, []),
+    } else if (event.change_type === 'deleted') {
+      // Remove from all lists
+      const removeFromList = (prev: Cargo[]) => prev.filter(c => c.id !== event.entity_id)
+      setPortMovement(removeFromList)
+      setActiveLoadings(removeFromList)
+      setCompletedCargos(removeFromList)
+      setInRoadCIF(removeFromList)
+      setCompletedInRoadCIF(removeFromList)
+    }
+  }, [])
+
+  // Stale or unknown cargo: a delta can't be applied, fetch the cargo and apply it in full
+  const refetchCargo = (event: DataSyncEvent) => {
+    cargoAPI.getById(event.entity_id)
+      .then(res => applyCargoChange({ ...event, change_type: 'updated', base_version: undefined, entity_data: res.data }))
+      .catch(err => console.error(`[RealTimeSync] Failed to fetch cargo ${event.entity_id}:`, err))
+  }
+
+  // Real-time sync for port movement page - receives live updates when other users make changes
+  useRealTimeSync('port-movement', {
+    onCargoChange: useCallback((event: DataSyncEvent) => {
+      if (event.change_type === 'updated' && event.base_version != null && event.entity_data) {
+        // Delta: only the changed fields, valid on top of base_version
+        const current = findLoadedCargo(event.entity_id)
+        if (!current || current.version !== event.base_version) {
+          console.log(`[RealTimeSync] Cargo ${event.entity_id} is not at version ${event.base_version} - fetching it`)
+          refetchCargo(event)
+          return
+        }
+        applyCargoChange({ ...event, entity_data: { ...current, ...event.entity_data } })
+        return
+      }
+      applyCargoChange(event)
+      // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [applyCargoChange]),
     onPortOperationChange: useCallback((event: DataSyncEvent) => {
       // entity_id is the cargo_id for port operations
       const cargoId = event.entity_id
@@ -994,6 +1029,16 @@ export default function HomePage() {
       
       if (!portOpData) return
       
+      if (event.base_version != null) {
+        // Delta: only the changed fields of the port operation, valid on top of the cargo at base_version
+        const current = findLoadedCargo(cargoId)
+        if (!current || current.version !== event.base_version) {
+          console.log(`[RealTimeSync] Cargo ${cargoId} is not at version ${event.base_version} - fetching it`)
+          refetchCargo(event)
+          return
+        }
+      }
+      
       console.log(`[RealTimeSync] Port operation updated for cargo ${cargoId}, port ${portOpData.port_code}:`, portOpData)
       
       // Update the port operation in all cargo lists
@@ -1039,6 +1084,10 @@ export default function HomePage() {
         if (portOpData.cargo_status && portOpData.cargo_status !== cargo.status) {
           updatedCargo.status = portOpData.cargo_status as CargoStatus
         }
+        // The upsert bumps the cargo version; keep it so later deltas apply
+        if (typeof portOpData.cargo_version === 'number') {
+          updatedCargo.version = portOpData.cargo_version
+        }
         
         return updatedCargo
       }
@@ -1085,6 +1134,12 @@ export default function HomePage() {
         }
       }
     }, [portMovement, activeLoadings, completedCargos, inRoadCIF, completedInRoadCIF]),
+    // Changes were missed while disconnected and can no longer be replayed
+    onResync: () => {
+      loadData()
+      loadPortMovement()
+      loadActiveLoadings()
+    },
   })
 
   const formatSelectedMonthsLabel = (months: number[], year: number) => {
@@ -1101,10 +1156,7 @@ export default function HomePage() {
   useEffect(() => {
     if (isInitialLoad) {
       setIsInitialLoad(false)
-      loadData()
-      loadPortMovement()
-      loadActiveLoadings()
-      loadMonthlyPlansForPortMovement()
+      loadHomeSnapshot()
     }
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [])
@@ -1295,81 +1347,140 @@ export default function HomePage() {
     }
   }
 
+  // Index the embedded quarterly plan / contract / customer data of bulk monthly plans
+  const applyMonthlyPlans = (plans: any[]) => {
+    // Build quarterlyPlansMap from the embedded data
+    const qpMap = new Map<number, any>()
+    const contractsMap = new Map<number, any>()
+    const customersMap = new Map<number, any>()
+    
+    plans.forEach((mp: any) => {
+      // Extract and cache quarterly plan with its contract
+      if (mp.quarterly_plan && !qpMap.has(mp.quarterly_plan.id)) {
+        qpMap.set(mp.quarterly_plan.id, {
+          ...mp.quarterly_plan,
+          contract: mp.quarterly_plan.contract
+        })
+        
+        // Extract and cache contract with its customer
+        if (mp.quarterly_plan.contract && !contractsMap.has(mp.quarterly_plan.contract.id)) {
+          contractsMap.set(mp.quarterly_plan.contract.id, mp.quarterly_plan.contract)
+          
+          // Extract and cache customer
+          if (mp.quarterly_plan.contract.customer) {
+            const customer = mp.quarterly_plan.contract.customer
+            if (!customersMap.has(customer.id)) {
+              customersMap.set(customer.id, customer)
+            }
+          }
+        }
+      }
+    })
+    
+    setQuarterlyPlansMap(qpMap)
+
+    // Update contracts if we got new ones (merge with existing to avoid losing any)
+    if (contractsMap.size > 0) {
+      setContracts(prev => {
+        const merged = new Map(prev.map((c: Contract) => [c.id, c]))
+        contractsMap.forEach((c, id) => merged.set(id, c))
+        return Array.from(merged.values())
+      })
+    }
+    
+    // Update customers if we got new ones (merge with existing to avoid losing any)
+    if (customersMap.size > 0) {
+      setCustomers(prev => {
+        const merged = new Map(prev.map((c: Customer) => [c.id, c]))
+        customersMap.forEach((c, id) => merged.set(id, c))
+        return Array.from(merged.values())
+      })
+    }
+    
+    // Transform plans to include quarterlyPlanId for compatibility with existing code
+    const transformedPlans = plans.map((mp: any) => ({
+      ...mp,
+      quarterlyPlanId: mp.quarterly_plan_id
+    }))
+    
+    setMonthlyPlans(transformedPlans)
+  }
+
   const loadMonthlyPlansForPortMovement = async () => {
     try {
       // OPTIMIZED: Single API call instead of ~100+ calls
       // The bulk endpoint returns monthly plans with embedded quarterly plan, contract, and customer data
       const res = await monthlyPlanAPI.getBulk(selectedMonths, selectedYear, false)
-      const plans = res.data || []
-      
-      // Build quarterlyPlansMap from the embedded data
-      const qpMap = new Map<number, any>()
-      const contractsMap = new Map<number, any>()
-      const customersMap = new Map<number, any>()
-      
-      plans.forEach((mp: any) => {
-        // Extract and cache quarterly plan with its contract
-        if (mp.quarterly_plan && !qpMap.has(mp.quarterly_plan.id)) {
-          qpMap.set(mp.quarterly_plan.id, {
-            ...mp.quarterly_plan,
-            contract: mp.quarterly_plan.contract
-          })
-          
-          // Extract and cache contract with its customer
-          if (mp.quarterly_plan.contract && !contractsMap.has(mp.quarterly_plan.contract.id)) {
-            contractsMap.set(mp.quarterly_plan.contract.id, mp.quarterly_plan.contract)
-            
-            // Extract and cache customer
-            if (mp.quarterly_plan.contract.customer) {
-              const customer = mp.quarterly_plan.contract.customer
-              if (!customersMap.has(customer.id)) {
-                customersMap.set(customer.id, customer)
-              }
-            }
-          }
-        }
+      applyMonthlyPlans(res.data || [])
+    } catch (error) {
+      console.error('Error loading monthly plans:', error)
+      setMonthlyPlans([])
+    }
+  }
+
+  // Initial load: every Home dataset from the single /api/views/home snapshot
+  const loadHomeSnapshot = async () => {
+    try {
+      setLoading(true)
+      const monthsToLoad = (selectedMonths && selectedMonths.length > 0)
+        ? [...selectedMonths].sort((a, b) => a - b)
+        : [new Date().getMonth() + 1]
+      const res = await viewsAPI.getHome({
+        months: monthsToLoad,
+        year: selectedYear,
+        completedMonth: completedMonth,
+        completedYear: completedYear,
+        tngMonths: tngFilterMonth ? [tngFilterMonth] : undefined,
+        tngYear: tngFilterYear,
       })
-      
-      setQuarterlyPlansMap(qpMap)
-
-      // Update contracts if we got new ones (merge with existing to avoid losing any)
-      if (contractsMap.size > 0) {
-        setContracts(prev => {
-          const merged = new Map(prev.map((c: Contract) => [c.id, c]))
-          contractsMap.forEach((c, id) => merged.set(id, c))
-          return Array.from(merged.values())
-        })
+      const data = res.data || {}
+
+      if (data.discharge_ports && data.discharge_ports.length > 0) {
+        setVoyageDurations(data.discharge_ports)
       }
-      
-      // Update customers if we got new ones (merge with existing to avoid losing any)
-      if (customersMap.size > 0) {
-        setCustomers(prev => {
-          const merged = new Map(prev.map((c: Customer) => [c.id, c]))
-          customersMap.forEach((c, id) => merged.set(id, c))
-          return Array.from(merged.values())
-        })
+      setCustomers(data.customers || [])
+      setContracts(data.contracts || [])
+      setPortMovement(data.port_movement || [])
+      setActiveLoadings(data.active_loadings || [])
+      setCompletedCargos(data.completed_cargos || [])
+      setInRoadCIF(data.in_road_cif || [])
+      setCompletedInRoadCIF(data.completed_in_road_cif || [])
+      setTngMonthlyPlans(data.cif_tng_plans || [])
+
+      // Delivery windows of the CIF cargos come embedded - no per-plan requests
+      const deliveryWindowsMap = new Map<number, string>()
+      ;(data.referenced_monthly_plans || []).forEach((plan: MonthlyPlan) => {
+        if (plan.delivery_window) deliveryWindowsMap.set(plan.id, plan.delivery_window)
+      })
+      setInRoadCIFDeliveryWindows(deliveryWindowsMap)
+
+      if (data.load_port_codes && data.load_port_codes.length > 0) {
+        setLoadPortOptions(data.load_port_codes)
       }
-      
-      // Transform plans to include quarterlyPlanId for compatibility with existing code
-      const transformedPlans = plans.map((mp: any) => ({
-        ...mp,
-        quarterlyPlanId: mp.quarterly_plan_id
-      }))
-      
-      setMonthlyPlans(transformedPlans)
+      if (data.inspector_names && data.inspector_names.length > 0) {
+        setInspectorOptions(data.inspector_names)
+      }
+
+      applyMonthlyPlans(data.monthly_plans || [])
     } catch (error) {
-      console.error('Error loading monthly plans:', error)
-      setMonthlyPlans([])
+      console.error('Error loading home snapshot, falling back to individual requests:', error)
+      loadData()
+      loadPortMovement()
+      loadActiveLoadings()
+      loadMonthlyPlansForPortMovement()
+    } finally {
+      setLoading(false)
     }
   }
 
-  // Calculate laycan alerts - use all cargos (not just port movement) for comprehensive alerts
-  const allCargosForAlerts = [...portMovement, ...completedCargos, ...inRoadCIF]
+  // Laycan alerts come from the server; edits to any loaded cargo or plan trigger a refetch
+  const allCargosForAlerts = useMemo(
+    () => [...portMovement, ...completedCargos, ...inRoadCIF],
+    [portMovement, completedCargos, inRoadCIF]
+  )
   const laycanAlerts = useLaycanAlerts({
     cargos: allCargosForAlerts,
     monthlyPlans,
-    contracts,
-    customers,
     maxDays: 14,
   })
 
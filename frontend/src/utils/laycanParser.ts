@@ -5,6 +5,9 @@
  * - "15 Nov 2024" (single date)
  * - "02-03/11" (day-month format)
  * - "02-03" (day range only, uses reference month/year)
+ *
+ * backend/app/laycan.py parses laycans the same way for the stored laycan dates
+ * behind /api/alerts/laycan - keep the two in sync.
  */
 
 export interface LaycanDate {
@@ -0,0 +1,63 @@
+/**
+ * Wire protocol of the real-time WebSocket endpoint (/api/ws/presence/...).
+ *
+ * The client offers the compact protocol as a WebSocket subprotocol; the
+ * server answers with it (JSON with short keys) or with none (plain JSON,
+ * e.g. an older backend). On the compact protocol the server keeps the
+ * connection alive with ping frames, so no heartbeat messages are needed.
+ *
+ * Mirrors backend/app/wire.py.
+ */
+
+export const COMPACT_PROTOCOL = 'oil-lifting.compact.v1'
+
+/** Subprotocols offered when connecting, in order of preference */
+export const WIRE_PROTOCOLS = [COMPACT_PROTOCOL]
+
+// Same order as COMPACT_KEYS in backend/app/wire.py - codes are the base-36 index
+const COMPACT_KEYS = [
+  // Envelope
+  'type', 'resource_type', 'resource_id', 'users', 'count', 'user', 'field',
+  'code', 'message', 'epoch', 'seq', 'replay', 'reason', 'events',
+  // Presence users
+  'user_id', 'initials', 'full_name', 'connected_at',
+  // Data changes
+  'change_type', 'entity_type', 'entity_id', 'entity_data', 'changed_by', 'timestamp',
+  // Cargo / port operation payloads
+  'id', 'cargo_id', 'vessel_name', 'customer_id', 'customer_name', 'product_name',
+  'contract_id', 'contract_type', 'cargo_quantity', 'status', 'laycan_window',
+  'load_ports', 'monthly_plan_id', 'combi_group_id', 'lc_status', 'inspector_name',
+  'notes', 'port_code', 'eta', 'berthed', 'commenced', 'etc', 'cargo_status',
+  'cargo_version',
+]
+
+const CODE_TO_KEY: Record<string, string> = Object.fromEntries(
+  COMPACT_KEYS.map((key, index) => [index.toString(36), key])
+)
+
+function expandKeys(value: unknown): unknown {
+  if (Array.isArray(value)) {
+    return value.map(expandKeys)
+  }
+  if (value !== null && typeof value === 'object') {
+    const out: Record<string, unknown> = {}
+    for (const [code, item] of Object.entries(value as Record<string, unknown>)) {
+      // "~" escapes a key that would otherwise be read as a code
+      const key = code.startsWith('~') ? code.slice(1) : (CODE_TO_KEY[code] ?? code)
+      out[key] = expandKeys(item)
+    }
+    return out
+  }
+  return value
+}
+
+/** True if the server keeps this connection alive with ping frames */
+export function usesPingKeepalive(ws: WebSocket): boolean {
+  return ws.protocol === COMPACT_PROTOCOL
+}
+
+/** Decode a received frame into a message with the regular (long) keys */
+export function decodeFrame(ws: WebSocket, data: string): any {
+  const message = JSON.parse(data)
+  return ws.protocol === COMPACT_PROTOCOL ? expandKeys(message) : message
+}